@@ -0,0 +1,134 @@
+"""Load test of the async API with concurrent requests.
+
+Starts an :class:`custom_rules.aio.AsyncLinter` and runs concurrent clients,
+each sending migrations of mixed sizes one after the other, as the handlers of
+a web service would. Prints the latency of the requests (p50 and p99), the
+throughput, the requests rejected because the pool was full or timed out, and
+the largest delay of a timer running on the event loop meanwhile, which stays
+in milliseconds because the lints run in the worker processes.
+
+Usage:
+    python benchmarks/bench_async.py --clients 32 --requests 20 --workers 4
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from custom_rules.aio import AsyncLinter, PoolFullError
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id)\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS SELECT id FROM public.table_{i};\n"
+)
+
+
+def percentile(values, fraction):
+    """Return the value below which ``fraction`` of the values are."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def ticker(lags, stop):
+    """Measure how late a 10ms timer of the event loop fires."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.01)
+        lags.append(loop.time() - start - 0.01)
+
+
+async def client(linter, requests, sizes, rng, latencies, outcomes):
+    """Send requests one after the other, backing off when the pool is full."""
+    for _ in range(requests):
+        sql = "".join(MIGRATION.format(i=i) for i in range(rng.choice(sizes)))
+        start = time.perf_counter()
+        try:
+            await linter.lint(sql)
+        except PoolFullError:
+            outcomes["rejected"] += 1
+            await asyncio.sleep(0.05)
+            continue
+        except asyncio.TimeoutError:
+            outcomes["timed out"] += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    """Run the load test."""
+    linter = AsyncLinter(
+        dialect="postgres",
+        rules=RULES,
+        fast=args.fast,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        timeout=args.timeout,
+    )
+    start = time.perf_counter()
+    await linter.start()
+    print(f"{linter.workers} workers ready in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(0)
+    latencies, lags = [], []
+    outcomes = {"rejected": 0, "timed out": 0}
+    stop = asyncio.Event()
+    timer = asyncio.ensure_future(ticker(lags, stop))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                client(linter, args.requests, args.sizes, rng, latencies, outcomes)
+                for _ in range(args.clients)
+            )
+        )
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await timer
+        await linter.close()
+
+    print(
+        f"{args.clients} clients: {len(latencies)} requests in {elapsed:.2f}s, "
+        f"{len(latencies) / elapsed:.1f} requests/s, "
+        f"{outcomes['rejected']} rejected, {outcomes['timed out']} timed out"
+    )
+    print(
+        f"latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms; "
+        f"event loop timer late by {max(lags) * 1000:.1f}ms at most"
+    )
+
+
+def main():
+    """Run the async API load test."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 1, 1, 10, 10, 100],
+        help="Numbers of tables of the migrations, picked at random.",
+    )
+    parser.add_argument("--fast", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Benchmark the throughput of the batch API against a Linter per call.
+
+Lints a number of small migration strings the way embedding tools did, by
+building a ``Linter(config=FluffConfig(...))`` for each, then with one call
+of :func:`custom_rules.lint_many`, which resolves the configuration and sets
+up the rules once. Prints the inputs linted per second of each.
+
+Usage:
+    python benchmarks/bench_batch_api.py --inputs 300
+"""
+
+import argparse
+import sys
+import time
+
+from sqlfluff.core import FluffConfig, Linter
+
+from custom_rules import lint_many
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id)\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS SELECT id FROM public.table_{i};\n"
+)
+
+
+def per_call(inputs):
+    """Lint each input with a new Linter, as ``tests/fixtures.py`` does."""
+    violations = 0
+    for sql in inputs:
+        config = FluffConfig(
+            configs={"core": {"dialect": "postgres"}},
+            overrides={"rules": RULES},
+        )
+        violations += len(Linter(config=config).lint_string(sql).get_violations())
+    return violations
+
+
+def batch(inputs, fast):
+    """Lint the inputs with one batch."""
+    return sum(1 for _ in lint_many(inputs, rules=RULES, dialect="postgres", fast=fast))
+
+
+def main():
+    """Run the batch API benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--inputs", type=int, default=300)
+    args = parser.parse_args()
+    inputs = [MIGRATION.format(i=i) for i in range(args.inputs)]
+
+    results = {}
+    for name, run in (
+        ("Linter per call", lambda: per_call(inputs)),
+        ("lint_many", lambda: batch(inputs, fast=False)),
+        ("lint_many, fast", lambda: batch(inputs, fast=True)),
+    ):
+        start = time.perf_counter()
+        violations = run()
+        elapsed = time.perf_counter() - start
+        results[name] = elapsed
+        print(
+            f"{name:<16} {elapsed:6.2f}s, {args.inputs / elapsed:7.1f} inputs/s, "
+            f"{violations} violations"
+        )
+    base = results["Linter per call"]
+    print(
+        f"lint_many is {base / results['lint_many']:.1f}x faster, "
+        f"{base / results['lint_many, fast']:.1f}x in the fast mode"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Benchmark linting catalog exports.
+
+Writes CSV exports of ``pg_constraint``, ``pg_proc`` and ``pg_class`` with the
+given number of constraints (and a fifth as many functions and views), a share
+of them violating the naming conventions, then times ``CatalogLinter`` on them
+checking the names one at a time and in batches.
+
+Usage:
+    python benchmarks/bench_catalog.py --objects 1000000 --violation-ratio 0.05
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchlib import make_linter
+
+from custom_rules.catalog import CatalogLinter
+
+RULES = "CR01,CR02,CR03,CR04,FN01,FN02,VW01"
+
+CONSTRAINT_TYPES = (("p", "pk_"), ("f", "fk_"), ("c", "chk_"), ("u", "uc_"))
+
+
+def write_exports(directory, objects, violation_ratio, rng):
+    """Write the CSV exports and return the number of rows written."""
+
+    def prefix(expected):
+        return "bad_" if rng.random() < violation_ratio else expected
+
+    with open(os.path.join(directory, "pg_constraint.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["nspname", "relname", "conname", "contype"])
+        for i in range(objects):
+            contype, expected = CONSTRAINT_TYPES[i % 4]
+            writer.writerow(
+                ["public", f"table_{i // 4}", f"{prefix(expected)}{i}", contype]
+            )
+    with open(os.path.join(directory, "pg_proc.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["nspname", "proname", "prokind", "proargnames", "proargmodes"])
+        for i in range(objects // 5):
+            arguments = f"{{{prefix('p_')}id,{prefix('p_')}name}}"
+            writer.writerow(["api", f"{prefix('fun_')}{i}", "f", arguments, ""])
+    with open(os.path.join(directory, "pg_class.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["nspname", "relname", "relkind"])
+        for i in range(objects // 5):
+            writer.writerow(["reports", f"{prefix('v_')}{i}", "v"])
+    return objects + 2 * (objects // 5)
+
+
+def main():
+    """Run the catalog benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--objects", type=int, default=1_000_000)
+    parser.add_argument("--violation-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    config = make_linter(RULES).config
+    with tempfile.TemporaryDirectory() as directory:
+        rows = write_exports(
+            directory, args.objects, args.violation_ratio, random.Random(0)
+        )
+        print(f"{rows} rows exported")
+        results = {}
+        for mode, batch_size in (("one by one", 1), ("batched", 100_000)):
+            linter = CatalogLinter(config=config, batch_size=batch_size)
+            start = time.perf_counter()
+            results[mode] = [
+                violation
+                for _, violations in linter.lint_paths([directory])
+                for violation in violations
+            ]
+            elapsed = time.perf_counter() - start
+            print(
+                f"{mode:>10}: {elapsed:6.2f}s, {rows / elapsed:>10,.0f} rows/s, "
+                f"{len(results[mode])} violations"
+            )
+    if results["one by one"] != results["batched"]:
+        print("Mismatch between the batch sizes", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Benchmark resolving the configurations of a monorepo with many directories.
+
+Writes a tree of directories with a few files each, every tenth directory
+with a ``.sqlfluff`` file changing the options of a rule, and measures:
+
+- building the rules of every file as SQLFluff does, with a fresh instance
+  of each rule every time and with the instances shared per configuration;
+- linting the tree in the parsed mode, loading the configuration of every
+  file and of every directory once.
+
+Usage:
+    python benchmarks/bench_config_resolution.py --directories 300 --files 3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlfluff.core import FluffConfig, Linter
+
+from custom_rules import registry
+from custom_rules.configs import ConfigResolver
+from custom_rules.prefilter import PrefilteredLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+SQL = "CREATE VIEW public.v_{i} AS SELECT 1;\n"
+
+OVERRIDE = "[sqlfluff:rules:views.view_naming]\nexpected_prefix = v_,vw_{i}_\n"
+
+
+def write_tree(root, directories, files):
+    """Write the tree, returning its files."""
+    paths = []
+    for d in range(directories):
+        directory = os.path.join(root, f"team_{d // 10}", f"service_{d}")
+        os.makedirs(directory)
+        if d % 10 == 9:
+            with open(os.path.join(directory, ".sqlfluff"), "w") as f:
+                f.write(OVERRIDE.format(i=d // 10))
+        for i in range(files):
+            paths.append(os.path.join(directory, f"{i}.sql"))
+            with open(paths[-1], "w") as f:
+                f.write(SQL.format(i=i))
+    return paths
+
+
+def build_rules(config, paths, shared):
+    """Build the rules of every file from its configuration, as SQLFluff does."""
+    linter = Linter(config=config)
+    resolver = ConfigResolver(config)
+    configs = [resolver.directory_config(path) for path in paths]
+    registry._RULE_INSTANCES.clear()
+    start = time.perf_counter()
+    for file_config in configs:
+        if not shared:
+            registry._RULE_INSTANCES.clear()
+        linter.get_rulepack(config=file_config)
+    return time.perf_counter() - start
+
+
+def lint(config, paths, resolved):
+    """Lint the files in the parsed mode, returning the time and violations."""
+    linter = PrefilteredLinter(config=config)
+    root = linter.configs if resolved else linter.config
+    start = time.perf_counter()
+    violations = sum(
+        len(linter.lint_rendered(linter.linter.render_file(path, root)))
+        for path in paths
+    )
+    return time.perf_counter() - start, violations
+
+
+def main():
+    """Run the config resolution benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--directories", type=int, default=300)
+    parser.add_argument("--files", type=int, default=3)
+    args = parser.parse_args()
+    config = FluffConfig(overrides={"dialect": "postgres", "rules": RULES})
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = write_tree(root, args.directories, args.files)
+        fresh = build_rules(config, paths, shared=False)
+        before = registry.rule_statistics().configs
+        shared = build_rules(config, paths, shared=True)
+        configs = registry.rule_statistics().configs - before
+        print(f"{len(paths)} files in {args.directories} directories")
+        print(f"rules built per file      {fresh:7.2f}s")
+        print(
+            f"rules shared per config   {shared:7.2f}s  "
+            f"({fresh / shared:.1f}x, {configs} distinct rule configurations)"
+        )
+
+        per_file, expected = lint(config, paths, resolved=False)
+        per_directory, violations = lint(config, paths, resolved=True)
+        assert violations == expected
+        print(f"lint, config per file     {per_file:7.2f}s")
+        print(
+            f"lint, config per dir      {per_directory:7.2f}s  "
+            f"({per_file / per_directory:.1f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
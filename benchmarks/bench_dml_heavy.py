@@ -0,0 +1,73 @@
+"""Benchmark the function rules on a DML-heavy file.
+
+Generates a pg_dump-like file that is almost entirely INSERT and ALTER TABLE
+statements with a handful of CREATE FUNCTION statements, parses it once, and
+times the FN01 and FN02 crawls. Both rules only target CREATE FUNCTION
+statements, so their cost should stay a small fraction of the parse time and
+grow with the number of functions rather than the number of statements.
+
+Usage:
+    python benchmarks/bench_dml_heavy.py --statements 1000 5000 --functions 5
+"""
+
+import argparse
+import sys
+import time
+
+from benchlib import make_linter, time_rule
+
+FUNCTION_SQL = (
+    "CREATE OR REPLACE FUNCTION public.get_user_{i}(user_id INT, p_active BOOLEAN)\n"
+    "RETURNS INT LANGUAGE sql AS $$ SELECT user_id $$;\n"
+)
+
+
+def make_dml_heavy_sql(statements, functions):
+    """Build a file with ``statements`` DML statements and ``functions`` functions."""
+    parts = []
+    every = max(statements // max(functions, 1), 1)
+    for i in range(statements):
+        if i % 10 == 9:
+            parts.append(f"ALTER TABLE public.person_{i} OWNER TO app_owner;\n")
+        else:
+            parts.append(
+                f"INSERT INTO public.person (person_id, email) VALUES ({i}, 'u{i}@x.org');\n"
+            )
+        if functions and i % every == 0 and i // every < functions:
+            parts.append(FUNCTION_SQL.format(i=i))
+    return "".join(parts)
+
+
+def main():
+    """Run the DML-heavy benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--statements", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--functions", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    linter = make_linter("FN01,FN02")
+    rules = linter.get_rulepack().rules
+
+    print(
+        f"{'statements':>10} {'parse':>9} "
+        + " ".join(f"{rule.code + ' crawl':>11} {'us/stmt':>8}" for rule in rules)
+    )
+    for count in args.statements:
+        sql = make_dml_heavy_sql(count, args.functions)
+        start = time.perf_counter()
+        linter.parse_string(sql)
+        parse_time = time.perf_counter() - start
+
+        columns = []
+        for rule in rules:
+            elapsed, _ = time_rule(linter, rule, sql, args.runs)
+            columns.append(f"{elapsed:>10.4f}s {elapsed / count * 1e6:>8.2f}")
+        print(f"{count:>10} {parse_time:>8.3f}s " + " ".join(columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Benchmark the lexer-only fast mode against the parsed mode.
+
+Generates a file mixing DDL (tables with named constraints, functions, views)
+and DML statements, then times a full ``lint_string`` of the plugin rules in
+the parsed mode and in the fast mode, and checks that both report the same
+violations. Lexing dominates the fast mode, so the speedup is largest on files
+with long or deeply nested statements, which are the costliest to parse.
+
+Usage:
+    python benchmarks/bench_fast_mode.py --statements 500 2000 --dml-ratio 0.5
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from benchlib import make_linter
+
+from custom_rules.fast import FastLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+TABLE_SQL = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT CONSTRAINT table_{i}_pk PRIMARY KEY,\n"
+    "    parent_id INT CONSTRAINT fk_table_{i}_parent REFERENCES public.parent (id),\n"
+    "    amount NUMERIC(10, 2) CONSTRAINT amount_{i}_positive CHECK (amount > 0),\n"
+    "    email VARCHAR(100) CONSTRAINT uc_table_{i}_email UNIQUE\n"
+    ");\n"
+)
+FUNCTION_SQL = (
+    "CREATE OR REPLACE FUNCTION public.get_{i}(p_id INT, active BOOLEAN)\n"
+    "RETURNS INT LANGUAGE sql AS $$ SELECT p_id $$;\n"
+)
+VIEW_SQL = (
+    "CREATE VIEW public.view_{i} AS\n"
+    "SELECT t.id, sum(t.amount) AS total FROM public.table_{i} AS t\n"
+    "WHERE t.email LIKE '%@x.org' GROUP BY t.id;\n"
+)
+DML_SQL = (
+    "UPDATE public.table_{i} SET amount = amount * 1.1\n"
+    "WHERE id IN (SELECT id FROM public.parent WHERE created_at > now() - "
+    "INTERVAL '1 day' AND (status = 'open' OR status = 'pending'));\n"
+)
+
+
+def make_sql(statements, dml_ratio, rng):
+    """Build a file of ``statements`` DDL and DML statements."""
+    ddl = (TABLE_SQL, FUNCTION_SQL, VIEW_SQL)
+    return "".join(
+        (DML_SQL if rng.random() < dml_ratio else rng.choice(ddl)).format(i=i)
+        for i in range(statements)
+    )
+
+
+def time_best(lint, sql, runs):
+    """Return the best time of ``runs`` lints and the sorted violations."""
+    best = float("inf")
+    violations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        violations = lint(sql)
+        best = min(best, time.perf_counter() - start)
+    return best, sorted((v.rule_code(), v.line_no, v.line_pos) for v in violations)
+
+
+def main():
+    """Run the fast mode benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--statements", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--dml-ratio", type=float, default=0.5)
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    linter = make_linter(RULES)
+    fast_linter = FastLinter(config=linter.config)
+
+    print(
+        f"{'statements':>10} {'bytes':>10} {'violations':>10} "
+        f"{'parsed':>9} {'fast':>9} {'speedup':>8}"
+    )
+    for count in args.statements:
+        sql = make_sql(count, args.dml_ratio, rng)
+        parsed_time, parsed = time_best(
+            lambda s: linter.lint_string(s).get_violations(), sql, args.runs
+        )
+        fast_time, fast = time_best(fast_linter.lint_string, sql, args.runs)
+        if fast != parsed:
+            print(f"Mismatch at {count} statements", file=sys.stderr)
+            return 1
+        print(
+            f"{count:>10} {len(sql):>10} {len(fast):>10} {parsed_time:>8.2f}s "
+            f"{fast_time:>8.2f}s {parsed_time / fast_time:>7.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
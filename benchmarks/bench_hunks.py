@@ -0,0 +1,86 @@
+"""Benchmark linting the statements touched by edits of a large file.
+
+Generates a migration file of about the given number of lines and times
+linting the statements overlapping edits of growing size, spread over the
+file, in the parsed mode. The time should grow with the edit rather than with
+the file. Linting the whole file in the fast mode is timed for reference.
+
+Usage:
+    python benchmarks/bench_hunks.py --lines 20000 --edits 1 10 100
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from benchlib import make_linter
+
+from custom_rules.fast import FastLinter
+from custom_rules.hunks import HunkLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+STATEMENTS = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    email TEXT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id),\n"
+    "    CONSTRAINT uc_table_{i}_email UNIQUE (email)\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS\n"
+    "SELECT id, email FROM public.table_{i} WHERE email LIKE '%;%';\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id INT, active BOOLEAN)\n"
+    "RETURNS INT LANGUAGE plpgsql AS $$\nBEGIN\n    RETURN p_id;\nEND;\n$$;\n\n"
+    "UPDATE public.table_{i} SET email = lower(email) WHERE id > {i};\n\n"
+)
+
+
+def make_file(lines):
+    """Generate a migration of about ``lines`` lines."""
+    block_lines = STATEMENTS.count("\n")
+    return "".join(STATEMENTS.format(i=i) for i in range(max(1, lines // block_lines)))
+
+
+def main():
+    """Run the hunk scoped linting benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+    config = make_linter(RULES).config
+    sql = make_file(args.lines)
+    line_count = sql.count("\n")
+
+    start = time.perf_counter()
+    full = FastLinter(config=config).lint_string(sql)
+    print(
+        f"{line_count} lines, whole file in the fast mode: "
+        f"{time.perf_counter() - start:.2f}s, {len(full)} violations"
+    )
+    full_keys = {(v.rule_code(), v.line_no, v.line_pos) for v in full}
+    rng = random.Random(0)
+    for edits in args.edits:
+        lines = sorted(rng.sample(range(1, line_count + 1), edits))
+        linter = HunkLinter(config=config)
+        start = time.perf_counter()
+        violations = linter.lint_string(sql, [(line, line) for line in lines])
+        elapsed = time.perf_counter() - start
+        print(
+            f"{edits:>5} edited lines: {elapsed:6.2f}s, {len(violations)} "
+            f"violations  {linter.statistics}"
+        )
+        if any(
+            (v.rule_code(), v.line_no, v.line_pos) not in full_keys for v in violations
+        ):
+            print(
+                "The edit reports violations the whole file does not", file=sys.stderr
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark linting a document again after single character edits.
+
+Generates a migration file of about the given number of statements, lints it
+once, then times linting it again after each of a series of single character
+edits, as an editor would after every keystroke. Only the edited statement is
+parsed again, so an edit should take milliseconds whatever the size of the
+file, against the seconds of the first lint. Use ``--fast`` to lint the
+statements in the fast mode.
+
+Usage:
+    python benchmarks/bench_incremental.py --statements 5000 --edits 50
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from benchlib import make_linter
+
+from custom_rules.incremental import IncrementalLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+STATEMENTS = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    email TEXT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id),\n"
+    "    CONSTRAINT uc_table_{i}_email UNIQUE (email)\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS\n"
+    "SELECT id, email FROM public.table_{i} WHERE email LIKE '%;%';\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id INT, active BOOLEAN)\n"
+    "RETURNS INT LANGUAGE plpgsql AS $$\nBEGIN\n    RETURN p_id;\nEND;\n$$;\n\n"
+    "UPDATE public.table_{i} SET email = lower(email) WHERE id > {i};\n\n"
+)
+
+
+def main():
+    """Run the incremental linting benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--statements", type=int, default=5000)
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--fast", action="store_true")
+    args = parser.parse_args()
+    blocks = max(1, args.statements // 4)
+    sql = "".join(STATEMENTS.format(i=i) for i in range(blocks))
+    linter = IncrementalLinter(config=make_linter(RULES).config, fast=args.fast)
+
+    start = time.perf_counter()
+    violations = linter.lint(sql)
+    full = time.perf_counter() - start
+    print(
+        f"{blocks * 4} statements, {sql.count(chr(10))} lines, first lint: "
+        f"{full:.2f}s, {len(violations)} violations"
+    )
+
+    rng = random.Random(0)
+    times = []
+    for _ in range(args.edits):
+        # Type or delete one character in the name of a random view.
+        i = rng.randrange(blocks)
+        old, new = f"public.view_{i} AS", f"public.vieww_{i} AS"
+        sql = sql.replace(old, new) if old in sql else sql.replace(new, old)
+        start = time.perf_counter()
+        violations = linter.lint(sql)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    p50 = times[len(times) // 2]
+    print(
+        f"{args.edits} single character edits: p50 {p50 * 1000:.1f}ms, "
+        f"max {times[-1] * 1000:.1f}ms, {full / p50:.0f}x faster than the first "
+        f"lint, {len(violations)} violations"
+    )
+    print(linter.statistics)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Benchmark header-only linting on files with large view and function bodies.
+
+Generates two files: one of reporting views whose queries run to thousands of
+lines, and one of functions with long ``BEGIN ATOMIC`` and dollar quoted
+bodies. Each file is linted with the plugin rules in the parsed mode, the fast
+mode and the header-only fast mode, which blanks out view queries and function
+bodies before lexing. All modes must report the same violations; the
+header-only mode should stay roughly flat as the bodies grow.
+
+Usage:
+    python benchmarks/bench_large_bodies.py --objects 5 --body-lines 500 2000
+"""
+
+import argparse
+import sys
+import time
+
+from benchlib import make_linter
+
+from custom_rules.fast import FastLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+VIEW_LINE = (
+    "    CASE WHEN o.amount_{j} > {j} THEN o.amount_{j} * 1.2 ELSE 0 END "
+    "AS amount_{j},\n"
+)
+ATOMIC_LINE = "    INSERT INTO public.audit_log (id, note) VALUES ({j}, 'step {j}');\n"
+PLPGSQL_LINE = "    total := total + (SELECT count(*) FROM public.orders_{j});\n"
+
+
+def make_view_sql(objects, body_lines):
+    """Build a file of ``objects`` views with ``body_lines`` select lines each."""
+    parts = []
+    for i in range(objects):
+        columns = "".join(VIEW_LINE.format(j=j) for j in range(body_lines))
+        parts.append(
+            f"CREATE OR REPLACE VIEW public.report_{i} AS\nSELECT\n{columns}"
+            "    o.id\nFROM public.orders AS o\n"
+            "JOIN public.customers AS c ON c.id = o.customer_id;\n\n"
+        )
+    return "".join(parts)
+
+
+def make_function_sql(objects, body_lines):
+    """Build a file of ``objects`` functions with ``body_lines`` body lines each."""
+    parts = []
+    for i in range(objects):
+        if i % 2:
+            body = "".join(PLPGSQL_LINE.format(j=j) for j in range(body_lines))
+            parts.append(
+                f"CREATE FUNCTION public.compute_{i}(p_id INT, total INT)\n"
+                f"RETURNS INT LANGUAGE plpgsql AS $$\nBEGIN\n{body}"
+                "    RETURN total;\nEND;\n$$;\n\n"
+            )
+        else:
+            body = "".join(ATOMIC_LINE.format(j=j) for j in range(body_lines))
+            parts.append(
+                f"CREATE PROCEDURE public.log_{i}(p_id INT, note TEXT)\n"
+                f"LANGUAGE sql\nBEGIN ATOMIC\n{body}END;\n\n"
+                f"CREATE FUNCTION public.fun_log_{i}(p_id INT, note TEXT)\n"
+                f"RETURNS INT LANGUAGE sql\nBEGIN ATOMIC\n{body}"
+                "    SELECT p_id;\nEND;\n\n"
+            )
+    return "".join(parts)
+
+
+def time_best(lint, sql, runs):
+    """Return the best time of ``runs`` lints and the sorted violations."""
+    best = float("inf")
+    violations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        violations = lint(sql)
+        best = min(best, time.perf_counter() - start)
+    return best, sorted(
+        (v.rule_code(), v.line_no, v.line_pos, v.desc()) for v in violations
+    )
+
+
+def main():
+    """Run the large body benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--objects", type=int, default=5)
+    parser.add_argument("--body-lines", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument(
+        "--skip-parsed", action="store_true", help="Only time the fast modes."
+    )
+    args = parser.parse_args()
+
+    linter = make_linter(RULES)
+    fast_linter = FastLinter(config=linter.config)
+    header_linter = FastLinter(config=linter.config, header_only=True)
+
+    print(
+        f"{'file':>9} {'lines':>6} {'bytes':>9} {'violations':>10} "
+        f"{'parsed':>9} {'fast':>9} {'header':>9}"
+    )
+    for kind, make_sql in (("views", make_view_sql), ("functions", make_function_sql)):
+        for body_lines in args.body_lines:
+            sql = make_sql(args.objects, body_lines)
+            header_time, expected = time_best(header_linter.lint_string, sql, args.runs)
+            fast_time, fast = time_best(fast_linter.lint_string, sql, args.runs)
+            parsed_column = f"{'-':>9}"
+            if not args.skip_parsed:
+                parsed_time, parsed = time_best(
+                    lambda s: linter.lint_string(s).get_violations(), sql, args.runs
+                )
+                parsed_column = f"{parsed_time:>8.2f}s"
+                if parsed != expected:
+                    print(f"Parsed mode mismatch for {kind}", file=sys.stderr)
+                    return 1
+            if fast != expected:
+                print(f"Fast mode mismatch for {kind}", file=sys.stderr)
+                return 1
+            print(
+                f"{kind:>9} {body_lines:>6} {len(sql):>9} {len(expected):>10} "
+                f"{parsed_column} {fast_time:>8.2f}s {header_time:>8.3f}s"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Micro-benchmark of the compiled name matcher.
+
+Checks N generated names against prefix lists of growing size, with a few
+per-schema overrides, and compares the compiled matcher with a naive
+``any(name.startswith(prefix) ...)`` loop over the same prefixes. The compiled
+matcher should stay flat as the prefix list grows while the naive loop grows
+linearly.
+
+Usage:
+    python benchmarks/bench_name_matcher.py --names 1000000 --patterns 10 50 200
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+
+from custom_rules.matcher import compile_name_matcher
+
+SCHEMAS = ("public", "audit", "staging", "reporting")
+
+
+def make_prefixes(count, rng):
+    """Generate ``count`` distinct prefixes of 2 to 8 characters."""
+    prefixes = set()
+    while len(prefixes) < count:
+        length = rng.randint(1, 7)
+        prefixes.add("".join(rng.choices(string.ascii_lowercase, k=length)) + "_")
+    return sorted(prefixes)
+
+
+def make_names(count, prefixes, rng):
+    """Generate ``count`` (schema, name) pairs, about half of them compliant."""
+    names = []
+    for i in range(count):
+        prefix = rng.choice(prefixes) if i % 2 else "x"
+        names.append((rng.choice(SCHEMAS), f"{prefix}object_{i}"))
+    return names
+
+
+def time_best(check, names, runs):
+    """Return the best time of ``runs`` passes and the number of mismatches."""
+    best = float("inf")
+    mismatches = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        mismatches = sum(1 for schema, name in names if check(name, schema))
+        best = min(best, time.perf_counter() - start)
+    return best, mismatches
+
+
+def main():
+    """Run the name matcher benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--patterns", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--skip-naive", action="store_true", help="Only time the compiled matcher."
+    )
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    print(
+        f"{'patterns':>8} {'names':>9} {'mismatches':>10} "
+        f"{'compiled':>9} {'ns/name':>8} {'naive':>9} {'ns/name':>8}"
+    )
+    for count in args.patterns:
+        prefixes = make_prefixes(count, rng)
+        names = make_names(args.names, prefixes, rng)
+        # Objects of the audit and staging schemas use their own prefixes.
+        overrides = tuple(
+            f"{schema}:{prefix}"
+            for schema in ("audit", "staging")
+            for prefix in prefixes[: count // 4 or 1]
+        )
+
+        start = time.perf_counter()
+        matcher = compile_name_matcher(
+            tuple(prefixes),
+            name_pattern="[a-z][a-z0-9_]*",
+            max_name_bytes=63,
+            schema_prefixes=overrides,
+        )
+        compile_time = time.perf_counter() - start
+        compiled, mismatches = time_best(matcher.mismatch, names, args.runs)
+
+        naive_column = ""
+        if not args.skip_naive:
+            prefix_lists = {None: prefixes}
+            for override in overrides:
+                schema, _, prefix = override.partition(":")
+                prefix_lists.setdefault(schema, []).append(prefix)
+
+            def naive(name, schema):
+                allowed = prefix_lists.get(schema, prefixes)
+                return not any(name.lower().startswith(p) for p in allowed)
+
+            naive_time, _ = time_best(naive, names, args.runs)
+            naive_column = f"{naive_time:>8.3f}s {naive_time / args.names * 1e9:>8.0f}"
+
+        print(
+            f"{count:>8} {args.names:>9} {mismatches:>10} {compiled:>8.3f}s "
+            f"{compiled / args.names * 1e9:>8.0f} {naive_column}"
+            f"  (compiled in {compile_time * 1e3:.2f}ms)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
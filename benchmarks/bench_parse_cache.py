@@ -0,0 +1,99 @@
+"""Benchmark relinting large files from the parse cache after a config change.
+
+Writes migration files of growing sizes and lints each as the ``lint`` command
+does: once to parse it and cache the facts of the parse, then again with other
+rule options, which misses the result cache but reads the facts instead of
+parsing. Prints the time of the parse and of the cache load with each rule
+run, their ratio and the size of the cached facts.
+
+Usage:
+    python benchmarks/bench_parse_cache.py --sizes 100 300 600
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlfluff.core import FluffConfig
+
+from custom_rules.cache import ResultCache
+from custom_rules.facts import FactsLinter
+from custom_rules.prefilter import PrefilteredLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    email TEXT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id),\n"
+    "    CONSTRAINT uc_table_{i}_email UNIQUE (email)\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS SELECT id FROM public.table_{i};\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id INT) RETURNS INT\n"
+    "LANGUAGE sql AS $$ SELECT p_id $$;\n"
+)
+
+
+def make_config(view_prefix):
+    """Return a postgres configuration of the plugin rules."""
+    return FluffConfig(
+        configs={"rules": {"views.view_naming": {"expected_prefix": view_prefix}}},
+        # Overrides also apply to the configuration of each file.
+        overrides={
+            "dialect": "postgres",
+            "rules": RULES,
+            "large_file_skip_byte_limit": 0,
+            "max_parse_nodes": 0,
+        },
+    )
+
+
+def lint(path, cache_dir, view_prefix):
+    """Lint a file with the facts cache, returning the time and violations."""
+    linter = FactsLinter(
+        PrefilteredLinter(config=make_config(view_prefix)), ResultCache(cache_dir)
+    )
+    start = time.perf_counter()
+    violations = linter.lint_path(path)
+    return time.perf_counter() - start, len(violations), linter.statistics
+
+
+def main():
+    """Run the parse cache benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 300, 600],
+        help="Numbers of migrations (3 statements each) per file.",
+    )
+    args = parser.parse_args()
+
+    print(f"{'statements':>10} {'parse':>9} {'cached':>9} {'ratio':>7} {'facts':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        for size in args.sizes:
+            path = os.path.join(root, f"m{size}.sql")
+            with open(path, "w") as f:
+                f.write("".join(MIGRATION.format(i=i) for i in range(size)))
+            cache_dir = os.path.join(root, f"cache{size}")
+            parse, _, statistics = lint(path, cache_dir, "v_")
+            assert statistics.misses == 1
+            cached, violations, statistics = lint(path, cache_dir, "view_")
+            assert statistics.hits == 1
+            facts = sum(entry.size for entry in ResultCache(cache_dir).entries())
+            print(
+                f"{3 * size:>10} {parse:>8.2f}s {cached * 1000:>7.0f}ms "
+                f"{parse / cached:>6.0f}x {facts / 1024:>7.0f}kB"
+                f"  ({violations} violations)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
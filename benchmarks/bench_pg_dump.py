@@ -0,0 +1,111 @@
+"""Benchmark the pg_dump input mode on a large synthetic dump.
+
+Writes a dump of the requested size made of a fixed number of tables, views and
+functions and of COPY data blocks and INSERT statements filling the rest, then
+times reading its statements with the data sections skipped, and linting it in
+the pg_dump mode. The time should be dominated by the DDL, which is the same
+whatever the size of the dump, while scanning the data runs at disk speed.
+
+Usage:
+    python benchmarks/bench_pg_dump.py --size-mb 5000 --tables 500
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchlib import make_linter
+
+from custom_rules.pg_dump import DumpStatistics, iter_dump_statements
+from custom_rules.streaming import StreamingLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+DDL = (
+    "--\n-- Name: table_{i}; Type: TABLE; Schema: public; Owner: app\n--\n\n"
+    "CREATE TABLE public.table_{i} (\n"
+    "    id integer NOT NULL,\n"
+    "    email text CONSTRAINT email_{i}_unique UNIQUE\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS\n SELECT id, email FROM public.table_{i};\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id integer) RETURNS integer\n"
+    "    LANGUAGE sql AS $$ SELECT p_id; $$;\n\n"
+    "ALTER TABLE ONLY public.table_{i}\n"
+    "    ADD CONSTRAINT table_{i}_pkey PRIMARY KEY (id);\n\n"
+)
+COPY_HEADER = (
+    "--\n-- Data for Name: table_{i}; Type: TABLE DATA; Schema: public\n--\n\n"
+    "COPY public.table_{i} (id, email) FROM stdin;\n"
+)
+ROW = "{j}\tuser_{j}@example.org; CREATE VIEW not_ddl AS SELECT 'x';\n"
+INSERT = "INSERT INTO public.table_{i} VALUES ({j}, 'user_{j}@example.org;''x''');\n"
+
+
+def write_dump(path, megabytes, tables):
+    """Write a dump of about ``megabytes`` MB with ``tables`` DDL blocks."""
+    target = megabytes * 1_000_000
+    rows = "".join(ROW.format(j=j) for j in range(10_000))
+    inserts = "".join(INSERT.format(i=0, j=j) for j in range(1_000))
+    with open(path, "w", encoding="utf8") as f:
+        for i in range(tables):
+            f.write(DDL.format(i=i))
+        written = f.tell()
+        i = 0
+        while written < target:
+            f.write(COPY_HEADER.format(i=i % max(tables, 1)))
+            f.write(rows)
+            f.write("\\.\n\n")
+            f.write(inserts)
+            written = f.tell()
+            i += 1
+
+
+def main():
+    """Run the pg_dump benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--size-mb", type=int, default=500)
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument(
+        "--path", help="Write the dump here and keep it, instead of a temp file."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path or os.path.join(tmp, "dump.sql")
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            write_dump(path, args.size_mb, args.tables)
+            print(f"Wrote {path} in {time.perf_counter() - start:.1f}s")
+        size = os.path.getsize(path)
+
+        statistics = DumpStatistics()
+        start = time.perf_counter()
+        for _ in iter_dump_statements(path, statistics=statistics):
+            pass
+        scan_time = time.perf_counter() - start
+        print(
+            f"Scanned {size / 1e9:.2f} GB in {scan_time:.2f}s "
+            f"({size / 1e9 / scan_time:.2f} GB/s): {statistics}"
+        )
+
+        config = make_linter(RULES).config
+        for mode, kwargs in (("header-only", {"header_only": True}), ("fast", {})):
+            linter = StreamingLinter(config=config, pg_dump=True, fast=True, **kwargs)
+            start = time.perf_counter()
+            violations = linter.lint_path(path)
+            print(
+                f"Linted in the {mode} pg_dump mode in "
+                f"{time.perf_counter() - start:.2f}s: {len(violations)} violations"
+            )
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"Peak RSS, including mapped dump pages: {peak_mb:.0f}MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
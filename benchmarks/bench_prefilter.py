@@ -0,0 +1,101 @@
+"""Benchmark the trigger keyword prefilter on a repository of SQL files.
+
+Generates a set of files where only some contain the DDL the plugin rules
+check, the others holding DML only, like the queries and data migrations of a
+typical repository. The files are linted in the parsed and the fast mode
+without the prefilter, with it, and with it skipping the files left without
+any rule to run, checking that the violations are identical, and the
+prefilter counters are printed.
+
+Usage:
+    python benchmarks/bench_prefilter.py --files 200 --ddl-ratio 0.2
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from benchlib import make_linter
+
+from custom_rules.fast import FastLinter
+from custom_rules.prefilter import PrefilteredLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+DDL_SQL = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT CONSTRAINT table_{i}_pk PRIMARY KEY,\n"
+    "    amount NUMERIC(10, 2) CONSTRAINT amount_{i}_positive CHECK (amount > 0)\n"
+    ");\n"
+    "CREATE VIEW public.view_{i} AS SELECT t.id FROM public.table_{i} AS t;\n"
+)
+DML_SQL = (
+    "UPDATE public.table_{i} SET amount = amount * 1.1\n"
+    "WHERE id IN (SELECT id FROM public.parent WHERE created_at > now() - "
+    "INTERVAL '1 day' AND (status = 'open' OR status = 'pending'));\n"
+    "INSERT INTO public.audit (table_id, note) SELECT id, 'bumped' "
+    "FROM public.table_{i};\n"
+)
+
+
+def make_files(files, ddl_ratio, statements, rng):
+    """Build ``files`` SQL texts, a share of them containing DDL."""
+    return [
+        "".join(
+            (DDL_SQL if is_ddl and j == 0 else DML_SQL).format(i=f"{i}_{j}")
+            for j in range(statements)
+        )
+        for i, is_ddl in enumerate(rng.random() < ddl_ratio for _ in range(files))
+    ]
+
+
+def time_lint(lint, texts):
+    """Return the time to lint every text and the sorted violations."""
+    start = time.perf_counter()
+    violations = [
+        sorted((v.rule_code(), v.line_no, v.line_pos) for v in lint(sql))
+        for sql in texts
+    ]
+    return time.perf_counter() - start, violations
+
+
+def main():
+    """Run the prefilter benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--ddl-ratio", type=float, default=0.2)
+    parser.add_argument("--statements", type=int, default=10)
+    args = parser.parse_args()
+    texts = make_files(args.files, args.ddl_ratio, args.statements, random.Random(0))
+    config = make_linter(RULES).config
+
+    print(
+        f"{'mode':>6} {'full':>9} {'prefilter':>10} {'skip':>9} {'speedup':>8}  "
+        f"counters"
+    )
+    for mode, linter_class in (("parsed", PrefilteredLinter), ("fast", FastLinter)):
+        full_time, full = time_lint(
+            linter_class(config=config, prefilter=False).lint_string, texts
+        )
+        prefiltered_time, prefiltered = time_lint(
+            linter_class(config=config).lint_string, texts
+        )
+        # The DML parses, so skipping it does not drop any parse error.
+        linter = linter_class(config=config, skip_files=True)
+        skip_time, skipped = time_lint(linter.lint_string, texts)
+        if not prefiltered == skipped == full:
+            print(f"Mismatch in the {mode} mode", file=sys.stderr)
+            return 1
+        print(
+            f"{mode:>6} {full_time:>8.2f}s {prefiltered_time:>9.2f}s "
+            f"{skip_time:>8.2f}s {full_time / skip_time:>7.1f}x  "
+            f"{linter.prefilter.statistics}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Benchmark ephemeral CI runners sharing a remote result cache.
+
+Writes a directory of migration files, starts the stand-in cache server and
+lints the directory as the ``lint`` command does on three runners, each with
+an empty local cache: one without a remote cache, one filling the remote
+cache, and one reading every result from it. A network latency is added to
+each request, so the batched lookups can be compared with one request per
+file (``--batch-size 1``). A last run against an unreachable server shows the
+cost of a backend which is down.
+
+Usage:
+    python benchmarks/bench_remote_cache.py --files 500 --latency-ms 20
+"""
+
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from benchlib import make_linter
+
+from custom_rules.cache import CachedLinter, ResultCache
+from custom_rules.prefilter import PrefilteredLinter
+from custom_rules.remote import (
+    DEFAULT_BATCH_SIZE,
+    HttpBackend,
+    RemoteCache,
+    make_server,
+)
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id)\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS SELECT id FROM public.table_{i};\n"
+)
+
+
+class LatencyBackend(HttpBackend):
+    """An HTTP backend whose requests take ``latency`` seconds longer."""
+
+    def __init__(self, url, latency):
+        super().__init__(url)
+        self.latency = latency
+
+    def _post(self, path, body):
+        time.sleep(self.latency)
+        return super()._post(path, body)
+
+
+def run(name, config, directory, cache_dir, remote):
+    """Lint the directory on a runner with an empty local cache."""
+    linter = CachedLinter(
+        PrefilteredLinter(config=config), ResultCache(cache_dir), "lint", remote
+    )
+    start = time.perf_counter()
+    violations = sum(len(v) for _, v in linter.lint_paths([directory]))
+    elapsed = time.perf_counter() - start
+    counts = remote.statistics if remote else ""
+    print(f"{name:<18} {elapsed:7.2f}s, {violations} violations  {counts}")
+    return elapsed
+
+
+def main():
+    """Run the remote cache benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    config = make_linter(RULES).config
+    latency = args.latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as root:
+        directory = os.path.join(root, "migrations")
+        os.mkdir(directory)
+        for i in range(args.files):
+            with open(os.path.join(directory, f"m{i:05}.sql"), "w") as f:
+                f.write(MIGRATION.format(i=i))
+        server = make_server(os.path.join(root, "server"), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://{}:{}".format(*server.server_address[:2])
+
+        def remote():
+            return RemoteCache(LatencyBackend(url, latency), args.batch_size)
+
+        cold = run("no remote cache", config, directory, root + "/a", None)
+        run("filling remote", config, directory, root + "/b", remote())
+        warm = run("from remote", config, directory, root + "/c", remote())
+        server.shutdown()
+        server.server_close()
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            down = "http://127.0.0.1:{}".format(s.getsockname()[1])
+        run(
+            "remote down",
+            config,
+            directory,
+            root + "/d",
+            RemoteCache(HttpBackend(down), args.batch_size),
+        )
+    print(f"runner reading the remote cache {cold / warm:.0f}x faster than cold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Benchmark CI runs of the lint command with the result cache.
+
+Writes a directory of migration files and lints it as the ``lint`` command
+does: a cold run filling the cache, a warm run with every file unchanged, and
+a run after changing a few files, which only lints those. Prints the time of
+each run and its cache counters.
+
+Usage:
+    python benchmarks/bench_result_cache.py --files 1000 --changed 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchlib import make_linter
+
+from custom_rules.cache import CachedLinter, ResultCache
+from custom_rules.prefilter import PrefilteredLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    email TEXT,\n"
+    "    CONSTRAINT table_{i}_pk PRIMARY KEY (id),\n"
+    "    CONSTRAINT uc_table_{i}_email UNIQUE (email)\n"
+    ");\n\n"
+    "CREATE VIEW public.{view}_{i} AS SELECT id FROM public.table_{i};\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id INT) RETURNS INT\n"
+    "LANGUAGE sql AS $$ SELECT p_id $$;\n"
+)
+
+
+def write(directory, i, view="view"):
+    """Write the migration file of ``i``."""
+    with open(os.path.join(directory, f"m{i:05}.sql"), "w") as f:
+        f.write(MIGRATION.format(i=i, view=view))
+
+
+def run(name, config, directory, cache_dir):
+    """Lint the directory with the cache, as the lint command does."""
+    linter = CachedLinter(
+        PrefilteredLinter(config=config), ResultCache(cache_dir), "lint"
+    )
+    start = time.perf_counter()
+    violations = sum(len(v) for _, v in linter.lint_paths([directory]))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<20} {elapsed:7.2f}s, {violations} violations  {linter.cache.statistics}"
+    )
+    return elapsed
+
+
+def main():
+    """Run the result cache benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--changed", type=int, default=10)
+    args = parser.parse_args()
+    config = make_linter(RULES).config
+
+    with tempfile.TemporaryDirectory() as root:
+        directory = os.path.join(root, "migrations")
+        cache_dir = os.path.join(root, "cache")
+        os.mkdir(directory)
+        for i in range(args.files):
+            write(directory, i)
+        cold = run("cold", config, directory, cache_dir)
+        warm = run("warm", config, directory, cache_dir)
+        for i in range(0, args.files, max(1, args.files // args.changed)):
+            write(directory, i, view="v_view")
+        run(f"{args.changed} files changed", config, directory, cache_dir)
+        size = sum(entry.size for entry in ResultCache(cache_dir).entries())
+    print(
+        f"warm run {cold / warm:.0f}x faster than the cold run, cache {size / 1024:.0f} kB"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
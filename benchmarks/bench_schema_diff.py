@@ -0,0 +1,88 @@
+"""Benchmark diffing two schema dumps against linting the new one.
+
+Writes a dump of the given number of tables, views and functions and a copy
+where a few of them are changed, renamed or added, as a migration would, then
+times linting the whole new dump in the fast mode and linting only the diff.
+The diff time grows with the size of the dumps only through reading and
+hashing them.
+
+Usage:
+    python benchmarks/bench_schema_diff.py --objects 5000 --changes 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchlib import make_linter
+
+from custom_rules.fast import FastLinter
+from custom_rules.schema_diff import SchemaDiffLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+STATEMENTS = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT CONSTRAINT pk_table_{i} PRIMARY KEY,\n"
+    "    email TEXT CONSTRAINT uc_table_{i}_email UNIQUE\n"
+    ");\n\n"
+    "CREATE VIEW public.v_view_{i} AS SELECT id, email FROM public.table_{i};\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id INT) RETURNS INT\n"
+    "LANGUAGE sql AS $$ SELECT p_id $$;\n\n"
+)
+
+
+def write_dumps(directory, objects, changes):
+    """Write the old and new dumps and return their paths."""
+    step = max(1, objects // max(1, changes))
+    paths = os.path.join(directory, "old.sql"), os.path.join(directory, "new.sql")
+    with open(paths[0], "w") as old, open(paths[1], "w") as new:
+        for i in range(objects):
+            block = STATEMENTS.format(i=i)
+            old.write(block)
+            if i % step == 0:
+                # Rename the view, which now breaks the naming convention.
+                block = block.replace(f"v_view_{i} ", f"view_{i} ")
+            new.write(block)
+        for i in range(changes):
+            new.write(f"CREATE VIEW public.added_{i} AS SELECT {i} AS id;\n\n")
+    return paths
+
+
+def main():
+    """Run the schema diff benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--objects", type=int, default=5_000)
+    parser.add_argument("--changes", type=int, default=20)
+    args = parser.parse_args()
+    config = make_linter(RULES).config
+
+    with tempfile.TemporaryDirectory() as directory:
+        old, new = write_dumps(directory, args.objects, args.changes)
+        start = time.perf_counter()
+        full = FastLinter(config=config).lint_path(new)
+        full_time = time.perf_counter() - start
+
+        linter = SchemaDiffLinter(config=config)
+        start = time.perf_counter()
+        diff = linter.lint_sql(old, new)
+        diff_time = time.perf_counter() - start
+    print(f"full lint: {full_time:6.2f}s, {len(full)} violations")
+    print(
+        f"     diff: {diff_time:6.2f}s, {len(diff)} violations, "
+        f"{full_time / diff_time:.1f}x faster  {linter.statistics}"
+    )
+    # Every violation of the diff is in the new dump, at the same position.
+    keys = {(v.rule_code(), v.line_no, v.line_pos) for v in full}
+    if not all((v.rule_code(), v.line_no, v.line_pos) in keys for v in diff):
+        print("The diff reports violations the full lint does not", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Benchmark plugin startup cost.
+
+Measures the wall time of ``sqlfluff rules`` and of linting a single
+statement, both cold (a fresh interpreter per run) and warm (repeated in
+the same interpreter, with the plugin manager already loaded).
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --max-cold-lint 3.0  # fail on regression
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SINGLE_STATEMENT = (
+    "CREATE TABLE public.person (id INT, CONSTRAINT pk_person PRIMARY KEY (id));\n"
+)
+
+
+def _time_command(command, runs):
+    """Run a command ``runs`` times in fresh processes and return the timings."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _time_warm(sql_path, runs):
+    """Build a ruleset and lint the statement ``runs`` times in this process."""
+    from sqlfluff.core import FluffConfig, Linter
+    from sqlfluff.core.rules import get_ruleset
+
+    config = FluffConfig(overrides={"dialect": "postgres", "rules": "CR01"})
+    rules_timings, lint_timings = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        get_ruleset().get_rulepack(config)
+        rules_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        Linter(config=config).lint_paths((sql_path,))
+        lint_timings.append(time.perf_counter() - start)
+    return rules_timings, lint_timings
+
+
+def _report(label, timings):
+    print(
+        f"{label:<28} min {min(timings):8.3f}s  median {statistics.median(timings):8.3f}s"
+    )
+
+
+def main():
+    """Run the startup benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Number of runs per measurement."
+    )
+    parser.add_argument(
+        "--max-cold-rules",
+        type=float,
+        help="Fail if cold `sqlfluff rules` median exceeds this.",
+    )
+    parser.add_argument(
+        "--max-cold-lint",
+        type=float,
+        help="Fail if cold single-statement lint median exceeds this.",
+    )
+    args = parser.parse_args()
+
+    sqlfluff = [sys.executable, "-m", "sqlfluff"]
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_path = os.path.join(tmp, "single.sql")
+        with open(sql_path, "w") as f:
+            f.write(SINGLE_STATEMENT)
+
+        cold_import = _time_command(
+            [sys.executable, "-c", "import custom_rules; custom_rules.get_rules()"],
+            args.runs,
+        )
+        cold_rules = _time_command(sqlfluff + ["rules"], args.runs)
+        cold_lint = _time_command(
+            sqlfluff + ["lint", sql_path, "--dialect", "postgres", "--rules", "CR01"],
+            args.runs,
+        )
+        warm_rules, warm_lint = _time_warm(sql_path, args.runs)
+
+    _report("cold import + get_rules", cold_import)
+    _report("cold sqlfluff rules", cold_rules)
+    _report("cold single-statement lint", cold_lint)
+    _report("warm get_rulepack", warm_rules)
+    _report("warm single-statement lint", warm_lint)
+
+    failed = False
+    for limit, timings, label in (
+        (args.max_cold_rules, cold_rules, "cold sqlfluff rules"),
+        (args.max_cold_lint, cold_lint, "cold single-statement lint"),
+    ):
+        if limit is not None and statistics.median(timings) > limit:
+            print(f"REGRESSION: {label} median exceeds {limit:.3f}s")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
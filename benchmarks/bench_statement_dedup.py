@@ -0,0 +1,109 @@
+"""Benchmark reusing the violations of repeated statements when streaming.
+
+Writes a schema file applying the same migration to many tenants, each copy
+commented and laid out differently, with a share of statements unique to the
+tenant, and lints it statement by statement in the parsed streaming mode:
+without the statement cache, with it in memory, and again with it read from
+a cache directory as in a following run. Prints the time of each run, the
+dedup hit rate and checks that the violations are the same.
+
+Usage:
+    python benchmarks/bench_statement_dedup.py --tenants 100 --unique 0.1
+"""
+
+import argparse
+import io
+import random
+import sys
+import tempfile
+import time
+
+from sqlfluff.core import FluffConfig
+
+from custom_rules.cache import ResultCache
+from custom_rules.configs import config_fingerprint
+from custom_rules.dedup import StatementCache
+from custom_rules.streaming import StreamingLinter
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE accounts (\n"
+    "    id INT,\n"
+    "    email TEXT,\n"
+    "    CONSTRAINT accounts_pk PRIMARY KEY (id),\n"
+    "    CONSTRAINT uc_accounts_email UNIQUE (email)\n"
+    ");\n",
+    "CREATE VIEW active_accounts AS SELECT id FROM accounts;\n",
+    "CREATE FUNCTION fun_get_account(p_id INT) RETURNS INT\n"
+    "LANGUAGE sql AS $$ SELECT p_id $$;\n",
+)
+
+UNIQUE = "CREATE VIEW tenant_{i}_{j} AS SELECT {j} AS id;\n"
+
+
+def write_schema(tenants, unique, seed=0):
+    """Return a schema of ``tenants`` copies of the migration."""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(tenants):
+        parts.append(f"-- tenant {i}\nSET search_path TO tenant_{i};\n")
+        for j, statement in enumerate(MIGRATION):
+            if rng.random() < 0.5:
+                statement = statement.replace("\n    ", " ").replace(" (", "  (")
+            parts.append(f"/* step {j} */\n{statement}\n")
+            if rng.random() < unique:
+                parts.append(UNIQUE.format(i=i, j=j))
+    return "".join(parts)
+
+
+def lint(sql, statement_cache):
+    """Stream a schema, returning the time and the violations."""
+    config = FluffConfig(overrides={"dialect": "postgres", "rules": RULES})
+    linter = StreamingLinter(config=config, statement_cache=statement_cache)
+    start = time.perf_counter()
+    violations = [
+        (v.rule_code(), v.line_no, v.line_pos)
+        for v in linter.lint_stream(io.StringIO(sql))
+    ]
+    return time.perf_counter() - start, sorted(violations)
+
+
+def main():
+    """Run the statement dedup benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tenants", type=int, default=100)
+    parser.add_argument(
+        "--unique",
+        type=float,
+        default=0.1,
+        help="Chance of a statement unique to the tenant after each step.",
+    )
+    args = parser.parse_args()
+
+    sql = write_schema(args.tenants, args.unique)
+    fingerprint = config_fingerprint(
+        FluffConfig(overrides={"dialect": "postgres", "rules": RULES})
+    )
+    print(f"{'run':>10} {'time':>8} {'hit rate':>9}")
+    baseline, expected = lint(sql, None)
+    print(f"{'no dedup':>10} {baseline:>7.2f}s {'':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for run in ("cold", "warm"):
+            statement_cache = StatementCache(
+                fingerprint, "stream", ResultCache(directory)
+            )
+            elapsed, violations = lint(sql, statement_cache)
+            assert violations == expected
+            rate = statement_cache.statistics.hit_rate
+            print(
+                f"{run:>10} {elapsed:>7.2f}s {rate:>8.0%}  "
+                f"({baseline / elapsed:.1f}x, {len(violations)} violations)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
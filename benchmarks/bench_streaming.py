@@ -0,0 +1,115 @@
+"""Benchmark the peak memory of streaming and whole file linting.
+
+Writes schema dumps of growing size to a temporary directory and lints each of
+them in a child process, once as a whole file and once statement by statement,
+reporting the time and the peak resident memory of the child. Both use the
+header-only fast mode, so that whole files of tens of megabytes can still be
+linted. The streaming mode should stay flat in memory as the file grows.
+
+Usage:
+    python benchmarks/bench_streaming.py --sizes 5 20 --mode fast
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+STATEMENTS = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT CONSTRAINT table_{i}_pk PRIMARY KEY,\n"
+    "    email TEXT CONSTRAINT uc_table_{i}_email UNIQUE\n"
+    ");\n\n"
+    "CREATE VIEW public.view_{i} AS\n"
+    "SELECT id, email FROM public.table_{i} WHERE email LIKE '%;%';\n\n"
+    "CREATE FUNCTION public.fun_get_{i}(p_id INT, active BOOLEAN)\n"
+    "RETURNS INT LANGUAGE plpgsql AS $$\nBEGIN\n    RETURN p_id;\nEND;\n$$;\n\n"
+    "INSERT INTO public.table_{i} (id, email) VALUES ({i}, 'u{i}@x.org');\n\n"
+)
+
+
+def write_dump(path, megabytes):
+    """Write a dump of about ``megabytes`` MB and return its statement count."""
+    target = megabytes * 1_000_000
+    written = i = 0
+    with open(path, "w", encoding="utf8") as f:
+        while written < target:
+            block = STATEMENTS.format(i=i)
+            f.write(block)
+            written += len(block)
+            i += 1
+    return i * 4
+
+
+def run_child(streaming, header_only, path):
+    """Lint ``path`` and print the violation count, time and peak RSS."""
+    from benchlib import make_linter
+
+    from custom_rules.fast import FastLinter
+    from custom_rules.streaming import StreamingLinter
+
+    config = make_linter("CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01").config
+    start = time.perf_counter()
+    if streaming:
+        linter = StreamingLinter(config=config, fast=True, header_only=header_only)
+    else:
+        linter = FastLinter(config=config, header_only=header_only)
+    violations = linter.lint_path(path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(len(violations), elapsed, peak_kb)
+
+
+def main():
+    """Run the streaming benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20])
+    parser.add_argument(
+        "--mode", choices=["fast", "header-only"], default="header-only"
+    )
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    header_only = args.mode == "header-only"
+    if args.child:
+        run_child(args.child[0] == "stream", header_only, args.child[1])
+        return 0
+
+    print(
+        f"{'MB':>5} {'statements':>10} {'mode':>7} {'violations':>10} "
+        f"{'time':>9} {'peak RSS':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"dump_{size}.sql")
+            statements = write_dump(path, size)
+            for kind in ("whole", "stream"):
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--mode",
+                        args.mode,
+                        "--child",
+                        kind,
+                        path,
+                    ],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout.split()
+                violations, elapsed, peak_kb = output
+                print(
+                    f"{size:>5} {statements:>10} {kind:>7} {violations:>10} "
+                    f"{float(elapsed):>8.2f}s {int(peak_kb) / 1024:>8.0f}MB"
+                )
+            os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
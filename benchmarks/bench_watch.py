@@ -0,0 +1,104 @@
+"""Benchmark the latency and memory of a long watch session.
+
+Writes a directory of migration files and watches it with inotify or by
+polling, in a background thread, while the main thread saves one file at a
+time as a developer would, alternating between adding and fixing a violation.
+Prints the latency from save to result and the peak resident memory after the
+first saves and at the end, which should stay flat however many saves the
+session handles.
+
+Usage:
+    python benchmarks/bench_watch.py --files 200 --saves 500 --watcher inotify
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+from benchlib import make_linter
+
+from custom_rules.fast import FastLinter
+from custom_rules.watch import WatchSession, make_watcher
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+
+MIGRATION = (
+    "CREATE TABLE public.table_{i} (\n"
+    "    id INT,\n"
+    "    CONSTRAINT pk_table_{i} PRIMARY KEY (id)\n"
+    ");\n\n"
+    "CREATE VIEW public.{view}_{i} AS SELECT id FROM public.table_{i};\n"
+)
+
+
+def peak_rss_mb():
+    """Return the peak resident memory of the process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def main():
+    """Run the watch benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--saves", type=int, default=500)
+    parser.add_argument("--watcher", choices=["inotify", "poll"], default="inotify")
+    parser.add_argument("--debounce", type=float, default=0.02)
+    args = parser.parse_args()
+    config = make_linter(RULES).config
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(args.files):
+            with open(os.path.join(directory, f"m{i:04}.sql"), "w") as f:
+                f.write(MIGRATION.format(i=i, view="v_view"))
+        watcher = make_watcher(
+            [directory], config, poll=args.watcher == "poll", interval=0.05
+        )
+        session = WatchSession(
+            FastLinter(config=config),
+            [directory],
+            watcher,
+            echo=lambda line: None,
+            debounce=args.debounce,
+        )
+        thread = threading.Thread(target=session.run, kwargs={"bursts": args.saves})
+        thread.start()
+        while not session.results:
+            time.sleep(0.01)
+        warm_rss = None
+        for save in range(args.saves):
+            i = rng.randrange(args.files)
+            view = "view" if save % 2 == 0 else "v_view"
+            with open(os.path.join(directory, f"m{i:04}.sql"), "w") as f:
+                f.write(MIGRATION.format(i=i, view=view))
+            # Wait for the result, so that each save is its own burst.
+            while session.latency.count <= save and thread.is_alive():
+                time.sleep(0.001)
+            if save == min(49, args.saves - 1):
+                warm_rss = peak_rss_mb()
+        thread.join()
+
+    latency = session.latency
+    print(
+        f"{type(watcher).__name__}: {latency.count} saves, save to result "
+        f"p50 {latency.percentile(0.5) * 1000:.1f}ms, "
+        f"p95 {latency.percentile(0.95) * 1000:.1f}ms "
+        f"(debounce {args.debounce * 1000:.0f}ms)"
+    )
+    print(
+        f"peak RSS after 50 saves: {warm_rss:.1f} MB, at the end: {peak_rss_mb():.1f} MB"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Benchmark CR05 on wide tables.
+
+Generates a CREATE TABLE statement with N columns, each with a named DEFAULT
+constraint, followed by a SELECT and an INSERT over all columns. The file is
+parsed once per width and only the CR05 crawl is timed, so the numbers show
+how the rule itself scales with the column count.
+
+By default the constraint names are compliant. With ``--violating`` every
+column reports a violation; note that SQLFluff's own per-violation processing
+(locating the anchor in the tree) is linear in the number of siblings, so
+that mode measures SQLFluff as much as the rule.
+
+Usage:
+    python benchmarks/bench_wide_tables.py --widths 250 500 1000 2000
+"""
+
+import argparse
+import sys
+
+from benchlib import make_linter, time_rule
+
+
+def make_wide_table_sql(columns, violating=False):
+    """Build a statement set over a table with ``columns`` columns."""
+    names = [f"col_{i}" for i in range(columns)]
+    prefix = "default_" if violating else "df_"
+    column_defs = ",\n".join(
+        f"    {name} INT CONSTRAINT {prefix}{name} DEFAULT 0" for name in names
+    )
+    column_list = ", ".join(names)
+    return (
+        f"CREATE TABLE public.wide (\n{column_defs}\n);\n"
+        f"SELECT {column_list} FROM public.wide;\n"
+        f"INSERT INTO public.wide ({column_list}) SELECT {column_list} FROM public.wide;\n"
+    )
+
+
+def main():
+    """Run the wide table benchmark."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--widths", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--violating", action="store_true", help="Use non-compliant names."
+    )
+    args = parser.parse_args()
+
+    linter = make_linter("CR05")
+    (rule,) = linter.get_rulepack().rules
+
+    print(f"{'columns':>8} {'violations':>10} {'CR05 time':>10} {'us/column':>10}")
+    for width in args.widths:
+        elapsed, violations = time_rule(
+            linter, rule, make_wide_table_sql(width, args.violating), args.runs
+        )
+        print(
+            f"{width:>8} {violations:>10} {elapsed:>9.4f}s {elapsed / width * 1e6:>10.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
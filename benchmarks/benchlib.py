@@ -0,0 +1,42 @@
+"""Helpers shared by the benchmark scripts."""
+
+import time
+
+from sqlfluff.core import FluffConfig, Linter
+
+
+def make_linter(rules):
+    """Create a postgres linter with only the given rules enabled.
+
+    The large file and parse node limits are disabled, the generated inputs are
+    big on purpose.
+    """
+    config = FluffConfig(
+        configs={"core": {"large_file_skip_byte_limit": 0, "max_parse_nodes": 0}},
+        overrides={"dialect": "postgres", "rules": rules},
+    )
+    return Linter(config=config)
+
+
+def time_rule(linter, rule, sql, runs):
+    """Parse ``sql`` once and return the best time of ``runs`` rule crawls.
+
+    Returns:
+        A tuple of the best crawl time in seconds and the number of violations.
+    """
+    parsed = linter.parse_string(sql)
+    tree = parsed.tree
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        violations, _, _, _ = rule.crawl(
+            tree,
+            dialect=linter.dialect,
+            fix=False,
+            templated_file=parsed.parsed_variants[0].templated_file,
+            ignore_mask=None,
+            fname=None,
+            config=linter.config,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best, len(violations)
@@ -9,6 +9,16 @@ from typing import List, Type, Dict, Any
 from sqlfluff.core.plugin import hookimpl
 from sqlfluff.core.rules import BaseRule
 
+# The Python and async APIs, imported on first use so that loading the plugin
+# stays cheap.
+_API = {
+    "AsyncLinter": "aio",
+    "BatchLinter": "api",
+    "PoolFullError": "aio",
+    "Violation": "api",
+    "lint_many": "api",
+}
+
 
 @hookimpl
 def get_configs_info() -> Dict[str, Any]:
@@ -19,6 +29,18 @@ def get_configs_info() -> Dict[str, Any]:
                 "Expected prefix for PRIMARY KEY constraints. " "Example: pk_ "
             ),
         },
+        "schema_prefixes": {
+            "definition": (
+                "Comma separated schema:prefix overrides of expected_prefix. "
+                "Example: audit:aud_"
+            ),
+        },
+        "name_pattern": {
+            "definition": "Regular expression the whole object name must match.",
+        },
+        "max_name_bytes": {
+            "definition": "Maximum length of object names in bytes. Example: 63",
+        },
     }
 
 
@@ -26,32 +48,23 @@ def get_configs_info() -> Dict[str, Any]:
 def get_rules() -> List[Type[BaseRule]]:
     """Get plugin rules.
 
+    The rule modules are not imported here. SQLFluff receives lightweight
+    placeholder classes built from the metadata in
+    :mod:`custom_rules.registry`, and a rule module is only imported once
+    SQLFluff instantiates the rule, i.e. when the rule is selected.
+
     Returns:
         A list of rule classes to be registered with SQLFluff.
     """
-    # Import directly from modules to avoid registration conflicts
-    print("Loading rules from custom_rules...")
-
-    # Import rules directly
-    from custom_rules.constraints.CR01 import Rule_CR01
-    from custom_rules.constraints.CR02 import Rule_CR02
-    from custom_rules.constraints.CR03 import Rule_CR03
-    from custom_rules.constraints.CR04 import Rule_CR04
-    from custom_rules.constraints.CR05 import Rule_CR05
-    from custom_rules.functions.FN01 import Rule_FN01
-    from custom_rules.functions.FN02 import Rule_FN02
-    from custom_rules.views.VW01 import Rule_VW01
-
-    # Return the rules as a list
-    rules = [
-        Rule_CR01,
-        Rule_CR02,
-        Rule_CR03,
-        Rule_CR04,
-        Rule_CR05,
-        Rule_FN01,
-        Rule_FN02,
-        Rule_VW01,
-    ]
-    print(f"Loaded {len(rules)} rules: {[r.code for r in rules]}")
-    return rules
+    from custom_rules.registry import get_lazy_rules
+
+    return list(get_lazy_rules())
+
+
+def __getattr__(name: str) -> Any:
+    """Import the Python API lazily, see :mod:`custom_rules.api`."""
+    if name in _API:
+        import importlib
+
+        return getattr(importlib.import_module(f"custom_rules.{_API[name]}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
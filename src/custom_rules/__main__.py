@@ -0,0 +1,5 @@
+"""Allow running the command line interface with ``python -m custom_rules``."""
+
+from custom_rules.cli import cli
+
+cli(prog_name="sqlfluff-extended")
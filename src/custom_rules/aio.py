@@ -0,0 +1,292 @@
+"""Linting from asyncio code without blocking the event loop.
+
+Linting large DDL takes seconds of CPU, which would stall every other task of
+an asyncio service. :class:`AsyncLinter` runs the lints in a bounded pool of
+worker processes instead, each set up once with the rules (see
+:class:`custom_rules.api.BatchLinter`), and talks to them through pipes.
+
+The workers are processes of their own, started with ``python -m
+custom_rules.aio``, so a request which is cancelled or times out while a
+worker lints it is stopped for good: the worker is killed and another one
+started in its place. A bounded number of requests is admitted at once, and
+the requests beyond it are rejected with :class:`PoolFullError` rather than
+queued without end, so a service can shed load while it still answers.
+
+The protocol is one JSON document per line. A worker prints ``"ready"`` once
+its rules are set up, then reads requests ``{"sql": ..., "fname": ...}`` and
+answers each with its violations, one per line as a list of the
+:class:`custom_rules.api.Violation` fields, followed by ``{"done": true}`` or
+``{"error": message}``.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import Any, AsyncIterator, List, Optional, Sequence, Set, Union
+
+from custom_rules.api import Violation
+
+# Responses hold one violation per line, requests a whole file.
+_LINE_LIMIT = 1 << 30
+
+# Stands for the linter's timeout, None meaning no limit.
+_DEFAULT_TIMEOUT: Any = object()
+
+
+class PoolFullError(RuntimeError):
+    """Raised when an :class:`AsyncLinter` admitted as many requests as it can."""
+
+
+class _Worker:
+    """A worker process and the pipes to it."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+
+    @classmethod
+    async def start(cls, options: dict) -> "_Worker":
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "custom_rules.aio",
+            json.dumps(options),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=_LINE_LIMIT,
+        )
+        worker = cls(process)
+        try:
+            ready = await process.stdout.readline()
+        except BaseException:
+            worker.kill()
+            raise
+        if json.loads(ready or "null") != "ready":
+            worker.kill()
+            raise RuntimeError("The lint worker failed to start, see its stderr.")
+        return worker
+
+    async def send(self, request: dict) -> None:
+        self.process.stdin.write(json.dumps(request).encode("utf8") + b"\n")
+        await self.process.stdin.drain()
+
+    async def receive(self):
+        line = await self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("The lint worker exited, see its stderr.")
+        return json.loads(line)
+
+    def kill(self) -> None:
+        if self.process.returncode is None:
+            self.process.kill()
+
+
+class AsyncLinter:
+    """Lints SQL in a pool of worker processes, for asyncio code.
+
+    Use it as an async context manager, or call :meth:`start` and
+    :meth:`close`::
+
+        async with AsyncLinter(dialect="postgres", rules="CR01,VW01") as linter:
+            violations = await linter.lint(sql, timeout=10)
+
+    Args:
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        config_path: Optional configuration file, read after the
+            configuration found from the current directory.
+        fast: Whether to lint in the lexer-only fast mode (see
+            :class:`custom_rules.fast.FastLinter`).
+        workers: The number of worker processes. Defaults to the number of
+            CPUs.
+        max_pending: The number of requests admitted at once, being linted or
+            waiting for a worker. Defaults to four per worker.
+        timeout: The default time limit of a request, in seconds, waiting for
+            a worker included. None for no limit.
+    """
+
+    def __init__(
+        self,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        config_path: Optional[str] = None,
+        fast: bool = False,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        if not isinstance(rules, (str, type(None))):
+            rules = ",".join(rules)
+        self._options = {
+            "dialect": dialect,
+            "rules": rules,
+            "config_path": config_path,
+            "fast": fast,
+        }
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.timeout = timeout
+        self.pending = 0
+        self._idle: Optional[asyncio.Queue] = None
+        self._running: Set[_Worker] = set()
+        self._starting: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Start the worker processes and wait until they are ready."""
+        self._idle = asyncio.Queue()
+        workers = await asyncio.gather(
+            *(_Worker.start(self._options) for _ in range(self.workers)),
+            return_exceptions=True,
+        )
+        errors = [worker for worker in workers if isinstance(worker, BaseException)]
+        for worker in workers:
+            if not isinstance(worker, BaseException):
+                self._idle.put_nowait(worker)
+        if errors:
+            await self.close()
+            raise errors[0]
+
+    async def close(self) -> None:
+        """Stop the worker processes, failing the requests being linted."""
+        for task in self._starting:
+            task.cancel()
+        await asyncio.gather(*self._starting, return_exceptions=True)
+        workers = set(self._running)
+        while self._idle is not None and not self._idle.empty():
+            workers.add(self._idle.get_nowait())
+        for worker in workers:
+            worker.kill()
+        await asyncio.gather(*(worker.process.wait() for worker in workers))
+
+    async def __aenter__(self) -> "AsyncLinter":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a worker in an unknown state and start another in its place."""
+        worker.kill()
+        task = asyncio.ensure_future(self._restart())
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+
+    async def _restart(self) -> None:
+        try:
+            worker = await _Worker.start(self._options)
+        except RuntimeError:
+            # Failing to start once means the next start would fail too, the
+            # requests waiting for a worker end with their timeout.
+            return
+        self._idle.put_nowait(worker)
+
+    async def lint_iter(
+        self,
+        sql: str,
+        fname: str = "<string input>",
+        timeout: Optional[float] = _DEFAULT_TIMEOUT,
+    ) -> AsyncIterator[Violation]:
+        """Lint a SQL string, yielding the violations as the worker sends them.
+
+        Stopping the iteration before its end kills the worker linting the
+        string, like cancelling the task iterating does.
+
+        Args:
+            sql: The SQL to lint.
+            fname: The file name used for templating and reporting.
+            timeout: The time limit of the request in seconds, None for no
+                limit. Defaults to the linter's.
+
+        Raises:
+            PoolFullError: If ``max_pending`` requests are already admitted.
+            asyncio.TimeoutError: If the time limit is reached.
+            RuntimeError: If the lint failed in the worker.
+        """
+        if self._idle is None:
+            raise RuntimeError("The linter is not started.")
+        if self.pending >= self.max_pending:
+            raise PoolFullError(f"{self.pending} lint requests are pending.")
+        loop = asyncio.get_running_loop()
+        if timeout is _DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        deadline = None if timeout is None else loop.time() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - loop.time())
+
+        self.pending += 1
+        worker = None
+        finished = False
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), remaining())
+            self._running.add(worker)
+            await worker.send({"sql": sql, "fname": fname})
+            while True:
+                message = await asyncio.wait_for(worker.receive(), remaining())
+                if isinstance(message, list):
+                    yield Violation(*message)
+                    continue
+                finished = True
+                if "error" in message:
+                    raise RuntimeError(message["error"])
+                return
+        finally:
+            self.pending -= 1
+            if worker is not None:
+                self._running.discard(worker)
+                if finished:
+                    self._idle.put_nowait(worker)
+                else:
+                    self._replace(worker)
+
+    async def lint(
+        self,
+        sql: str,
+        fname: str = "<string input>",
+        timeout: Optional[float] = _DEFAULT_TIMEOUT,
+    ) -> List[Violation]:
+        """Lint a SQL string.
+
+        Takes the same arguments and raises the same errors as
+        :meth:`lint_iter`. Cancelling the awaiting task kills the worker
+        linting the string.
+
+        Returns:
+            The violations.
+        """
+        iterator = self.lint_iter(sql, fname, timeout)
+        try:
+            return [violation async for violation in iterator]
+        finally:
+            await iterator.aclose()
+
+
+def _serve(options: dict) -> None:
+    """Answer lint requests read from stdin, see the module docstring."""
+    # Keep stdout for the protocol, anything else printed goes to stderr.
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    from custom_rules.api import BatchLinter
+    from custom_rules.cli import _load_config
+
+    config = _load_config(options["dialect"], options["rules"], options["config_path"])
+    linter = BatchLinter(config=config, fast=options["fast"])
+    out.write('"ready"\n')
+    out.flush()
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            for violation in linter.lint_string(request["sql"], request["fname"]):
+                out.write(json.dumps(violation) + "\n")
+        except Exception as error:
+            out.write(json.dumps({"error": f"{type(error).__name__}: {error}"}))
+        else:
+            out.write('{"done": true}')
+        out.write("\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    _serve(json.loads(sys.argv[1]))
@@ -0,0 +1,154 @@
+"""Linting many files or SQL strings from Python.
+
+Building a ``Linter`` resolves the configuration, loads the dialect and
+instantiates the rules, which costs more than linting a small migration.
+:class:`BatchLinter` does it once and lints any number of inputs with the
+same rules, and :func:`lint_many` is a shortcut for a single batch.
+
+The violations are returned as :class:`Violation` records holding plain
+values only, so they can be kept, compared or serialised without holding on
+to parse trees.
+"""
+
+import os
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from sqlfluff.core import FluffConfig
+from sqlfluff.core.errors import (
+    SQLBaseError,
+    SQLLexError,
+    SQLLintError,
+    SQLParseError,
+    SQLTemplaterError,
+    SQLUnusedNoQaWarning,
+)
+
+from custom_rules.fast import FastLinter
+from custom_rules.prefilter import PrefilteredLinter
+
+Input = Union[str, "os.PathLike[str]"]
+
+
+class Violation(NamedTuple):
+    """A violation of a linted input.
+
+    ``source`` is the path of a linted file, or the index of a linted string
+    in the inputs. ``kind`` is ``"linting"`` for rule violations,
+    ``"templating"``, ``"lexing"`` or ``"parsing"`` for the errors of the
+    other steps and ``"noqa"`` for unused ``noqa`` comments.
+    """
+
+    source: Union[str, int]
+    code: str
+    name: str
+    kind: str
+    line: int
+    col: int
+    description: str
+
+
+# The kind of violation each class of errors reports.
+_KINDS = (
+    (SQLLintError, "linting"),
+    (SQLParseError, "parsing"),
+    (SQLLexError, "lexing"),
+    (SQLTemplaterError, "templating"),
+    (SQLUnusedNoQaWarning, "noqa"),
+)
+
+
+def _violation(source: Union[str, int], error: SQLBaseError) -> Violation:
+    rule = getattr(error, "rule", None)
+    return Violation(
+        source,
+        error.rule_code(),
+        rule.name if rule is not None else "",
+        next((kind for cls, kind in _KINDS if isinstance(error, cls)), "other"),
+        error.line_no,
+        error.line_pos,
+        error.desc(),
+    )
+
+
+class BatchLinter:
+    """Lints files and SQL strings with rules set up once.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        fast: Whether to lint in the lexer-only fast mode (see
+            :class:`custom_rules.fast.FastLinter`).
+        prefilter: Whether to skip the rule groups whose trigger keywords an
+            input does not contain (see :mod:`custom_rules.prefilter`).
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        fast: bool = False,
+        prefilter: bool = True,
+    ):
+        if fast:
+            self.linter = FastLinter(
+                config=config, dialect=dialect, rules=rules, prefilter=prefilter
+            )
+        else:
+            self.linter = PrefilteredLinter(
+                config=config, dialect=dialect, rules=rules, prefilter=prefilter
+            )
+        self.config = self.linter.config
+
+    def lint_string(self, sql: str, source: Union[str, int] = 0) -> List[Violation]:
+        """Lint a SQL string.
+
+        Args:
+            sql: The SQL to lint.
+            source: The source reported with the violations.
+        """
+        fname = source if isinstance(source, str) else "<string input>"
+        return [
+            _violation(source, error)
+            for error in self.linter.lint_string(sql, fname=fname)
+        ]
+
+    def lint_many(self, inputs: Iterable[Input]) -> Iterator[Violation]:
+        """Lint files, directories and SQL strings.
+
+        Path objects are always paths. Strings are paths if a file or
+        directory of that name exists, and SQL to lint otherwise. Directories
+        are searched like ``sqlfluff lint`` searches them.
+
+        Yields:
+            The violations of each input, in input order, as soon as the input
+            is linted.
+        """
+        for index, item in enumerate(inputs):
+            if isinstance(item, str) and not os.path.exists(item):
+                yield from self.lint_string(item, index)
+                continue
+            for path, errors in self.linter.lint_paths([os.fspath(item)]):
+                for error in errors:
+                    yield _violation(path, error)
+
+
+def lint_many(
+    inputs: Iterable[Input],
+    rules: Optional[Union[str, Sequence[str]]] = None,
+    config: Optional[FluffConfig] = None,
+    dialect: Optional[str] = None,
+    fast: bool = False,
+) -> Iterator[Violation]:
+    """Lint files, directories and SQL strings with the same rules.
+
+    The rules are set up once for all the inputs, see :class:`BatchLinter`.
+
+    Yields:
+        The violations of each input, in input order.
+    """
+    return BatchLinter(
+        config=config, dialect=dialect, rules=rules, fast=fast
+    ).lint_many(inputs)
@@ -0,0 +1,358 @@
+"""Persistent cache of lint results, keyed by file content.
+
+CI lints the same unchanged migrations on every run. :class:`ResultCache`
+keeps the violations of each linted file on disk, under a key hashing the
+file's content with everything else its violations depend on: the plugin and
+SQLFluff versions, the lint mode and the configuration applying to the file
+(its dialect, rule selection and rule options such as ``expected_prefix``).
+:class:`CachedLinter` looks each file up before linting it, so an unchanged
+file is read and hashed but neither parsed nor linted.
+
+Each entry is a small JSON file named after its key. Entries are written to a
+temporary file first and renamed into place, so concurrent writers never leave
+a partial entry, and readers only ever see complete ones. The cache is capped
+in size: reading an entry marks it as used by touching its modification time,
+and once a run wrote new entries, the least recently used ones are evicted
+until the cache fits its cap again. An entry which cannot be written, e.g. as
+the cache directory is not writable, is skipped: the lint goes on as if the
+cache had missed. The results can also be shared between machines through a
+remote cache, see :mod:`custom_rules.remote`.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import sqlfluff
+from sqlfluff.core.errors import SQLBaseError
+
+from custom_rules import __version__
+from custom_rules.configs import config_fingerprint
+
+CACHE_DIR = ".sqlfluff-extended-cache"
+DEFAULT_MAX_BYTES = 256 << 20
+
+# Temporary files older than this were left by writers which did not finish.
+_STALE_TEMP_SECONDS = 3600
+
+_CACHEDIR_TAG = (
+    "Signature: 8a477f597d28d172789f06886806bc55\n"
+    "# This file is a cache directory tag created by sqlfluff-extended.\n"
+)
+
+
+class CacheStatistics:
+    """Counters of a run using the result cache.
+
+    ``write_errors`` counts the entries which could not be stored, e.g. on a
+    read-only or full volume.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_errors = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"CacheStatistics(hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions}, write_errors={self.write_errors})"
+        )
+
+
+class CachedViolation:
+    """A violation read from the cache.
+
+    It has the attributes and methods of ``SQLBaseError`` the command line
+    reports use.
+    """
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: Dict):
+        self.record = record
+
+    @property
+    def line_no(self) -> int:
+        return self.record["start_line_no"]
+
+    @property
+    def line_pos(self) -> int:
+        return self.record["start_line_pos"]
+
+    def rule_code(self) -> str:
+        return self.record["code"]
+
+    def desc(self) -> str:
+        return self.record["description"]
+
+    def to_dict(self) -> Dict:
+        return dict(self.record)
+
+
+class CacheEntry(NamedTuple):
+    """An entry of the cache directory."""
+
+    path: str
+    size: int
+    mtime: float
+
+
+class ResultCache:
+    """The violations of linted files, stored in a directory.
+
+    Args:
+        directory: The cache directory, created when first written to.
+        max_bytes: The size the cache is evicted down to after a run.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.statistics = CacheStatistics()
+        self.written = False
+        # The last error writing an entry, see save().
+        self.error: Optional[OSError] = None
+
+    @staticmethod
+    def key(content: bytes, fingerprint: str, mode: str) -> str:
+        """Return the key of a file's violations.
+
+        Args:
+            content: The content of the file.
+            fingerprint: The fingerprint of the configuration applying to the
+                file, see :func:`custom_rules.configs.config_fingerprint`.
+            mode: The lint mode, as the violations may differ between modes.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        header = "\0".join((__version__, sqlfluff.__version__, mode, fingerprint))
+        digest.update(header.encode("utf8") + b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + suffix)
+
+    def read(self, key: str, suffix: str = ".json"):
+        """Return the JSON data of an entry, None when there is none.
+
+        Args:
+            key: The key of the entry.
+            suffix: The suffix of the entry's file, which tells the kinds of
+                entries sharing the directory apart.
+        """
+        path = self._path(key, suffix)
+        try:
+            with open(path, encoding="utf8") as f:
+                data = json.load(f)
+            # The modification time is the time of last use.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return data
+
+    def write(self, key: str, data, suffix: str = ".json") -> None:
+        """Store the JSON data of an entry, see :meth:`read`."""
+        path = self._path(key, suffix)
+        self._initialise()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf8") as f:
+                json.dump(data, f)
+            os.replace(temp, path)
+        except BaseException:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+        self.written = True
+
+    def save(self, key: str, data, suffix: str = ".json") -> bool:
+        """Store the JSON data of an entry, unless it cannot be written.
+
+        Unlike :meth:`write`, an error writing the entry is counted and kept
+        in :attr:`error` instead of raised, as the cache is only an
+        optimisation.
+
+        Returns:
+            Whether the entry was stored.
+        """
+        try:
+            self.write(key, data, suffix)
+        except OSError as error:
+            self.statistics.write_errors += 1
+            self.error = error
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[List[CachedViolation]]:
+        """Return the cached violations of a key, None when not cached."""
+        records = self.read(key)
+        if records is None:
+            self.statistics.misses += 1
+            return None
+        self.statistics.hits += 1
+        return [CachedViolation(record) for record in records]
+
+    def put(self, key: str, violations: Iterable[SQLBaseError]) -> None:
+        """Store the violations of a key, unless they cannot be written."""
+        self.save(key, [v.to_dict() for v in violations])
+
+    def _initialise(self) -> None:
+        """Mark the directory as a cache, for backup tools and git."""
+        if os.path.isdir(self.directory):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for name, text in (("CACHEDIR.TAG", _CACHEDIR_TAG), (".gitignore", "*\n")):
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(text)
+
+    def entries(self) -> List[CacheEntry]:
+        """Return the entries of the cache, temporary files included."""
+        entries = []
+        try:
+            buckets = [e for e in os.scandir(self.directory) if e.is_dir()]
+        except FileNotFoundError:
+            return entries
+        for bucket in buckets:
+            try:
+                for entry in os.scandir(bucket.path):
+                    stat = entry.stat()
+                    entries.append(CacheEntry(entry.path, stat.st_size, stat.st_mtime))
+            except FileNotFoundError:
+                # Removed by a concurrent run while listed.
+                continue
+        return entries
+
+    def prune(self) -> int:
+        """Evict the least recently used entries until the cache fits its cap.
+
+        Returns:
+            The number of entries evicted.
+        """
+        entries = self.entries()
+        now = time.time()
+        size = sum(entry.size for entry in entries)
+        evicted = 0
+        for entry in sorted(entries, key=lambda entry: entry.mtime):
+            if entry.path.endswith(".tmp"):
+                # Another run may still be writing recent temporary files.
+                if now - entry.mtime < _STALE_TEMP_SECONDS:
+                    continue
+            elif size <= self.max_bytes:
+                continue
+            else:
+                evicted += 1
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            size -= entry.size
+        self.statistics.evictions += evicted
+        return evicted
+
+    def clear(self) -> int:
+        """Remove every entry.
+
+        Returns:
+            The number of entries removed.
+        """
+        entries = self.entries()
+        for entry in entries:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        return len(entries)
+
+
+class CachedLinter:
+    """Looks the files up in a result cache before linting them.
+
+    Args:
+        linter: The linter of a mode, with ``files`` and ``lint_path``
+            methods.
+        cache: The result cache.
+        mode: The lint mode, part of the keys.
+        remote: Optional remote cache, looked up for the files the result
+            cache misses (see :class:`custom_rules.remote.RemoteCache`).
+    """
+
+    def __init__(self, linter, cache: ResultCache, mode: str, remote=None):
+        self.linter = linter
+        self.cache = cache
+        self.mode = mode
+        self.remote = remote
+        self.config = linter.config
+        self.prefilter = linter.prefilter
+        # The results are keyed on the configuration they are linted with: that
+        # of the directory of each file, from the configurations the linter
+        # loads, or the root configuration for the linters without them.
+        self.configs = getattr(linter, "configs", None)
+        self._fingerprint = config_fingerprint(self.config)
+
+    def _key(self, path: str) -> str:
+        fingerprint = self._fingerprint
+        if self.configs is not None:
+            fingerprint = self.configs.fingerprint(path)
+        with open(path, "rb") as f:
+            return self.cache.key(f.read(), fingerprint, self.mode)
+
+    def lint_path(self, path: str) -> List:
+        """Lint a single file, unless its violations are cached."""
+        key = self._key(path)
+        violations = self.cache.get(key)
+        if violations is None:
+            violations = self.linter.lint_path(path)
+            self.cache.put(key, violations)
+        return violations
+
+    def _lint_batch(self, paths: List[str]) -> Iterator[Tuple[str, List]]:
+        """Lint files, looking the local cache misses up in the remote cache."""
+        keys = [self._key(path) for path in paths]
+        found = [self.cache.get(key) for key in keys]
+        remote = self.remote.fetch(
+            [key for key, violations in zip(keys, found) if violations is None]
+        )
+        linted = {}
+        for path, key, violations in zip(paths, keys, found):
+            if violations is None:
+                records = remote.get(key)
+                if records is None:
+                    records = [v.to_dict() for v in self.linter.lint_path(path)]
+                    # Identical files of the batch share the entry.
+                    remote[key] = linted[key] = records
+                self.cache.save(key, records)
+                violations = [CachedViolation(record) for record in records]
+            yield path, violations
+        self.remote.store(linted)
+
+    def lint_paths(self, paths: Iterable[str]) -> Iterator[Tuple[str, List]]:
+        """Lint files and directories, as the wrapped linter finds them.
+
+        With a remote cache, the files are looked up and their results sent
+        in batches. The cache is pruned once the files are linted.
+
+        Yields:
+            Tuples of the file path and its violations.
+        """
+        try:
+            files = iter(self.linter.files(paths))
+            if self.remote is None:
+                for path in files:
+                    yield path, self.lint_path(path)
+                return
+            batch = list(islice(files, self.remote.batch_size))
+            while batch:
+                yield from self._lint_batch(batch)
+                batch = list(islice(files, self.remote.batch_size))
+        finally:
+            if self.cache.written:
+                self.cache.prune()
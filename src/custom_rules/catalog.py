@@ -0,0 +1,519 @@
+"""Linting the names of a PostgreSQL catalog export.
+
+The DDL of a production database is not always in version control, but its
+catalog holds every name the rules check. :class:`CatalogLinter` reads exports
+of ``pg_constraint``, ``pg_proc`` and ``pg_class`` (see the README for the
+export queries) and applies the naming rules of the plugin to the names
+directly, with the prefixes and options configured for the rules and the same
+rule codes and messages as ``sqlfluff lint``. Nothing is parsed and no
+database connection is needed.
+
+The names are collected by object kind and checked in batches
+with :meth:`custom_rules.matcher.NameMatcher.mismatches`, which finds the
+names lacking a prefix in a whole batch with one regular expression scan, so
+millions of objects are checked in seconds. The naming specs checking each
+kind of object are those the rules use on the DDL model (see
+:mod:`custom_rules.naming`).
+
+The catalog does not record how an object was declared, so:
+
+- constraints are checked whether they were declared on the table or on a
+  column, and CR05 does not apply, PostgreSQL discarding the names of DEFAULT
+  constraints;
+- functions are checked whatever their schema, except for the system schemas,
+  so exports should leave out the functions of extensions;
+- the schema of every object is known, so ``schema_prefixes`` applies to
+  objects which the DDL did not qualify.
+"""
+
+import csv
+import json
+import os
+from operator import itemgetter
+from typing import (
+    IO,
+    AbstractSet,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlfluff.core import FluffConfig, Linter
+
+from custom_rules.matcher import NameMatcher
+from custom_rules.model import ConstraintKind, ConstraintObject, ObjectKind
+from custom_rules.naming import NAMING_SPECS, SPECS_BY_KIND, NamingSpec
+
+CATALOGS = ("pg_constraint", "pg_proc", "pg_class")
+
+DEFAULT_BATCH_SIZE = 100_000
+
+_CONSTRAINT_TYPES = {
+    "p": ConstraintKind.PRIMARY_KEY,
+    "f": ConstraintKind.FOREIGN_KEY,
+    "c": ConstraintKind.CHECK,
+    "u": ConstraintKind.UNIQUE,
+}
+
+# Functions and window functions; procedures and aggregates are created with
+# other statements, which the rules do not check.
+_FUNCTION_KINDS = frozenset({"f", "w"})
+
+# Argument modes of the columns of RETURNS TABLE, which are not parameters.
+_TABLE_COLUMN_MODE = "t"
+
+_RELATION_KINDS = {"v": ObjectKind.VIEW, "m": ObjectKind.MATERIALIZED_VIEW}
+
+# The required and optional columns read from the export of each catalog.
+_COLUMNS = {
+    "pg_constraint": (("nspname", "conname", "contype"), ("relname",)),
+    "pg_proc": (("nspname", "proname"), ("prokind", "proargnames", "proargmodes")),
+    "pg_class": (("nspname", "relname", "relkind"), ()),
+}
+
+# The values of the columns of a row, in the order of ``_COLUMNS``.
+Record = Tuple[Any, ...]
+
+# Identifies an object across two exports or dumps: its kind, schema, owner
+# (the table of a constraint, the function of a parameter, otherwise None)
+# and name.
+ObjectKey = Tuple[ObjectKind, Optional[str], Optional[str], str]
+
+
+class CatalogViolation(NamedTuple):
+    """A naming violation found in a catalog export.
+
+    ``row`` is the line of the record in a CSV export, and its position from 1
+    in the records of the catalog in a JSON export. ``object`` is the qualified
+    name of the object, e.g. ``public.person.person_pk`` for a constraint of
+    ``public.person``, or of the function of a parameter.
+    """
+
+    code: str
+    description: str
+    source: str
+    catalog: str
+    row: int
+    object: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the violation as a JSON serializable dict."""
+        return self._asdict()
+
+
+def _is_system_schema(schema: Optional[str]) -> bool:
+    return not schema or schema.startswith("pg_") or schema == "information_schema"
+
+
+def _parse_array(value: Any) -> List[Optional[str]]:
+    """Read a text array, as a JSON list or a PostgreSQL array literal.
+
+    Args:
+        value: The exported value, e.g. ``["a", "b"]`` or ``{a,"b c"}``.
+
+    Returns:
+        The items, None for NULL items. Empty for a NULL or empty value.
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    text = str(value).strip()
+    if not text:
+        return []
+    if not (text.startswith("{") and text.endswith("}")):
+        raise ValueError(f"Invalid array value '{text}'.")
+    if '"' not in text:
+        if len(text) == 2:
+            return []
+        return [
+            None if item.upper() == "NULL" else item
+            for item in map(str.strip, text[1:-1].split(","))
+        ]
+    items: List[Optional[str]] = []
+    pos = 1
+    end = len(text) - 1
+    while pos < end:
+        if text[pos] == '"':
+            chars = []
+            pos += 1
+            while pos < end and text[pos] != '"':
+                if text[pos] == "\\":
+                    pos += 1
+                chars.append(text[pos])
+                pos += 1
+            items.append("".join(chars))
+            pos += 1
+        else:
+            comma = text.find(",", pos, end)
+            item_end = end if comma < 0 else comma
+            item = text[pos:item_end].strip()
+            items.append(None if item.upper() == "NULL" else item)
+            pos = item_end
+        # Skip the separator.
+        pos += 1
+    return items
+
+
+def _catalog_of(path: str) -> str:
+    """Find which catalog a file exports from its name."""
+    name = os.path.basename(path).lower()
+    catalog = next((catalog for catalog in CATALOGS if catalog in name), None)
+    if catalog is None:
+        raise ValueError(
+            f"{path}: cannot tell the catalog from the file name, which should "
+            f"contain one of {', '.join(CATALOGS)}."
+        )
+    return catalog
+
+
+def _csv_rows(f: IO[str], path: str, catalog: str) -> Iterator[Tuple[int, Record]]:
+    """Read the rows of a CSV export, skipping blank lines.
+
+    Raises:
+        ValueError: If a column is missing, from the header or from a row.
+    """
+    reader = csv.reader(f)
+    header = next(reader, [])
+    required, optional = _COLUMNS[catalog]
+    for column in required:
+        if column not in header:
+            raise ValueError(f"{path}: the export has no '{column}' column.")
+    # Missing optional columns read an empty value added to each row.
+    indexes = [
+        header.index(column) if column in header else len(header)
+        for column in required + optional
+    ]
+    padded = len(header) in indexes
+    get = itemgetter(*indexes)
+    for values in reader:
+        if not values:
+            continue
+        if len(values) < len(header):
+            raise ValueError(
+                f"{path}:{reader.line_num}: the row has {len(values)} values, "
+                f"the header {len(header)}."
+            )
+        if padded:
+            values.append("")
+        yield reader.line_num, get(values)
+
+
+def _json_rows(
+    records: List[Dict[str, Any]], path: str, catalog: str
+) -> Iterator[Tuple[int, Record]]:
+    """Read the rows of the records of a JSON export."""
+    required, optional = _COLUMNS[catalog]
+    columns = required + optional
+    for row, record in enumerate(records, start=1):
+        for column in required:
+            if column not in record:
+                raise ValueError(f"{path}: the export has no '{column}' column.")
+        yield row, tuple(record.get(column) for column in columns)
+
+
+def iter_catalog_sections(
+    path: str,
+) -> Iterator[Tuple[str, Iterator[Tuple[int, Record]]]]:
+    """Read the rows of a catalog export.
+
+    CSV exports need a header row and a file name containing the name of the
+    catalog, e.g. ``pg_proc.csv``. JSON exports are either a list of records
+    named the same way, or an object holding the list of records of each
+    catalog under its name.
+
+    Yields:
+        Tuples of a catalog name and the rows exported from it, each row being
+        a tuple of the row number and the values of the catalog columns (see
+        ``_COLUMNS``). The rows must be read before the next section.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            sections = [
+                (catalog, data[catalog]) for catalog in CATALOGS if catalog in data
+            ]
+        else:
+            sections = [(_catalog_of(path), data)]
+        for catalog, records in sections:
+            yield catalog, _json_rows(records, path, catalog)
+        return
+
+    catalog = _catalog_of(path)
+    with open(path, encoding="utf8", newline="") as f:
+        yield catalog, _csv_rows(f, path, catalog)
+
+
+# The catalog each kind of object is read from.
+_CATALOG_OF_KIND = {
+    ObjectKind.CONSTRAINT: "pg_constraint",
+    ObjectKind.FUNCTION: "pg_proc",
+    ObjectKind.PARAMETER: "pg_proc",
+    ObjectKind.VIEW: "pg_class",
+    ObjectKind.MATERIALIZED_VIEW: "pg_class",
+}
+
+
+def _checking_specs(
+    object_kind: ObjectKind, constraint_kind: Optional[ConstraintKind]
+) -> Tuple[NamingSpec, ...]:
+    """Return the naming specs checking the catalog objects of a kind.
+
+    The predicates of the constraint specs only look at the constraint kind,
+    so they are evaluated once, on an object standing for all constraints of
+    the kind.
+    """
+    probe = ConstraintObject(None, None, "", constraint_kind, None, None)
+    return tuple(
+        spec
+        for spec in SPECS_BY_KIND.get(object_kind, ())
+        if spec.predicate is None or spec.predicate(probe)
+    )
+
+
+def _qualified_name(kind: ObjectKind, entry: Tuple[str, str, int, str]) -> str:
+    """Return the qualified name of an object, or of the function of a
+    parameter."""
+    name, schema, _, owner = entry
+    if kind is ObjectKind.PARAMETER:
+        return f"{schema}.{owner}"
+    if kind is ObjectKind.CONSTRAINT:
+        return f"{schema}.{owner}.{name}"
+    return f"{schema}.{name}"
+
+
+class _Batch:
+    """The names of the catalog objects checked at once.
+
+    Each object is stored as a tuple of its name, schema, row and owner, i.e.
+    the table of a constraint and the function of a parameter. The objects
+    are grouped by ``contype`` and ``relkind`` so that each group is checked
+    by the same rules.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Remove the objects of the batch, once checked."""
+        self.constraints: Dict[str, List[tuple]] = {
+            contype: [] for contype in _CONSTRAINT_TYPES
+        }
+        self.functions: List[tuple] = []
+        self.parameters: List[tuple] = []
+        self.relations: Dict[str, List[tuple]] = {
+            relkind: [] for relkind in _RELATION_KINDS
+        }
+        self.size = 0
+
+    def groups(
+        self,
+    ) -> Iterator[Tuple[ObjectKind, Optional[ConstraintKind], List[tuple]]]:
+        """Yield the object kind, constraint kind and objects of each group."""
+        for contype, entries in self.constraints.items():
+            yield ObjectKind.CONSTRAINT, _CONSTRAINT_TYPES[contype], entries
+        yield ObjectKind.FUNCTION, None, self.functions
+        yield ObjectKind.PARAMETER, None, self.parameters
+        for relkind, entries in self.relations.items():
+            yield _RELATION_KINDS[relkind], None, entries
+
+    def keys(self) -> Iterator[ObjectKey]:
+        """Yield the key of each object of the batch."""
+        for kind, _, entries in self.groups():
+            for name, schema, _, owner in entries:
+                yield kind, schema, owner, name
+
+    def discard(self, keys: AbstractSet[ObjectKey]):
+        """Remove the objects whose key is in ``keys``."""
+        for kind, _, entries in self.groups():
+            kept = [
+                entry
+                for entry in entries
+                if (kind, entry[1], entry[3], entry[0]) not in keys
+            ]
+            self.size -= len(entries) - len(kept)
+            entries[:] = kept
+
+    def add_constraint(self, row: int, values: Record):
+        """Add a ``pg_constraint`` row, if the rules check it."""
+        schema, name, contype, table = values
+        entries = self.constraints.get(contype)
+        # Constraints of domains have no table.
+        if entries is None or not table or _is_system_schema(schema):
+            return
+        entries.append((name or "", schema, row, table))
+        self.size += 1
+
+    def add_function(self, row: int, values: Record):
+        """Add a ``pg_proc`` row and its parameters, if the rules check them."""
+        schema, name, prokind, arg_names, arg_modes = values
+        if (prokind or "f") not in _FUNCTION_KINDS or _is_system_schema(schema):
+            return
+        name = name or ""
+        self.functions.append((name, schema, row, None))
+        self.size += 1
+        arg_names = _parse_array(arg_names)
+        if not arg_names:
+            return
+        arg_modes = _parse_array(arg_modes)
+        for i, arg_name in enumerate(arg_names):
+            if arg_name and (i >= len(arg_modes) or arg_modes[i] != _TABLE_COLUMN_MODE):
+                self.parameters.append((arg_name, schema, row, name))
+                self.size += 1
+
+    def add_relation(self, row: int, values: Record):
+        """Add a ``pg_class`` row, if the rules check it."""
+        schema, name, relkind = values
+        entries = self.relations.get(relkind)
+        if entries is None or _is_system_schema(schema):
+            return
+        entries.append((name or "", schema, row, None))
+        self.size += 1
+
+
+class CatalogLinter:
+    """Applies the naming rules to the names of catalog exports.
+
+    Args:
+        config: The SQLFluff configuration, which holds the rule options.
+            Defaults to the configuration found from the current directory.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        batch_size: The number of names checked at once.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if isinstance(rules, str):
+            rules = [rule.strip() for rule in rules.split(",")]
+        linter = Linter(config=config, rules=rules)
+        self.config = linter.config
+        # The naming rules compile their matcher from the rule options.
+        self.matchers: Dict[str, NameMatcher] = {
+            rule.code: rule.matcher
+            for rule in linter.get_rulepack().rules
+            if rule.code in NAMING_SPECS
+        }
+        self.batch_size = batch_size
+
+    def _evaluate(self, batch: _Batch, source: str) -> List[CatalogViolation]:
+        """Check the names of a batch, rule by rule."""
+        violations = []
+        for kind, constraint_kind, entries in batch.groups():
+            if not entries:
+                continue
+            names = [entry[0] for entry in entries]
+            schemas = [entry[1] for entry in entries]
+            for spec in _checking_specs(kind, constraint_kind):
+                matcher = self.matchers.get(spec.code)
+                if matcher is None:
+                    continue
+                for i, mismatch in matcher.mismatches(names, schemas):
+                    violations.append(
+                        CatalogViolation(
+                            spec.code,
+                            f"{spec.label} '{names[i]}' {mismatch}.",
+                            source,
+                            _CATALOG_OF_KIND[kind],
+                            entries[i][2],
+                            _qualified_name(kind, entries[i]),
+                        )
+                    )
+        return violations
+
+    def _iter_batches(self, path: str) -> Iterator[_Batch]:
+        """Read the objects of an export file, a batch at a time.
+
+        The same batch is yielded each time, and cleared once used.
+        """
+        batch = _Batch()
+        adders = {
+            "pg_constraint": batch.add_constraint,
+            "pg_proc": batch.add_function,
+            "pg_class": batch.add_relation,
+        }
+        for catalog, rows in iter_catalog_sections(path):
+            add = adders[catalog]
+            for row, values in rows:
+                add(row, values)
+                if batch.size >= self.batch_size:
+                    yield batch
+                    batch.clear()
+        if batch.size:
+            yield batch
+
+    def object_keys(self, paths: Iterable[str]) -> Set[ObjectKey]:
+        """Return the keys of the objects the rules check in export files."""
+        keys: Set[ObjectKey] = set()
+        for path in expand_export_paths(paths):
+            for batch in self._iter_batches(path):
+                keys.update(batch.keys())
+        return keys
+
+    def lint_path(
+        self, path: str, exclude: AbstractSet[ObjectKey] = frozenset()
+    ) -> List[CatalogViolation]:
+        """Lint a single export file.
+
+        Args:
+            path: The path of the export.
+            exclude: The keys of objects not to check, see
+                :meth:`object_keys`.
+
+        Returns:
+            The violations, sorted by catalog and row.
+        """
+        violations: List[CatalogViolation] = []
+        for batch in self._iter_batches(path):
+            if exclude:
+                batch.discard(exclude)
+            if batch.size:
+                violations += self._evaluate(batch, path)
+        violations.sort(key=lambda v: (v.catalog, v.row, v.code, v.description))
+        return violations
+
+    def lint_paths(
+        self, paths: Iterable[str], exclude: AbstractSet[ObjectKey] = frozenset()
+    ) -> Iterator[Tuple[str, List[CatalogViolation]]]:
+        """Lint export files and directories of export files.
+
+        Directories are searched for ``.csv`` and ``.json`` files, not
+        recursively.
+
+        Args:
+            paths: The export files and directories.
+            exclude: The keys of objects not to check, see
+                :meth:`object_keys`.
+
+        Yields:
+            Tuples of the file path and its violations.
+        """
+        for path in expand_export_paths(paths):
+            yield path, self.lint_path(path, exclude)
+
+
+def expand_export_paths(paths: Iterable[str]) -> List[str]:
+    """Expand directories into the export files they contain, sorted."""
+    files = []
+    for path in map(os.path.normpath, paths):
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        files.extend(
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if name.lower().endswith((".csv", ".json"))
+        )
+    return files
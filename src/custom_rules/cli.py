@@ -0,0 +1,669 @@
+"""Command line interface of the plugin.
+
+The ``sqlfluff-extended`` command complements ``sqlfluff`` with modes that only
+make sense for the naming rules of this plugin, such as linting the lexed
+tokens without parsing (``lint --fast``), linting the names of a catalog
+export (``catalog``) or the objects added between two schema snapshots
+(``diff``).
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import click
+from sqlfluff.core import FluffConfig
+from sqlfluff.core.errors import SQLBaseError
+
+from custom_rules import __version__
+from custom_rules.cache import (
+    CACHE_DIR,
+    DEFAULT_MAX_BYTES,
+    CachedLinter,
+    ResultCache,
+)
+from custom_rules.configs import config_fingerprint
+
+
+def _load_config(
+    dialect: Optional[str], rules: Optional[str], extra_config_path: Optional[str]
+) -> FluffConfig:
+    """Load the SQLFluff configuration like ``sqlfluff lint`` does."""
+    overrides = {}
+    if dialect:
+        overrides["dialect"] = dialect
+    if rules:
+        overrides["rules"] = rules
+    return FluffConfig.from_root(
+        extra_config_path=extra_config_path, overrides=overrides
+    )
+
+
+def _make_linter(
+    config: FluffConfig,
+    fast: bool,
+    header_only: bool,
+    stream: bool,
+    pg_dump: bool,
+    prefilter: bool,
+    skip_files: bool = False,
+    diff_base: Optional[str] = None,
+):
+    """Build the linter of a mode.
+
+    Every linter has a ``lint_paths`` method yielding the path and violations
+    of each file, and a ``prefilter`` attribute (see
+    :mod:`custom_rules.prefilter`), None when it is disabled.
+    """
+    if diff_base is not None:
+        # Lints the statements touched by the changes since a git revision.
+        from custom_rules.hunks import HunkLinter
+
+        return HunkLinter(
+            config=config,
+            base=diff_base,
+            fast=fast,
+            header_only=header_only,
+            prefilter=prefilter,
+            skip_files=skip_files,
+        )
+    if stream or pg_dump:
+        # Reads and lints the files one statement at a time.
+        from custom_rules.streaming import StreamingLinter
+
+        return StreamingLinter(
+            config=config,
+            fast=fast,
+            header_only=header_only,
+            pg_dump=pg_dump,
+            prefilter=prefilter,
+            skip_files=skip_files,
+        )
+    if fast or header_only:
+        # Lints the lexed tokens only.
+        from custom_rules.fast import FastLinter
+
+        return FastLinter(
+            config=config,
+            header_only=header_only,
+            prefilter=prefilter,
+            skip_files=skip_files,
+        )
+    # Lints with the parser, i.e. like ``sqlfluff lint``.
+    from custom_rules.prefilter import PrefilteredLinter
+
+    return PrefilteredLinter(config=config, prefilter=prefilter, skip_files=skip_files)
+
+
+def _format_human(path: str, violations: List[SQLBaseError]) -> List[str]:
+    return [
+        f"{path}:{v.line_no}:{v.line_pos}: {v.rule_code()} {v.desc()}"
+        for v in violations
+    ]
+
+
+def _format_catalog_human(path: str, violations: List) -> List[str]:
+    return [
+        f"{path}:{v.row}: {v.code} {v.description} [{v.catalog} {v.object}]"
+        for v in violations
+    ]
+
+
+_cache_dir_option = click.option(
+    "--cache-dir",
+    default=CACHE_DIR,
+    show_default=True,
+    envvar="SQLFLUFF_EXTENDED_CACHE_DIR",
+    help="The result cache directory.",
+)
+
+
+@click.group()
+@click.version_option(__version__)
+def cli():
+    """Extra commands of the SQLFluff extended rules pack."""
+
+
+@cli.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--fast",
+    is_flag=True,
+    help=(
+        "Run the plugin rules on the lexed tokens without parsing. Other rules "
+        "and parse errors are not reported."
+    ),
+)
+@click.option(
+    "--header-only",
+    is_flag=True,
+    help=(
+        "Only lex the statement headers, skipping view queries and function "
+        "bodies. Implies --fast."
+    ),
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help=(
+        "Read and lint the files one statement at a time, for files too large "
+        "to lint as a whole."
+    ),
+)
+@click.option(
+    "--pg-dump",
+    is_flag=True,
+    help=(
+        "The files are pg_dump output: skip the COPY data blocks and INSERT "
+        "statements. Implies --stream."
+    ),
+)
+@click.option(
+    "--no-prefilter",
+    is_flag=True,
+    help=(
+        "Run every rule on every file, instead of skipping the rule groups "
+        "whose trigger keywords a file does not contain."
+    ),
+)
+@click.option(
+    "--skip-untriggered",
+    is_flag=True,
+    help=(
+        "Skip the files left without any rule to run by the prefilter, whose "
+        "parse errors are then not reported."
+    ),
+)
+@click.option(
+    "--statistics",
+    is_flag=True,
+    help="Print how many files and rule runs the prefilter skipped to stderr.",
+)
+@click.option(
+    "--changed",
+    is_flag=True,
+    help=(
+        "Only lint the statements touched by the changes since --diff-base, "
+        "and report the violations on changed lines."
+    ),
+)
+@click.option(
+    "--diff-base",
+    default="HEAD",
+    show_default=True,
+    help="The git revision or range the changes are read against, e.g. main...",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Lint every file, instead of reusing the cached results of unchanged files.",
+)
+@_cache_dir_option
+@click.option(
+    "--cache-max-size",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_BYTES >> 20,
+    show_default=True,
+    help="The size of the result cache in MB, beyond which the least recently used results are evicted.",
+)
+@click.option(
+    "--remote-cache",
+    default=None,
+    envvar="SQLFLUFF_EXTENDED_REMOTE_CACHE",
+    help=(
+        "A cache shared between machines, looked up for the files the result "
+        "cache misses: the URL of an HTTP cache server or a shared directory."
+    ),
+)
+@click.option(
+    "--remote-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=2.0,
+    show_default=True,
+    help="The seconds a remote cache request may take before it is given up.",
+)
+@click.option("--dialect", default=None, help="The SQL dialect, e.g. postgres.")
+@click.option("--rules", default=None, help="Comma separated rules to run.")
+@click.option(
+    "--config",
+    "extra_config_path",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="An additional configuration file, as for sqlfluff.",
+)
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(["human", "json"]),
+    default="human",
+    help="The output format.",
+)
+def lint(
+    paths,
+    fast,
+    header_only,
+    stream,
+    pg_dump,
+    no_prefilter,
+    skip_untriggered,
+    statistics,
+    changed,
+    diff_base,
+    no_cache,
+    cache_dir,
+    cache_max_size,
+    remote_cache,
+    remote_timeout,
+    dialect,
+    rules,
+    extra_config_path,
+    format_,
+):
+    """Lint SQL files and directories.
+
+    The results of unchanged files are read from a cache, see the cache
+    command, and from a remote cache if given. Exits with status 1 when
+    violations are found.
+    """
+    if changed and (stream or pg_dump):
+        raise click.UsageError("--changed cannot be combined with --stream.")
+    config = _load_config(dialect, rules, extra_config_path)
+    linter = _make_linter(
+        config,
+        fast,
+        header_only,
+        stream,
+        pg_dump,
+        prefilter=not no_prefilter,
+        skip_files=skip_untriggered,
+        diff_base=diff_base if changed else None,
+    )
+    mode = "pg_dump" if pg_dump else "stream" if stream else "lint"
+    if header_only or fast:
+        mode += "+header_only" if header_only else "+fast"
+    if skip_untriggered and not no_prefilter:
+        mode += "+skip"
+    cache = facts = dedup = remote = None
+    if not (no_cache or changed):
+        # The results of --changed depend on the changes, not only the files.
+        cache = ResultCache(cache_dir, max_bytes=cache_max_size << 20)
+    if stream or pg_dump:
+        # Reuses the violations of repeated statements, across runs if cached.
+        from custom_rules.dedup import StatementCache
+
+        dedup = linter.statement_cache = StatementCache(
+            config_fingerprint(config), mode, cache
+        )
+    if cache is not None:
+        if mode == "lint":
+            # Relints files after configuration changes without parsing them.
+            from custom_rules.facts import FactsLinter
+
+            linter = facts = FactsLinter(linter, cache)
+        if remote_cache:
+            # Shares the results between machines, see custom_rules.remote.
+            from custom_rules.remote import RemoteCache, make_backend
+
+            remote = RemoteCache(make_backend(remote_cache, remote_timeout))
+        linter = CachedLinter(linter, cache, mode, remote)
+
+    found = False
+    records: List[Dict] = []
+    try:
+        for path, violations in linter.lint_paths(tuple(paths)):
+            found = found or bool(violations)
+            if format_ == "json":
+                records.append(
+                    {"filepath": path, "violations": [v.to_dict() for v in violations]}
+                )
+            else:
+                for line in _format_human(path, violations):
+                    click.echo(line)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if format_ == "json":
+        click.echo(json.dumps(records))
+    if statistics and linter.prefilter is not None:
+        counts = linter.prefilter.statistics
+        if skip_untriggered:
+            click.echo(
+                f"Prefilter: skipped {counts.skipped_files} of {counts.files} "
+                f"files and {counts.skipped_rule_runs} of {counts.rule_runs} "
+                f"rule runs.",
+                err=True,
+            )
+        else:
+            click.echo(
+                f"Prefilter: skipped {counts.skipped_rule_runs} of "
+                f"{counts.rule_runs} rule runs, {counts.skipped_files} of "
+                f"{counts.files} files without any rule to run.",
+                err=True,
+            )
+    if cache is not None and cache.error is not None:
+        click.echo(
+            f"Warning: {cache.statistics.write_errors} cache entries were not "
+            f"written after an error: {cache.error}",
+            err=True,
+        )
+    if statistics and cache is not None:
+        counts = cache.statistics
+        click.echo(
+            f"Cache: {counts.hits} hits, {counts.misses} misses, "
+            f"{counts.evictions} evicted.",
+            err=True,
+        )
+    if remote is not None and remote.error is not None:
+        click.echo(
+            f"Warning: the remote cache was not used after an error: {remote.error}",
+            err=True,
+        )
+    if statistics and remote is not None:
+        counts = remote.statistics
+        click.echo(
+            f"Remote cache: {counts.hits} hits, {counts.misses} misses, "
+            f"{counts.writes} written in {counts.requests} requests.",
+            err=True,
+        )
+    if statistics and facts is not None and facts.enabled:
+        counts = facts.statistics
+        click.echo(
+            f"Parse cache: {counts.hits} hits, {counts.misses} misses.", err=True
+        )
+    if statistics and dedup is not None:
+        counts = dedup.statistics
+        click.echo(
+            f"Dedup: reused {counts.hits} of {counts.statements} statements "
+            f"({counts.hit_rate:.0%}).",
+            err=True,
+        )
+    configs = getattr(linter, "configs", None)
+    if statistics and configs is not None:
+        counts = configs.statistics
+        click.echo(
+            f"Configs: {counts.configs} distinct configurations in "
+            f"{counts.directories} directories, "
+            f"{counts.rule_configs} distinct rule configurations.",
+            err=True,
+        )
+    if statistics and changed:
+        counts = linter.statistics
+        click.echo(
+            f"Changes: linted {counts.linted_statements} of {counts.statements} "
+            f"statements of {counts.files} files, {counts.whole_files} files "
+            f"linted whole.",
+            err=True,
+        )
+    sys.exit(1 if found else 0)
+
+
+@cli.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--rules", default=None, help="Comma separated rules to run.")
+@click.option(
+    "--config",
+    "extra_config_path",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="An additional configuration file, as for sqlfluff.",
+)
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(["human", "json"]),
+    default="human",
+    help="The output format.",
+)
+def catalog(paths, rules, extra_config_path, format_):
+    """Lint the names of pg_catalog exports (CSV or JSON).
+
+    The exports of pg_constraint, pg_proc and pg_class are checked with the
+    naming rules, without parsing SQL or connecting to a database. Exits with
+    status 1 when violations are found.
+    """
+    from custom_rules.catalog import CatalogLinter
+
+    config = _load_config(None, rules, extra_config_path)
+    found = False
+    records: List[Dict] = []
+    try:
+        for path, violations in CatalogLinter(config=config).lint_paths(paths):
+            found = found or bool(violations)
+            if format_ == "json":
+                records.append(
+                    {
+                        "filepath": path,
+                        "violations": [v.to_dict() for v in violations],
+                    }
+                )
+            else:
+                for line in _format_catalog_human(path, violations):
+                    click.echo(line)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if format_ == "json":
+        click.echo(json.dumps(records))
+    sys.exit(1 if found else 0)
+
+
+@cli.command()
+@click.argument("old", type=click.Path(exists=True))
+@click.argument("new", type=click.Path(exists=True))
+@click.option(
+    "--pg-dump",
+    is_flag=True,
+    help="The SQL dumps are pg_dump output: skip the COPY data blocks.",
+)
+@click.option(
+    "--statistics",
+    is_flag=True,
+    help="Print how many statements changed to stderr.",
+)
+@click.option("--dialect", default=None, help="The SQL dialect, e.g. postgres.")
+@click.option("--rules", default=None, help="Comma separated rules to run.")
+@click.option(
+    "--config",
+    "extra_config_path",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="An additional configuration file, as for sqlfluff.",
+)
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(["human", "json"]),
+    default="human",
+    help="The output format.",
+)
+def diff(old, new, pg_dump, statistics, dialect, rules, extra_config_path, format_):
+    """Lint the objects added or renamed between two schema snapshots.
+
+    OLD and NEW are either two SQL dumps or two catalog exports (files or
+    directories, as for the catalog command). Only the new objects and the
+    renamed ones are checked, in the lexer-only fast mode for SQL dumps.
+    Exits with status 1 when violations are found.
+    """
+    from custom_rules.schema_diff import SchemaDiffLinter
+
+    config = _load_config(dialect, rules, extra_config_path)
+    linter = SchemaDiffLinter(config=config, pg_dump=pg_dump)
+    # Catalog exports are CSV or JSON files, or directories of them.
+    sql = not any(
+        os.path.isdir(path) or path.lower().endswith((".csv", ".json"))
+        for path in (old, new)
+    )
+    found = False
+    records: List[Dict] = []
+    try:
+        if sql:
+            results = [(new, linter.lint_sql(old, new))]
+        else:
+            results = linter.lint_catalogs([old], [new])
+        for path, violations in results:
+            found = found or bool(violations)
+            if format_ == "json":
+                records.append(
+                    {
+                        "filepath": path,
+                        "violations": [v.to_dict() for v in violations],
+                    }
+                )
+            elif sql:
+                for line in _format_human(path, violations):
+                    click.echo(line)
+            else:
+                for line in _format_catalog_human(path, violations):
+                    click.echo(line)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if format_ == "json":
+        click.echo(json.dumps(records))
+    if statistics:
+        counts = linter.statistics
+        click.echo(
+            f"Diff: {counts.changed_statements} of {counts.statements} statements "
+            f"changed, {counts.old_objects} old objects compared.",
+            err=True,
+        )
+    sys.exit(1 if found else 0)
+
+
+@cli.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--fast",
+    is_flag=True,
+    help="Run the plugin rules on the lexed tokens without parsing.",
+)
+@click.option(
+    "--header-only",
+    is_flag=True,
+    help="Only lex the statement headers. Implies --fast.",
+)
+@click.option(
+    "--poll",
+    is_flag=True,
+    help="Poll the files for changes instead of using inotify.",
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=0.5,
+    show_default=True,
+    help="The number of seconds between two scans when polling.",
+)
+@click.option(
+    "--debounce",
+    type=float,
+    default=0.1,
+    show_default=True,
+    help="The number of seconds without changes ending a burst of saves.",
+)
+@click.option("--dialect", default=None, help="The SQL dialect, e.g. postgres.")
+@click.option("--rules", default=None, help="Comma separated rules to run.")
+@click.option(
+    "--config",
+    "extra_config_path",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="An additional configuration file, as for sqlfluff.",
+)
+def watch(
+    paths,
+    fast,
+    header_only,
+    poll,
+    interval,
+    debounce,
+    dialect,
+    rules,
+    extra_config_path,
+):
+    """Lint SQL files again each time they are saved.
+
+    The files are linted once, then only the changed files are linted again,
+    printing the new violations with a + and the fixed ones with a -, and the
+    latency from save to result. Stop with Ctrl-C.
+    """
+    from custom_rules.watch import WatchSession, make_watcher
+
+    config = _load_config(dialect, rules, extra_config_path)
+    linter = _make_linter(
+        config, fast, header_only, stream=False, pg_dump=False, prefilter=True
+    )
+    watcher = make_watcher(paths, config, poll=poll, interval=interval)
+    session = WatchSession(linter, paths, watcher, echo=click.echo, debounce=debounce)
+    try:
+        session.run()
+    except KeyboardInterrupt:
+        latency = session.latency
+        click.echo(
+            f"Stopped after {latency.count} saves, save to result "
+            f"p50 {latency.percentile(0.5) * 1000:.0f}ms, "
+            f"p95 {latency.percentile(0.95) * 1000:.0f}ms.",
+            err=True,
+        )
+
+
+@cli.group()
+def cache():
+    """Inspect, clear or serve the result, parse and statement caches of the lint command."""
+
+
+@cache.command()
+@_cache_dir_option
+def stats(cache_dir):
+    """Print the number of cached results, parses and statements, and their size."""
+    entries = [
+        e for e in ResultCache(cache_dir).entries() if not e.path.endswith(".tmp")
+    ]
+    results = sum(1 for entry in entries if entry.path.endswith(".json"))
+    parsed = sum(1 for entry in entries if entry.path.endswith(".facts"))
+    size = sum(entry.size for entry in entries)
+    click.echo(
+        f"{cache_dir}: {results} results, {parsed} parsed files, "
+        f"{len(entries) - results - parsed} statements, "
+        f"{size / (1 << 20):.1f} MB."
+    )
+    if entries:
+        unused = time.time() - min(entry.mtime for entry in entries)
+        click.echo(f"Least recently used entry: {unused / 86400:.1f} days ago.")
+
+
+@cache.command()
+@_cache_dir_option
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8765, show_default=True)
+@click.option(
+    "--cache-max-size",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_BYTES >> 20,
+    show_default=True,
+    help="The size of the cache in MB, beyond which the least recently used results are evicted.",
+)
+def serve(cache_dir, host, port, cache_max_size):
+    """Serve a cache directory as a remote cache, until Ctrl-C.
+
+    A local stand-in of a shared cache server, for the --remote-cache option
+    of the lint command.
+    """
+    from custom_rules.remote import make_server
+
+    server = make_server(cache_dir, host, port, cache_max_size << 20)
+    host, port = server.server_address[:2]
+    click.echo(f"Serving {cache_dir} on http://{host}:{port}/", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@cache.command()
+@_cache_dir_option
+def clear(cache_dir):
+    """Remove every cached result."""
+    removed = ResultCache(cache_dir).clear()
+    click.echo(f"Removed {removed} cached results from {cache_dir}.")
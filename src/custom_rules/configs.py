@@ -0,0 +1,177 @@
+"""Resolving the configuration of each file once per directory.
+
+SQLFluff merges the ``.sqlfluff`` files found from the root down to each
+file's directory into the configuration of the file, and loads it again for
+every file. Loading a configuration takes milliseconds, which adds up in a
+repository of thousands of directories while every file of a directory gets
+the same configuration.
+
+:class:`ConfigResolver` loads the configuration of each directory once and
+tells the distinct configurations apart by :func:`config_fingerprint`. Inline
+``-- sqlfluff:`` directives only apply to their file, so each file gets its
+own copy of the configuration of its directory.
+
+The rules of a file are built from its configuration, as SQLFluff builds
+them, but only once per distinct rule settings (see :func:`rules_fingerprint`
+and :meth:`ConfigResolver.rules`): the files sharing them share the rules.
+The rule instances themselves are also shared across rule packs, see
+:func:`custom_rules.registry.rule_instance`.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlfluff.core import FluffConfig
+from sqlfluff.core.config import clear_config_caches
+
+
+def config_fingerprint(config: FluffConfig) -> str:
+    """Hash every value of a configuration."""
+    values = json.dumps(list(config.iter_vals()), default=repr)
+    return hashlib.blake2b(values.encode("utf8"), digest_size=16).hexdigest()
+
+
+def rules_fingerprint(config: FluffConfig) -> str:
+    """Hash the settings the rules of a configuration are built from.
+
+    These are the ``rules`` section, holding the options of every rule, and
+    the rule selection.
+    """
+    values = json.dumps(
+        [
+            config.get_section("rules"),
+            config.get("rule_allowlist"),
+            config.get("rule_denylist"),
+        ],
+        default=repr,
+        sort_keys=True,
+    )
+    return hashlib.blake2b(values.encode("utf8"), digest_size=16).hexdigest()
+
+
+def inline_config(config: FluffConfig, sql: str, fname: str) -> FluffConfig:
+    """Apply the inline ``-- sqlfluff:`` directives of a file to its configuration.
+
+    Returns:
+        The configuration itself if the file has no directives, else a
+        modified copy.
+    """
+    if "sqlfluff:" not in sql:
+        return config
+    config = config.copy()
+    config.process_raw_file_for_config(sql, fname)
+    return config
+
+
+class ConfigStatistics:
+    """Counters of the configurations resolved in a run.
+
+    ``configs`` counts the distinct configurations of the ``directories``
+    the ``files`` were found in, ``rule_configs`` the distinct rule settings
+    the rules were built for.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.directories = 0
+        self.configs = 0
+        self.rule_configs = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"ConfigStatistics(files={self.files}, "
+            f"directories={self.directories}, configs={self.configs}, "
+            f"rule_configs={self.rule_configs})"
+        )
+
+
+class ConfigResolver:
+    """The configurations of files, loaded once per directory.
+
+    It can stand for the root configuration in ``Linter.render_file``, which
+    only makes the configuration of the file from it (see
+    :meth:`make_child_from_path`).
+
+    Args:
+        config: The root configuration.
+        setup: Builds what a linter runs on the files of a configuration, e.g.
+            its rule pack, see :meth:`rules`.
+    """
+
+    def __init__(
+        self,
+        config: FluffConfig,
+        setup: Optional[Callable[[FluffConfig], Any]] = None,
+    ):
+        self.config = config
+        self.setup = setup
+        self.statistics = ConfigStatistics()
+        self._directories: Dict[str, FluffConfig] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._distinct: Set[str] = set()
+        self._rules: Dict[str, Any] = {}
+
+    def directory_config(self, path: str) -> FluffConfig:
+        """Return the configuration of the directory of a file.
+
+        It is shared by every file of the directory and must not be modified,
+        see :meth:`make_child_from_path`.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        config = self._directories.get(directory)
+        if config is None:
+            config = self._directories[directory] = self.config.make_child_from_path(
+                path
+            )
+            fingerprint = self._fingerprints[directory] = config_fingerprint(config)
+            self._distinct.add(fingerprint)
+            self.statistics.directories += 1
+            self.statistics.configs = len(self._distinct)
+        return config
+
+    def fingerprint(self, path: str) -> str:
+        """Return the fingerprint of the configuration of a file's directory."""
+        self.directory_config(path)
+        return self._fingerprints[os.path.dirname(os.path.abspath(path))]
+
+    def make_child_from_path(self, path: str) -> FluffConfig:
+        """Return the configuration of a file, which its directives may modify."""
+        self.statistics.files += 1
+        return self.directory_config(path).copy()
+
+    def forget(self, directory: Optional[str] = None) -> None:
+        """Drop the configurations of a directory and its subdirectories.
+
+        They are loaded again from the files when next needed, e.g. after a
+        ``.sqlfluff`` file of the directory changed.
+
+        Args:
+            directory: The directory, or None to drop every configuration.
+        """
+        # SQLFluff caches the configuration files it read by path.
+        clear_config_caches()
+        if directory is None:
+            self._directories.clear()
+            self._fingerprints.clear()
+            return
+        directory = os.path.abspath(directory)
+        prefix = directory.rstrip(os.sep) + os.sep
+        for known in list(self._directories):
+            if known == directory or known.startswith(prefix):
+                del self._directories[known]
+                del self._fingerprints[known]
+
+    def rules(self, config: FluffConfig) -> Any:
+        """Return what ``setup`` built for a configuration.
+
+        It is built once per distinct rule settings, see
+        :func:`rules_fingerprint`.
+        """
+        fingerprint = rules_fingerprint(config)
+        rules = self._rules.get(fingerprint)
+        if rules is None:
+            rules = self._rules[fingerprint] = self.setup(config)
+            self.statistics.rule_configs += 1
+        return rules
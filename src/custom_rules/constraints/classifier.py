@@ -0,0 +1,67 @@
+"""Shared classification of named constraints.
+
+CR01 to CR05 all check named constraints and only differ in the kind of
+constraint they care about. Rather than having each rule classify every
+constraint on its own, the constraints of a file are classified once, when
+its DDL model is built (see :mod:`custom_rules.model`), and the constraint
+rules only filter the model by kind.
+"""
+
+from enum import Enum
+from typing import Optional, Tuple
+
+from sqlfluff.core.parser import BaseSegment
+
+
+class ConstraintKind(Enum):
+    """The kinds of named constraints checked by the constraint rules."""
+
+    PRIMARY_KEY = "PRIMARY KEY"
+    FOREIGN_KEY = "FOREIGN KEY"
+    CHECK = "CHECK"
+    UNIQUE = "UNIQUE"
+    DEFAULT = "DEFAULT"
+
+
+def classify_constraint(
+    segment: BaseSegment,
+) -> Optional[Tuple[BaseSegment, Optional[ConstraintKind]]]:
+    """Find the name and kind of a constraint segment.
+
+    Args:
+        segment: A ``table_constraint`` or ``column_constraint_segment``.
+
+    Returns:
+        A tuple of the name segment and the constraint kind, or None if the
+        constraint is not named with the CONSTRAINT keyword. The kind is None
+        for constraints of other kinds, e.g. EXCLUDE.
+    """
+    # Index the code children once, so that looking at the neighbours of the
+    # CONSTRAINT keyword does not require rescanning the siblings.
+    code_children = [child for child in segment.segments if child.is_code]
+
+    for idx, child in enumerate(code_children[:-1]):
+        if child.is_type("keyword") and child.raw.upper() == "CONSTRAINT":
+            name_segment = code_children[idx + 1]
+            following = code_children[idx + 2 : idx + 3]
+            if (
+                following
+                and following[0].is_type("keyword")
+                and following[0].raw.upper() == "DEFAULT"
+            ):
+                return name_segment, ConstraintKind.DEFAULT
+            break
+    else:
+        return None
+
+    keywords = {keyword.raw.upper() for keyword in segment.get_children("keyword")}
+    if "KEY" in keywords:
+        if "PRIMARY" in keywords:
+            return name_segment, ConstraintKind.PRIMARY_KEY
+        if "FOREIGN" in keywords:
+            return name_segment, ConstraintKind.FOREIGN_KEY
+    if "CHECK" in keywords:
+        return name_segment, ConstraintKind.CHECK
+    if "UNIQUE" in keywords:
+        return name_segment, ConstraintKind.UNIQUE
+    return name_segment, None
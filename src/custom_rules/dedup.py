@@ -0,0 +1,201 @@
+"""Reusing the violations of repeated statements.
+
+Generated migrations and per-tenant schema files repeat the same ``CREATE
+TABLE`` and ``CREATE FUNCTION`` statements many times. In the streaming mode
+each statement is linted on its own, so its violations only depend on its
+text. :class:`StatementCache` keys them on the normalized text of the
+statement, without whitespace and comments (see
+:func:`custom_rules.statements.normalized_statement`), and a repeated
+statement is neither parsed nor checked again: the violations of its first
+occurrence are moved to its own tokens.
+
+Positions are recorded as the code token a violation starts in and the offset
+into that token, since whitespace and comments may differ between the copies.
+Statements with a violation outside of their code tokens are not reused, nor
+are statements with ``noqa`` comments, whose directives differ between copies.
+
+Within a run the violations are kept in memory, up to a number of distinct
+statements. Given a result cache (see :mod:`custom_rules.cache`), they are
+also stored in its directory for the following runs.
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from sqlfluff.core.errors import SQLBaseError
+
+from custom_rules.cache import CachedViolation, ResultCache
+from custom_rules.statements import code_token_spans, normalized_statement
+
+DEFAULT_MAX_ENTRIES = 1 << 16
+
+# The suffix of the statement entries in the result cache directory.
+_SUFFIX = ".stmt"
+
+# The keys of the records of violations whose segments were dropped.
+_RECORD_KEYS = frozenset(
+    (
+        "start_line_no",
+        "start_line_pos",
+        "code",
+        "description",
+        "name",
+        "warning",
+        "fixes",
+    )
+)
+
+
+class DedupStatistics:
+    """Counters of the statements whose violations were reused.
+
+    ``hits`` counts the statements reused from memory or from the result
+    cache directory, of the ``statements`` looked up.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of the statements looked up which were reused."""
+        return self.hits / self.statements if self.statements else 0.0
+
+    def __repr__(self) -> str:
+        return f"DedupStatistics(statements={self.statements}, hits={self.hits})"
+
+
+def _line_starts(text: str) -> List[int]:
+    starts = [0]
+    pos = text.find("\n")
+    while pos >= 0:
+        starts.append(pos + 1)
+        pos = text.find("\n", pos + 1)
+    return starts
+
+
+class StatementCache:
+    """The violations of statements, by normalized statement text.
+
+    Args:
+        fingerprint: The fingerprint of the configuration the statements are
+            linted with by default, see
+            :func:`custom_rules.configs.config_fingerprint`.
+        mode: The lint mode, part of the keys.
+        cache: Optional result cache, in whose directory the violations are
+            also stored across runs.
+        max_entries: The number of statements kept in memory.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        mode: str,
+        cache: Optional[ResultCache] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.fingerprint = fingerprint
+        self.mode = mode
+        self.cache = cache
+        self.max_entries = max_entries
+        self.statistics = DedupStatistics()
+        self._entries: Dict[str, List] = OrderedDict()
+
+    def _get(self, key: str) -> Optional[List]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.cache is not None:
+            entry = self.cache.read(key, _SUFFIX)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: List) -> None:
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lint(
+        self,
+        sql: str,
+        line_offset: int,
+        lint: Callable[[], List[SQLBaseError]],
+        groups: FrozenSet[str] = frozenset(),
+        fingerprint: Optional[str] = None,
+    ) -> List:
+        """Lint a statement, unless a statement with the same tokens was linted.
+
+        Args:
+            sql: The statement.
+            line_offset: The number of lines of the file before the statement.
+            lint: Lints the statement, returning its violations at their
+                position in the file.
+            groups: The trigger groups found in the statement, comments
+                included, when the prefilter selects the rules to run on it.
+            fingerprint: The fingerprint of the configuration the statement is
+                linted with, when it is not that of the cache.
+
+        Returns:
+            The violations, at their position in the file.
+        """
+        self.statistics.statements += 1
+        if "noqa" in sql:
+            return lint()
+        spans = code_token_spans(sql)
+        content = "\0".join(sorted(groups)) + "\0" + normalized_statement(sql, spans)
+        key = ResultCache.key(
+            content.encode("utf8"), fingerprint or self.fingerprint, self.mode
+        )
+        entry = self._get(key)
+        if entry is not None:
+            self.statistics.hits += 1
+            return self._rebase(entry, sql, spans, line_offset)
+
+        violations = lint()
+        entry = self._entry(violations, sql, spans, line_offset)
+        if entry is not None:
+            self._remember(key, entry)
+            if self.cache is not None:
+                self.cache.save(key, entry, _SUFFIX)
+        return violations
+
+    @staticmethod
+    def _entry(
+        violations: List[SQLBaseError], sql: str, spans: List, line_offset: int
+    ) -> Optional[List]:
+        """Record violations by the token they start in, None if one is outside tokens."""
+        line_starts = _line_starts(sql)
+        starts = [start for start, _ in spans]
+        entry = []
+        for violation in violations:
+            record = violation.to_dict()
+            if not record.keys() <= _RECORD_KEYS or not violation.line_pos:
+                return None
+            line = (violation.line_no or 0) - line_offset
+            if not 1 <= line <= len(line_starts):
+                return None
+            offset = line_starts[line - 1] + violation.line_pos - 1
+            index = bisect_right(starts, offset) - 1
+            if index < 0 or offset >= spans[index][1]:
+                return None
+            entry.append([index, offset - starts[index], record])
+        return entry
+
+    @staticmethod
+    def _rebase(
+        entry: List, sql: str, spans: List, line_offset: int
+    ) -> List[CachedViolation]:
+        """Move recorded violations to the tokens of a statement."""
+        line_starts = _line_starts(sql)
+        violations = []
+        for index, delta, record in entry:
+            offset = spans[index][0] + delta
+            line = bisect_right(line_starts, offset)
+            record = dict(record)
+            record["start_line_no"] = line + line_offset
+            record["start_line_pos"] = offset - line_starts[line - 1] + 1
+            violations.append(CachedViolation(record))
+        return violations
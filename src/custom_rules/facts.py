@@ -0,0 +1,652 @@
+"""Persistent cache of the DDL facts the rules consume, keyed by parse inputs.
+
+Changing the rule options or the rule selection of a ``.sqlfluff`` file misses
+the result cache (see :mod:`custom_rules.cache`), although every file parses
+exactly as before. The facts cache keeps what the plugin rules consume from the
+parse of a file instead of its violations: the DDL model of each templated
+variant (see :mod:`custom_rules.model`) with the source positions of the
+segments it refers to, the noqa comments, the errors of templating, lexing and
+parsing, and the trigger groups of the rendered SQL (see
+:mod:`custom_rules.prefilter`). Its keys only hash what the parse depends on:
+the content, the dialect, the templater settings and the plugin and SQLFluff
+versions. :class:`FactsLinter` runs the rules on the cached facts, so after a
+change of the rule configuration the files are linted again without being
+rendered or parsed.
+
+The facts are stored in the directory of the result cache, next to the
+results, and share its size cap. Only rules providing ``eval_model`` can run on
+facts: when other rules, such as the SQLFluff core rules, are selected, files
+are parsed and linted as usual.
+
+Running the rules on facts reproduces ``Linter.lint_parsed``, which relies on
+SQLFluff internals. They are all used through :class:`_Internals`, and the
+facts are only used with the SQLFluff releases it was checked against (see
+:func:`sqlfluff_supported`); with other releases files are parsed as usual.
+"""
+
+import hashlib
+import json
+import os
+import re
+from types import SimpleNamespace
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import sqlfluff
+from sqlfluff.core import FluffConfig, Linter
+from sqlfluff.core.errors import (
+    SQLBaseError,
+    SQLLexError,
+    SQLLintError,
+    SQLParseError,
+    SQLTemplaterError,
+)
+from sqlfluff.core.linter import LintedFile, ParsedString, RenderedFile
+from sqlfluff.core.linter.linted_file import FileTimings
+from sqlfluff.core.parser import BaseSegment
+from sqlfluff.core.rules import BaseRule, RulePack
+from sqlfluff.core.rules.noqa import IgnoreMask
+
+from custom_rules.cache import CacheStatistics, ResultCache
+from custom_rules.model import (
+    ConstraintKind,
+    ConstraintObject,
+    DdlModel,
+    FunctionObject,
+    ParameterObject,
+    TableObject,
+    ViewObject,
+    get_ddl_model,
+)
+from custom_rules.prefilter import PrefilteredLinter, RulePrefilter
+from custom_rules.registry import GROUP_TRIGGERS
+
+# The suffix of the facts entries in the result cache directory.
+_SUFFIX = ".facts"
+
+# The core settings the rendering and parsing of a file depend on.
+_PARSE_SETTINGS = (
+    "dialect",
+    "templater",
+    "encoding",
+    "large_file_skip_byte_limit",
+    "large_file_skip_char_limit",
+    "max_parse_depth",
+    "max_parse_nodes",
+    "render_variant_limit",
+    "recursion_limit",
+    "use_rust_parser",
+    "rust_parser_max_iterations",
+)
+
+_ERROR_TYPES = {
+    cls.__name__: cls for cls in (SQLTemplaterError, SQLLexError, SQLParseError)
+}
+
+# Every group, whichever rules are selected, as the facts serve any selection.
+_TRIGGERS = re.compile(
+    "|".join(
+        f"(?P<{group}>{'|'.join(map(re.escape, triggers))})"
+        for group, triggers in GROUP_TRIGGERS.items()
+    ),
+    re.IGNORECASE,
+)
+
+# The SQLFluff releases _Internals was checked against, from the first up to
+# the second, excluded.
+_SUPPORTED_SQLFLUFF = ((3, 3), (5, 0))
+
+# Linter.remove_templated_errors only asks the rule of a violation whether it
+# targets templated areas, which none of the plugin rules do.
+_PROBE_RULE = SimpleNamespace(targets_templated=False)
+
+
+def sqlfluff_supported(version: Optional[str] = None) -> bool:
+    """Whether the facts can be linted with a SQLFluff release.
+
+    Args:
+        version: The SQLFluff version. Defaults to the installed one.
+    """
+    match = re.match(r"(\d+)\.(\d+)", version or sqlfluff.__version__)
+    if match is None:
+        return False
+    low, high = _SUPPORTED_SQLFLUFF
+    return low <= (int(match[1]), int(match[2])) < high
+
+
+class _Internals:
+    """The SQLFluff internals used to lint facts as ``Linter.lint_parsed`` does.
+
+    They are not part of the public API of SQLFluff, so every use is kept
+    here, to check against each new release, see :func:`sqlfluff_supported`.
+    """
+
+    @staticmethod
+    def templated(segment: BaseSegment) -> bool:
+        """Whether SQLFluff drops the violations of a segment as templated."""
+        probe = SQLLintError("", segment, _PROBE_RULE)
+        return not Linter.remove_templated_errors([probe])
+
+    @staticmethod
+    def ignore_mask(
+        comments: "_Comments", reference_map: Dict[str, set]
+    ) -> Tuple[IgnoreMask, List[SQLBaseError]]:
+        """Read the noqa directives of comments, as from a parse tree."""
+        return IgnoreMask.from_tree(comments, reference_map)
+
+    @staticmethod
+    def violations(
+        fname: str, violations: List[SQLBaseError], ignore_mask: Optional[IgnoreMask]
+    ) -> List[SQLBaseError]:
+        """Return the violations of a file, as ``LintedFile.get_violations`` does."""
+        linted = LintedFile(
+            fname,
+            LintedFile.deduplicate_in_source_space(violations),
+            FileTimings({}, []),
+            None,
+            ignore_mask=ignore_mask,
+            templated_file=None,
+            encoding="utf8",
+        )
+        return linted.get_violations()
+
+
+def parse_fingerprint(config: FluffConfig) -> str:
+    """Hash the settings of a configuration the parse of a file depends on.
+
+    Unlike :func:`custom_rules.configs.config_fingerprint`, the rule selection
+    and the rule options are left out.
+    """
+    values = [config.get(name) for name in _PARSE_SETTINGS]
+    values.append(config.get_section("templater"))
+    text = json.dumps(values, default=repr, sort_keys=True)
+    return hashlib.blake2b(text.encode("utf8"), digest_size=16).hexdigest()
+
+
+class _Anchor:
+    """Stands in for a segment of the parse tree the facts were extracted from.
+
+    It has the attributes violations and noqa directives read from segments:
+    the source position, and the raw text of comments. ``templated`` tells
+    whether the segment is in a templated area, ``unparsable`` whether it is
+    in an unparsable section, where rules do not report anything.
+    """
+
+    __slots__ = (
+        "line_no",
+        "line_pos",
+        "source",
+        "templated",
+        "unparsable",
+        "raw",
+        "type",
+    )
+
+    def __init__(
+        self,
+        line_no: int,
+        line_pos: int,
+        source: Optional[Dict[str, int]],
+        templated: bool = False,
+        unparsable: bool = False,
+        raw: str = "",
+        type: str = "",
+    ):
+        self.line_no = line_no
+        self.line_pos = line_pos
+        self.source = source
+        self.templated = templated
+        self.unparsable = unparsable
+        self.raw = raw
+        self.type = type
+
+    @property
+    def pos_marker(self) -> "_Anchor":
+        return self
+
+    def source_position(self) -> Tuple[int, int]:
+        return self.line_no, self.line_pos
+
+    def is_literal(self) -> bool:
+        return self.source is not None
+
+    def to_source_dict(self) -> Dict[str, int]:
+        return dict(self.source)
+
+    def is_type(self, *seg_type: str) -> bool:
+        return self.type in seg_type
+
+    def raw_trimmed(self) -> str:
+        return self.raw
+
+
+class _Comments(tuple):
+    """Stands in for a parse tree holding only its noqa comments."""
+
+    def recursive_crawl(self, *seg_type: str) -> Iterator[_Anchor]:
+        return iter(self)
+
+
+def _anchor(segment: BaseSegment, tree: Optional[BaseSegment] = None) -> List:
+    """Return the record of a segment, see :class:`_Anchor`.
+
+    The flags are only computed for segments of the tree given.
+    """
+    marker = segment.pos_marker
+    line_no, line_pos = marker.source_position()
+    record = [
+        line_no,
+        line_pos,
+        marker.to_source_dict() if marker.is_literal() else None,
+    ]
+    if tree is not None:
+        record.append(_Internals.templated(segment))
+        record.append(
+            segment.is_type("unparsable")
+            or any(step.segment.is_type("unparsable") for step in tree.path_to(segment))
+        )
+    return record
+
+
+def _dump_model(model: DdlModel, tree: BaseSegment) -> Dict:
+    def anchor(segment):
+        return None if segment is None else _anchor(segment, tree)
+
+    def named(obj):
+        return [anchor(obj.segment), obj.schema, obj.name]
+
+    return {
+        "tables": [named(table) for table in model.tables],
+        "constraints": [
+            [
+                anchor(c.segment),
+                anchor(c.name_segment),
+                c.name,
+                c.kind.value if c.kind else None,
+                c.table,
+                c.column,
+                c.schema,
+                c.segment_type,
+            ]
+            for c in model.constraints
+        ],
+        "functions": [
+            named(f)
+            + [
+                anchor(f.parameter_list),
+                [[anchor(p.segment), p.name, p.schema] for p in f.parameters],
+            ]
+            for f in model.functions
+        ],
+        "views": [named(view) for view in model.views],
+        "materialized_views": [named(view) for view in model.materialized_views],
+    }
+
+
+def _load_model(record: Dict) -> DdlModel:
+    def anchor(anchor_record):
+        return None if anchor_record is None else _Anchor(*anchor_record)
+
+    def named(cls, fields):
+        return cls(anchor(fields[0]), *fields[1:])
+
+    return DdlModel(
+        tables=tuple(named(TableObject, t) for t in record["tables"]),
+        constraints=tuple(
+            ConstraintObject(
+                anchor(segment),
+                anchor(name_segment),
+                name,
+                ConstraintKind(kind) if kind else None,
+                table,
+                column,
+                schema,
+                segment_type,
+            )
+            for (
+                segment,
+                name_segment,
+                name,
+                kind,
+                table,
+                column,
+                schema,
+                segment_type,
+            ) in record["constraints"]
+        ),
+        functions=tuple(
+            FunctionObject(
+                anchor(segment),
+                schema,
+                name,
+                anchor(parameter_list),
+                tuple(named(ParameterObject, p) for p in parameters),
+            )
+            for segment, schema, name, parameter_list, parameters in record["functions"]
+        ),
+        views=tuple(named(ViewObject, v) for v in record["views"]),
+        materialized_views=tuple(
+            named(ViewObject, v) for v in record["materialized_views"]
+        ),
+    )
+
+
+def _dump_errors(errors: Iterable[SQLBaseError]) -> Optional[List]:
+    """Return the records of errors, None if some cannot be recorded."""
+    records = []
+    for error in errors:
+        if _ERROR_TYPES.get(type(error).__name__) is not type(error):
+            return None
+        segment = getattr(error, "segment", None)
+        records.append(
+            [
+                type(error).__name__,
+                error.description,
+                error.line_no,
+                error.line_pos,
+                error.fatal,
+                error.warning,
+                None if segment is None else _anchor(segment),
+            ]
+        )
+    return records
+
+
+def _load_error(record: List) -> SQLBaseError:
+    name, description, line_no, line_pos, fatal, warning, anchor = record
+    if anchor is not None:
+        return SQLParseError(
+            description, segment=_Anchor(*anchor), fatal=fatal, warning=warning
+        )
+    return _ERROR_TYPES[name](
+        description, line_no=line_no, line_pos=line_pos, fatal=fatal, warning=warning
+    )
+
+
+def _on_facts(rule_pack: RulePack) -> bool:
+    """Whether the rules of a pack can run on facts, all evaluating the DDL model."""
+    return all(hasattr(rule, "eval_model") for rule in rule_pack.rules)
+
+
+class Facts:
+    """What the rules consume from the parse of a file.
+
+    Args:
+        record: The JSON record of the facts, as cached.
+    """
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: Dict):
+        self.record = record
+
+    @classmethod
+    def extract(
+        cls, rendered: RenderedFile, parsed: Optional[ParsedString] = None
+    ) -> Optional["Facts"]:
+        """Extract the facts of a rendered file.
+
+        Args:
+            rendered: The rendered file.
+            parsed: The parsed file, if it was parsed.
+
+        Returns:
+            The facts, None when they cannot serve as a parse of the file: its
+            root variant did not parse, or some errors cannot be recorded.
+        """
+        groups = set()
+        for variant in rendered.templated_variants:
+            for match in _TRIGGERS.finditer(variant.templated_str):
+                groups.add(match.lastgroup)
+                if len(groups) == len(GROUP_TRIGGERS):
+                    break
+        record = {
+            "groups": sorted(groups),
+            "templating": _dump_errors(rendered.templater_violations),
+            "errors": [],
+            "variants": None,
+        }
+        if parsed is not None:
+            root = parsed.root_variant()
+            if root is None:
+                # Linter.lint_parsed then reads the noqa comments from the
+                # source, which the facts do not keep.
+                return None
+            record["errors"] = _dump_errors(root.violations())
+            # The root variant comes first.
+            record["variants"] = [
+                cls._dump_variant(variant.tree)
+                for variant in parsed.parsed_variants
+                if variant.tree
+            ]
+        if record["templating"] is None or record["errors"] is None:
+            return None
+        return cls(record)
+
+    @staticmethod
+    def _dump_variant(tree: BaseSegment) -> Dict:
+        comments = [
+            _anchor(comment)
+            + [
+                False,
+                False,
+                comment.raw_trimmed(),
+                (
+                    "inline_comment"
+                    if comment.is_type("inline_comment")
+                    else "block_comment"
+                ),
+            ]
+            for comment in tree.recursive_crawl("comment")
+            if comment.is_type("inline_comment", "block_comment")
+            and "noqa" in comment.raw
+        ]
+        return {"model": _dump_model(get_ddl_model(tree), tree), "comments": comments}
+
+    @property
+    def groups(self) -> FrozenSet[str]:
+        """The trigger groups whose keywords the rendered SQL contains."""
+        return frozenset(self.record["groups"])
+
+    @property
+    def parsed(self) -> bool:
+        """Whether the file was parsed, or only rendered."""
+        return self.record["variants"] is not None
+
+    def templating_errors(self) -> List[SQLBaseError]:
+        """Return new instances of the templating errors."""
+        return [_load_error(record) for record in self.record["templating"]]
+
+    def errors(self) -> List[SQLBaseError]:
+        """Return new instances of the lexing and parsing errors of the root variant."""
+        return [_load_error(record) for record in self.record["errors"]]
+
+    def variants(self) -> List[Tuple[DdlModel, _Comments]]:
+        """Return the DDL model and noqa comments of each parsed variant."""
+        return [
+            (
+                _load_model(variant["model"]),
+                _Comments(_Anchor(*comment) for comment in variant["comments"]),
+            )
+            for variant in self.record["variants"] or ()
+        ]
+
+
+class FactsLinter:
+    """Lints files with the parser, reusing the cached facts of their parse.
+
+    The rules run on the facts of a file whenever they are cached, without
+    rendering or parsing the file. The violations are the same as those of the
+    wrapped linter.
+
+    Args:
+        linter: The parsed mode linter.
+        cache: The result cache, in whose directory the facts are stored.
+    """
+
+    def __init__(self, linter: PrefilteredLinter, cache: ResultCache):
+        self.linter = linter
+        self.cache = cache
+        self.config = linter.config
+        self.prefilter = linter.prefilter
+        self.configs = linter.configs
+        self.rule_pack = linter.rule_pack
+        # Only rules evaluating the DDL model can run on facts.
+        self.enabled = sqlfluff_supported() and _on_facts(self.rule_pack)
+        self.statistics = CacheStatistics()
+        self._configs: Dict[str, Tuple[FluffConfig, str]] = {}
+
+    @staticmethod
+    def key(content: bytes, fingerprint: str) -> str:
+        """Return the key of the facts of a file.
+
+        Args:
+            content: The content of the file.
+            fingerprint: The fingerprint of the configuration applying to the
+                file, see :func:`parse_fingerprint`.
+        """
+        return ResultCache.key(content, fingerprint, "facts")
+
+    def _config(self, path: str, content: bytes) -> Tuple[FluffConfig, str]:
+        """Return the configuration applying to a file and its parse fingerprint."""
+        if b"sqlfluff:" in content:
+            # Inline configuration directives only apply to their file.
+            _, config, _ = self.linter.linter.load_raw_file_and_config(
+                path, self.configs
+            )
+            return config, parse_fingerprint(config)
+        # Configuration files apply to whole directories.
+        directory = os.path.dirname(os.path.abspath(path))
+        entry = self._configs.get(directory)
+        if entry is None:
+            config = self.configs.directory_config(path)
+            entry = self._configs[directory] = (config, parse_fingerprint(config))
+        return entry
+
+    def _rules(
+        self, facts: Facts, prefilter: Optional[RulePrefilter], rule_pack: RulePack
+    ) -> Optional[Tuple[BaseRule, ...]]:
+        """Return the rules to run on a file, or None to skip it."""
+        if prefilter is None:
+            return tuple(rule_pack.rules)
+        rules = prefilter.select_groups(facts.groups)
+        if not rules and self.linter.skip_files:
+            return None
+        return rules
+
+    def lint_path(self, path: str) -> List[SQLBaseError]:
+        """Lint a single file, from the cached facts of its parse if there are some."""
+        if not self.enabled:
+            return self.linter.lint_path(path)
+        with open(path, "rb") as f:
+            content = f.read()
+        config, fingerprint = self._config(path, content)
+        # The rules of the configuration of the file, as the wrapped linter
+        # runs them.
+        rule_pack, _, prefilter = self.configs.rules(config)
+        if not _on_facts(rule_pack):
+            return self.linter.lint_path(path)
+        key = self.key(content, fingerprint)
+        record = self.cache.read(key, _SUFFIX)
+        rendered = None
+        if record is None:
+            rendered = self.linter.linter.render_file(path, self.configs)
+            facts = Facts.extract(rendered)
+            if facts is None:
+                self.statistics.misses += 1
+                return self.linter.lint_rendered(rendered)
+        else:
+            facts = Facts(record)
+
+        rules = self._rules(facts, prefilter, rule_pack)
+        if rules is not None and not facts.parsed:
+            # Cached when no rule needed the parse, by another configuration.
+            if rendered is None:
+                rendered = self.linter.linter.render_file(path, self.configs)
+            parsed = Linter.parse_rendered(rendered)
+            facts = Facts.extract(rendered, parsed)
+            if facts is None:
+                self.statistics.misses += 1
+                selected = RulePack(
+                    rules=list(rules), reference_map=rule_pack.reference_map
+                )
+                return Linter.lint_parsed(parsed, selected).get_violations()
+
+        if rendered is None:
+            self.statistics.hits += 1
+        else:
+            self.statistics.misses += 1
+            self.cache.save(key, facts.record, _SUFFIX)
+        if rules is None:
+            # Like PrefilteredLinter, which does not parse skipped files.
+            return facts.templating_errors()
+        return self._lint_facts(facts, rules, rule_pack, config, path)
+
+    def _lint_facts(
+        self,
+        facts: Facts,
+        rules: Tuple[BaseRule, ...],
+        rule_pack: RulePack,
+        config: FluffConfig,
+        fname: str,
+    ) -> List[SQLBaseError]:
+        """Run the rules on the facts of a file, as Linter.lint_parsed does on its parse."""
+        violations = facts.templating_errors() + facts.errors()
+        disable_noqa_except = config.get("disable_noqa_except")
+        noqa = not config.get("disable_noqa") or disable_noqa_except
+        reference_map = Linter.allowed_rule_ref_map(
+            rule_pack.reference_map, disable_noqa_except
+        )
+        ignore_templated_areas = config.get("ignore_templated_areas", default=True)
+        root_mask = None
+        for index, (model, comments) in enumerate(facts.variants()):
+            errors: List[SQLBaseError] = []
+            ignore_mask = None
+            if noqa:
+                ignore_mask, errors = _Internals.ignore_mask(comments, reference_map)
+            for rule in rules:
+                for result in rule.eval_model(model):
+                    error = result.to_linting_error(rule)
+                    if error is None or error.segment.unparsable:
+                        continue
+                    if ignore_mask and not ignore_mask.ignore_masked_violations(
+                        [error]
+                    ):
+                        continue
+                    errors.append(error)
+            if ignore_templated_areas:
+                errors = [
+                    e
+                    for e in errors
+                    if not isinstance(e, SQLLintError)
+                    or not e.segment.templated
+                    or e.rule.targets_templated
+                ]
+            violations += errors
+            if index == 0:
+                root_mask = ignore_mask
+
+        for violation in violations:
+            violation.ignore_if_in(config.get("ignore"))
+            violation.warning_if_in(config.get("warnings"))
+        return _Internals.violations(fname, violations, root_mask)
+
+    def files(self, paths: Iterable[str]) -> Iterator[str]:
+        """Find the files of files and directories, as the wrapped linter does."""
+        return self.linter.files(paths)
+
+    def lint_paths(
+        self, paths: Iterable[str]
+    ) -> Iterator[Tuple[str, List[SQLBaseError]]]:
+        """Lint files and directories, see :meth:`files`.
+
+        The cache is pruned once the files are linted.
+
+        Yields:
+            Tuples of the file path and its violations.
+        """
+        try:
+            for path in self.files(paths):
+                yield path, self.lint_path(path)
+        finally:
+            if self.cache.written:
+                self.cache.prune()
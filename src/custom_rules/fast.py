@@ -0,0 +1,208 @@
+"""Lexer-only linting mode.
+
+The plugin rules only check names, which can be read from the token stream
+without parsing (see :mod:`custom_rules.token_model`). :class:`FastLinter`
+renders and lexes each file like SQLFluff does, builds the DDL model from the
+tokens and runs the plugin rules on it, skipping the parser entirely. It
+reports the same rule codes, messages and positions as ``sqlfluff lint`` for
+files the parser accepts, at a fraction of the cost, which makes it suitable
+for pre-commit hooks.
+
+Like the parsed mode, each file is linted with the rules of its configuration,
+including its ``.sqlfluff`` files and inline directives (see
+:mod:`custom_rules.configs`). Only rules providing ``eval_model`` take part,
+i.e. the rules of this plugin.
+Other selected rules, such as the SQLFluff core rules, are ignored, and parse
+errors are not reported since nothing is parsed.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlfluff.core import FluffConfig, Lexer, Linter
+from sqlfluff.core.errors import SQLBaseError
+from sqlfluff.core.parser.segments import BaseFileSegment
+from sqlfluff.core.rules import BaseRule
+from sqlfluff.core.rules.noqa import IgnoreMask
+from sqlfluff.core.linter import RenderedFile
+from sqlfluff.core.templaters import TemplatedFile
+
+from custom_rules.configs import ConfigResolver, inline_config
+from custom_rules.model import DdlModel
+from custom_rules.prefilter import (
+    ConfiguredRules,
+    PrefilterStatistics,
+    RulePrefilter,
+    expand_paths,
+)
+from custom_rules.statements import mask_bodies
+from custom_rules.token_model import build_token_model
+
+
+class FastLinter:
+    """Runs the plugin rules on lexed tokens instead of parse trees.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        header_only: Whether to only lex the statement headers. View queries
+            and function definitions after the parameter list are blanked out
+            before lexing (see :func:`custom_rules.statements.mask_bodies`).
+        prefilter: Whether to skip the rule groups whose trigger keywords a
+            file does not contain (see :mod:`custom_rules.prefilter`).
+        skip_files: Whether to skip the files left without any rule to run,
+            instead of lexing them for their lexing errors.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        header_only: bool = False,
+        prefilter: bool = True,
+        skip_files: bool = False,
+    ):
+        if isinstance(rules, str):
+            rules = [rule.strip() for rule in rules.split(",")]
+        self.linter = Linter(config=config, dialect=dialect, rules=rules)
+        self.config = self.linter.config
+        self.header_only = header_only
+        self.skip_files = skip_files
+        self._statistics = PrefilterStatistics() if prefilter else None
+        self._lexers: Dict[str, Lexer] = {}
+        self.configs = ConfigResolver(self.config, self._configure)
+        # The rules of the root configuration, those of lint_string.
+        self.rule_pack, self.rules, self.prefilter = self.configs.rules(self.config)
+        self.lexer = self._lexer(self.config)
+
+    def _configure(self, config: FluffConfig) -> ConfiguredRules:
+        """Build the rules of a configuration, see :class:`ConfiguredRules`."""
+        rule_pack = self.linter.get_rulepack(config=config)
+        # Only rules evaluating the DDL model can run without a parse tree.
+        rules = tuple(rule for rule in rule_pack.rules if hasattr(rule, "eval_model"))
+        prefilter = None
+        if self._statistics is not None:
+            prefilter = RulePrefilter(rules, self._statistics)
+        return ConfiguredRules(rule_pack, rules, prefilter)
+
+    def _lexer(self, config: FluffConfig) -> Lexer:
+        """Return the lexer of the dialect of a configuration."""
+        dialect = config.get("dialect")
+        lexer = self._lexers.get(dialect)
+        if lexer is None:
+            lexer = self._lexers[dialect] = Lexer(config=config)
+        return lexer
+
+    def lint_string(
+        self,
+        sql: str,
+        fname: str = "<string input>",
+        encoding: str = "utf8",
+        config: Optional[FluffConfig] = None,
+    ) -> List[SQLBaseError]:
+        """Lint a SQL string.
+
+        Args:
+            sql: The SQL to lint.
+            fname: The file name used for templating and reporting.
+            encoding: The encoding of the source.
+            config: The configuration to lint with, e.g. that of the file the
+                SQL was read from. Defaults to the root configuration.
+
+        Returns:
+            The violations, sorted by position.
+        """
+        return self.lint_rendered(
+            self.linter.render_string(sql, fname, config or self.config, encoding)
+        )
+
+    def lint_rendered(self, rendered: RenderedFile) -> List[SQLBaseError]:
+        """Lint a rendered file with the rules of its configuration.
+
+        Returns:
+            The violations, sorted by position.
+        """
+        config = rendered.config
+        rule_pack, rules, prefilter = self.configs.rules(config)
+        violations: List[SQLBaseError] = list(rendered.templater_violations)
+        if not rendered.templated_variants:
+            return violations
+
+        templated_file = rendered.templated_variants[0]
+        if prefilter is not None:
+            rules = prefilter.select([templated_file.templated_str])
+            if not rules and self.skip_files:
+                return violations
+        if self.header_only:
+            # Blanking keeps every offset, so the source mapping still holds.
+            templated_file = TemplatedFile(
+                templated_file.source_str,
+                templated_file.fname,
+                mask_bodies(templated_file.templated_str),
+                templated_file.sliced_file,
+                templated_file.raw_sliced,
+            )
+        tokens, lex_violations = self._lexer(config).lex(templated_file)
+        violations += lex_violations
+        violations += self._evaluate(build_token_model(tokens), rules)
+
+        disable_noqa_except = config.get("disable_noqa_except")
+        # Comments are tokens, so noqa directives are read the same way as from
+        # a parse tree, from a root segment holding only the comments.
+        comments = tuple(token for token in tokens if token.is_type("comment"))
+        if comments and (not config.get("disable_noqa") or disable_noqa_except):
+            ignore_mask, noqa_violations = IgnoreMask.from_tree(
+                BaseFileSegment(comments, fname=rendered.fname),
+                Linter.allowed_rule_ref_map(
+                    rule_pack.reference_map, disable_noqa_except
+                ),
+            )
+            violations = ignore_mask.ignore_masked_violations(violations)
+            violations += noqa_violations
+
+        # Like SQLFluff, report identical violations only once.
+        unique = {
+            (v.rule_code(), v.line_no, v.line_pos, v.desc()): v
+            for v in reversed(violations)
+        }
+        return sorted(
+            unique.values(),
+            key=lambda v: (v.line_no or 0, v.line_pos or 0, v.rule_code(), v.desc()),
+        )
+
+    def _evaluate(
+        self, model: DdlModel, rules: Sequence[BaseRule]
+    ) -> List[SQLBaseError]:
+        """Run the rules on the DDL model of a file."""
+        violations = []
+        for rule in rules:
+            for result in rule.eval_model(model):
+                error = result.to_linting_error(rule)
+                if error is not None:
+                    violations.append(error)
+        return violations
+
+    def lint_path(self, path: str) -> List[SQLBaseError]:
+        """Lint a single file, with the configuration that applies to it."""
+        with open(path, encoding="utf8") as f:
+            sql = f.read()
+        # The configuration of each directory is loaded once.
+        config = inline_config(self.configs.directory_config(path), sql, path)
+        return self.lint_rendered(self.linter.render_string(sql, path, config, "utf8"))
+
+    def files(self, paths: Iterable[str]) -> List[str]:
+        """Find the files of files and directories, see :func:`expand_paths`."""
+        return expand_paths(paths, self.config)
+
+    def lint_paths(
+        self, paths: Iterable[str]
+    ) -> Iterator[Tuple[str, List[SQLBaseError]]]:
+        """Lint files and directories, see :meth:`files`.
+
+        Yields:
+            Tuples of the file path and its violations.
+        """
+        for path in self.files(paths):
+            yield path, self.lint_path(path)
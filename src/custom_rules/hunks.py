@@ -0,0 +1,286 @@
+"""Linting only the statements a change touches.
+
+In pre-commit hooks and CI, only the violations on the lines a change touches
+matter. :class:`HunkLinter` reads the hunks of ``git diff`` (see
+:func:`parse_diff`), splits each changed file into statements without lexing
+it (see :mod:`custom_rules.statements`) and lints only the statements
+overlapping a changed line, one at a time like the streaming mode does (see
+:mod:`custom_rules.streaming`). The violations are reported at their position
+in the file, and only those on a changed line are kept, so the cost and the
+output follow the size of the edit rather than the size of the file.
+
+The statements of a file are only linted one at a time when their boundaries
+are certain. A file is linted as a whole instead when:
+
+- it is templated, since template blocks may span statements or produce them;
+- its last statement is unterminated and holds a semicolon, e.g. when an
+  unclosed quote or comment runs to the end of the file, hiding where the
+  statements following it end.
+
+The violations of a whole file are then filtered to the changed lines too.
+"""
+
+import io
+import os
+import re
+import subprocess
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from sqlfluff.core import FluffConfig
+from sqlfluff.core.errors import SQLBaseError
+
+from custom_rules.prefilter import expand_paths
+from custom_rules.statements import find_statement_end
+from custom_rules.streaming import Statement, StreamingLinter, iter_statements
+
+# The new side of a hunk header, e.g. ``@@ -10,2 +12,3 @@``.
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+# Markers of template tags, which make statement boundaries uncertain.
+_TEMPLATE_TAGS = re.compile(r"\{\{|\{%|\{#")
+
+# The inclusive ranges of changed lines of a file, sorted.
+LineRanges = List[Tuple[int, int]]
+
+
+class HunkStatistics:
+    """Counters of the statements linted for a change.
+
+    ``whole_files`` counts the changed files linted as a whole because their
+    statement boundaries were uncertain.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.whole_files = 0
+        self.statements = 0
+        self.linted_statements = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"HunkStatistics(files={self.files}, "
+            f"whole_files={self.whole_files}, "
+            f"statements={self.statements}, "
+            f"linted_statements={self.linted_statements})"
+        )
+
+
+def _unquote_path(path: str) -> str:
+    """Read a path of a diff header, which git quotes when unusual."""
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1].encode("latin-1").decode("unicode_escape")
+        path = path.encode("latin-1").decode("utf8")
+    return path
+
+
+def parse_diff(diff: str) -> Dict[str, LineRanges]:
+    """Read the changed lines of each file of a unified diff.
+
+    Args:
+        diff: The output of ``git diff``, best with ``-U0``, as context lines
+            count as changed.
+
+    Returns:
+        The ranges of changed lines of the new version of each file, by the
+        path of the file relative to the repository root. A hunk removing
+        lines marks the lines around the removal. Deleted files are left out.
+    """
+    changes: Dict[str, LineRanges] = {}
+    ranges: Optional[LineRanges] = None
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            path = _unquote_path(line[4:].rstrip("\t"))
+            if path == "/dev/null":
+                ranges = None
+                continue
+            ranges = changes.setdefault(path[2:] if path[:2] == "b/" else path, [])
+            continue
+        match = _HUNK_HEADER.match(line)
+        if match is None or ranges is None:
+            continue
+        start = int(match.group(1))
+        count = 1 if match.group(2) is None else int(match.group(2))
+        if count:
+            ranges.append((start, start + count - 1))
+        else:
+            # Lines were removed after line ``start``.
+            ranges.append((max(start, 1), start + 1))
+    for ranges in changes.values():
+        ranges.sort()
+    return changes
+
+
+def _git(args: Sequence[str], cwd: Optional[str] = None) -> str:
+    """Run a git command and return its output."""
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            capture_output=True,
+            check=True,
+            encoding="utf8",
+        )
+    except FileNotFoundError:
+        raise ValueError("git is not installed.")
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"git {args[0]} failed: {e.stderr.strip()}")
+    return result.stdout
+
+
+def git_changes(
+    paths: Iterable[str], base: str = "HEAD", cwd: Optional[str] = None
+) -> Dict[str, LineRanges]:
+    """Read the lines changed since a git revision.
+
+    Args:
+        paths: The files and directories to read the changes of.
+        base: The revision compared to the working tree, or a range such as
+            ``main...``, as for ``git diff``.
+        cwd: The directory to run git in, by default the current one.
+
+    Returns:
+        The ranges of changed lines by real path of each changed file.
+    """
+    paths = list(paths)
+    root = _git(["rev-parse", "--show-toplevel"], cwd).strip()
+    diff = _git(["diff", "-U0", "--no-color", "--no-ext-diff", base, "--", *paths], cwd)
+    return {
+        os.path.realpath(os.path.join(root, path)): ranges
+        for path, ranges in parse_diff(diff).items()
+    }
+
+
+def _overlaps(ranges: LineRanges, first: int, last: int) -> bool:
+    return any(start <= last and first <= end for start, end in ranges)
+
+
+def _on_changed_line(ranges: LineRanges, violation: SQLBaseError) -> bool:
+    line_no = violation.line_no or 0
+    return any(start <= line_no <= end for start, end in ranges)
+
+
+class HunkLinter:
+    """Lints the statements of files overlapping changed lines.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        base: The git revision the changes are read against, see
+            :func:`git_changes`.
+        fast: Whether to lint in the lexer-only fast mode.
+        header_only: Whether to only lex the statement headers. Implies
+            ``fast``.
+        prefilter: Whether to skip the rule groups whose trigger keywords a
+            statement does not contain (see :mod:`custom_rules.prefilter`).
+        skip_files: Whether to skip the statements left without any rule to
+            run, instead of parsing them for their parse errors.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        base: str = "HEAD",
+        fast: bool = False,
+        header_only: bool = False,
+        prefilter: bool = True,
+        skip_files: bool = False,
+    ):
+        self.streaming = StreamingLinter(
+            config=config,
+            dialect=dialect,
+            rules=rules,
+            fast=fast,
+            header_only=header_only,
+            prefilter=prefilter,
+            skip_files=skip_files,
+        )
+        self.config = self.streaming.config
+        self.prefilter = self.streaming.prefilter
+        self.base = base
+        self.statistics = HunkStatistics()
+
+    def lint_string(
+        self,
+        sql: str,
+        changes: LineRanges,
+        fname: str = "<string input>",
+        config: Optional[FluffConfig] = None,
+    ) -> List[SQLBaseError]:
+        """Lint the statements of a SQL string overlapping changed lines.
+
+        Args:
+            sql: The SQL of the new version of a file.
+            changes: The inclusive ranges of changed lines, see
+                :func:`parse_diff`.
+            fname: The file name used for templating and reporting.
+            config: The configuration to lint with, e.g. that of the file the
+                SQL was read from. Defaults to the root configuration.
+
+        Returns:
+            The violations on the changed lines, in statement order.
+        """
+        self.statistics.files += 1
+        statements = list(iter_statements(io.StringIO(sql), max(len(sql), 1)))
+        last = statements[-1].text if statements else ""
+        templated = (config or self.config).get("templater") != "raw"
+        if (templated and _TEMPLATE_TAGS.search(sql)) or (
+            ";" in last and find_statement_end(last, final=False) is None
+        ):
+            self.statistics.whole_files += 1
+            violations = self.streaming._lint_statement(sql, fname, config)
+        else:
+
+            def selected(statement: Statement) -> bool:
+                self.statistics.statements += 1
+                # The statement starts on the line where the previous one ends.
+                text = statement.text
+                code = len(text) - len(text.lstrip())
+                first_line = statement.line_no + text.count("\n", 0, code)
+                last_line = first_line + text.count("\n", code)
+                if _overlaps(changes, first_line, last_line):
+                    self.statistics.linted_statements += 1
+                    return True
+                return False
+
+            violations = self.streaming.lint_statements(
+                statements, fname=fname, selected=selected, config=config
+            )
+        return [v for v in violations if _on_changed_line(changes, v)]
+
+    def lint_path(self, path: str, changes: LineRanges) -> List[SQLBaseError]:
+        """Lint the changed statements of a single file, with its configuration."""
+        config = self.streaming.configs.directory_config(path)
+        with open(path, encoding="utf8") as f:
+            return self.lint_string(f.read(), changes, fname=path, config=config)
+
+    def lint_paths(
+        self, paths: Sequence[str]
+    ) -> Iterator[Tuple[str, List[SQLBaseError]]]:
+        """Lint the changed statements of files and directories.
+
+        Files without changes since the base revision are skipped.
+
+        Yields:
+            Tuples of the path and violations of each changed file.
+        """
+        files = expand_paths(paths, self.config)
+        if not files:
+            return
+        changes = git_changes(paths, self.base)
+        for path in files:
+            ranges = changes.get(os.path.realpath(path))
+            if ranges:
+                yield path, self.lint_path(path, ranges)
@@ -0,0 +1,393 @@
+"""Linting a document again after an edit, one changed statement at a time.
+
+Editors lint the document they hold after every edit, while most of its
+statements did not change. :class:`IncrementalLinter` splits the document
+into statements without lexing it (see :mod:`custom_rules.statements`) and
+keeps the parse tree and the violations of each statement, keyed by a hash of
+its text (see :func:`custom_rules.statements.statement_digest`). Linting a new
+version of the document only parses and lints the statements whose text is not
+known yet; the violations of the others are moved to the line and position
+their statement starts at in the new version.
+
+The statements before and after the edited text are not even scanned again:
+the text shared with the previous version at its start and end is found first,
+the statements ending before the edit are kept as they are, and the scan of
+the edited text stops at the first statement end which was also one in the
+previous version, the statements after it being moved by the edit's length.
+
+Each statement is linted from the first character of its code, leading
+whitespace excluded, so a statement moved by an edit elsewhere, or indented
+differently, is still known. The rules see one statement at a time, as in the
+streaming mode (see :mod:`custom_rules.streaming`), and range ``noqa``
+directives apply across statements. Only the statements of the last version
+are kept, so the memory used follows the size of the document.
+"""
+
+import bisect
+import dataclasses
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from sqlfluff.core import FluffConfig
+from sqlfluff.core.errors import SQLBaseError
+from sqlfluff.core.parser import BaseSegment
+from sqlfluff.core.rules.noqa import IgnoreMask, NoQaDirective
+
+from custom_rules.statements import find_statement_end, statement_digest
+from custom_rules.streaming import StreamingLinter, _detach
+
+
+class IncrementalStatistics:
+    """Counters of the statements linted by an incremental linter.
+
+    ``statements`` counts the statements of every version linted and
+    ``linted_statements`` those which were not known and had to be linted.
+    ``scanned_statements`` counts those whose end had to be found again,
+    because they were edited or follow an edit of their boundaries.
+    """
+
+    def __init__(self):
+        self.versions = 0
+        self.statements = 0
+        self.scanned_statements = 0
+        self.linted_statements = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"IncrementalStatistics(versions={self.versions}, "
+            f"statements={self.statements}, "
+            f"scanned_statements={self.scanned_statements}, "
+            f"linted_statements={self.linted_statements})"
+        )
+
+
+class _StatementResult(NamedTuple):
+    """What is kept of a linted statement.
+
+    The violations and directives are positioned as if the statement started
+    the document, at line 1 and position 1.
+    """
+
+    tree: Optional[BaseSegment]
+    violations: Tuple[SQLBaseError, ...]
+    directives: Tuple[NoQaDirective, ...]
+
+
+class _PlacedStatement(NamedTuple):
+    """A statement of the current version.
+
+    ``line_no`` and ``line_pos`` are where its code starts, after the leading
+    whitespace, and ``end_line_no`` and ``end_line_pos`` where the next
+    statement starts. Statements of whitespace only have no result.
+    """
+
+    line_no: int
+    line_pos: int
+    last_line_no: int
+    end_line_no: int
+    end_line_pos: int
+    digest: Optional[bytes]
+    result: Optional[_StatementResult]
+    violations: Tuple[SQLBaseError, ...]
+    directives: Tuple[NoQaDirective, ...]
+
+
+def _place(violation: SQLBaseError, line_no: int, line_pos: int) -> SQLBaseError:
+    """Return a copy of a statement violation at the statement's position."""
+    # copy.copy would rebuild the error from its pickling arguments, which
+    # take the position from the segment the violation no longer references.
+    placed = type(violation).__new__(type(violation))
+    placed.args = violation.args
+    placed.__dict__.update(violation.__dict__)
+    if placed.line_no == 1:
+        placed.line_pos += line_pos - 1
+    placed.line_no += line_no - 1
+    return placed
+
+
+def _place_directive(directive: NoQaDirective, line_no: int) -> NoQaDirective:
+    """Return a copy of a statement directive at the statement's line."""
+    return dataclasses.replace(directive, line_no=directive.line_no + line_no - 1)
+
+
+def _common_prefix(old: str, new: str) -> int:
+    """Return the length of the text two strings start with."""
+    low, high = 0, min(len(old), len(new))
+    # The strings are compared in halving slices, each character being
+    # copied a few times at most.
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[low:middle] == new[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(old: str, new: str, limit: int) -> int:
+    """Return the length of the text two strings end with, up to ``limit``."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if (
+            old[len(old) - middle : len(old) - low]
+            == new[len(new) - middle : len(new) - low]
+        ):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class IncrementalLinter:
+    """Lints versions of a document, linting only the statements which changed.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        fast: Whether to lint the statements in the lexer-only fast mode (see
+            :class:`custom_rules.fast.FastLinter`), which keeps no parse trees.
+        keep_trees: Whether to keep the parse tree of each statement, see
+            :meth:`tree_at`.
+        prefilter: Whether to skip the rule groups whose trigger keywords a
+            statement does not contain (see :mod:`custom_rules.prefilter`).
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        fast: bool = False,
+        keep_trees: bool = True,
+        prefilter: bool = True,
+    ):
+        self.streaming = StreamingLinter(
+            config=config, dialect=dialect, rules=rules, fast=fast, prefilter=prefilter
+        )
+        self.config = self.streaming.config
+        self._noqa = self.streaming._noqa_matcher(self.config)
+        self.keep_trees = keep_trees and not fast
+        self.statistics = IncrementalStatistics()
+        self._sql = ""
+        self._statements: List[_PlacedStatement] = []
+        # The offset each statement of the last version ends at.
+        self._ends: List[int] = []
+        self._results: Dict[bytes, _StatementResult] = {}
+
+    def _lint_statement(self, code: str, fname: str) -> _StatementResult:
+        """Lint the code of a statement as if it started the document."""
+        streaming = self.streaming
+        tree = None
+        if streaming.fast_linter is not None:
+            violations = streaming.fast_linter.lint_string(code, fname=fname)
+        else:
+            linter = streaming.linter
+            rendered = linter.linter.render_string(code, fname, self.config, "utf8")
+            linted = linter.lint_rendered_file(rendered)
+            if linted is None:
+                violations = list(rendered.templater_violations)
+            else:
+                violations = linted.get_violations()
+                if self.keep_trees:
+                    tree = linted.tree
+        directives = ()
+        if self._noqa is not None and "noqa" in code:
+            directives = tuple(streaming._range_directives(code, 0, self._noqa))
+        return _StatementResult(
+            tree, tuple(_detach(violation, 0) for violation in violations), directives
+        )
+
+    def _scan_statement(
+        self, text: str, line_no: int, line_pos: int, fname: str
+    ) -> _PlacedStatement:
+        """Place a statement found by the scan, linting it if it is not known."""
+        newlines = text.count("\n")
+        if newlines:
+            end_line_no = line_no + newlines
+            end_line_pos = len(text) - text.rfind("\n")
+        else:
+            end_line_no, end_line_pos = line_no, line_pos + len(text)
+        code = text.lstrip()
+        if not code:
+            return _PlacedStatement(
+                end_line_no,
+                end_line_pos,
+                end_line_no,
+                end_line_no,
+                end_line_pos,
+                None,
+                None,
+                (),
+                (),
+            )
+        skipped = text[: len(text) - len(code)]
+        newlines = skipped.count("\n")
+        if newlines:
+            line_no += newlines
+            line_pos = len(skipped) - skipped.rfind("\n")
+        else:
+            line_pos += len(skipped)
+
+        digest = statement_digest(code)
+        result = self._results.get(digest)
+        if result is None:
+            result = self._lint_statement(code, fname)
+            self._results[digest] = result
+            self.statistics.linted_statements += 1
+        return self._placed(
+            result,
+            digest,
+            line_no,
+            line_pos,
+            line_no + code.count("\n"),
+            end_line_no,
+            end_line_pos,
+        )
+
+    @staticmethod
+    def _placed(
+        result: _StatementResult,
+        digest: bytes,
+        line_no: int,
+        line_pos: int,
+        last_line_no: int,
+        end_line_no: int,
+        end_line_pos: int,
+    ) -> _PlacedStatement:
+        return _PlacedStatement(
+            line_no,
+            line_pos,
+            last_line_no,
+            end_line_no,
+            end_line_pos,
+            digest,
+            result,
+            tuple(_place(v, line_no, line_pos) for v in result.violations),
+            tuple(_place_directive(d, line_no) for d in result.directives),
+        )
+
+    def _moved(
+        self, statement: _PlacedStatement, line: int, line_shift: int, pos_shift: int
+    ) -> _PlacedStatement:
+        """Move a statement following an edit.
+
+        Args:
+            statement: The statement, as placed in the previous version.
+            line: The line of the previous version the edit ended on.
+            line_shift: The number of lines the edit added.
+            pos_shift: The number of characters the edit added to ``line``.
+        """
+        end_line_pos = statement.end_line_pos
+        if statement.end_line_no == line:
+            end_line_pos += pos_shift
+        if statement.result is None:
+            line_no = statement.end_line_no + line_shift
+            return statement._replace(
+                line_no=line_no,
+                line_pos=end_line_pos,
+                last_line_no=line_no,
+                end_line_no=line_no,
+                end_line_pos=end_line_pos,
+            )
+        line_pos = statement.line_pos
+        if statement.line_no == line:
+            line_pos += pos_shift
+        if line_pos == statement.line_pos:
+            # The violations of a statement are placed relative to its first
+            # line, so they move with it.
+            return statement._replace(
+                line_no=statement.line_no + line_shift,
+                last_line_no=statement.last_line_no + line_shift,
+                end_line_no=statement.end_line_no + line_shift,
+                end_line_pos=end_line_pos,
+                violations=tuple(
+                    _place(v, 1 + line_shift, 1) for v in statement.violations
+                ),
+                directives=tuple(
+                    _place_directive(d, 1 + line_shift) for d in statement.directives
+                ),
+            )
+        return self._placed(
+            statement.result,
+            statement.digest,
+            statement.line_no + line_shift,
+            line_pos,
+            statement.last_line_no + line_shift,
+            statement.end_line_no + line_shift,
+            end_line_pos,
+        )
+
+    def lint(self, sql: str, fname: str = "<string input>") -> List[SQLBaseError]:
+        """Lint a version of the document.
+
+        Args:
+            sql: The text of the document.
+            fname: The file name used for templating and reporting.
+
+        Returns:
+            The violations, in statement order.
+        """
+        old_sql, old, old_ends = self._sql, self._statements, self._ends
+        prefix = _common_prefix(old_sql, sql)
+        suffix = _common_suffix(old_sql, sql, min(len(old_sql), len(sql)) - prefix)
+        # The scan of a statement stops at its semicolon, so the statements
+        # ending before the edit are found again unchanged. The last one is
+        # scanned again unless a semicolon ended it.
+        kept = bisect.bisect_right(old_ends, min(prefix, len(old_sql) - 1))
+        statements = old[:kept]
+        ends = old_ends[:kept]
+
+        pos = ends[-1] if kept else 0
+        line_no, line_pos = (
+            (old[kept - 1].end_line_no, old[kept - 1].end_line_pos) if kept else (1, 1)
+        )
+        shift = len(sql) - len(old_sql)
+        while pos < len(sql):
+            end = find_statement_end(sql, pos)
+            statement = self._scan_statement(sql[pos:end], line_no, line_pos, fname)
+            statements.append(statement)
+            ends.append(end)
+            self.statistics.scanned_statements += 1
+            pos = end
+            line_no, line_pos = statement.end_line_no, statement.end_line_pos
+            # Past the edit, a statement end which also was one in the
+            # previous version means the statements after it did not change.
+            old_end = end - shift
+            if end >= len(sql) - suffix and old_end < len(old_sql):
+                index = bisect.bisect_left(old_ends, old_end)
+                if index < len(old_ends) and old_ends[index] == old_end:
+                    line = old[index].end_line_no
+                    line_shift = line_no - line
+                    pos_shift = line_pos - old[index].end_line_pos
+                    statements += [
+                        self._moved(moved, line, line_shift, pos_shift)
+                        for moved in old[index + 1 :]
+                    ]
+                    ends += [moved + shift for moved in old_ends[index + 1 :]]
+                    break
+
+        self._sql, self._statements, self._ends = sql, statements, ends
+        self._results = {s.digest: s.result for s in statements if s.result}
+        self.statistics.versions += 1
+        self.statistics.statements += sum(1 for s in statements if s.result)
+        violations = [v for s in statements for v in s.violations]
+        directives = [d for s in statements for d in s.directives]
+        if directives:
+            violations = IgnoreMask(directives).ignore_masked_violations(violations)
+        return violations
+
+    def tree_at(self, line_no: int) -> Optional[BaseSegment]:
+        """Return the parse tree of the statement of the last version at a line.
+
+        The positions of the tree are those of the statement linted on its
+        own, starting at line 1.
+        """
+        for statement in self._statements:
+            if (
+                statement.result
+                and statement.line_no <= line_no <= statement.last_line_no
+            ):
+                return statement.result.tree
+        return None
@@ -0,0 +1,234 @@
+"""Compiled name matchers built from the rule configuration.
+
+A rule accepts a name when it starts with one of the allowed prefixes for the
+schema of the object, matches the configured pattern and fits in the
+configured number of bytes. The configuration of a rule is compiled once into a
+:class:`NameMatcher`, and identical configurations share the same matcher.
+
+Prefixes are stored in hash sets bucketed by prefix length, so checking a name
+costs one set lookup per distinct prefix length, however many prefixes are
+allowed. Large batches of names, such as those of a catalog export, are checked
+with :meth:`NameMatcher.mismatches`, which finds the names lacking a prefix
+with a single regular expression scan over the whole batch.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+def _split_list(value: Any) -> Tuple[str, ...]:
+    """Split a comma separated configuration value into its items."""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(str(item).strip() for item in value)
+    return tuple(item.strip() for item in str(value).split(","))
+
+
+class _PrefixSet:
+    """A set of allowed prefixes, bucketed by length."""
+
+    __slots__ = ("prefixes", "description", "_buckets", "_line_start")
+
+    def __init__(self, prefixes: Iterable[str]):
+        self.prefixes = tuple(dict.fromkeys(prefix.lower() for prefix in prefixes))
+        buckets: Dict[int, set] = {}
+        for prefix in self.prefixes:
+            buckets.setdefault(len(prefix), set()).add(prefix)
+        self._buckets: Tuple[Tuple[int, FrozenSet[str]], ...] = tuple(
+            (length, frozenset(bucket)) for length, bucket in sorted(buckets.items())
+        )
+        quoted = ", ".join(f"'{prefix}'" for prefix in self.prefixes)
+        if len(self.prefixes) == 1:
+            self.description = f"should start with {quoted}"
+        else:
+            self.description = f"should start with one of {quoted}"
+        # Matches at the start of the lines lacking every prefix.
+        self._line_start = re.compile(
+            f"^(?!{'|'.join(map(re.escape, self.prefixes))})", re.MULTILINE
+        )
+
+    def matches(self, name: str) -> bool:
+        """Return whether a lowercased name starts with one of the prefixes."""
+        for length, bucket in self._buckets:
+            if name[:length] in bucket:
+                return True
+        return False
+
+    def failures(self, names: Sequence[str]) -> List[int]:
+        """Return the indexes of the names starting with none of the prefixes."""
+        text = "\n".join(names).lower()
+        if text.count("\n") != len(names) - 1:
+            # A name spans several lines.
+            return [i for i, name in enumerate(names) if not self.matches(name.lower())]
+        failures = []
+        line = last = 0
+        for match in self._line_start.finditer(text):
+            line += text.count("\n", last, match.start())
+            last = match.start()
+            failures.append(line)
+        return failures
+
+
+class NameMatcher:
+    """Checks names against the compiled naming configuration of a rule.
+
+    Args:
+        prefixes: The allowed prefixes for objects of any schema.
+        pattern: Optional regular expression the whole name must match.
+        max_name_bytes: Optional maximum length of the name in UTF-8 bytes,
+            e.g. 63 for PostgreSQL identifiers.
+        schema_prefixes: The allowed prefixes by schema, replacing
+            ``prefixes`` for objects of that schema.
+    """
+
+    def __init__(
+        self,
+        prefixes: Iterable[str],
+        pattern: Optional[str] = None,
+        max_name_bytes: Optional[int] = None,
+        schema_prefixes: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        self._default = _PrefixSet(prefixes)
+        self._by_schema = {
+            schema.strip('"').lower(): _PrefixSet(schema_prefix_list)
+            for schema, schema_prefix_list in (schema_prefixes or {}).items()
+        }
+        self.pattern = re.compile(pattern) if pattern else None
+        self.max_name_bytes = max_name_bytes
+
+    def prefixes_for(self, schema: Optional[str] = None) -> Tuple[str, ...]:
+        """Return the allowed prefixes for objects of a schema."""
+        return self._prefix_set(schema).prefixes
+
+    def _prefix_set(self, schema: Optional[str]) -> _PrefixSet:
+        if schema is None or not self._by_schema:
+            return self._default
+        return self._by_schema.get(schema.strip('"').lower(), self._default)
+
+    def mismatch(self, name: str, schema: Optional[str] = None) -> Optional[str]:
+        """Check a name.
+
+        Args:
+            name: The object name.
+            schema: The schema of the object, if known.
+
+        Returns:
+            None if the name is accepted, otherwise what is expected of the
+            name, e.g. ``should start with 'pk_'``.
+        """
+        prefix_set = self._prefix_set(schema)
+        if not prefix_set.matches(name.lower()):
+            return prefix_set.description
+        if self.pattern is not None and self.pattern.fullmatch(name) is None:
+            return f"should match pattern '{self.pattern.pattern}'"
+        if (
+            self.max_name_bytes is not None
+            and len(name.encode("utf-8")) > self.max_name_bytes
+        ):
+            return f"should not be longer than {self.max_name_bytes} bytes"
+        return None
+
+    def mismatches(
+        self,
+        names: Sequence[str],
+        schemas: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[Tuple[int, str]]:
+        """Check a batch of names.
+
+        The result is the same as calling :meth:`mismatch` on each name, but
+        the prefixes are checked for the whole batch at once.
+
+        Args:
+            names: The object names.
+            schemas: The schema of each object, if known.
+
+        Returns:
+            The index of each rejected name with what is expected of it, in
+            index order.
+        """
+        groups: Dict[int, Tuple[_PrefixSet, List[int]]] = {}
+        if schemas is None or not self._by_schema:
+            groups[id(self._default)] = (self._default, list(range(len(names))))
+        else:
+            for i, schema in enumerate(schemas):
+                prefix_set = self._prefix_set(schema)
+                groups.setdefault(id(prefix_set), (prefix_set, []))[1].append(i)
+
+        results = []
+        for prefix_set, indexes in groups.values():
+            failures = prefix_set.failures([names[i] for i in indexes])
+            results.extend((indexes[i], prefix_set.description) for i in failures)
+            if self.pattern is None and self.max_name_bytes is None:
+                continue
+            failed = set(failures)
+            for position, i in enumerate(indexes):
+                if position not in failed:
+                    mismatch = self.mismatch(names[i], schemas and schemas[i])
+                    if mismatch is not None:
+                        results.append((i, mismatch))
+        results.sort()
+        return results
+
+
+@lru_cache(maxsize=None)
+def compile_name_matcher(
+    expected_prefix: Tuple[str, ...],
+    name_pattern: Optional[str] = None,
+    max_name_bytes: Optional[int] = None,
+    schema_prefixes: Tuple[str, ...] = (),
+) -> NameMatcher:
+    """Compile a name matcher, sharing it between identical configurations.
+
+    Args:
+        expected_prefix: The allowed prefixes.
+        name_pattern: Optional regular expression the whole name must match.
+        max_name_bytes: Optional maximum length of the name in UTF-8 bytes.
+        schema_prefixes: Per schema prefixes as ``schema:prefix`` items. A
+            schema may be listed several times to allow several prefixes.
+
+    Returns:
+        The compiled matcher.
+    """
+    by_schema: Dict[str, list] = {}
+    for item in schema_prefixes:
+        schema, separator, prefix = item.partition(":")
+        if not separator or not schema.strip():
+            raise ValueError(
+                f"Invalid schema_prefixes item '{item}', expected 'schema:prefix'."
+            )
+        by_schema.setdefault(schema.strip().lower(), []).append(prefix.strip())
+    return NameMatcher(
+        expected_prefix,
+        pattern=name_pattern,
+        max_name_bytes=max_name_bytes,
+        schema_prefixes=by_schema,
+    )
+
+
+def matcher_from_config(config: Dict[str, Any], default_prefix: str) -> NameMatcher:
+    """Compile the name matcher of a rule from its configuration.
+
+    Args:
+        config: The rule configuration, i.e. the keyword arguments SQLFluff
+            passes to the rule. The ``expected_prefix``, ``name_pattern``,
+            ``max_name_bytes`` and ``schema_prefixes`` options are used.
+        default_prefix: The prefix used when ``expected_prefix`` is not
+            configured.
+
+    Returns:
+        The compiled matcher.
+    """
+    expected_prefix = config.get("expected_prefix", default_prefix)
+    if expected_prefix is None:
+        expected_prefix = default_prefix
+    max_name_bytes = config.get("max_name_bytes")
+    return compile_name_matcher(
+        _split_list(expected_prefix),
+        name_pattern=config.get("name_pattern") or None,
+        max_name_bytes=int(max_name_bytes) if max_name_bytes is not None else None,
+        schema_prefixes=tuple(
+            item for item in _split_list(config.get("schema_prefixes")) if item
+        ),
+    )
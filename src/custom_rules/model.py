@@ -0,0 +1,399 @@
+"""Per-file model of the DDL objects checked by the plugin rules.
+
+Every rule of the plugin checks the name of some DDL object: constraints,
+functions and their parameters, or views. Instead of each rule crawling the
+parse tree and extracting names on its own, the tree of a file is walked once
+and the objects are collected into a small typed model. The model is cached for
+the tree, so the walk happens once per file however many rules are enabled.
+Constraints are classified by kind with
+:func:`custom_rules.constraints.classifier.classify_constraint`.
+"""
+
+import weakref
+from enum import Enum
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlfluff.core.parser import BaseSegment
+
+from custom_rules.constraints.classifier import ConstraintKind, classify_constraint
+
+
+class TableObject(NamedTuple):
+    """A table created in the file."""
+
+    segment: BaseSegment
+    schema: Optional[str]
+    name: str
+
+
+class ConstraintObject(NamedTuple):
+    """A named table or column constraint.
+
+    ``column`` is only set for constraints declared as part of a column
+    definition. ``schema`` is the schema of the table, if qualified.
+    ``segment_type`` is the type of the constraint segment, which tells table
+    constraints (``table_constraint``) from column constraints.
+    """
+
+    segment: BaseSegment
+    name_segment: BaseSegment
+    name: str
+    kind: Optional[ConstraintKind]
+    table: Optional[str]
+    column: Optional[str]
+    schema: Optional[str] = None
+    segment_type: str = "table_constraint"
+
+    @property
+    def is_table_constraint(self) -> bool:
+        """Whether the constraint is declared at the table level."""
+        return self.segment_type == "table_constraint"
+
+
+class ParameterObject(NamedTuple):
+    """A named function parameter, with the schema of its function."""
+
+    segment: BaseSegment
+    name: str
+    schema: Optional[str] = None
+
+
+class FunctionObject(NamedTuple):
+    """A function created in the file."""
+
+    segment: BaseSegment
+    schema: Optional[str]
+    name: str
+    parameter_list: Optional[BaseSegment]
+    parameters: Tuple[ParameterObject, ...]
+
+
+class ViewObject(NamedTuple):
+    """A view or materialized view created in the file."""
+
+    segment: BaseSegment
+    schema: Optional[str]
+    name: str
+
+
+class ObjectKind(Enum):
+    """The kinds of DDL objects in the model."""
+
+    TABLE = "table"
+    CONSTRAINT = "constraint"
+    FUNCTION = "function"
+    PARAMETER = "parameter"
+    VIEW = "view"
+    MATERIALIZED_VIEW = "materialized view"
+
+
+class DdlModel(NamedTuple):
+    """All DDL objects of a file, in document order."""
+
+    tables: Tuple[TableObject, ...]
+    constraints: Tuple[ConstraintObject, ...]
+    functions: Tuple[FunctionObject, ...]
+    views: Tuple[ViewObject, ...]
+    materialized_views: Tuple[ViewObject, ...]
+
+    def objects(self, kind: ObjectKind) -> Tuple[NamedTuple, ...]:
+        """Return the objects of the given kind."""
+        if kind is ObjectKind.PARAMETER:
+            return tuple(
+                parameter
+                for function in self.functions
+                for parameter in function.parameters
+            )
+        return getattr(self, _MODEL_FIELDS[kind])
+
+
+_MODEL_FIELDS = {
+    ObjectKind.TABLE: "tables",
+    ObjectKind.CONSTRAINT: "constraints",
+    ObjectKind.FUNCTION: "functions",
+    ObjectKind.VIEW: "views",
+    ObjectKind.MATERIALIZED_VIEW: "materialized_views",
+}
+
+
+# Type names which are not parameter names when falling back to parsing the raw
+# parameter list.
+_COMMON_TYPES = {
+    "INT",
+    "INTEGER",
+    "TEXT",
+    "VARCHAR",
+    "CHAR",
+    "BOOLEAN",
+    "DATE",
+    "TIMESTAMP",
+    "NUMERIC",
+    "DECIMAL",
+    "FLOAT",
+    "REAL",
+    "JSON",
+    "JSONB",
+    "UUID",
+    "ARRAY",
+    "SETOF",
+}
+
+
+def _split_qualified_name(raw: str) -> Tuple[Optional[str], str]:
+    """Split a possibly schema-qualified name into schema and name."""
+    parts = raw.split(".")
+    schema = parts[-2] if len(parts) > 1 else None
+    return schema, parts[-1]
+
+
+def _object_name(
+    segment: BaseSegment, name_types: Tuple[str, ...], keyword: str
+) -> Optional[str]:
+    """Extract the raw, possibly qualified, name of a created object.
+
+    Args:
+        segment: The CREATE statement segment.
+        name_types: Segment types which hold the object name, in order of
+            preference.
+        keyword: The keyword directly preceding the name, e.g. ``FUNCTION``.
+
+    Returns:
+        The raw name, or None if it could not be found.
+    """
+    # Look for the schema qualified name segment, where the last identifier is
+    # the object name.
+    schema_qualified_name = segment.get_child("schema_qualified_name")
+    if schema_qualified_name:
+        identifiers = schema_qualified_name.get_children("naked_identifier")
+        if identifiers:
+            return identifiers[-1].raw
+
+    for name_type in name_types:
+        name_segment = segment.get_child(name_type)
+        if name_segment:
+            return name_segment.raw
+
+    # Otherwise take the first code segment after the keyword.
+    keyword_found = False
+    for child in segment.segments:
+        if keyword_found and child.is_code:
+            return child.raw
+        if child.is_type("keyword") and child.raw.upper() == keyword:
+            keyword_found = True
+
+    return None
+
+
+def raw_parameter_names(raw: str) -> List[str]:
+    """Guess the parameter names from the raw text of a parameter list.
+
+    Args:
+        raw: The raw parameter list, which looks like "(param1 TYPE, param2 TYPE)".
+
+    Returns:
+        The first word of each parameter, unless it is a common type name.
+    """
+    raw_content = raw.strip()
+    if raw_content.startswith("(") and raw_content.endswith(")"):
+        raw_content = raw_content[1:-1]
+    names = []
+    for raw_param in raw_content.split(","):
+        parts = raw_param.split()
+        # Make sure we're not picking up a type name as a parameter
+        if parts and parts[0].upper() not in _COMMON_TYPES:
+            names.append(parts[0])
+    return names
+
+
+def _extract_parameters(
+    segment: BaseSegment, schema: Optional[str]
+) -> Tuple[Optional[BaseSegment], Tuple[ParameterObject, ...]]:
+    """Extract the parameter list and named parameters of a function.
+
+    Returns:
+        A tuple of the parameter list segment and the named parameters.
+    """
+    parameter_list = segment.get_child("function_parameter_list")
+    if parameter_list is None:
+        # Fall back to the first bracket after the function name.
+        parameter_list = segment.get_child("bracketed")
+    if parameter_list is None:
+        return None, ()
+
+    parameters = tuple(
+        ParameterObject(parameter, parameter.raw, schema)
+        for parameter in parameter_list.recursive_crawl("parameter")
+    )
+    if parameters:
+        return parameter_list, parameters
+
+    # Dialects without dedicated parameter segments: parse the raw content.
+    return parameter_list, tuple(
+        ParameterObject(parameter_list, name, schema)
+        for name in raw_parameter_names(parameter_list.raw)
+    )
+
+
+class _Scope(NamedTuple):
+    """The enclosing table and column of a segment during the walk."""
+
+    table: Optional[str] = None
+    column: Optional[str] = None
+
+
+class _ModelBuilder:
+    """Walks a parse tree once and collects the DDL objects.
+
+    Each visitor handles one or more segment types. The visitors are compiled
+    into a segment type to visitor dispatch table, and the walk only descends
+    into segments which contain one of the dispatched types. A visitor returns
+    the scope for the children of the segment, or None to not descend.
+    """
+
+    _VISITORS = {
+        "create_table_statement": "_visit_table",
+        "alter_table_statement": "_visit_table",
+        "column_definition": "_visit_column",
+        "table_constraint": "_visit_constraint",
+        "column_constraint_segment": "_visit_constraint",
+        "create_function_statement": "_visit_function",
+        "create_view_statement": "_visit_view",
+        "create_materialized_view_statement": "_visit_view",
+    }
+    _TARGETS = frozenset(_VISITORS)
+
+    def __init__(self):
+        self.tables = []
+        self.constraints = []
+        self.functions = []
+        self.views = []
+        self.materialized_views = []
+        self._dispatch = {
+            seg_type: getattr(self, visitor)
+            for seg_type, visitor in self._VISITORS.items()
+        }
+
+    def build(self, tree: BaseSegment) -> DdlModel:
+        """Walk the tree and return the collected model."""
+        self._walk(tree, _Scope())
+        return DdlModel(
+            tables=tuple(self.tables),
+            constraints=tuple(self.constraints),
+            functions=tuple(self.functions),
+            views=tuple(self.views),
+            materialized_views=tuple(self.materialized_views),
+        )
+
+    def _walk(self, segment: BaseSegment, scope: _Scope) -> None:
+        visitor = self._dispatch.get(segment.type)
+        if visitor is not None:
+            scope = visitor(segment, scope)
+            if scope is None:
+                return
+
+        child_scope = scope
+        for child in segment.segments:
+            if scope.table is not None and segment.is_type("bracketed"):
+                # Some SQLFluff versions put the columns of a table directly in
+                # its brackets, without column_definition segments.
+                if child.is_type("column_reference"):
+                    child_scope = scope._replace(column=child.raw)
+                elif child.is_type("comma"):
+                    child_scope = scope
+            if child.type in self._TARGETS or not self._TARGETS.isdisjoint(
+                child.descendant_type_set
+            ):
+                self._walk(child, child_scope)
+
+    def _visit_table(self, segment: BaseSegment, scope: _Scope) -> _Scope:
+        reference = segment.get_child("table_reference")
+        if reference is None:
+            return _Scope()
+        if segment.is_type("create_table_statement"):
+            schema, name = _split_qualified_name(reference.raw)
+            self.tables.append(TableObject(segment, schema, name))
+        return _Scope(table=reference.raw)
+
+    def _visit_column(self, segment: BaseSegment, scope: _Scope) -> _Scope:
+        identifier = segment.get_child("naked_identifier", "quoted_identifier")
+        return scope._replace(column=identifier.raw if identifier else None)
+
+    def _visit_constraint(self, segment: BaseSegment, scope: _Scope) -> _Scope:
+        classified = classify_constraint(segment)
+        if classified is not None:
+            name_segment, kind = classified
+            segment_type = (
+                "table_constraint"
+                if segment.is_type("table_constraint")
+                else "column_constraint_segment"
+            )
+            column = None if segment_type == "table_constraint" else scope.column
+            schema = _split_qualified_name(scope.table)[0] if scope.table else None
+            self.constraints.append(
+                ConstraintObject(
+                    segment,
+                    name_segment,
+                    name_segment.raw,
+                    kind,
+                    scope.table,
+                    column,
+                    schema,
+                    segment_type,
+                )
+            )
+        # Unnamed constraints are named by the database itself.
+        return scope
+
+    def _visit_function(self, segment: BaseSegment, scope: _Scope) -> None:
+        raw_name = _object_name(
+            segment, ("function_name", "object_reference"), "FUNCTION"
+        )
+        if raw_name is None:
+            return None
+        schema, name = _split_qualified_name(raw_name)
+        parameter_list, parameters = _extract_parameters(segment, schema)
+        self.functions.append(
+            FunctionObject(segment, schema, name, parameter_list, parameters)
+        )
+        return None
+
+    def _visit_view(self, segment: BaseSegment, scope: _Scope) -> None:
+        raw_name = _object_name(
+            segment, ("view_name", "object_reference", "table_reference"), "VIEW"
+        )
+        if raw_name is None:
+            return None
+        schema, name = _split_qualified_name(raw_name)
+        if segment.is_type("create_materialized_view_statement"):
+            self.materialized_views.append(ViewObject(segment, schema, name))
+        else:
+            self.views.append(ViewObject(segment, schema, name))
+        return None
+
+
+# The model of the most recently walked tree. Rules are run one after the other
+# on the same tree, so a single slot is enough to share the walk without keeping
+# old parse trees alive.
+_last_model: Tuple[Optional[weakref.ref], Optional[DdlModel]] = (None, None)
+
+
+def get_ddl_model(tree: BaseSegment) -> DdlModel:
+    """Return the DDL model of a parse tree.
+
+    The model is cached for the tree, so only the first rule to run on a file
+    pays for the walk.
+
+    Args:
+        tree: The root segment of the file.
+
+    Returns:
+        The DDL objects of the file.
+    """
+    global _last_model
+    tree_ref, model = _last_model
+    if tree_ref is not None and tree_ref() is tree:
+        return model
+
+    model = _ModelBuilder().build(tree)
+    _last_model = (weakref.ref(tree), model)
+    return model
@@ -0,0 +1,229 @@
+"""Declarative naming rules.
+
+Most rules of the plugin follow the same pattern: pick the objects of one kind
+from the per-file DDL model (see :mod:`custom_rules.model`), optionally narrow
+them down with a predicate, and check their names with the compiled name
+matcher of the rule (see :mod:`custom_rules.matcher`). Those rules are
+declared in :data:`NAMING_SPECS` and share the implementation in
+:class:`NamingRuleMixin`.
+
+The parse tree is walked once per file to build the model, so a new naming
+rule only adds a scan over the objects of its kind instead of another crawl of
+the whole tree. The specs are also compiled once into an object kind to specs
+dispatch table, which the catalog mode uses to pick the rules checking an
+object (see :mod:`custom_rules.catalog`).
+"""
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlfluff.core.rules import LintResult, RuleContext
+from sqlfluff.core.rules.crawlers import RootOnlyCrawler
+
+from custom_rules.matcher import NameMatcher, matcher_from_config
+from custom_rules.model import ConstraintKind, DdlModel, ObjectKind, get_ddl_model
+
+
+class NamingSpec(NamedTuple):
+    """Declaration of a naming rule.
+
+    Attributes:
+        code: The rule code.
+        object_kinds: The kinds of objects the rule checks.
+        label: How the checked name is referred to in the violation message.
+        default_prefix: The prefix used when ``expected_prefix`` is not
+            configured.
+        predicate: Optional filter on the objects of the given kinds.
+        anchor_name: Whether violations are anchored to the name of the object
+            (its ``name_segment``) instead of the whole object.
+        lowercase_name: Whether the name is lowercased in the message.
+    """
+
+    code: str
+    object_kinds: Tuple[ObjectKind, ...]
+    label: str
+    default_prefix: str
+    predicate: Optional[Callable[[Any], bool]] = None
+    anchor_name: bool = False
+    lowercase_name: bool = False
+
+
+def _table_constraint_of_kind(kind: ConstraintKind) -> Callable[[Any], bool]:
+    """Build a predicate matching table level constraints of a kind."""
+
+    def predicate(constraint) -> bool:
+        return constraint.kind is kind and constraint.is_table_constraint
+
+    return predicate
+
+
+def _constraint_of_kind(kind: ConstraintKind) -> Callable[[Any], bool]:
+    """Build a predicate matching table and column constraints of a kind."""
+
+    def predicate(constraint) -> bool:
+        return constraint.kind is kind
+
+    return predicate
+
+
+NAMING_SPECS: Dict[str, NamingSpec] = {
+    spec.code: spec
+    for spec in (
+        NamingSpec(
+            code="CR01",
+            object_kinds=(ObjectKind.CONSTRAINT,),
+            label="PRIMARY KEY constraint name",
+            default_prefix="pk_",
+            predicate=_table_constraint_of_kind(ConstraintKind.PRIMARY_KEY),
+        ),
+        NamingSpec(
+            code="CR02",
+            object_kinds=(ObjectKind.CONSTRAINT,),
+            label="FOREIGN KEY constraint name",
+            default_prefix="fk_",
+            predicate=_table_constraint_of_kind(ConstraintKind.FOREIGN_KEY),
+        ),
+        NamingSpec(
+            code="CR03",
+            object_kinds=(ObjectKind.CONSTRAINT,),
+            label="CHECK constraint name",
+            default_prefix="chk_",
+            predicate=_table_constraint_of_kind(ConstraintKind.CHECK),
+        ),
+        NamingSpec(
+            code="CR04",
+            object_kinds=(ObjectKind.CONSTRAINT,),
+            label="UNIQUE constraint name",
+            default_prefix="uc_",
+            predicate=_table_constraint_of_kind(ConstraintKind.UNIQUE),
+        ),
+        NamingSpec(
+            code="CR05",
+            object_kinds=(ObjectKind.CONSTRAINT,),
+            label="DEFAULT constraint name",
+            default_prefix="df_",
+            predicate=_constraint_of_kind(ConstraintKind.DEFAULT),
+            anchor_name=True,
+            lowercase_name=True,
+        ),
+        NamingSpec(
+            code="FN01",
+            object_kinds=(ObjectKind.FUNCTION,),
+            label="Function name",
+            default_prefix="fun_",
+        ),
+        NamingSpec(
+            code="FN02",
+            object_kinds=(ObjectKind.PARAMETER,),
+            label="Function parameter",
+            default_prefix="p_",
+        ),
+        NamingSpec(
+            code="VW01",
+            object_kinds=(ObjectKind.VIEW, ObjectKind.MATERIALIZED_VIEW),
+            label="View name",
+            default_prefix="v_",
+        ),
+    )
+}
+
+
+def _compile_dispatch(
+    specs: Dict[str, NamingSpec],
+) -> Dict[ObjectKind, Tuple[NamingSpec, ...]]:
+    """Group the specs by the object kinds they check."""
+    dispatch = defaultdict(list)
+    for spec in specs.values():
+        for kind in spec.object_kinds:
+            dispatch[kind].append(spec)
+    return {kind: tuple(kind_specs) for kind, kind_specs in dispatch.items()}
+
+
+SPECS_BY_KIND = _compile_dispatch(NAMING_SPECS)
+
+
+def naming_violations(
+    model: DdlModel, spec: NamingSpec, matcher: NameMatcher
+) -> List[Tuple[Any, str]]:
+    """Return the objects of a model violating a naming spec.
+
+    Args:
+        model: The DDL model of a file.
+        spec: The naming rule declaration.
+        matcher: The compiled name matcher of the rule.
+
+    Returns:
+        The violating objects with what is expected of their names, in
+        document order per object kind.
+    """
+    violations = []
+    for kind in spec.object_kinds:
+        for obj in model.objects(kind):
+            if spec.predicate is None or spec.predicate(obj):
+                mismatch = matcher.mismatch(obj.name, obj.schema)
+                if mismatch is not None:
+                    violations.append((obj, mismatch))
+    return violations
+
+
+class NamingRuleMixin:
+    """Implementation shared by the rules declared in :data:`NAMING_SPECS`.
+
+    Rule classes mix this in before ``BaseRule`` and only provide their
+    metadata and documentation.
+    """
+
+    # Objects are read from the per-file DDL model, see model.py
+    crawl_behaviour = RootOnlyCrawler()
+
+    def __init__(self, code, description="", **kwargs):
+        """Initialize the rule with configuration."""
+        super().__init__(code=code, description=description, **kwargs)
+        self.spec = NAMING_SPECS[code]
+        self.matcher = matcher_from_config(kwargs, self.spec.default_prefix)
+
+    def _eval(self, context: RuleContext) -> List[LintResult]:
+        """Validate the names of the objects checked by the rule."""
+        try:
+            return self.eval_model(get_ddl_model(context.segment))
+        except Exception as e:
+            self.logger.error(f"Exception in {self.spec.label.lower()} rule: {str(e)}")
+            return []
+
+    def eval_model(self, model: DdlModel) -> List[LintResult]:
+        """Validate the names of the objects of a DDL model.
+
+        The model is either built from the parse tree or, in the lexer-only
+        mode, from the token stream (see :mod:`custom_rules.fast`).
+        """
+        spec = self.spec
+        return [
+            self._create_lint_result(
+                obj.name_segment if spec.anchor_name else obj.segment,
+                obj.name.lower() if spec.lowercase_name else obj.name,
+                mismatch,
+            )
+            for obj, mismatch in naming_violations(model, spec, self.matcher)
+        ]
+
+    def _create_lint_result(
+        self, segment, object_name: str, mismatch: str
+    ) -> LintResult:
+        """
+        Create a lint result for a naming violation.
+
+        Args:
+            segment: The segment to anchor the lint result to
+            object_name: The name of the object
+            mismatch: What is expected of the name, e.g. "should start with 'pk_'"
+
+        Returns:
+            LintResult: The lint result object
+        """
+        self.logger.debug(
+            f"{self.spec.label} '{object_name}' violates naming convention"
+        )
+        return LintResult(
+            anchor=segment,
+            description=f"{self.spec.label} '{object_name}' {mismatch}.",
+        )
@@ -0,0 +1,181 @@
+"""Reading ``pg_dump`` output without its data sections.
+
+Plain ``pg_dump`` output mixes DDL with data, as ``COPY ... FROM stdin;``
+statements followed by rows up to a ``\\.`` line, or as ``INSERT`` statements
+with ``--inserts``. The data is usually most of the file and none of the rules
+look at it. :func:`iter_dump_statements` memory-maps the dump, jumps over the
+data sections on the raw bytes without decoding them, and only decodes and
+yields the other statements, with their position in the file.
+
+The data statements are found as ``pg_dump`` writes them: a ``COPY`` statement
+on a single line followed by its rows, and ``INSERT`` statements whose strings
+are standard conforming, i.e. quotes are escaped by doubling them. Other
+``INSERT`` statements are read and linted like the DDL.
+"""
+
+import mmap
+import re
+from typing import Iterator, Optional
+
+from custom_rules.statements import find_statement_end
+from custom_rules.streaming import DEFAULT_CHUNK_SIZE, Statement
+
+_SPACE_AND_COMMENTS = re.compile(rb"(?:[ \t\r\n\f]|--[^\n]*)*")
+_DATA_KEYWORD = re.compile(rb"(copy|insert)(?![\w$])", re.IGNORECASE)
+_COPY_FROM_STDIN = re.compile(rb"from\s+stdin\b[^\n;]*;\s*$", re.IGNORECASE)
+_COPY_DATA_END = re.compile(rb"[ \t]*\r?(?:\n|\Z)")
+# A run of consecutive INSERT statements, skipped at once. Quoted identifiers
+# may contain quotes and semicolons too.
+_INSERT_RUN = re.compile(
+    rb"""(?:insert(?![\w$])[^'";]*(?:(?:'[^']*'|"[^"]*")[^'";]*)*;[ \t\r\n]*)+""",
+    re.IGNORECASE,
+)
+
+# The initial number of bytes decoded to find the end of a DDL statement.
+_DECODE_WINDOW = 8192
+
+# The pages read are released every so many bytes, so that the mapped dump
+# does not stay resident as it is read.
+_RELEASE_EVERY = 64 << 20
+
+
+class DumpStatistics:
+    """Counters of the statements read from a dump.
+
+    ``insert_blocks`` counts runs of consecutive ``INSERT`` statements.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.copy_blocks = 0
+        self.insert_blocks = 0
+        self.skipped_bytes = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"DumpStatistics(statements={self.statements}, "
+            f"copy_blocks={self.copy_blocks}, "
+            f"insert_blocks={self.insert_blocks}, "
+            f"skipped_bytes={self.skipped_bytes})"
+        )
+
+
+class _DumpReader:
+    """Walks the bytes of a dump, tracking the line of the current offset."""
+
+    def __init__(self, data, chunk_size: int, statistics: DumpStatistics):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.statistics = statistics
+        self.line_no = 1
+        self.line_start = 0
+        self.released = 0
+
+    def _advance(self, start: int, end: int) -> None:
+        """Count the lines between two offsets, a chunk at a time."""
+        for chunk_start in range(start, end, self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, end)
+            self.line_no += self.data[chunk_start:chunk_end].count(b"\n")
+        last_newline = self.data.rfind(b"\n", start, end)
+        if last_newline >= 0:
+            self.line_start = last_newline + 1
+        self._release(min(end, self.line_start))
+
+    def _release(self, pos: int) -> None:
+        """Drop the mapped pages before an offset from the resident memory."""
+        if pos - self.released < _RELEASE_EVERY or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        stop = pos - pos % mmap.PAGESIZE
+        self.data.madvise(mmap.MADV_DONTNEED, self.released, stop - self.released)
+        self.released = stop
+
+    def _data_end(self, pos: int) -> Optional[int]:
+        """Return the end of the data statement at an offset, if it is one."""
+        code = _SPACE_AND_COMMENTS.match(self.data, pos).end()
+        keyword = _DATA_KEYWORD.match(self.data, code)
+        if keyword is None:
+            return None
+        if keyword.group(1).lower() == b"insert":
+            end = _INSERT_RUN.match(self.data, code)
+            if end is None:
+                # Not as pg_dump writes it, e.g. an unbalanced quote: the
+                # statement is read like any other one.
+                return None
+            self.statistics.insert_blocks += 1
+            return end.end()
+
+        line_end = self.data.find(b"\n", code)
+        if line_end < 0:
+            line_end = len(self.data)
+        if _COPY_FROM_STDIN.search(self.data, code, line_end) is None:
+            return None
+        self.statistics.copy_blocks += 1
+        return self._copy_data_end(line_end)
+
+    def _copy_data_end(self, pos: int) -> int:
+        """Return the end of the ``\\.`` line ending the rows after an offset."""
+        while True:
+            marker = self.data.find(b"\n\\.", pos)
+            if marker < 0:
+                return len(self.data)
+            line_end = _COPY_DATA_END.match(self.data, marker + 3)
+            if line_end is not None:
+                return line_end.end()
+            pos = marker + 1
+
+    def _decode_statement(self, pos: int) -> str:
+        """Decode the statement at an offset, growing the decoded window."""
+        window = _DECODE_WINDOW
+        while True:
+            stop = min(pos + window, len(self.data))
+            text = self.data[pos:stop].decode("utf-8", "surrogateescape")
+            end = find_statement_end(text, final=stop == len(self.data))
+            if end is not None:
+                return text[:end]
+            window *= 2
+
+    def statements(self) -> Iterator[Statement]:
+        """Yield the statements which are not data sections."""
+        pos = 0
+        size = len(self.data)
+        while pos < size:
+            end = self._data_end(pos)
+            if end is not None:
+                self.statistics.skipped_bytes += end - pos
+                self._advance(pos, end)
+                pos = end
+                continue
+
+            text = self._decode_statement(pos)
+            end = pos + len(text.encode("utf-8", "surrogateescape"))
+            line_pos = len(self.data[self.line_start : pos].decode("utf-8", "replace"))
+            self.statistics.statements += 1
+            yield Statement(text, self.line_no, line_pos + 1)
+            self._advance(pos, end)
+            pos = end
+
+
+def iter_dump_statements(
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    statistics: Optional[DumpStatistics] = None,
+) -> Iterator[Statement]:
+    """Read the statements of a dump, skipping its data sections.
+
+    Args:
+        path: The path of the dump.
+        chunk_size: The number of bytes scanned at once when counting the
+            lines of the data sections.
+        statistics: Optional counters, updated as the dump is read.
+
+    Yields:
+        The statements of the dump other than ``COPY ... FROM stdin`` with its
+        rows and ``INSERT``, in order.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        if not f.tell():
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            reader = _DumpReader(data, chunk_size, statistics or DumpStatistics())
+            yield from reader.statements()
@@ -0,0 +1,312 @@
+"""Skipping the rule groups a file cannot trigger.
+
+The rules of each group only check objects introduced by a keyword, e.g. the
+constraint rules only check constraints named with ``CONSTRAINT``. The groups
+declare these keywords in :data:`custom_rules.registry.GROUP_TRIGGERS`, and
+:class:`RulePrefilter` searches the rendered SQL of a file for them with a
+single case insensitive regular expression before anything is lexed or parsed.
+The rules of a group whose keywords are absent cannot report anything, so they
+are switched off for the file.
+
+The search runs on the rendered SQL of every templated variant, so it sees
+what the rules would see. Rules which are not part of the plugin, such as the
+SQLFluff core rules, always run. The output is identical to that of a full
+lint: a file left without any rule to run is still parsed for its parse
+errors. Skipping such files altogether is opt-in (``skip_files``), as their
+parse errors are then not reported.
+"""
+
+import os
+import re
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from sqlfluff.core import FluffConfig, Linter
+from sqlfluff.core.errors import SQLBaseError
+from sqlfluff.core.linter import LintedFile, RenderedFile
+from sqlfluff.core.linter.discovery import paths_from_path
+from sqlfluff.core.rules import BaseRule, RulePack
+
+from custom_rules.configs import ConfigResolver
+from custom_rules.registry import GROUP_TRIGGERS, trigger_group
+
+
+class PrefilterStatistics:
+    """Counters of the files and rule runs the prefilter skipped.
+
+    A rule run is one rule on one file. ``rule_runs`` counts the runs of the
+    rules with trigger keywords, ``skipped_rule_runs`` those switched off.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.skipped_files = 0
+        self.rule_runs = 0
+        self.skipped_rule_runs = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"PrefilterStatistics(files={self.files}, "
+            f"skipped_files={self.skipped_files}, "
+            f"rule_runs={self.rule_runs}, "
+            f"skipped_rule_runs={self.skipped_rule_runs})"
+        )
+
+
+class RulePrefilter:
+    """Selects the rules to run on a file from the trigger keywords it contains.
+
+    Args:
+        rules: The selected rules, in the order they run.
+        statistics: Optional counters to add to, shared by the prefilters of
+            the rules of several configurations.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[BaseRule],
+        statistics: Optional[PrefilterStatistics] = None,
+    ):
+        self.rules = tuple(rules)
+        self._groups = {rule.code: trigger_group(rule.code) for rule in self.rules}
+        groups = sorted({group for group in self._groups.values() if group})
+        self._pattern = None
+        if groups:
+            # One named alternative per group, so a single scan finds them all.
+            self._pattern = re.compile(
+                "|".join(
+                    f"(?P<{group}>{'|'.join(map(re.escape, GROUP_TRIGGERS[group]))})"
+                    for group in groups
+                ),
+                re.IGNORECASE,
+            )
+        self._groups_count = len(groups)
+        self._triggered = sum(1 for group in self._groups.values() if group)
+        self._selections: Dict[FrozenSet[str], Tuple[BaseRule, ...]] = {}
+        self.statistics = statistics or PrefilterStatistics()
+
+    def active_groups(self, texts: Iterable[str]) -> FrozenSet[str]:
+        """Return the groups whose trigger keywords appear in any of the texts."""
+        found = set()
+        if self._pattern is None:
+            return frozenset(found)
+        for text in texts:
+            for match in self._pattern.finditer(text):
+                found.add(match.lastgroup)
+                if len(found) == self._groups_count:
+                    return frozenset(found)
+        return frozenset(found)
+
+    def select(self, texts: Iterable[str]) -> Tuple[BaseRule, ...]:
+        """Return the rules which can report something on a file.
+
+        Args:
+            texts: The rendered SQL of the file, one text per templated
+                variant.
+
+        Returns:
+            The rules to run, in their original order. Empty if the file does
+            not need to be linted.
+        """
+        return self.select_groups(self.active_groups(texts))
+
+    def select_groups(self, active: Iterable[str]) -> Tuple[BaseRule, ...]:
+        """Return the rules which can report something on a file, see :meth:`select`.
+
+        Args:
+            active: The groups whose trigger keywords the file contains.
+        """
+        active = frozenset(active)
+        selection = self._selections.get(active)
+        if selection is None:
+            selection = tuple(
+                rule
+                for rule in self.rules
+                if self._groups[rule.code] is None or self._groups[rule.code] in active
+            )
+            self._selections[active] = selection
+
+        self.statistics.files += 1
+        self.statistics.skipped_files += not selection
+        self.statistics.rule_runs += self._triggered
+        self.statistics.skipped_rule_runs += len(self.rules) - len(selection)
+        return selection
+
+
+class ConfiguredRules(NamedTuple):
+    """The rules a linter runs on the files of one configuration.
+
+    Built once per distinct rule settings, see
+    :meth:`custom_rules.configs.ConfigResolver.rules`.
+    """
+
+    rule_pack: RulePack
+    rules: Tuple[BaseRule, ...]
+    prefilter: Optional[RulePrefilter]
+
+
+class PrefilteredLinter:
+    """Lints files with the parser, skipping the rule groups they cannot trigger.
+
+    Files are linted with the rules of their configuration, like ``sqlfluff
+    lint`` does, and strings with those of the root configuration unless
+    told otherwise.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        prefilter: Whether to search for the trigger keywords. Without it,
+            every file is linted with every selected rule.
+        skip_files: Whether to skip the files left without any rule to run,
+            instead of parsing them for their parse errors.
+        model_rules_only: Whether to only run the rules evaluating the DDL
+            model, for code linted apart from the rest of its file, e.g. one
+            statement at a time. The other rules, such as the SQLFluff layout
+            rules, would report the edges of the code as those of a file.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        prefilter: bool = True,
+        skip_files: bool = False,
+        model_rules_only: bool = False,
+    ):
+        if isinstance(rules, str):
+            rules = [rule.strip() for rule in rules.split(",")]
+        self.linter = Linter(config=config, dialect=dialect, rules=rules)
+        self.config = self.linter.config
+        self.skip_files = skip_files
+        self.model_rules_only = model_rules_only
+        self._statistics = PrefilterStatistics() if prefilter else None
+        self.configs = ConfigResolver(self.config, self._configure)
+        # The rules of the root configuration, those of lint_string.
+        self.rule_pack, _, self.prefilter = self.configs.rules(self.config)
+
+    def _configure(self, config: FluffConfig) -> ConfiguredRules:
+        """Build the rules of a configuration, see :class:`ConfiguredRules`."""
+        rule_pack = self.linter.get_rulepack(config=config)
+        if self.model_rules_only:
+            rule_pack = RulePack(
+                rules=[rule for rule in rule_pack.rules if hasattr(rule, "eval_model")],
+                reference_map=rule_pack.reference_map,
+            )
+        prefilter = None
+        if self._statistics is not None:
+            prefilter = RulePrefilter(rule_pack.rules, self._statistics)
+        return ConfiguredRules(rule_pack, tuple(rule_pack.rules), prefilter)
+
+    def _rule_pack_for(self, rendered: RenderedFile) -> Optional[RulePack]:
+        """Return the rules to lint a rendered file with, or None to skip it.
+
+        The rules are those of the configuration of the file, including its
+        ``.sqlfluff`` files and inline directives.
+        """
+        rule_pack, _, prefilter = self.configs.rules(rendered.config)
+        if prefilter is None:
+            return rule_pack
+        rules = prefilter.select(
+            variant.templated_str for variant in rendered.templated_variants
+        )
+        if not rules and self.skip_files:
+            return None
+        return RulePack(rules=list(rules), reference_map=rule_pack.reference_map)
+
+    def lint_rendered_file(self, rendered: RenderedFile) -> Optional[LintedFile]:
+        """Lint a rendered file, keeping its parse tree.
+
+        Returns:
+            The linted file, or None if the prefilter skipped it.
+        """
+        rule_pack = self._rule_pack_for(rendered)
+        if rule_pack is None:
+            return None
+        return Linter.lint_rendered(rendered, rule_pack)
+
+    def lint_rendered(self, rendered: RenderedFile) -> List[SQLBaseError]:
+        """Lint a rendered file.
+
+        Returns:
+            The violations, as ``LintedFile.get_violations`` returns them.
+        """
+        linted = self.lint_rendered_file(rendered)
+        if linted is None:
+            return list(rendered.templater_violations)
+        return linted.get_violations()
+
+    def lint_string(
+        self,
+        sql: str,
+        fname: str = "<string input>",
+        encoding: str = "utf8",
+        config: Optional[FluffConfig] = None,
+    ) -> List[SQLBaseError]:
+        """Lint a SQL string.
+
+        Args:
+            sql: The SQL to lint.
+            fname: The file name used for templating and reporting.
+            encoding: The encoding of the source.
+            config: The configuration to lint with, e.g. that of the file the
+                SQL was read from. Defaults to the root configuration.
+
+        Returns:
+            The violations.
+        """
+        return self.lint_rendered(
+            self.linter.render_string(sql, fname, config or self.config, encoding)
+        )
+
+    def lint_path(self, path: str) -> List[SQLBaseError]:
+        """Lint a single file, with the configuration that applies to it."""
+        # The configuration of each directory is loaded once.
+        return self.lint_rendered(self.linter.render_file(path, self.configs))
+
+    def files(self, paths: Iterable[str]) -> List[str]:
+        """Find the files of files and directories, see :func:`expand_paths`."""
+        return expand_paths(paths, self.config)
+
+    def lint_paths(
+        self, paths: Iterable[str]
+    ) -> Iterator[Tuple[str, List[SQLBaseError]]]:
+        """Lint files and directories, see :meth:`files`.
+
+        Yields:
+            Tuples of the file path and its violations.
+        """
+        for fname in self.files(paths):
+            yield fname, self.lint_path(fname)
+
+
+def expand_paths(paths: Iterable[str], config: FluffConfig) -> List[str]:
+    """Expand directories into the SQL files they contain.
+
+    Files are found like ``sqlfluff lint`` finds them: directories are searched
+    for files with one of the ``sql_file_exts`` extensions, files matched by a
+    ``.sqlfluffignore`` file are left out, and the paths are normalised and
+    sorted within each directory.
+    """
+    extensions = tuple(
+        ext.strip().lower()
+        for ext in str(config.get("sql_file_exts") or ".sql").split(",")
+    )
+    files = []
+    for path in paths:
+        files.extend(
+            paths_from_path(path, working_path=os.getcwd(), target_file_exts=extensions)
+        )
+    return files
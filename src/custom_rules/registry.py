@@ -0,0 +1,245 @@
+"""Lazy registry of the rules shipped with the plugin.
+
+SQLFluff asks every plugin for its rule classes whenever a ruleset is built,
+which happens at least once per process (and once per worker process when
+linting in parallel). Registration only needs the rule metadata, so the
+metadata is kept here in a precomputed table and the rule modules themselves
+are only imported when SQLFluff instantiates a rule, i.e. when the rule has
+been selected by the configuration.
+
+SQLFluff also builds the rules again for every file whose configuration it
+loads, even when every file has the same rule options. The placeholders
+return a shared instance of the rule for each distinct configuration of the
+rule instead (see :func:`rule_instance`), so the options of a rule are only
+resolved and its name matcher only compiled once per configuration.
+"""
+
+import importlib
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type
+
+from sqlfluff.core.rules import BaseRule
+from sqlfluff.core.rules.crawlers import RootOnlyCrawler
+
+# Debug output of the plugin is opt-in: it is only shown when the
+# ``sqlfluff.plugin`` logger is enabled, e.g. with ``sqlfluff lint -vvvv``.
+plugin_logger = logging.getLogger("sqlfluff.plugin.custom_rules")
+
+
+class RuleSpec(NamedTuple):
+    """Metadata of a single rule, available without importing the rule."""
+
+    code: str
+    name: str
+    groups: Tuple[str, ...]
+    description: str
+    module: str
+    class_name: str
+
+
+RULE_SPECS: Tuple[RuleSpec, ...] = (
+    RuleSpec(
+        code="CR01",
+        name="constraints.pk_constraint_naming",
+        groups=("all", "custom", "constraints"),
+        description="Enforces PRIMARY KEY constraints to start with expected prefix.",
+        module="custom_rules.constraints.CR01",
+        class_name="Rule_CR01",
+    ),
+    RuleSpec(
+        code="CR02",
+        name="constraints.fk_constraint_naming",
+        groups=("all", "custom", "constraints"),
+        description="Enforces FOREIGN KEY constraints to start with expected prefix.",
+        module="custom_rules.constraints.CR02",
+        class_name="Rule_CR02",
+    ),
+    RuleSpec(
+        code="CR03",
+        name="constraints.chk_constraint_naming",
+        groups=("all", "custom", "constraints"),
+        description="Enforces CHECK constraints to start with expected prefix.",
+        module="custom_rules.constraints.CR03",
+        class_name="Rule_CR03",
+    ),
+    RuleSpec(
+        code="CR04",
+        name="constraints.uc_constraint_naming",
+        groups=("all", "custom", "constraints"),
+        description="Enforces UNIQUE constraints to start with expected prefix.",
+        module="custom_rules.constraints.CR04",
+        class_name="Rule_CR04",
+    ),
+    RuleSpec(
+        code="CR05",
+        name="constraints.df_constraint_naming",
+        groups=("all", "custom", "constraints"),
+        description="Enforces named DEFAULT constraints to start with expected prefix.",
+        module="custom_rules.constraints.CR05",
+        class_name="Rule_CR05",
+    ),
+    RuleSpec(
+        code="FN01",
+        name="functions.function_naming",
+        groups=("all", "custom", "functions"),
+        description="Enforces function names to start with expected prefix.",
+        module="custom_rules.functions.FN01",
+        class_name="Rule_FN01",
+    ),
+    RuleSpec(
+        code="FN02",
+        name="functions.function_parameter_naming",
+        groups=("all", "custom", "functions"),
+        description="Enforces function parameters to start with expected prefix.",
+        module="custom_rules.functions.FN02",
+        class_name="Rule_FN02",
+    ),
+    RuleSpec(
+        code="VW01",
+        name="views.view_naming",
+        groups=("all", "custom", "views"),
+        description="Enforces view names to start with expected prefix.",
+        module="custom_rules.views.VW01",
+        class_name="Rule_VW01",
+    ),
+)
+
+SPECS_BY_CODE = {spec.code: spec for spec in RULE_SPECS}
+
+# Keywords without which the rules of a group cannot report anything: every
+# object they check is introduced by one of them. Files whose SQL contains none
+# of the keywords of a group are not linted with the rules of that group (see
+# :mod:`custom_rules.prefilter`).
+GROUP_TRIGGERS: Dict[str, Tuple[str, ...]] = {
+    "constraints": ("CONSTRAINT",),
+    "functions": ("FUNCTION",),
+    "views": ("VIEW",),
+}
+
+
+def trigger_group(code: str) -> Optional[str]:
+    """Return the group of a rule which declares trigger keywords, if any.
+
+    Args:
+        code: The rule code, e.g. ``CR01``.
+
+    Returns:
+        The group name, or None for rules which are not part of the plugin.
+    """
+    spec = SPECS_BY_CODE.get(code)
+    if spec is None:
+        return None
+    return next((group for group in spec.groups if group in GROUP_TRIGGERS), None)
+
+
+@lru_cache(maxsize=None)
+def load_rule_class(code: str) -> Type[BaseRule]:
+    """Import and return the implementation class of a rule.
+
+    Args:
+        code: The rule code, e.g. ``CR01``.
+
+    Returns:
+        The rule class defined in the rule module.
+    """
+    spec = SPECS_BY_CODE[code]
+    plugin_logger.debug("Importing rule %s from %s", code, spec.module)
+    module = importlib.import_module(spec.module)
+    return getattr(module, spec.class_name)
+
+
+class RuleStatistics:
+    """Counters of the rules SQLFluff built in this process.
+
+    ``configs`` counts the distinct rule configurations, i.e. the rule
+    instances built, for the ``instances`` SQLFluff asked for.
+    """
+
+    def __init__(self):
+        self.instances = 0
+        self.configs = 0
+
+    def __repr__(self) -> str:
+        return f"RuleStatistics(instances={self.instances}, configs={self.configs})"
+
+
+# The shared rule instances by rule code and configuration fingerprint.
+_RULE_INSTANCES: Dict[Tuple[str, str], BaseRule] = {}
+
+_RULE_STATISTICS = RuleStatistics()
+
+
+def rule_instance(code: str, kwargs: Dict[str, Any]) -> BaseRule:
+    """Return the instance of a rule for a configuration.
+
+    Rules do not keep any state between files, so the files sharing a rule
+    configuration share the same instance.
+
+    Args:
+        code: The rule code, e.g. ``CR01``.
+        kwargs: The configuration SQLFluff passes to the rule.
+
+    Returns:
+        An instance of the real rule class.
+    """
+    _RULE_STATISTICS.instances += 1
+    fingerprint = json.dumps(kwargs, default=repr, sort_keys=True)
+    rule = _RULE_INSTANCES.get((code, fingerprint))
+    if rule is None:
+        rule = load_rule_class(code)(**kwargs)
+        _RULE_INSTANCES[(code, fingerprint)] = rule
+        _RULE_STATISTICS.configs += 1
+        plugin_logger.debug("Configured rule %s with %s", code, fingerprint)
+    return rule
+
+
+def rule_statistics() -> RuleStatistics:
+    """Return the counters of the rules built in this process.
+
+    Every worker process of a parallel lint has its own counters.
+    """
+    return _RULE_STATISTICS
+
+
+@lru_cache(maxsize=None)
+def lazy_rule_class(code: str) -> Type[BaseRule]:
+    """Build a lightweight placeholder class for a rule.
+
+    The placeholder carries the metadata SQLFluff needs to register and select
+    the rule. Instantiating it imports the rule module and returns an instance
+    of the real rule class instead (see :func:`rule_instance`), so unselected
+    rules are never imported.
+
+    Args:
+        code: The rule code, e.g. ``CR01``.
+
+    Returns:
+        A ``BaseRule`` subclass standing in for the rule.
+    """
+    spec = SPECS_BY_CODE[code]
+
+    def __new__(cls, **kwargs):
+        return rule_instance(spec.code, kwargs)
+
+    return type(
+        spec.class_name,
+        (BaseRule,),
+        {
+            "__doc__": spec.description,
+            "__module__": __name__,
+            "__new__": __new__,
+            "name": spec.name,
+            "groups": spec.groups,
+            "config_keywords": [],
+            "crawl_behaviour": RootOnlyCrawler(),
+        },
+    )
+
+
+def get_lazy_rules() -> Tuple[Type[BaseRule], ...]:
+    """Return placeholder classes for every rule in the registry."""
+    rules = tuple(lazy_rule_class(spec.code) for spec in RULE_SPECS)
+    plugin_logger.debug("Registered %d rules: %s", len(rules), [r.code for r in rules])
+    return rules
@@ -0,0 +1,292 @@
+"""Sharing the result cache between machines.
+
+CI runners are often ephemeral, so their own result cache (see
+:mod:`custom_rules.cache`) starts cold on most runs. A remote cache backend
+holds the results of every runner: :class:`CachedLinter
+<custom_rules.cache.CachedLinter>` looks the files its local cache misses up
+in the backend, and sends it the results of the files it linted.
+
+Two backends are provided, chosen by :func:`make_backend` from a URL:
+
+- :class:`DirectoryBackend` stores the results in a shared directory, e.g. on
+  NFS, laid out like the local cache.
+- :class:`HttpBackend` talks to a key-value server over HTTP, in the style of
+  the remote storage of ccache. ``POST /get`` with ``{"keys": [...]}`` answers
+  ``{"entries": {key: records}}`` for the keys it has, and ``POST /put`` with
+  ``{"entries": {key: records}}`` stores results. Keys are the 40 hexadecimal
+  digits of :meth:`ResultCache.key <custom_rules.cache.ResultCache.key>`.
+
+:func:`make_server` runs a local stand-in of such a server, storing the
+results in a directory, for trying the protocol out and for tests
+(``sqlfluff-extended cache serve``).
+
+Any object with ``read_many`` and ``write_many`` methods can be a backend.
+Lookups and writes are batched, one request per batch of files. The remote
+cache must never fail a lint: :class:`RemoteCache` gives each request a
+timeout, drops the entries which are not lists of violation records, and
+stops using the backend for the rest of the run after its first error, so an
+unreachable or slow backend costs one timeout at most.
+"""
+
+import json
+import re
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+from custom_rules.cache import DEFAULT_MAX_BYTES, ResultCache
+
+DEFAULT_TIMEOUT = 2.0
+
+DEFAULT_BATCH_SIZE = 64
+
+DEFAULT_PORT = 8765
+
+# The keys of ResultCache.key, which the server also uses as file names.
+_KEY = re.compile(r"[0-9a-f]{40}")
+
+# The largest request body the stand-in server reads.
+_MAX_BODY = 64 << 20
+
+# The fields every cached violation record has.
+_RECORD_FIELDS = ("start_line_no", "start_line_pos", "code", "description")
+
+
+class RemoteStatistics:
+    """Counters of a run using a remote cache backend."""
+
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"RemoteStatistics(requests={self.requests}, hits={self.hits}, "
+            f"misses={self.misses}, writes={self.writes}, errors={self.errors})"
+        )
+
+
+class DirectoryBackend:
+    """Results stored in a directory shared between machines.
+
+    Args:
+        directory: The shared directory, e.g. on NFS.
+    """
+
+    def __init__(self, directory: str):
+        self.cache = ResultCache(directory)
+
+    def read_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        """Return the records of the keys the directory has."""
+        entries = {}
+        for key in keys:
+            records = self.cache.read(key)
+            if records is not None:
+                entries[key] = records
+        return entries
+
+    def write_many(self, entries: Dict[str, Any]) -> None:
+        """Store the records of keys."""
+        for key, records in entries.items():
+            self.cache.write(key, records)
+
+
+class HttpBackend:
+    """Results stored by a key-value server, see the module documentation.
+
+    Args:
+        url: The base URL of the server, e.g. ``http://cache:8765``.
+        timeout: The number of seconds a request may block on the network.
+    """
+
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path: str, body: Dict) -> bytes:
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(body).encode("utf8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def read_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        """Return the records of the keys the server has."""
+        entries = json.loads(self._post("/get", {"keys": list(keys)}))["entries"]
+        return {key: entries[key] for key in keys if key in entries}
+
+    def write_many(self, entries: Dict[str, Any]) -> None:
+        """Store the records of keys."""
+        self._post("/put", {"entries": entries})
+
+
+def make_backend(url: str, timeout: float = DEFAULT_TIMEOUT):
+    """Return the backend of a URL.
+
+    Args:
+        url: An ``http://`` or ``https://`` URL of a key-value server, or the
+            path or ``file://`` URL of a shared directory.
+        timeout: The number of seconds an HTTP request may block.
+    """
+    if url.startswith(("http://", "https://")):
+        return HttpBackend(url, timeout)
+    if url.startswith("file://"):
+        url = url[len("file://") :]
+    return DirectoryBackend(url)
+
+
+def _valid(records: Any) -> bool:
+    """Return whether data read from a backend are violation records."""
+    return isinstance(records, list) and all(
+        isinstance(record, dict) and all(field in record for field in _RECORD_FIELDS)
+        for record in records
+    )
+
+
+class RemoteCache:
+    """A remote cache backend which never fails a lint.
+
+    Args:
+        backend: The backend, see :func:`make_backend`.
+        batch_size: The number of files looked up in one request.
+    """
+
+    def __init__(self, backend, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.statistics = RemoteStatistics()
+        # The first error, after which the backend is no longer used.
+        self.error: Optional[str] = None
+
+    def _fail(self, error: Exception) -> None:
+        self.statistics.errors += 1
+        self.error = f"{type(error).__name__}: {error}"
+
+    def fetch(self, keys: Sequence[str]) -> Dict[str, List[Dict]]:
+        """Return the records of the keys the backend has, in one request."""
+        if self.error is not None or not keys:
+            return {}
+        self.statistics.requests += 1
+        try:
+            entries = {
+                key: records
+                for key, records in self.backend.read_many(keys).items()
+                if _valid(records)
+            }
+        # Whatever the backend raises or answers, the files are linted instead.
+        except Exception as error:
+            self._fail(error)
+            return {}
+        self.statistics.hits += len(entries)
+        self.statistics.misses += len(keys) - len(entries)
+        return entries
+
+    def store(self, entries: Dict[str, List[Dict]]) -> None:
+        """Send the records of keys to the backend, in one request."""
+        if self.error is not None or not entries:
+            return
+        self.statistics.requests += 1
+        try:
+            self.backend.write_many(entries)
+        except Exception as error:
+            self._fail(error)
+            return
+        self.statistics.writes += len(entries)
+
+
+def _is_key(key: Any) -> bool:
+    return isinstance(key, str) and _KEY.fullmatch(key) is not None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers the requests of :class:`HttpBackend` from a result cache."""
+
+    server: "_Server"
+
+    def _reply(self, status: int, body: Optional[Dict] = None) -> None:
+        data = json.dumps(body).encode("utf8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > _MAX_BODY:
+            self._reply(413)
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            body = None
+        if self.path not in ("/get", "/put"):
+            self._reply(404)
+        elif self.path == "/get" and isinstance(body, dict):
+            keys = body.get("keys")
+            if not isinstance(keys, list):
+                self._reply(400)
+                return
+            keys = [key for key in keys if _is_key(key)]
+            self._reply(200, {"entries": self.server.backend.read_many(keys)})
+        elif self.path == "/put" and isinstance(body, dict):
+            entries = body.get("entries")
+            if not isinstance(entries, dict):
+                self._reply(400)
+                return
+            self.server.write(
+                {key: value for key, value in entries.items() if _is_key(key)}
+            )
+            self._reply(204)
+        else:
+            self._reply(400)
+
+    def log_message(self, format: str, *args) -> None:
+        # Requests are not logged, a run sends one per batch of files.
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    """The stand-in server, storing the results in a directory."""
+
+    daemon_threads = True
+
+    def __init__(self, address, directory: str, max_bytes: int):
+        super().__init__(address, _Handler)
+        self.backend = DirectoryBackend(directory)
+        self.backend.cache.max_bytes = max_bytes
+        self._prune_lock = threading.Lock()
+
+    def write(self, entries: Dict[str, Any]) -> None:
+        """Store results, evicting the least recently used beyond the cap."""
+        self.backend.write_many(entries)
+        with self._prune_lock:
+            self.backend.cache.prune()
+
+
+def make_server(
+    directory: str,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> ThreadingHTTPServer:
+    """Return a local stand-in of a remote cache server.
+
+    Call ``serve_forever`` on it, and ``shutdown`` from another thread to
+    stop it.
+
+    Args:
+        directory: The directory storing the results.
+        host: The address to listen on.
+        port: The port to listen on, 0 for any free port (see the
+            ``server_address`` of the server).
+        max_bytes: The size the directory is evicted down to after writes.
+    """
+    return _Server((host, port), directory, max_bytes)
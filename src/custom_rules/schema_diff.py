@@ -0,0 +1,241 @@
+"""Linting only the objects a schema change adds or renames.
+
+Reviewing a migration of a large schema only needs the names the migration
+introduces. :class:`SchemaDiffLinter` takes two snapshots of a schema, either
+two SQL dumps or two sets of catalog exports (see :mod:`custom_rules.catalog`),
+and reports the naming violations of the objects of the new snapshot which the
+old one does not have, i.e. new objects and renamed ones. Objects are keyed by
+their kind, schema, owner (the table of a constraint, the function of a
+parameter) and name, so functions are keyed by name, overloads included.
+
+For SQL dumps, the statements of both snapshots are read one at a time (see
+:mod:`custom_rules.streaming`) and compared by a hash of their text, so only
+the statements which changed are lexed: the changed statements of the new
+snapshot are linted in the lexer-only fast mode (see :mod:`custom_rules.fast`),
+dropping the violations of the objects which the changed statements of the old
+snapshot declare. The cost is reading and hashing both dumps, which is
+typically an order of magnitude faster than linting them, plus linting the
+change. An object declared by an unchanged statement and declared again by a
+changed one, e.g. a constraint added again after being dropped, counts as new.
+
+Catalog exports are not ordered statements, so the object keys of the old
+exports are read in full, and the rules only check the objects of the new
+exports missing from them.
+"""
+
+from typing import (
+    AbstractSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlfluff.core import FluffConfig
+from sqlfluff.core.errors import SQLBaseError
+from sqlfluff.core.parser import BaseSegment
+from sqlfluff.core.rules import BaseRule
+
+from custom_rules.catalog import CatalogLinter, CatalogViolation, ObjectKey
+from custom_rules.fast import FastLinter
+from custom_rules.model import DdlModel, ObjectKind
+from custom_rules.statements import statement_digest
+from custom_rules.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    Statement,
+    _detach,
+    iter_statements,
+)
+from custom_rules.token_model import build_token_model
+
+
+class DiffStatistics:
+    """Counters of the statements and objects compared by a diff.
+
+    ``old_objects`` counts the objects declared by the changed statements of
+    the old snapshot, or by all of its catalog rows.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.changed_statements = 0
+        self.old_objects = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"DiffStatistics(statements={self.statements}, "
+            f"changed_statements={self.changed_statements}, "
+            f"old_objects={self.old_objects})"
+        )
+
+
+def _object_anchors(
+    model: DdlModel,
+) -> Iterator[Tuple[ObjectKey, Tuple[BaseSegment, ...]]]:
+    """Yield the key of each object of a model and the segments the rules
+    anchor its violations to."""
+    for constraint in model.constraints:
+        key = (ObjectKind.CONSTRAINT, constraint.schema, constraint.table)
+        # CR05 anchors to the name of the constraint.
+        yield key + (constraint.name,), (constraint.segment, constraint.name_segment)
+    for function in model.functions:
+        yield (ObjectKind.FUNCTION, function.schema, None, function.name), (
+            function.segment,
+        )
+        for parameter in function.parameters:
+            yield (
+                ObjectKind.PARAMETER,
+                parameter.schema,
+                function.name,
+                parameter.name,
+            ), (parameter.segment,)
+    for kind in (ObjectKind.VIEW, ObjectKind.MATERIALIZED_VIEW):
+        for view in model.objects(kind):
+            yield (kind, view.schema, None, view.name), (view.segment,)
+
+
+class _ChangeLinter(FastLinter):
+    """Fast mode linter dropping the violations of known objects."""
+
+    exclude: AbstractSet[ObjectKey] = frozenset()
+
+    def object_keys(self, sql: str) -> List[ObjectKey]:
+        """Return the keys of the objects a SQL string declares."""
+        rendered = self.linter.render_string(sql, "<string input>", self.config, "utf8")
+        if not rendered.templated_variants:
+            return []
+        tokens, _ = self.lexer.lex(rendered.templated_variants[0])
+        return [key for key, _ in _object_anchors(build_token_model(tokens))]
+
+    def _evaluate(
+        self, model: DdlModel, rules: Sequence[BaseRule]
+    ) -> List[SQLBaseError]:
+        if not self.exclude:
+            return super()._evaluate(model, rules)
+        excluded = {
+            id(segment)
+            for key, segments in _object_anchors(model)
+            if key in self.exclude
+            for segment in segments
+        }
+        return [
+            violation
+            for violation in super()._evaluate(model, rules)
+            if id(violation.segment) not in excluded
+        ]
+
+
+class SchemaDiffLinter:
+    """Lints the objects which are new or renamed between two schema snapshots.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        pg_dump: Whether SQL dumps are ``pg_dump`` output, whose data sections
+            are skipped (see :mod:`custom_rules.pg_dump`).
+        chunk_size: The number of characters of the dumps read at once.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        pg_dump: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if isinstance(rules, str):
+            rules = [rule.strip() for rule in rules.split(",")]
+        self.linter = _ChangeLinter(config=config, dialect=dialect, rules=rules)
+        self.config = self.linter.config
+        self.pg_dump = pg_dump
+        self.chunk_size = chunk_size
+        self.statistics = DiffStatistics()
+
+    def _iter_statements(self, path: str) -> Iterator[Statement]:
+        if self.pg_dump:
+            from custom_rules.pg_dump import iter_dump_statements
+
+            yield from iter_dump_statements(path, self.chunk_size)
+            return
+        with open(path, encoding="utf8") as f:
+            yield from iter_statements(f, self.chunk_size)
+
+    def lint_sql(self, old_path: str, new_path: str) -> List[SQLBaseError]:
+        """Lint the objects a SQL dump adds or renames.
+
+        Args:
+            old_path: The dump of the old schema.
+            new_path: The dump of the new schema.
+
+        Returns:
+            The violations of the new and renamed objects, at their position
+            in the new dump.
+        """
+        old_digests = {
+            statement_digest(statement.text)
+            for statement in self._iter_statements(old_path)
+            if not statement.text.isspace()
+        }
+        new_digests: Set[bytes] = set()
+        changed: List[Statement] = []
+        for statement in self._iter_statements(new_path):
+            if statement.text.isspace():
+                continue
+            self.statistics.statements += 1
+            digest = statement_digest(statement.text)
+            new_digests.add(digest)
+            if digest not in old_digests:
+                changed.append(statement)
+        self.statistics.changed_statements += len(changed)
+        if not changed:
+            return []
+
+        # The objects of the old statements which were changed or removed.
+        exclude: Set[ObjectKey] = set()
+        for statement in self._iter_statements(old_path):
+            if (
+                statement.text.isspace()
+                or statement_digest(statement.text) in new_digests
+            ):
+                continue
+            exclude.update(self.linter.object_keys(statement.text))
+        self.statistics.old_objects += len(exclude)
+
+        self.linter.exclude = exclude
+        violations = []
+        try:
+            for statement in changed:
+                # Padding the first line keeps the positions on it.
+                sql = " " * (statement.line_pos - 1) + statement.text
+                violations += [
+                    _detach(violation, statement.line_no - 1)
+                    for violation in self.linter.lint_string(sql, fname=new_path)
+                ]
+        finally:
+            self.linter.exclude = frozenset()
+        return violations
+
+    def lint_catalogs(
+        self, old_paths: Iterable[str], new_paths: Iterable[str]
+    ) -> Iterator[Tuple[str, List[CatalogViolation]]]:
+        """Lint the objects that catalog exports add or rename.
+
+        Args:
+            old_paths: The export files and directories of the old schema.
+            new_paths: The export files and directories of the new schema.
+
+        Returns:
+            An iterator of tuples of the path of a new export file and the
+            violations of its new and renamed objects.
+        """
+        catalog_linter = CatalogLinter(config=self.config)
+        exclude = catalog_linter.object_keys(old_paths)
+        self.statistics.old_objects += len(exclude)
+        return catalog_linter.lint_paths(new_paths, exclude)
@@ -0,0 +1,395 @@
+"""Statement boundaries and statement headers found without lexing.
+
+:func:`find_statement_end` scans SQL text for the semicolon ending a
+statement, skipping over quoted strings and identifiers, dollar quoted bodies,
+nested block comments and ``BEGIN ATOMIC ... END`` function bodies. The scan
+jumps between the few characters which can start one of these with regular
+expressions, so it costs much less than lexing the text.
+
+:func:`mask_bodies` uses it to blank out the query of views and the definition
+of functions and procedures following their parameter list, which the naming
+rules never look at. Blanking keeps every character offset, line and position
+of the text, so the headers left in place are reported exactly where they
+were.
+"""
+
+import hashlib
+import re
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# The characters or words which can start something a semicolon is not a
+# statement terminator in.
+_BOUNDARY = re.compile(
+    r"""
+    (?P<line_comment>--)
+    | (?P<block_comment>/\*)
+    | (?P<escape_string>(?<![\w$])[eE]')
+    | (?P<string>')
+    | (?P<identifier>")
+    | (?P<dollar>(?<![\w$])\$(?:[^\W\d]\w*)?\$)
+    | (?P<semicolon>;)
+    | (?P<atomic>(?<![\w$])begin\s+atomic(?![\w$]))
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Within a BEGIN ATOMIC body, semicolons end the inner statements and the body
+# ends with the END matching its BEGIN, CASE expressions having their own END.
+_ATOMIC_BOUNDARY = re.compile(
+    r"""
+    (?P<line_comment>--)
+    | (?P<block_comment>/\*)
+    | (?P<escape_string>(?<![\w$])[eE]')
+    | (?P<string>')
+    | (?P<identifier>")
+    | (?P<dollar>(?<![\w$])\$(?:[^\W\d]\w*)?\$)
+    | (?P<open>(?<![\w$])case(?![\w$]))
+    | (?P<close>(?<![\w$])end(?![\w$]))
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+_STRING_END = re.compile(r"[^']*(?:''[^']*)*'")
+_ESCAPE_STRING_END = re.compile(r"(?:[^'\\]|\\.|'')*'", re.DOTALL)
+_IDENTIFIER_END = re.compile(r'[^"]*(?:""[^"]*)*"')
+_BLOCK_COMMENT_MARK = re.compile(r"/\*|\*/")
+
+# The code tokens of a statement header: words, brackets and anything else
+# one character at a time. Whitespace, comments and quoted text are skipped
+# with the helpers above.
+_HEADER_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<skip>--|/\*|(?<![\w$])[eE]'|'|"|(?<![\w$])\$(?:[^\W\d]\w*)?\$)
+    | (?P<word>[^\W\d][\w$]*)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# The tokens of a statement, for normalizing it. Unlike the header tokens,
+# words include numbers, and quoted text is a token of its own.
+_CODE_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<skip>--|/\*|(?<![\w$])[eE]'|'|"|(?<![\w$])\$(?:[^\W\d]\w*)?\$)
+    | (?P<word>[\w$]+)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_QUOTED_KINDS = {
+    "--": "line_comment",
+    "/*": "block_comment",
+    "'": "string",
+    '"': "identifier",
+}
+
+# Tokens which whitespace around them does not change.
+_PUNCTUATION = frozenset("(),;")
+
+# Words which may appear between CREATE and the object keyword.
+_CREATE_MODIFIERS = frozenset(
+    {"OR", "REPLACE", "GLOBAL", "LOCAL", "TEMP", "TEMPORARY", "UNLOGGED", "RECURSIVE"}
+)
+
+
+class StatementSpan(NamedTuple):
+    """The character range of a statement, including its terminator.
+
+    ``start`` is the end of the previous statement, so the leading whitespace
+    and comments belong to the statement they precede.
+    """
+
+    start: int
+    end: int
+
+
+def _skip_quoted(text: str, kind: str, match_end: int, tag: str) -> Optional[int]:
+    """Return the offset after the quoted text or comment opened at a match.
+
+    Returns:
+        None if the text ends before the quoted text is closed.
+    """
+    if kind == "line_comment":
+        newline = text.find("\n", match_end)
+        return len(text) if newline < 0 else newline + 1
+    if kind == "block_comment":
+        depth = 1
+        pos = match_end
+        while depth:
+            mark = _BLOCK_COMMENT_MARK.search(text, pos)
+            if mark is None:
+                return None
+            depth += 1 if mark.group() == "/*" else -1
+            pos = mark.end()
+        return pos
+    if kind == "dollar":
+        close = text.find(tag, match_end)
+        return None if close < 0 else close + len(tag)
+    end_pattern = {
+        "string": _STRING_END,
+        "escape_string": _ESCAPE_STRING_END,
+        "identifier": _IDENTIFIER_END,
+    }[kind]
+    end = end_pattern.match(text, match_end)
+    return None if end is None else end.end()
+
+
+def _skip_atomic(text: str, pos: int) -> Optional[int]:
+    """Return the offset after the END closing a BEGIN ATOMIC body."""
+    depth = 1
+    while True:
+        match = _ATOMIC_BOUNDARY.search(text, pos)
+        if match is None:
+            return None
+        kind = match.lastgroup
+        if kind == "open":
+            depth += 1
+            pos = match.end()
+        elif kind == "close":
+            depth -= 1
+            pos = match.end()
+            if not depth:
+                return pos
+        else:
+            pos = _skip_quoted(text, kind, match.end(), match.group())
+            if pos is None:
+                return None
+
+
+def find_statement_end(text: str, start: int = 0, final: bool = True) -> Optional[int]:
+    """Find the end of the statement starting at an offset.
+
+    Args:
+        text: The SQL text.
+        start: The offset the statement starts at.
+        final: Whether ``text`` holds the rest of the input. When it does, an
+            unterminated statement ends with the text.
+
+    Returns:
+        The offset after the semicolon terminating the statement, or after the
+        last statement of the text. None if ``final`` is False and the text
+        ends before the statement does.
+    """
+    pos = start
+    while True:
+        match = _BOUNDARY.search(text, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        if kind == "semicolon":
+            return match.end()
+        if kind == "atomic":
+            pos = _skip_atomic(text, match.end())
+        else:
+            pos = _skip_quoted(text, kind, match.end(), match.group())
+        if pos is None:
+            break
+    return len(text) if final else None
+
+
+def iter_statement_spans(text: str) -> Iterator[StatementSpan]:
+    """Split SQL text into statements.
+
+    Yields:
+        The span of each statement, in order. The spans cover the whole text.
+    """
+    start = 0
+    while start < len(text):
+        end = find_statement_end(text, start)
+        yield StatementSpan(start, end)
+        start = end
+
+
+def statement_digest(text: str) -> bytes:
+    """Hash the text of a statement, ignoring the surrounding whitespace.
+
+    Statements with the same digest lint the same, so the digest identifies
+    them across versions of a file.
+    """
+    return hashlib.blake2b(text.strip().encode("utf8"), digest_size=16).digest()
+
+
+def code_token_spans(text: str) -> List[Tuple[int, int]]:
+    """Return the spans of the code tokens of a statement.
+
+    Words and numbers, quoted strings and identifiers, dollar quoted bodies and
+    any other character on its own are tokens. Whitespace and comments are
+    not.
+    """
+    spans = []
+    pos = 0
+    end = len(text)
+    while pos < end:
+        match = _CODE_TOKEN.match(text, pos)
+        kind = match.lastgroup
+        if kind == "skip":
+            skipped = match.group()
+            quoted_kind = _QUOTED_KINDS.get(
+                skipped, "dollar" if skipped[0] == "$" else "escape_string"
+            )
+            skipped_end = _skip_quoted(text, quoted_kind, match.end(), skipped) or end
+            if quoted_kind not in ("line_comment", "block_comment"):
+                spans.append((match.start(), skipped_end))
+            pos = skipped_end
+        else:
+            if kind != "space":
+                spans.append(match.span())
+            pos = match.end()
+    return spans
+
+
+def normalized_statement(text: str, spans: List[Tuple[int, int]]) -> str:
+    """Return the text of a statement without its whitespace and comments.
+
+    Tokens which whitespace or comments separate are separated by a single
+    space, except around brackets, commas and semicolons, which never merge
+    with their neighbours. Statements differing only in their layout and
+    comments have the same normalized text.
+
+    Args:
+        text: The statement.
+        spans: Its code tokens, see :func:`code_token_spans`.
+    """
+    parts: List[str] = []
+    last = 0
+    for start, end in spans:
+        token = text[start:end]
+        if (
+            parts
+            and start > last
+            and token not in _PUNCTUATION
+            and parts[-1] not in _PUNCTUATION
+        ):
+            parts.append(" ")
+        parts.append(token)
+        last = end
+    return "".join(parts)
+
+
+def _header_tokens(text: str, start: int, end: int) -> Iterator[Tuple[str, int, int]]:
+    """Yield the code tokens of a statement as (kind, start, end) tuples.
+
+    Words are upper cased in the kind, e.g. ``("CREATE", 0, 6)``; other
+    characters are their own kind, e.g. ``("(", 10, 11)``.
+    """
+    pos = start
+    while pos < end:
+        match = _HEADER_TOKEN.match(text, pos, end)
+        if match is None:
+            return
+        kind = match.lastgroup
+        if kind == "space":
+            pos = match.end()
+        elif kind == "skip":
+            skipped = match.group()
+            quoted_kind = _QUOTED_KINDS.get(
+                skipped, "dollar" if skipped[0] == "$" else "escape_string"
+            )
+            pos = _skip_quoted(text, quoted_kind, match.end(), skipped) or end
+        elif kind == "word":
+            yield match.group().upper(), match.start(), match.end()
+            pos = match.end()
+        else:
+            yield match.group(), match.start(), match.end()
+            pos = match.end()
+
+
+def body_start(text: str, span: StatementSpan) -> Optional[int]:
+    """Return where the part of a statement the naming rules ignore starts.
+
+    That is after the ``AS`` introducing the query of a view, and after the
+    parameter list of a function or procedure.
+
+    Returns:
+        The offset of the body, or None for other statements.
+    """
+    tokens = _header_tokens(text, span.start, span.end)
+    first = next(tokens, None)
+    if first is None or first[0] != "CREATE":
+        return None
+    token = next(tokens, None)
+    while token is not None and token[0] in _CREATE_MODIFIERS:
+        token = next(tokens, None)
+    if token is None:
+        return None
+    if token[0] == "MATERIALIZED":
+        token = next(tokens, None)
+        if token is None:
+            return None
+    if token[0] not in ("VIEW", "FUNCTION", "PROCEDURE"):
+        return None
+
+    is_view = token[0] == "VIEW"
+    depth = 0
+    for kind, _, token_end in tokens:
+        if kind == "(":
+            depth += 1
+        elif kind == ")":
+            depth -= 1
+            if depth == 0 and not is_view:
+                return token_end
+        elif is_view and depth == 0 and kind == "AS":
+            return token_end
+        elif kind == ";":
+            return None
+    return None
+
+
+def _blank(text: str) -> str:
+    """Replace everything but line breaks with spaces."""
+    return re.sub(r"[^\r\n]+", lambda match: " " * len(match.group()), text)
+
+
+def _blank_keeping_comments(text: str, start: int, end: int) -> List[str]:
+    """Blank a range of text, keeping its comments for ``noqa`` directives."""
+    parts = []
+    pos = start
+    while pos < end:
+        match = _BOUNDARY.search(text, pos, end)
+        if match is None or match.lastgroup in ("semicolon", "atomic"):
+            next_pos = end if match is None else match.end()
+            parts.append(_blank(text[pos:next_pos]))
+            pos = next_pos
+            continue
+        kind = match.lastgroup
+        skipped_end = min(
+            _skip_quoted(text, kind, match.end(), match.group()) or end, end
+        )
+        if kind in ("line_comment", "block_comment"):
+            parts.append(_blank(text[pos : match.start()]))
+            parts.append(text[match.start() : skipped_end])
+        else:
+            parts.append(_blank(text[pos:skipped_end]))
+        pos = skipped_end
+    return parts
+
+
+def mask_bodies(text: str) -> str:
+    """Blank out the view queries and function bodies of SQL text.
+
+    Comments and statement terminators are kept, and the result has the same
+    length and line breaks as ``text``.
+
+    Args:
+        text: The SQL text.
+
+    Returns:
+        The text with only the statement headers left.
+    """
+    parts = []
+    last = 0
+    for span in iter_statement_spans(text):
+        start = body_start(text, span)
+        if start is None:
+            continue
+        end = span.end - 1 if text[span.end - 1] == ";" else span.end
+        parts.append(text[last:start])
+        parts.extend(_blank_keeping_comments(text, start, end))
+        last = end
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return "".join(parts)
@@ -0,0 +1,354 @@
+"""Statement by statement linting of large files.
+
+Schema dumps and generated migrations can be several gigabytes, too large to
+template, lex and parse as a whole. :func:`iter_statements` reads a text
+stream in chunks and splits it on statement boundaries (see
+:mod:`custom_rules.statements`), and :class:`StreamingLinter` lints each
+statement on its own and drops it before reading the next one, so memory is
+bounded by the largest statement rather than by the file.
+
+The violations are reported at their position in the file, and range ``noqa``
+directives (``-- noqa: disable=...``) apply across statements as they do for
+whole files. Each statement is templated on its own, so template blocks
+spanning several statements are not supported, and the rules see one statement
+at a time. Only the rules evaluating the DDL model run, as in the fast mode:
+the other selected rules, such as the SQLFluff layout rules, check whole files
+and would report the edges of every statement. Since the violations of a
+statement only depend on its tokens, those of repeated statements can be
+reused (see :mod:`custom_rules.dedup`).
+
+Like the parsed mode, each file is linted with the configuration of its
+directory, including its ``.sqlfluff`` files (see :mod:`custom_rules.configs`).
+"""
+
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlfluff.core import FluffConfig, Linter
+from sqlfluff.core.errors import SQLBaseError
+from sqlfluff.core.parser import RegexLexer
+from sqlfluff.core.rules.noqa import IgnoreMask, NoQaDirective
+
+from custom_rules.configs import config_fingerprint
+from custom_rules.dedup import StatementCache
+from custom_rules.fast import FastLinter
+from custom_rules.prefilter import PrefilteredLinter, expand_paths
+from custom_rules.statements import find_statement_end
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class Statement(NamedTuple):
+    """A statement read from a stream, with the position it starts at.
+
+    ``text`` includes the whitespace and comments preceding the statement and
+    its terminating semicolon.
+    """
+
+    text: str
+    line_no: int
+    line_pos: int
+
+
+def iter_statements(
+    stream: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Statement]:
+    """Split a text stream into statements, reading it in chunks.
+
+    Args:
+        stream: The SQL text stream.
+        chunk_size: The number of characters to read at once. Statements
+            longer than a chunk are read in growing chunks.
+
+    Yields:
+        The statements of the stream, in order.
+    """
+    buffer = ""
+    start = 0
+    line_no = line_pos = 1
+    read_size = chunk_size
+    eof = False
+    while True:
+        end = find_statement_end(buffer, start, final=eof)
+        if end is None or start == len(buffer):
+            if eof:
+                return
+            # Keep the incomplete statement and read more of it, doubling the
+            # read size so long statements are rescanned a bounded number of
+            # times.
+            chunk = stream.read(read_size)
+            buffer = buffer[start:] + chunk
+            start = 0
+            eof = not chunk
+            read_size = max(chunk_size, len(buffer))
+            continue
+
+        text = buffer[start:end]
+        start = end
+        read_size = chunk_size
+        yield Statement(text, line_no, line_pos)
+        newlines = text.count("\n")
+        if newlines:
+            line_no += newlines
+            line_pos = len(text) - text.rfind("\n")
+        else:
+            line_pos += len(text)
+
+
+class NoQaMatcher(NamedTuple):
+    """What the range ``noqa`` directives of statements are read with."""
+
+    comment_matcher: RegexLexer
+    reference_map: Dict[str, Set[str]]
+
+
+def _detach(violation: SQLBaseError, line_offset: int) -> SQLBaseError:
+    """Move a violation of a statement to its line in the file.
+
+    The violation no longer references the statement's segments, so the parse
+    tree can be freed.
+    """
+    violation.line_no += line_offset
+    violation.segment = None
+    if hasattr(violation, "fixes"):
+        violation.fixes = []
+    return violation
+
+
+class StreamingLinter:
+    """Lints large files one statement at a time.
+
+    Args:
+        config: The SQLFluff configuration. Defaults to the configuration
+            found from the current directory.
+        dialect: Optional dialect override.
+        rules: Optional rule selection, as for ``sqlfluff lint --rules``.
+        fast: Whether to lint the statements in the lexer-only fast mode (see
+            :class:`custom_rules.fast.FastLinter`) instead of parsing them.
+        header_only: Whether to only lex the statement headers. Implies
+            ``fast``.
+        pg_dump: Whether files are ``pg_dump`` output, whose data sections are
+            skipped (see :mod:`custom_rules.pg_dump`).
+        chunk_size: The number of characters to read at once.
+        prefilter: Whether to skip the rule groups whose trigger keywords a
+            statement does not contain (see :mod:`custom_rules.prefilter`).
+        skip_files: Whether to skip the statements left without any rule to
+            run, instead of parsing them for their parse errors.
+        statement_cache: Optional cache of the violations of statements,
+            reused for the repeated ones (see :mod:`custom_rules.dedup`).
+    """
+
+    def __init__(
+        self,
+        config: Optional[FluffConfig] = None,
+        dialect: Optional[str] = None,
+        rules: Optional[Union[str, Sequence[str]]] = None,
+        fast: bool = False,
+        header_only: bool = False,
+        pg_dump: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        prefilter: bool = True,
+        skip_files: bool = False,
+        statement_cache: Optional[StatementCache] = None,
+    ):
+        if isinstance(rules, str):
+            rules = [rule.strip() for rule in rules.split(",")]
+        self.linter = PrefilteredLinter(
+            config=config,
+            dialect=dialect,
+            rules=rules,
+            prefilter=prefilter,
+            skip_files=skip_files,
+            model_rules_only=True,
+        )
+        self.config = self.linter.config
+        self.chunk_size = chunk_size
+        self.pg_dump = pg_dump
+        self.statement_cache = statement_cache
+        self.fast_linter = None
+        if fast or header_only:
+            self.fast_linter = FastLinter(
+                config=self.config,
+                header_only=header_only,
+                prefilter=prefilter,
+                skip_files=skip_files,
+            )
+        self.prefilter = (self.fast_linter or self.linter).prefilter
+        # The configuration of each directory is loaded once.
+        self.configs = self.linter.configs
+
+    def _lint_statement(
+        self, sql: str, fname: str, config: Optional[FluffConfig] = None
+    ) -> List[SQLBaseError]:
+        if self.fast_linter is not None:
+            return self.fast_linter.lint_string(sql, fname=fname, config=config)
+        return self.linter.lint_string(sql, fname=fname, config=config)
+
+    def _lint_detached(
+        self,
+        sql: str,
+        fname: str,
+        line_offset: int,
+        config: Optional[FluffConfig] = None,
+    ) -> List[SQLBaseError]:
+        """Lint a statement, moving its violations to their line in the file."""
+        return [
+            _detach(violation, line_offset)
+            for violation in self._lint_statement(sql, fname, config)
+        ]
+
+    def _noqa_matcher(self, config: FluffConfig) -> Optional[NoQaMatcher]:
+        """Return what reads the range directives under a configuration.
+
+        Returns:
+            None if ``noqa`` directives are disabled.
+        """
+        disable_noqa_except = config.get("disable_noqa_except")
+        if config.get("disable_noqa") and not disable_noqa_except:
+            return None
+        rule_pack = self.configs.rules(config).rule_pack
+        return NoQaMatcher(
+            next(
+                matcher
+                for matcher in config.get("dialect_obj").lexer_matchers
+                if matcher.name == "inline_comment"
+            ),
+            Linter.allowed_rule_ref_map(rule_pack.reference_map, disable_noqa_except),
+        )
+
+    @staticmethod
+    def _range_directives(
+        sql: str, line_offset: int, noqa: NoQaMatcher
+    ) -> List[NoQaDirective]:
+        """Return the disable and enable directives of a statement."""
+        ignore_mask, _ = IgnoreMask.from_source(
+            sql, noqa.comment_matcher, noqa.reference_map
+        )
+        directives = []
+        # IgnoreMask does not expose its directives, which are needed to apply
+        # them to the statements that follow.
+        for directive in ignore_mask._ignore_list:
+            if directive.action:
+                directive.line_no += line_offset
+                directives.append(directive)
+        return directives
+
+    def lint_stream(
+        self,
+        stream: IO[str],
+        fname: str = "<string input>",
+        config: Optional[FluffConfig] = None,
+    ) -> Iterator[SQLBaseError]:
+        """Lint a SQL text stream.
+
+        Args:
+            stream: The SQL text stream.
+            fname: The file name used for templating and reporting.
+            config: The configuration to lint with, see
+                :meth:`lint_statements`.
+
+        Yields:
+            The violations of each statement, in statement order.
+        """
+        return self.lint_statements(
+            iter_statements(stream, self.chunk_size), fname, config=config
+        )
+
+    def lint_statements(
+        self,
+        statements: Iterable[Statement],
+        fname: str = "<string input>",
+        selected: Optional[Callable[[Statement], bool]] = None,
+        config: Optional[FluffConfig] = None,
+    ) -> Iterator[SQLBaseError]:
+        """Lint statements read from a file.
+
+        Args:
+            statements: The statements, in file order.
+            fname: The file name used for templating and reporting.
+            selected: Optional predicate choosing the statements to lint. The
+                range ``noqa`` directives of the other statements still apply.
+            config: The configuration to lint with, e.g. that of the file the
+                statements were read from. Defaults to the root configuration.
+
+        Yields:
+            The violations of each statement, in statement order.
+        """
+        fingerprint = None
+        if config is None:
+            config = self.config
+        elif self.statement_cache is not None:
+            fingerprint = config_fingerprint(config)
+        noqa = self._noqa_matcher(config)
+        prefilter = (self.fast_linter or self.linter).configs.rules(config).prefilter
+        directives: List[NoQaDirective] = []
+        for statement in statements:
+            if statement.text.isspace():
+                continue
+            # Padding the first line keeps the positions on it.
+            sql = " " * (statement.line_pos - 1) + statement.text
+            line_offset = statement.line_no - 1
+            if noqa is not None and "noqa" in sql:
+                directives += self._range_directives(sql, line_offset, noqa)
+            if selected is not None and not selected(statement):
+                continue
+            if self.statement_cache is None:
+                violations = self._lint_detached(sql, fname, line_offset, config)
+            else:
+                violations = self.statement_cache.lint(
+                    sql,
+                    line_offset,
+                    lambda: self._lint_detached(sql, fname, line_offset, config),
+                    groups=(
+                        prefilter.active_groups([sql])
+                        if prefilter is not None
+                        else frozenset()
+                    ),
+                    fingerprint=fingerprint,
+                )
+            if directives:
+                violations = IgnoreMask(directives).ignore_masked_violations(violations)
+            yield from violations
+
+    def lint_path(self, path: str) -> List[SQLBaseError]:
+        """Lint a single file, with the configuration that applies to it."""
+        config = self.configs.directory_config(path)
+        if self.pg_dump:
+            from custom_rules.pg_dump import iter_dump_statements
+
+            return list(
+                self.lint_statements(
+                    iter_dump_statements(path, self.chunk_size),
+                    fname=path,
+                    config=config,
+                )
+            )
+        with open(path, encoding="utf8") as f:
+            return list(self.lint_stream(f, fname=path, config=config))
+
+    def files(self, paths: Sequence[str]) -> List[str]:
+        """Find the files of files and directories, see :func:`expand_paths`."""
+        return expand_paths(paths, self.config)
+
+    def lint_paths(
+        self, paths: Sequence[str]
+    ) -> Iterator[Tuple[str, List[SQLBaseError]]]:
+        """Lint files and directories.
+
+        Yields:
+            Tuples of the file path and its violations.
+        """
+        for path in self.files(paths):
+            yield path, self.lint_path(path)
@@ -0,0 +1,382 @@
+"""DDL model built from the lexed token stream.
+
+The naming rules only need the names following a few keywords, so the same
+:class:`~custom_rules.model.DdlModel` the parse tree provides can be recovered
+from the tokens of the lexer, without running the parser. The objects are
+anchored to the tokens the parser would have anchored them to, so that the
+violations are reported at the same positions.
+
+Only the statement shapes checked by the rules are recognised:
+
+- ``CREATE [OR REPLACE] [TEMP] TABLE`` with column and table constraints
+- ``ALTER TABLE ... ADD [COLUMN | CONSTRAINT]``
+- ``CREATE [OR REPLACE] FUNCTION`` with its parameter list
+- ``CREATE [OR REPLACE] [TEMP] [RECURSIVE] VIEW`` and
+  ``CREATE MATERIALIZED VIEW``
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from sqlfluff.core.parser import BaseSegment
+
+from custom_rules.model import (
+    ConstraintKind,
+    ConstraintObject,
+    DdlModel,
+    FunctionObject,
+    ParameterObject,
+    TableObject,
+    ViewObject,
+    _split_qualified_name,
+    raw_parameter_names,
+)
+
+# Words which may appear between CREATE and the object keyword.
+_CREATE_MODIFIERS = frozenset(
+    {"OR", "REPLACE", "GLOBAL", "LOCAL", "TEMP", "TEMPORARY", "UNLOGGED", "RECURSIVE"}
+)
+
+# Table elements which are not column definitions.
+_TABLE_CONSTRAINT_STARTS = frozenset(
+    {"CONSTRAINT", "PRIMARY", "FOREIGN", "UNIQUE", "CHECK", "EXCLUDE", "LIKE"}
+)
+
+# The keyword following the name of a constraint and the resulting kind.
+_CONSTRAINT_KINDS = {
+    "DEFAULT": ConstraintKind.DEFAULT,
+    "PRIMARY": ConstraintKind.PRIMARY_KEY,
+    "FOREIGN": ConstraintKind.FOREIGN_KEY,
+    "CHECK": ConstraintKind.CHECK,
+    "UNIQUE": ConstraintKind.UNIQUE,
+}
+
+_PARAMETER_MODES = frozenset({"IN", "OUT", "INOUT", "VARIADIC"})
+
+# Words continuing a multi word data type, e.g. DOUBLE PRECISION or
+# TIMESTAMP WITH TIME ZONE. A parameter followed by one of these has no name.
+_TYPE_CONTINUATIONS = frozenset(
+    {
+        "PRECISION",
+        "VARYING",
+        "WITH",
+        "WITHOUT",
+        "ARRAY",
+        "YEAR",
+        "MONTH",
+        "DAY",
+        "HOUR",
+        "MINUTE",
+        "SECOND",
+    }
+)
+
+_IDENTIFIER_TYPES = ("word", "double_quote", "unicode_double_quote")
+
+
+def _word(token: Optional[BaseSegment]) -> Optional[str]:
+    """Return the upper case raw of a word token, or None."""
+    if token is not None and token.is_type("word"):
+        return token.raw.upper()
+    return None
+
+
+def _at(tokens: Sequence[BaseSegment], idx: int) -> Optional[BaseSegment]:
+    """Return the token at an index, or None past the end."""
+    return tokens[idx] if idx < len(tokens) else None
+
+
+def _skip_words(tokens: Sequence[BaseSegment], idx: int, *words: str) -> int:
+    """Skip an exact sequence of words, e.g. IF NOT EXISTS, when present."""
+    for offset, word in enumerate(words):
+        if _word(_at(tokens, idx + offset)) != word:
+            return idx
+    return idx + len(words)
+
+
+def _read_name(tokens: Sequence[BaseSegment], idx: int) -> Tuple[Optional[str], int]:
+    """Read a possibly qualified name.
+
+    Returns:
+        A tuple of the raw name, with its parts joined by dots, and the index
+        following the name. The name is None if there is no identifier at the
+        index.
+    """
+    token = _at(tokens, idx)
+    if token is None or not token.is_type(*_IDENTIFIER_TYPES):
+        return None, idx
+    parts = [token.raw]
+    idx += 1
+    while (
+        idx + 1 < len(tokens)
+        and tokens[idx].is_type("dot")
+        and tokens[idx + 1].is_type(*_IDENTIFIER_TYPES)
+    ):
+        parts.append(tokens[idx + 1].raw)
+        idx += 2
+    return ".".join(parts), idx
+
+
+def _bracket_end(tokens: Sequence[BaseSegment], idx: int) -> int:
+    """Return the index of the bracket closing the one at ``idx``."""
+    depth = 0
+    for end in range(idx, len(tokens)):
+        if tokens[end].is_type("start_bracket"):
+            depth += 1
+        elif tokens[end].is_type("end_bracket"):
+            depth -= 1
+            if depth == 0:
+                return end
+    return len(tokens) - 1
+
+
+def _split_top_level(
+    tokens: Sequence[BaseSegment], start: int, stop: int
+) -> List[Sequence[BaseSegment]]:
+    """Split ``tokens[start:stop]`` on the commas outside of brackets."""
+    items = []
+    depth = 0
+    item_start = start
+    for idx in range(start, stop):
+        token = tokens[idx]
+        if token.is_type("start_bracket"):
+            depth += 1
+        elif token.is_type("end_bracket"):
+            depth -= 1
+        elif depth == 0 and token.is_type("comma"):
+            items.append(tokens[item_start:idx])
+            item_start = idx + 1
+    if item_start < stop:
+        items.append(tokens[item_start:stop])
+    return [item for item in items if item]
+
+
+def _split_statements(tokens: Sequence[BaseSegment]) -> List[List[BaseSegment]]:
+    """Split the code tokens of a file on the semicolons outside of brackets."""
+    statements = []
+    current: List[BaseSegment] = []
+    depth = 0
+    for token in tokens:
+        if not token.is_code:
+            continue
+        if token.is_type("start_bracket"):
+            depth += 1
+        elif token.is_type("end_bracket"):
+            depth = max(depth - 1, 0)
+        elif depth == 0 and token.is_type("semicolon"):
+            if current:
+                statements.append(current)
+            current = []
+            continue
+        current.append(token)
+    if current:
+        statements.append(current)
+    return statements
+
+
+class _TokenModelBuilder:
+    """Collects the DDL objects from the statements of a file."""
+
+    def __init__(self):
+        self.tables = []
+        self.constraints = []
+        self.functions = []
+        self.views = []
+        self.materialized_views = []
+
+    def build(self, tokens: Sequence[BaseSegment]) -> DdlModel:
+        """Scan the tokens and return the collected model."""
+        for statement in _split_statements(tokens):
+            self._visit_statement(statement)
+        return DdlModel(
+            tables=tuple(self.tables),
+            constraints=tuple(self.constraints),
+            functions=tuple(self.functions),
+            views=tuple(self.views),
+            materialized_views=tuple(self.materialized_views),
+        )
+
+    def _visit_statement(self, statement: List[BaseSegment]) -> None:
+        first = _word(statement[0])
+        if first == "ALTER" and _word(_at(statement, 1)) == "TABLE":
+            self._visit_alter_table(statement)
+            return
+        if first != "CREATE":
+            return
+
+        idx = 1
+        while _word(_at(statement, idx)) in _CREATE_MODIFIERS:
+            idx += 1
+        keyword = _word(_at(statement, idx))
+        if keyword == "TABLE":
+            self._visit_create_table(statement, idx + 1)
+        elif keyword == "FUNCTION":
+            self._visit_function(statement, idx + 1)
+        elif keyword == "VIEW":
+            self._visit_view(statement, idx + 1, self.views)
+        elif keyword == "MATERIALIZED" and _word(_at(statement, idx + 1)) == "VIEW":
+            self._visit_view(statement, idx + 2, self.materialized_views)
+
+    def _visit_create_table(self, statement: List[BaseSegment], idx: int) -> None:
+        idx = _skip_words(statement, idx, "IF", "NOT", "EXISTS")
+        table, idx = _read_name(statement, idx)
+        if table is None:
+            return
+        schema, name = _split_qualified_name(table)
+        self.tables.append(TableObject(statement[0], schema, name))
+
+        # The table elements are in the first bracket, e.g. after the name or
+        # after PARTITION OF parent. CREATE TABLE ... AS has no elements.
+        while idx < len(statement) and not statement[idx].is_type("start_bracket"):
+            if _word(statement[idx]) == "AS":
+                return
+            idx += 1
+        if idx == len(statement):
+            return
+        end = _bracket_end(statement, idx)
+        for element in _split_top_level(statement, idx + 1, end):
+            head = _word(element[0])
+            if head == "CONSTRAINT":
+                self._add_constraint(element, 0, table, None)
+            elif head not in _TABLE_CONSTRAINT_STARTS:
+                self._visit_column(element, 0, table)
+
+    def _visit_alter_table(self, statement: List[BaseSegment]) -> None:
+        idx = _skip_words(statement, 2, "IF", "EXISTS")
+        idx = _skip_words(statement, idx, "ONLY")
+        table, idx = _read_name(statement, idx)
+        if table is None:
+            return
+        if _at(statement, idx) is not None and statement[idx].raw == "*":
+            idx += 1
+        for action in _split_top_level(statement, idx, len(statement)):
+            if _word(action[0]) != "ADD":
+                continue
+            head = _word(_at(action, 1))
+            if head == "CONSTRAINT":
+                self._add_constraint(action, 1, table, None)
+            elif head not in _TABLE_CONSTRAINT_STARTS:
+                column_idx = _skip_words(action, 1, "COLUMN")
+                column_idx = _skip_words(action, column_idx, "IF", "NOT", "EXISTS")
+                self._visit_column(action, column_idx, table)
+
+    def _visit_column(
+        self, element: Sequence[BaseSegment], idx: int, table: str
+    ) -> None:
+        """Collect the named constraints of a column definition."""
+        column_token = _at(element, idx)
+        if column_token is None:
+            return
+        column = column_token.raw
+        depth = 0
+        for constraint_idx in range(idx + 1, len(element)):
+            token = element[constraint_idx]
+            if token.is_type("start_bracket"):
+                depth += 1
+            elif token.is_type("end_bracket"):
+                depth -= 1
+            elif depth == 0 and _word(token) == "CONSTRAINT":
+                self._add_constraint(element, constraint_idx, table, column)
+
+    def _add_constraint(
+        self,
+        tokens: Sequence[BaseSegment],
+        idx: int,
+        table: str,
+        column: Optional[str],
+    ) -> None:
+        """Add the constraint starting with the CONSTRAINT keyword at ``idx``."""
+        name_token = _at(tokens, idx + 1)
+        if name_token is None:
+            return
+        kind = _CONSTRAINT_KINDS.get(_word(_at(tokens, idx + 2)))
+        self.constraints.append(
+            ConstraintObject(
+                tokens[idx],
+                name_token,
+                name_token.raw,
+                kind,
+                table,
+                column,
+                _split_qualified_name(table)[0],
+                "table_constraint" if column is None else "column_constraint_segment",
+            )
+        )
+
+    def _visit_function(self, statement: List[BaseSegment], idx: int) -> None:
+        raw_name, idx = _read_name(statement, idx)
+        if raw_name is None:
+            return
+        schema, name = _split_qualified_name(raw_name)
+        parameter_list = _at(statement, idx)
+        if parameter_list is None or not parameter_list.is_type("start_bracket"):
+            self.functions.append(FunctionObject(statement[0], schema, name, None, ()))
+            return
+
+        end = _bracket_end(statement, idx)
+        parameters = []
+        for element in _split_top_level(statement, idx + 1, end):
+            name_token = _parameter_name(element)
+            if name_token is not None:
+                parameters.append(ParameterObject(name_token, name_token.raw, schema))
+        if not parameters and end > idx:
+            # Same fallback as for parse trees without parameter segments.
+            templated_str = parameter_list.pos_marker.templated_file.templated_str
+            raw = templated_str[
+                parameter_list.pos_marker.templated_slice.start : statement[
+                    end
+                ].pos_marker.templated_slice.stop
+            ]
+            parameters = [
+                ParameterObject(parameter_list, parameter_name, schema)
+                for parameter_name in raw_parameter_names(raw)
+            ]
+        self.functions.append(
+            FunctionObject(
+                statement[0], schema, name, parameter_list, tuple(parameters)
+            )
+        )
+
+    def _visit_view(
+        self, statement: List[BaseSegment], idx: int, views: List[ViewObject]
+    ) -> None:
+        idx = _skip_words(statement, idx, "IF", "NOT", "EXISTS")
+        raw_name, _ = _read_name(statement, idx)
+        if raw_name is None:
+            return
+        schema, name = _split_qualified_name(raw_name)
+        views.append(ViewObject(statement[0], schema, name))
+
+
+def _parameter_name(element: Sequence[BaseSegment]) -> Optional[BaseSegment]:
+    """Return the name token of a function parameter, if it is named.
+
+    A parameter is ``[mode] [name] [mode] type [DEFAULT expression]``. Like the
+    parser, a leading identifier is only a name when the rest of the parameter
+    is a data type on its own.
+    """
+    idx = 0
+    if _word(element[0]) in _PARAMETER_MODES and len(element) > 1:
+        idx = 1
+    first = element[idx]
+    following = _at(element, idx + 1)
+    if following is None or not first.is_type(*_IDENTIFIER_TYPES):
+        return None
+    if not following.is_type(*_IDENTIFIER_TYPES):
+        return None
+    if _word(following) in _TYPE_CONTINUATIONS or _word(following) == "DEFAULT":
+        return None
+    if _word(first) == "NATIONAL":
+        return None
+    return first
+
+
+def build_token_model(tokens: Sequence[BaseSegment]) -> DdlModel:
+    """Build the DDL model of a file from its lexed tokens.
+
+    Args:
+        tokens: The tokens of the file, as returned by the SQLFluff lexer.
+
+    Returns:
+        The DDL objects of the file.
+    """
+    return _TokenModelBuilder().build(tokens)
@@ -0,0 +1,466 @@
+"""Watching SQL files and linting them again as they are saved.
+
+:class:`WatchSession` lints the watched files once, then waits for changes and
+lints only the files which changed, printing the violations which appeared and
+those which were fixed rather than the whole report. The violations of every
+file are kept in memory as plain tuples, so the memory used depends on the
+number of violations, not on how long the session runs.
+
+Changes are read from inotify on Linux (:class:`InotifyWatcher`, through
+``ctypes``, without extra dependencies) and by comparing the modification time
+and size of the files at an interval elsewhere, or when asked to
+(:class:`PollingWatcher`). A burst of saves, e.g. a formatter rewriting
+several files or an editor writing a file in steps, is collected until no
+change arrives for the debounce delay, then linted at once.
+
+When a configuration or ignore file of the watched directories changes, e.g.
+``.sqlfluff`` or ``.sqlfluffignore``, the configurations of its directory and
+the files to lint are loaded again and every file is linted again.
+
+The latency from save to result, i.e. from the modification time of a file to
+its violations being printed, is measured for every file linted again and
+summarised as its median and 95th percentile over the last saves.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from collections import Counter, deque
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from sqlfluff.core import FluffConfig
+
+from custom_rules.prefilter import expand_paths
+
+DEFAULT_DEBOUNCE = 0.1
+
+DEFAULT_INTERVAL = 0.5
+
+# The files SQLFluff reads its configuration and ignore patterns from.
+CONFIG_FILES = frozenset(
+    (".sqlfluff", ".sqlfluffignore", "pyproject.toml", "setup.cfg", "tox.ini")
+)
+
+# The inotify constants of <sys/inotify.h>.
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+# A violation kept between runs: line, position, rule code and description.
+Finding = Tuple[int, int, str, str]
+
+
+class InotifyWatcher:
+    """Reads the changes of files from inotify.
+
+    Args:
+        directories: The directories to watch, with their subdirectories.
+
+    Raises:
+        OSError: If inotify is not available.
+    """
+
+    def __init__(self, directories: Iterable[str]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux.")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = {}
+        for directory in directories:
+            self._watch_tree(directory)
+
+    def _watch_tree(self, directory: str):
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(root), _WATCH_MASK)
+            if wd >= 0:
+                self._directories[wd] = root
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """Wait for changes.
+
+        Args:
+            timeout: The number of seconds to wait for, or None to wait until
+                a change.
+
+        Returns:
+            The paths which changed, empty if none did before the timeout.
+            None if events were lost and every file should be checked.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: Set[str] = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # Files may be written before the watch is added.
+                        self._watch_tree(path)
+                        overflow = True
+                    continue
+                changed.add(path)
+        return None if overflow else changed
+
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Finds the changed files by comparing their modification time and size.
+
+    Args:
+        paths: The files and directories to watch.
+        config: The configuration holding the SQL file extensions.
+        interval: The number of seconds between two scans.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        config: FluffConfig,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.paths = paths
+        self.config = config
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        # A watched directory may have been removed since.
+        paths = [path for path in self.paths if os.path.exists(path)]
+        files = expand_paths(paths, self.config)
+        # The configuration files of the directories from the watched ones
+        # down to those of the files.
+        directories = {
+            os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path))
+            for path in paths
+        }
+        for path in files:
+            directory = os.path.dirname(os.path.abspath(path))
+            while directory not in directories:
+                directories.add(directory)
+                directory = os.path.dirname(directory)
+        configs = [
+            os.path.join(directory, name)
+            for directory in sorted(directories)
+            for name in sorted(CONFIG_FILES)
+        ]
+        for path in files + configs:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def wait(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """Wait for changes, see :meth:`InotifyWatcher.wait`."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            state = self._scan()
+            changed = {
+                path
+                for path in state.keys() | self._state.keys()
+                if state.get(path) != self._state.get(path)
+            }
+            self._state = state
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self):
+        """Stop watching."""
+
+
+def make_watcher(
+    paths: Sequence[str],
+    config: FluffConfig,
+    poll: bool = False,
+    interval: float = DEFAULT_INTERVAL,
+):
+    """Return an inotify watcher of the paths, or a polling one.
+
+    Args:
+        paths: The files and directories to watch.
+        config: The configuration holding the SQL file extensions.
+        poll: Whether to poll even when inotify is available.
+        interval: The number of seconds between two scans when polling.
+    """
+    if not poll:
+        directories = {
+            path if os.path.isdir(path) else os.path.dirname(path) or "."
+            for path in map(os.path.normpath, paths)
+        }
+        try:
+            return InotifyWatcher(sorted(directories))
+        except (OSError, AttributeError):
+            # Not Linux, or a libc without inotify.
+            pass
+    return PollingWatcher(paths, config, interval)
+
+
+class LatencyStatistics:
+    """The latency from save to result of the files linted again.
+
+    Only the last ``window`` latencies are kept for the percentiles.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.last = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        """Record the latency of a file."""
+        self.count += 1
+        self.last = seconds
+        self._recent.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Return a percentile of the recent latencies, in seconds."""
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def __repr__(self) -> str:
+        return (
+            f"LatencyStatistics(count={self.count}, "
+            f"p50={self.percentile(0.5) * 1000:.0f}ms, "
+            f"p95={self.percentile(0.95) * 1000:.0f}ms)"
+        )
+
+
+def _format_finding(path: str, finding: Finding) -> str:
+    line_no, line_pos, code, description = finding
+    return f"{path}:{line_no}:{line_pos}: {code} {description}"
+
+
+class WatchSession:
+    """Lints files again as they change, printing what changed.
+
+    Args:
+        linter: A linter with ``lint_path`` and ``config``, see
+            :func:`custom_rules.cli._make_linter`.
+        paths: The files and directories to watch.
+        watcher: The source of the changes, see :func:`make_watcher`.
+        echo: Prints a line of output.
+        debounce: The number of seconds without changes ending a burst.
+    """
+
+    def __init__(
+        self,
+        linter,
+        paths: Sequence[str],
+        watcher,
+        echo: Callable[[str], None] = print,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ):
+        self.linter = linter
+        self.paths = [os.path.normpath(path) for path in paths]
+        self._roots = [os.path.abspath(path) for path in paths]
+        self.watcher = watcher
+        self.echo = echo
+        self.debounce = debounce
+        self.results: Dict[str, Tuple[Finding, ...]] = {}
+        # The files to lint, as ``sqlfluff lint`` finds them, and the changed
+        # files left out of them, e.g. by a ``.sqlfluffignore`` file.
+        self._files: Set[str] = set()
+        self._ignored: Set[str] = set()
+        self.latency = LatencyStatistics()
+        extensions = str(linter.config.get("sql_file_exts") or ".sql")
+        self._extensions = tuple(ext.strip().lower() for ext in extensions.split(","))
+
+    def _in_scope(self, path: str) -> bool:
+        if not path.lower().endswith(self._extensions):
+            return False
+        path = os.path.abspath(path)
+        return any(
+            path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+            for root in self._roots
+        )
+
+    def _forget_configs(self, directory: Optional[str]):
+        """Load the configurations of a directory again, see
+        :meth:`custom_rules.configs.ConfigResolver.forget`."""
+        configs = getattr(self.linter, "configs", None)
+        if configs is not None:
+            configs.forget(directory)
+
+    def _find_files(self):
+        self._files = set(expand_paths(self.paths, self.linter.config))
+        self._ignored = set()
+
+    def _lint(self, path: str) -> Tuple[Finding, ...]:
+        return tuple(
+            (v.line_no, v.line_pos, v.rule_code(), v.desc())
+            for v in self.linter.lint_path(path)
+        )
+
+    def start(self) -> int:
+        """Lint every watched file and print the violations.
+
+        Returns:
+            The number of violations.
+        """
+        self._find_files()
+        for path in sorted(self._files):
+            self.results[path] = self._lint(path)
+            for finding in self.results[path]:
+                self.echo(_format_finding(path, finding))
+        total = sum(map(len, self.results.values()))
+        self.echo(f"Watching {len(self.results)} files, {total} violations.")
+        return total
+
+    def update(self, changed: Optional[Iterable[str]]) -> List[str]:
+        """Lint the changed files again and print the differences.
+
+        New violations are printed with a ``+`` and fixed ones with a ``-``.
+        Violations only moved by an edit elsewhere in the file are not.
+
+        Args:
+            changed: The changed paths, or None to check every file.
+
+        Returns:
+            The paths linted again.
+        """
+        saved: Set[str] = set()
+        if changed is None:
+            self._forget_configs(None)
+        else:
+            changed = {os.path.normpath(path) for path in changed}
+            configs = {p for p in changed if os.path.basename(p) in CONFIG_FILES}
+            for path in configs:
+                self._forget_configs(os.path.dirname(path) or ".")
+            saved = {path for path in changed if self._in_scope(path)}
+            if configs:
+                changed = None
+        if changed is None:
+            self._find_files()
+            paths = self._files | self.results.keys()
+        else:
+            new = saved - self._files - self._ignored - self.results.keys()
+            if new:
+                # Created files, which may be ignored.
+                self._find_files()
+                self._ignored = new - self._files
+            paths = {p for p in saved if p in self._files or p in self.results}
+        relinted = []
+        start = time.perf_counter()
+        for path in sorted(paths):
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime is None or path not in self._files:
+                # Removed, or ignored since.
+                old = self.results.pop(path, ())
+                for finding in old:
+                    self.echo("- " + _format_finding(path, finding))
+                continue
+            new = self._lint(path)
+            if path in saved:
+                self.latency.add(max(0.0, (time.time_ns() - mtime) / 1e9))
+            self._print_delta(path, self.results.get(path, ()), new)
+            self.results[path] = new
+            relinted.append(path)
+        if relinted:
+            total = sum(map(len, self.results.values()))
+            self.echo(
+                f"Linted {len(relinted)} changed files in "
+                f"{(time.perf_counter() - start) * 1000:.0f}ms, {total} violations; "
+                f"save to result {self.latency.last * 1000:.0f}ms "
+                f"(p50 {self.latency.percentile(0.5) * 1000:.0f}ms, "
+                f"p95 {self.latency.percentile(0.95) * 1000:.0f}ms)."
+            )
+        return relinted
+
+    def _print_delta(
+        self, path: str, old: Tuple[Finding, ...], new: Tuple[Finding, ...]
+    ):
+        # Violations are compared by rule and message, ignoring positions.
+        fixed = Counter(f[2:] for f in old) - Counter(f[2:] for f in new)
+        added = Counter(f[2:] for f in new) - Counter(f[2:] for f in old)
+        for finding in old:
+            if fixed[finding[2:]]:
+                fixed[finding[2:]] -= 1
+                self.echo("- " + _format_finding(path, finding))
+        for finding in new:
+            if added[finding[2:]]:
+                added[finding[2:]] -= 1
+                self.echo("+ " + _format_finding(path, finding))
+
+    def wait(self) -> Optional[Set[str]]:
+        """Wait for a burst of changes, until none arrives for the debounce
+        delay."""
+        changed = self.watcher.wait(None)
+        while True:
+            more = self.watcher.wait(self.debounce)
+            if more is not None and not more:
+                return changed
+            changed = None if changed is None or more is None else changed | more
+
+    def run(self, bursts: Optional[int] = None):
+        """Lint the files, then lint them again as they change.
+
+        Args:
+            bursts: The number of bursts of changes to handle before
+                returning, or None to run until interrupted.
+        """
+        self.start()
+        handled = 0
+        try:
+            while bursts is None or handled < bursts:
+                self.update(self.wait())
+                handled += 1
+        finally:
+            self.watcher.close()
@@ -3,5 +3,13 @@
 import os
 import sys
 
+import pytest
+
 # Add the src directory to the path so that imports work correctly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_result_cache(tmp_path, monkeypatch):
+    """Keep the lint command's result cache of each test in its own directory."""
+    monkeypatch.setenv("SQLFLUFF_EXTENDED_CACHE_DIR", str(tmp_path / "result-cache"))
@@ -49,3 +49,14 @@ class TestPrimaryKeyConstraintRule:
         violations = [v for v in result.violations if v.rule_code() == "CR01"]
         assert len(violations) == 1
         assert "should start with 'pk_'" in violations[0].description.lower()
+
+    def test_column_primary_key_ignored(self, pk_linter):
+        """Test that a primary key declared on a column is not checked."""
+        sql = """
+        CREATE TABLE public.person (
+            person_id INT CONSTRAINT person_pk PRIMARY KEY
+        );
+        """
+        result = pk_linter.lint_string(sql)
+        violations = [v for v in result.violations if v.rule_code() == "CR01"]
+        assert len(violations) == 0
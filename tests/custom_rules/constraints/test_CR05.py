@@ -28,3 +28,26 @@ class TestDefaultConstraintRule:
         violations = [v for v in result.violations if v.rule_code() == "CR05"]
         assert len(violations) == 1
         assert "should start with 'df_'" in violations[0].description.lower()
+
+    def test_named_non_default_constraint_ignored(self, df_linter):
+        """Test that named column constraints other than DEFAULT are not checked."""
+        sql = """
+        CREATE TABLE public.person (
+            person_id INT CONSTRAINT person_id_not_null NOT NULL,
+            is_active BOOLEAN DEFAULT FALSE
+        );
+        """
+        result = df_linter.lint_string(sql)
+        violations = [v for v in result.violations if v.rule_code() == "CR05"]
+        assert len(violations) == 0
+
+    def test_multiple_default_constraints_invalid(self, df_linter):
+        """Test that each invalid default constraint on a wide table is reported."""
+        columns = ",\n".join(
+            f"col_{i} INT CONSTRAINT default_col_{i} DEFAULT 0" for i in range(50)
+        )
+        sql = f"CREATE TABLE public.wide (\n{columns}\n);\n"
+        result = df_linter.lint_string(sql)
+        violations = [v for v in result.violations if v.rule_code() == "CR05"]
+        assert len(violations) == 50
+        assert [v.line_no for v in violations] == list(range(2, 52))
@@ -0,0 +1,58 @@
+"""Tests for the shared constraint classifier."""
+
+from sqlfluff.core import Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.constraints.classifier import ConstraintKind, classify_constraint
+
+
+def _constraints(sql):
+    """Parse a SQL string with the postgres dialect and return its constraints."""
+    linter = Linter(config=FluffConfig(overrides={"dialect": "postgres"}))
+    tree = linter.parse_string(sql).tree
+    return list(tree.recursive_crawl("table_constraint", "column_constraint_segment"))
+
+
+class TestConstraintClassifier:
+    """Tests for classifying named constraints."""
+
+    def test_constraint_kinds(self):
+        """Test that each named constraint gets the expected kind."""
+        constraints = _constraints("""
+            CREATE TABLE public.orders (
+                order_id INT,
+                person_id INT,
+                amount INT,
+                CONSTRAINT orders_pk PRIMARY KEY (order_id),
+                CONSTRAINT orders_person_fk FOREIGN KEY (person_id) REFERENCES public.person(person_id),
+                CONSTRAINT amount_positive CHECK (amount > 0),
+                CONSTRAINT person_unique UNIQUE (person_id)
+            );
+            """)
+        classified = [classify_constraint(c) for c in constraints]
+        assert [(name.raw, kind) for name, kind in classified] == [
+            ("orders_pk", ConstraintKind.PRIMARY_KEY),
+            ("orders_person_fk", ConstraintKind.FOREIGN_KEY),
+            ("amount_positive", ConstraintKind.CHECK),
+            ("person_unique", ConstraintKind.UNIQUE),
+        ]
+
+    def test_lowercase_keywords(self):
+        """Test that constraint keywords are matched case-insensitively."""
+        (constraint,) = _constraints(
+            "alter table public.person add constraint person_pk primary key (person_id);\n"
+        )
+        assert classify_constraint(constraint)[1] is ConstraintKind.PRIMARY_KEY
+
+    def test_default(self):
+        """Test that a named DEFAULT column constraint is classified."""
+        (constraint,) = _constraints(
+            "CREATE TABLE t (c INT CONSTRAINT df_c DEFAULT 0);\n"
+        )
+        name, kind = classify_constraint(constraint)
+        assert (name.raw, kind) == ("df_c", ConstraintKind.DEFAULT)
+
+    def test_unnamed(self):
+        """Test that unnamed constraints, named by the database, are left out."""
+        (constraint,) = _constraints("CREATE TABLE t (c INT, PRIMARY KEY (c));\n")
+        assert classify_constraint(constraint) is None
@@ -0,0 +1,168 @@
+"""Generator of a large, varied SQL corpus for the lexer-only parity tests.
+
+The corpus mixes every statement shape the rules look at with noise the
+lexer-only mode must not be fooled by (names in strings, comments and function
+bodies), with random compliant and non-compliant names. Every statement is
+accepted by the postgres parser, so both modes see the same objects.
+"""
+
+import random
+
+TYPES = [
+    "INT",
+    "TEXT",
+    "NUMERIC(10, 2)",
+    "VARCHAR(20)",
+    "TIMESTAMP WITH TIME ZONE",
+    "DOUBLE PRECISION",
+    "INT[]",
+    "CHARACTER VARYING(5)",
+    "BOOLEAN",
+]
+
+
+def _name(rng, prefix):
+    """Return a name which starts with ``prefix`` half of the time."""
+    base = f"{rng.choice(['alpha', 'beta', 'gamma', 'delta'])}_{rng.randint(0, 999)}"
+    return prefix + base if rng.random() < 0.5 else base
+
+
+def _schema(rng):
+    return rng.choice(["public.", "audit.", "", '"Sales".'])
+
+
+def _column(rng, column):
+    kind = rng.randint(0, 8)
+    type_ = rng.choice(TYPES)
+    if kind == 0:
+        return f"{column} {type_} CONSTRAINT {_name(rng, 'df_')} DEFAULT 0"
+    if kind == 1:
+        return f"{column} {type_} CONSTRAINT {_name(rng, 'nn_')} NOT NULL"
+    if kind == 2:
+        return f"{column} INT CONSTRAINT {_name(rng, 'chk_')} CHECK ({column} > 0)"
+    if kind == 3:
+        return f"{column} INT CONSTRAINT {_name(rng, 'uc_')} UNIQUE"
+    if kind == 4:
+        return f"{column} INT CONSTRAINT {_name(rng, 'pk_')} PRIMARY KEY"
+    if kind == 5:
+        return (
+            f"{column} INT CONSTRAINT {_name(rng, 'fk_')} "
+            "REFERENCES public.other (id)"
+        )
+    if kind == 6:
+        return f"{column} INT NOT NULL DEFAULT 1 UNIQUE"
+    return f"{column} {type_}"
+
+
+def _table_constraint(rng):
+    return rng.choice(
+        [
+            f"CONSTRAINT {_name(rng, 'pk_')} PRIMARY KEY (col_0)",
+            f"CONSTRAINT {_name(rng, 'fk_')} FOREIGN KEY (col_0) "
+            "REFERENCES public.other (id) ON DELETE CASCADE",
+            f"CONSTRAINT {_name(rng, 'chk_')} CHECK (col_0 IN (1, 2, 3))",
+            f"CONSTRAINT {_name(rng, 'uc_')} UNIQUE (col_0)",
+            "PRIMARY KEY (col_0)",
+            "UNIQUE (col_0)",
+        ]
+    )
+
+
+def _create_table(rng, i):
+    elements = [_column(rng, f"col_{c}") for c in range(rng.randint(1, 5))]
+    elements += [_table_constraint(rng) for _ in range(rng.randint(0, 3))]
+    head = rng.choice(
+        [
+            "CREATE TABLE",
+            "CREATE TEMP TABLE",
+            "CREATE TABLE IF NOT EXISTS",
+            "CREATE UNLOGGED TABLE",
+        ]
+    )
+    body = ",\n    ".join(elements)
+    return f"{head} {_schema(rng)}table_{i} (\n    {body}\n);"
+
+
+def _alter_table(rng, i):
+    actions = [
+        rng.choice(
+            [
+                f"ADD CONSTRAINT {_name(rng, 'uc_')} UNIQUE (col_0)",
+                f"ADD CONSTRAINT {_name(rng, 'fk_')} FOREIGN KEY (col_0) "
+                "REFERENCES public.other (id)",
+                f"ADD COLUMN extra_{i} INT CONSTRAINT {_name(rng, 'df_')} DEFAULT 0",
+                f"DROP CONSTRAINT IF EXISTS old_{i}",
+                f"ADD CONSTRAINT {_name(rng, 'chk_')} CHECK (col_0 > 0)",
+            ]
+        )
+        for _ in range(rng.randint(1, 3))
+    ]
+    head = rng.choice(["ALTER TABLE", "ALTER TABLE IF EXISTS", "ALTER TABLE ONLY"])
+    return f"{head} {_schema(rng)}table_{i}\n    " + ",\n    ".join(actions) + ";"
+
+
+def _create_function(rng, i):
+    unnamed = rng.random() < 0.25
+    parameters = []
+    for p in range(rng.randint(0, 4)):
+        type_ = rng.choice(TYPES)
+        if unnamed:
+            parameters.append(type_)
+            continue
+        mode = rng.choice(["", "", "IN ", "OUT ", "INOUT "])
+        default = ""
+        if mode in ("", "IN "):
+            default = rng.choice(["", "", " DEFAULT 1", " = 2"])
+        parameters.append(f"{mode}{_name(rng, 'p_')}_{p} {type_}{default}")
+    head = rng.choice(["CREATE FUNCTION", "CREATE OR REPLACE FUNCTION"])
+    body = rng.choice(
+        [
+            "$$ SELECT 1 $$",
+            "$body$ SELECT 'CONSTRAINT x DEFAULT'; $body$",
+            "'SELECT 1'",
+        ]
+    )
+    has_out = any(p.startswith(("OUT", "INOUT")) for p in parameters)
+    returns = "" if has_out else "RETURNS INT\n"
+    return (
+        f"{head} {_schema(rng)}{_name(rng, 'fun_')}({', '.join(parameters)})\n"
+        f"{returns}LANGUAGE sql\nAS {body};"
+    )
+
+
+def _create_view(rng, i):
+    head = rng.choice(
+        [
+            "CREATE VIEW",
+            "CREATE OR REPLACE VIEW",
+            "CREATE TEMP VIEW",
+            "CREATE MATERIALIZED VIEW",
+            "CREATE MATERIALIZED VIEW IF NOT EXISTS",
+        ]
+    )
+    return (
+        f"{head} {_schema(rng)}{_name(rng, 'v_')} AS\n"
+        f"SELECT col_0, 'CREATE VIEW bad' AS label FROM public.table_{i};"
+    )
+
+
+def _noise(rng, i):
+    return rng.choice(
+        [
+            f"SELECT col_0 FROM public.table_{i} WHERE label = 'CONSTRAINT x CHECK';",
+            f"-- CREATE VIEW commented_{i} AS SELECT 1;\n"
+            f"INSERT INTO public.table_{i} (col_0) VALUES ({i});",
+            f"/* CREATE FUNCTION f_{i}(a INT) */\n"
+            f"UPDATE public.table_{i} SET col_0 = col_0 + 1;",
+            f"ALTER TABLE public.table_{i} RENAME CONSTRAINT old_{i} TO new_{i};",
+        ]
+    )
+
+
+GENERATORS = (_create_table, _alter_table, _create_function, _create_view, _noise)
+
+
+def make_corpus(statements, seed=0):
+    """Generate a SQL file of ``statements`` random statements."""
+    rng = random.Random(seed)
+    return "\n\n".join(rng.choice(GENERATORS)(rng, i) for i in range(statements)) + "\n"
@@ -0,0 +1,32 @@
+-- The DDL of the schema exported in this directory.
+
+CREATE TABLE public.person (
+    person_id INT,
+    CONSTRAINT person_pk PRIMARY KEY (person_id)
+);
+
+CREATE TABLE public.orders (
+    order_id INT,
+    person_id INT,
+    CONSTRAINT pk_orders PRIMARY KEY (order_id),
+    CONSTRAINT orders_person_fk FOREIGN KEY (person_id) REFERENCES public.person (person_id),
+    CONSTRAINT amount_positive CHECK (order_id > 0),
+    CONSTRAINT uc_orders_person UNIQUE (person_id)
+);
+
+CREATE TABLE audit.log (
+    id INT,
+    CONSTRAINT log_unique UNIQUE (id)
+);
+
+CREATE FUNCTION public.get_person(p_id INT, active BOOLEAN)
+RETURNS INT LANGUAGE sql AS $$ SELECT p_id $$;
+
+CREATE FUNCTION public.fun_list_people(p_limit INT)
+RETURNS TABLE (id INT, name TEXT) LANGUAGE sql AS $$ SELECT 1, 'a' $$;
+
+CREATE VIEW public.person_details AS SELECT 1 AS a;
+
+CREATE MATERIALIZED VIEW public.v_stats AS SELECT 1 AS a;
+
+CREATE MATERIALIZED VIEW public.stats_daily AS SELECT 1 AS a;
@@ -54,7 +54,7 @@ class TestFunctionParameterNamingRule:
         assert len(violations) == 0
 
     def test_multiple_params_mixed(self, fn_param_linter):
-        """Test that mixed valid/invalid parameters report the first violation."""
+        """Test that only the invalid parameter of a mixed list is reported."""
         sql = """
         CREATE OR REPLACE FUNCTION public.get_filtered_users(
             p_min_age INT,
@@ -87,3 +87,35 @@ class TestFunctionParameterNamingRule:
         result = fn_param_linter.lint_string(sql)
         violations = [v for v in result.violations if v.rule_code() == "FN02"]
         assert len(violations) == 0
+
+    def test_function_among_dml(self, fn_param_linter):
+        """Test that parameters are checked for functions among DML statements."""
+        sql = """
+        INSERT INTO public.person (person_id) VALUES (1);
+        ALTER TABLE public.person OWNER TO app_owner;
+        CREATE FUNCTION public.get_user(user_id INT) RETURNS INT LANGUAGE sql AS $$ SELECT 1 $$;
+        INSERT INTO public.person (person_id) VALUES (2);
+        """
+        result = fn_param_linter.lint_string(sql)
+        violations = [v for v in result.violations if v.rule_code() == "FN02"]
+        assert len(violations) == 1
+        assert "user_id" in violations[0].description
+
+    def test_every_invalid_param_reported(self, fn_param_linter):
+        """Test that each invalid parameter is reported at its own position."""
+        sql = """CREATE OR REPLACE FUNCTION public.fun_get_users(
+    min_age INT,
+    p_active BOOLEAN,
+    OUT max_age INT,
+    user_name TEXT
+)
+LANGUAGE SQL
+AS $$ SELECT 1 $$;
+"""
+        result = fn_param_linter.lint_string(sql)
+        violations = [v for v in result.violations if v.rule_code() == "FN02"]
+        assert [(v.line_no, v.line_pos, v.desc()) for v in violations] == [
+            (2, 5, "Function parameter 'min_age' should start with 'p_'."),
+            (4, 9, "Function parameter 'max_age' should start with 'p_'."),
+            (5, 5, "Function parameter 'user_name' should start with 'p_'."),
+        ]
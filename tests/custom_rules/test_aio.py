@@ -0,0 +1,96 @@
+"""Tests for linting in worker processes from asyncio code."""
+
+import asyncio
+
+import pytest
+
+from custom_rules.aio import AsyncLinter, PoolFullError
+from custom_rules.api import Violation
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+VIEWS = "CREATE VIEW public.a AS SELECT 1;\nCREATE VIEW public.b AS SELECT 1;\n"
+# Takes the fast mode a few seconds to lint.
+LARGE = "CREATE VIEW public.v_x AS SELECT 1;\n" * 50_000
+
+
+def _linter(**kwargs):
+    return AsyncLinter(dialect="postgres", rules=RULES, fast=True, **kwargs)
+
+
+def _run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 60))
+
+
+class TestAsyncLinter:
+    """Tests for the async API."""
+
+    def test_lint(self):
+        """Test concurrent requests, in order and as they are sent."""
+
+        async def main():
+            async with _linter(workers=2) as linter:
+                results = await asyncio.gather(
+                    linter.lint(VIEWS, fname="a.sql"),
+                    linter.lint("SELECT 1;"),
+                    linter.lint(VIEWS.replace(".a ", ".v_a ")),
+                )
+                streamed = [v async for v in linter.lint_iter(VIEWS)]
+            return results, streamed
+
+        results, streamed = _run(main())
+        message = "View name '{}' should start with 'v_'."
+        assert results[0] == [
+            Violation("a.sql", "VW01", "views.view_naming", "linting", line, 1, desc)
+            for line, desc in ((1, message.format("a")), (2, message.format("b")))
+        ]
+        assert results[1] == []
+        assert [v.line for v in results[2]] == [2]
+        assert [v.line for v in streamed] == [1, 2]
+
+    def test_timeout(self):
+        """Test that a request taking too long stops its worker."""
+
+        async def main():
+            async with _linter(workers=1) as linter:
+                with pytest.raises(asyncio.TimeoutError):
+                    await linter.lint(LARGE, timeout=0.2)
+                assert linter.pending == 0
+                # The killed worker is replaced.
+                return await linter.lint(VIEWS, timeout=30)
+
+        assert len(_run(main())) == 2
+
+    def test_cancel(self):
+        """Test that cancelling a request stops its worker."""
+
+        async def main():
+            async with _linter(workers=1) as linter:
+                task = asyncio.ensure_future(linter.lint(LARGE))
+                await asyncio.sleep(0.2)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                assert len(linter._starting) == 1
+                return await linter.lint(VIEWS, timeout=30)
+
+        assert len(_run(main())) == 2
+
+    def test_backpressure(self):
+        """Test that requests beyond the limit are rejected."""
+
+        async def main():
+            async with _linter(workers=1, max_pending=2) as linter:
+                first = asyncio.ensure_future(linter.lint(VIEWS))
+                second = asyncio.ensure_future(linter.lint(VIEWS))
+                await asyncio.sleep(0)
+                with pytest.raises(PoolFullError):
+                    await linter.lint(VIEWS)
+                assert [len(r) for r in await asyncio.gather(first, second)] == [2, 2]
+                return await linter.lint(VIEWS)
+
+        assert len(_run(main())) == 2
+
+    def test_not_started(self):
+        """Test that requests need started workers."""
+        with pytest.raises(RuntimeError, match="not started"):
+            _run(_linter().lint(VIEWS))
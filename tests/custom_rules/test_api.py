@@ -0,0 +1,100 @@
+"""Tests for linting many files and strings from Python."""
+
+import pathlib
+
+import pytest
+from sqlfluff.core import Linter
+
+import custom_rules
+from custom_rules.api import BatchLinter, Violation, lint_many
+from tests.custom_rules.test_fast import SQL_FILES, _config
+
+VIEW = "CREATE VIEW public.a AS SELECT 1;\n"
+
+
+class TestLintMany:
+    """Tests for the batch API."""
+
+    @pytest.mark.parametrize("fast", [False, True])
+    def test_inputs(self, tmp_path, fast):
+        """Test strings, path strings, path objects and directories."""
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "one.sql").write_text("\n" + VIEW)
+        (tmp_path / "two.sql").write_text(VIEW)
+        violations = list(
+            lint_many(
+                [VIEW, str(tmp_path / "two.sql"), tmp_path / "sub", "SELECT 1;"],
+                config=_config(),
+                fast=fast,
+            )
+        )
+        message = "View name 'a' should start with 'v_'."
+        assert violations == [
+            Violation(0, "VW01", "views.view_naming", "linting", 1, 1, message),
+            Violation(
+                str(tmp_path / "two.sql"),
+                "VW01",
+                "views.view_naming",
+                "linting",
+                1,
+                1,
+                message,
+            ),
+            Violation(
+                str(tmp_path / "sub" / "one.sql"),
+                "VW01",
+                "views.view_naming",
+                "linting",
+                2,
+                1,
+                message,
+            ),
+        ]
+
+    @pytest.mark.parametrize("path", SQL_FILES)
+    def test_parity(self, path):
+        """Test that the records match the violations of a Linter."""
+        config = _config()
+        expected = [
+            (v.rule_code(), v.line_no, v.line_pos, v.desc())
+            for v in Linter(config=config).lint_path(path).get_violations()
+        ]
+        violations = BatchLinter(config=config).lint_many([pathlib.Path(path)])
+        assert [(v.code, v.line, v.col, v.description) for v in violations] == expected
+
+    def test_rules(self):
+        """Test that the rules option selects the rules."""
+        sql = VIEW + "CREATE FUNCTION f() RETURNS INT AS $$ SELECT 1 $$ LANGUAGE sql;"
+        violations = lint_many([sql], rules="FN01", dialect="postgres")
+        assert [v.code for v in violations] == ["FN01"]
+
+    def test_other_errors(self):
+        """Test that errors of the other steps are reported with their kind."""
+        linter = BatchLinter(config=_config(), prefilter=False)
+        violations = linter.lint_string("CREATE VIEW v_a AS SELEC 1 FROM;", "x.sql")
+        assert [(v.source, v.kind) for v in violations] == [("x.sql", "parsing")]
+        assert violations[0].name == ""
+        violations = linter.lint_string("SELECT {{ 1 + }};", "y.sql")
+        assert [v.kind for v in violations] == ["templating"]
+        violations = linter.lint_string('SELECT "a;', "z.sql")
+        assert [v.kind for v in violations] == ["lexing", "parsing"]
+
+    def test_streaming(self):
+        """Test that the inputs are read as the records are consumed."""
+        consumed = []
+
+        def inputs():
+            for sql in (VIEW, VIEW):
+                consumed.append(sql)
+                yield sql
+
+        violations = lint_many(inputs(), config=_config())
+        assert next(violations).source == 0
+        assert len(consumed) == 1
+
+    def test_package_exports(self):
+        """Test that the API is importable from the package."""
+        assert custom_rules.lint_many is lint_many
+        assert custom_rules.Violation is Violation
+        assert custom_rules.AsyncLinter.__module__ == "custom_rules.aio"
+        assert not hasattr(custom_rules, "missing")
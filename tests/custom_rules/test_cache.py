@@ -0,0 +1,201 @@
+"""Tests for the persistent result cache of the lint command."""
+
+import json
+import os
+import time
+
+from click.testing import CliRunner
+
+from custom_rules.cache import CachedLinter, ResultCache
+from custom_rules.configs import config_fingerprint
+from custom_rules.cli import cli
+from custom_rules.fast import FastLinter
+from custom_rules.prefilter import PrefilteredLinter
+from tests.custom_rules.test_fast import _config
+
+VIEWS = "CREATE VIEW public.a AS SELECT 1;\nCREATE VIEW public.v_b AS SELECT 1;\n"
+
+
+class CountingLinter(FastLinter):
+    """Counts the files actually linted."""
+
+    linted = 0
+
+    def lint_path(self, path):
+        self.linted += 1
+        return super().lint_path(path)
+
+
+def _key(violation):
+    return (
+        violation.rule_code(),
+        violation.line_no,
+        violation.line_pos,
+        violation.desc(),
+    )
+
+
+class TestCachedLinter:
+    """Tests for looking up files before linting them."""
+
+    def test_hits(self, tmp_path):
+        """Test that unchanged files are not linted again."""
+        (tmp_path / "a.sql").write_text(VIEWS)
+        (tmp_path / "b.sql").write_text(VIEWS)
+        cache_dir = str(tmp_path / "cache")
+        linter = CountingLinter(config=_config())
+        expected = [
+            (path, [_key(v) for v in vs])
+            for path, vs in linter.lint_paths([str(tmp_path)])
+        ]
+
+        cached = CachedLinter(linter, ResultCache(cache_dir), "fast")
+        first = [
+            (path, [_key(v) for v in vs])
+            for path, vs in cached.lint_paths([str(tmp_path)])
+        ]
+        # Identical files share their entry.
+        assert cached.cache.statistics.hits == 1
+        cached = CachedLinter(linter, ResultCache(cache_dir), "fast")
+        second = [
+            (path, [_key(v) for v in vs])
+            for path, vs in cached.lint_paths([str(tmp_path)])
+        ]
+        assert first == second == expected
+        assert cached.cache.statistics.hits == 2
+        assert linter.linted == 2 + 1
+
+    def test_json_records(self, tmp_path):
+        """Test that cached violations serialise like the linted ones."""
+        path = tmp_path / "a.sql"
+        path.write_text(VIEWS)
+        linter = FastLinter(config=_config())
+        expected = [v.to_dict() for v in linter.lint_path(str(path))]
+        cached = CachedLinter(linter, ResultCache(str(tmp_path / "cache")), "fast")
+        cached.lint_path(str(path))
+        assert [v.to_dict() for v in cached.lint_path(str(path))] == expected
+
+    def test_key(self, tmp_path):
+        """Test that content, configuration and mode are part of the key."""
+        fingerprint = config_fingerprint(_config())
+        key = ResultCache.key(VIEWS.encode(), fingerprint, "fast")
+        assert key == ResultCache.key(VIEWS.encode(), fingerprint, "fast")
+        assert key != ResultCache.key(VIEWS.encode() + b"\n", fingerprint, "fast")
+        assert key != ResultCache.key(VIEWS.encode(), fingerprint, "lint")
+        assert config_fingerprint(_config(templater="raw")) != fingerprint
+
+    def test_rule_options(self, tmp_path, monkeypatch):
+        """Test that a file under other rule options misses."""
+        monkeypatch.chdir(tmp_path)
+        for name in ("default", "custom"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "a.sql").write_text(VIEWS)
+        (tmp_path / "custom" / ".sqlfluff").write_text(
+            "[sqlfluff:rules:views.view_naming]\nexpected_prefix = vw_\n"
+        )
+        cache = ResultCache(str(tmp_path / "cache"))
+        linter = CachedLinter(PrefilteredLinter(config=_config()), cache, "lint")
+        list(linter.lint_paths(["default", "custom"]))
+        assert cache.statistics.misses == 2
+
+
+class TestResultCache:
+    """Tests for the cache directory."""
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted first."""
+        cache = ResultCache(str(tmp_path / "cache"), max_bytes=0)
+        for key in ("aa1", "bb2", "cc3"):
+            cache.put(key, [])
+        now = time.time()
+        for age, entry in zip((30, 10, 20), sorted(cache.entries())):
+            os.utime(entry.path, (now - age, now - age))
+        assert cache.get("aa1") == []
+        cache.max_bytes = 2 * sorted(cache.entries())[0].size
+        assert cache.prune() == 1
+        assert cache.get("cc3") is None
+        assert cache.get("aa1") == cache.get("bb2") == []
+
+    def test_atomic_writes(self, tmp_path):
+        """Test that entries are renamed into place and stale temp files removed."""
+        cache = ResultCache(str(tmp_path / "cache"))
+        cache.put("aa1", [])
+        stale = tmp_path / "cache" / "aa" / "x.tmp"
+        fresh = tmp_path / "cache" / "aa" / "y.tmp"
+        stale.write_text("[")
+        fresh.write_text("[")
+        os.utime(stale, (0, 0))
+        assert cache.prune() == 0
+        assert sorted(os.listdir(tmp_path / "cache" / "aa")) == ["1.json", "y.tmp"]
+        assert (tmp_path / "cache" / ".gitignore").read_text() == "*\n"
+
+    def test_corrupt_entry(self, tmp_path):
+        """Test that an unreadable entry is a miss."""
+        cache = ResultCache(str(tmp_path / "cache"))
+        cache.put("aa1", [])
+        (tmp_path / "cache" / "aa" / "1.json").write_text("[{")
+        assert cache.get("aa1") is None
+
+
+    def test_write_error(self, tmp_path):
+        """Test that an entry which cannot be written is counted, not raised."""
+        (tmp_path / "cache").write_text("")
+        cache = ResultCache(str(tmp_path / "cache"))
+        cache.put("aa1", [])
+        assert not cache.save("aa1", [])
+        assert cache.statistics.write_errors == 2
+        assert isinstance(cache.error, FileExistsError)
+        assert cache.get("aa1") is None
+        assert not cache.written
+
+
+class TestCli:
+    """Tests for the cache options and command."""
+
+    def test_lint(self, tmp_path):
+        """Test cold and warm runs, --no-cache and the cache command."""
+        (tmp_path / "a.sql").write_text(VIEWS)
+        cache_dir = str(tmp_path / "cache")
+        args = [
+            "lint",
+            "--dialect",
+            "postgres",
+            "--statistics",
+            "--cache-dir",
+            cache_dir,
+        ]
+        runner = CliRunner()
+        cold = runner.invoke(cli, args + [str(tmp_path)])
+        warm = runner.invoke(cli, args + [str(tmp_path)])
+        uncached = runner.invoke(cli, args + ["--no-cache", str(tmp_path)])
+        assert cold.exit_code == warm.exit_code == uncached.exit_code == 1
+        assert cold.stdout == warm.stdout == uncached.stdout
+        assert "Cache: 0 hits, 1 misses" in cold.stderr
+        assert "Cache: 1 hits, 0 misses" in warm.stderr
+        assert "Cache:" not in uncached.stderr
+
+        json_args = args + ["--format", "json", str(tmp_path)]
+        assert json.loads(runner.invoke(cli, json_args).stdout) == json.loads(
+            runner.invoke(cli, json_args + ["--no-cache"]).stdout
+        )
+
+        stats = runner.invoke(cli, ["cache", "stats", "--cache-dir", cache_dir])
+        assert stats.stdout.startswith(f"{cache_dir}: 1 results, ")
+        cleared = runner.invoke(cli, ["cache", "clear", "--cache-dir", cache_dir])
+        assert cleared.stdout == f"Removed 1 cached results from {cache_dir}.\n"
+
+    def test_unwritable(self, tmp_path):
+        """Test that a cache directory which cannot be written is a miss."""
+        (tmp_path / "a.sql").write_text(VIEWS)
+        not_a_directory = tmp_path / "cache"
+        not_a_directory.write_text("")
+        args = ["lint", "--dialect", "postgres", "--statistics"]
+        runner = CliRunner()
+        cached = runner.invoke(
+            cli, args + ["--cache-dir", str(not_a_directory), str(tmp_path)]
+        )
+        uncached = runner.invoke(cli, args + ["--no-cache", str(tmp_path)])
+        assert cached.exit_code == uncached.exit_code == 1
+        assert cached.stdout == uncached.stdout
+        assert "Cache: 0 hits, 1 misses" in cached.stderr
+        assert "Warning: 1 cache entries were not written" in cached.stderr
@@ -0,0 +1,201 @@
+"""Tests for linting catalog exports."""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from sqlfluff.core import Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.catalog import CatalogLinter, _parse_array, iter_catalog_sections
+from custom_rules.cli import cli
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+CATALOG_DIR = os.path.join(FIXTURES, "catalog")
+CATALOG_JSON = os.path.join(FIXTURES, "catalog.json")
+
+
+def _config(**rule_configs):
+    return FluffConfig(
+        configs={"rules": rule_configs},
+        overrides={"dialect": "postgres", "rules": RULES},
+    )
+
+
+def _catalog(paths, config=None, **kwargs):
+    linter = CatalogLinter(config=config or _config(), **kwargs)
+    return [v for _, violations in linter.lint_paths(paths) for v in violations]
+
+
+def _messages(violations):
+    return sorted((v.code, v.description) for v in violations)
+
+
+@pytest.fixture(scope="module")
+def ddl_messages():
+    """The messages of a full lint of the DDL of the exported schema."""
+    with open(os.path.join(CATALOG_DIR, "schema.sql"), encoding="utf8") as f:
+        sql = f.read()
+    violations = Linter(config=_config()).lint_string(sql).get_violations()
+    return sorted((v.rule_code(), v.desc()) for v in violations)
+
+
+class TestParity:
+    """The catalog exports report what linting the DDL reports."""
+
+    def test_csv(self, ddl_messages):
+        """Test the CSV exports of the fixture schema."""
+        assert _messages(_catalog([CATALOG_DIR])) == ddl_messages
+
+    def test_json(self, ddl_messages):
+        """Test the single file JSON export of the fixture schema."""
+        assert _messages(_catalog([CATALOG_JSON])) == ddl_messages
+
+    def test_batches(self, ddl_messages):
+        """Test that the batch size does not change the result."""
+        assert _catalog([CATALOG_DIR], batch_size=1) == _catalog([CATALOG_DIR])
+
+    def test_rule_options(self):
+        """Test that the configured prefixes and options apply."""
+        config = _config(
+            **{
+                "constraints.uc_constraint_naming": {"schema_prefixes": "audit:uq_"},
+                "views.view_naming": {"expected_prefix": "v_,mv_"},
+            }
+        )
+        messages = _messages(_catalog([CATALOG_DIR], config))
+        assert (
+            "CR04",
+            "UNIQUE constraint name 'log_unique' should start with 'uq_'.",
+        ) in messages
+        assert (
+            "VW01",
+            "View name 'stats_daily' should start with one of 'v_', 'mv_'.",
+        ) in messages
+
+
+class TestReport:
+    """Tests for where the violations are reported."""
+
+    def test_rows(self):
+        """Test the CSV line and qualified name of the violating objects."""
+        violations = _catalog([os.path.join(CATALOG_DIR, "pg_constraint.csv")])
+        assert [(v.code, v.row, v.object) for v in violations] == [
+            ("CR01", 2, "public.person.person_pk"),
+            ("CR02", 4, "public.orders.orders_person_fk"),
+            ("CR03", 5, "public.orders.amount_positive"),
+            ("CR04", 7, "audit.log.log_unique"),
+        ]
+
+    def test_json_rows(self):
+        """Test that JSON rows are numbered per catalog."""
+        violations = _catalog([CATALOG_JSON])
+        assert [(v.catalog, v.row) for v in violations if v.code == "VW01"] == [
+            ("pg_class", 3),
+            ("pg_class", 5),
+        ]
+
+    def test_skipped_rows(self, tmp_path):
+        """Test that system schemas, procedures and table columns are skipped."""
+        path = tmp_path / "pg_proc.csv"
+        path.write_text(
+            "nspname,proname,prokind,proargnames,proargmodes\n"
+            "pg_catalog,lower,f,,\n"
+            "public,refresh,p,{job},\n"
+            'public,fun_list,f,"{p_a,""Out Name"",col}","{i,o,t}"\n'
+        )
+        violations = _catalog([str(path)])
+        assert _messages(violations) == [
+            ("FN02", "Function parameter 'Out Name' should start with 'p_'.")
+        ]
+
+
+class TestRecords:
+    """Tests for reading the exports."""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            (None, []),
+            ("", []),
+            ("{}", []),
+            ("{a,b}", ["a", "b"]),
+            ('{"a b","c\\"d",NULL,""}', ["a b", 'c"d', None, ""]),
+            (["a", "b"], ["a", "b"]),
+        ],
+    )
+    def test_parse_array(self, value, expected):
+        """Test reading array literals and JSON lists."""
+        assert _parse_array(value) == expected
+
+    def test_json_list(self, tmp_path):
+        """Test a JSON list of records named after its catalog."""
+        path = tmp_path / "prod_pg_class.json"
+        path.write_text(json.dumps([{"nspname": "s", "relname": "r", "relkind": "v"}]))
+        sections = [
+            (catalog, list(rows)) for catalog, rows in iter_catalog_sections(str(path))
+        ]
+        assert sections == [("pg_class", [(1, ("s", "r", "v"))])]
+
+    def test_unknown_catalog(self, tmp_path):
+        """Test that files named after no catalog are rejected."""
+        path = tmp_path / "export.csv"
+        path.write_text("nspname\n")
+        with pytest.raises(ValueError, match="cannot tell the catalog"):
+            list(iter_catalog_sections(str(path)))
+
+    def test_missing_column(self, tmp_path):
+        """Test that a missing required column is reported."""
+        path = tmp_path / "pg_class.csv"
+        path.write_text("nspname,relname\npublic,v\n")
+        with pytest.raises(ValueError, match="no 'relkind' column"):
+            _catalog([str(path)])
+
+    def test_short_row(self, tmp_path):
+        """Test that blank lines are skipped and rows missing values reported."""
+        path = tmp_path / "pg_class.csv"
+        path.write_text("nspname,relname,relkind\npublic,v,v\n\npublic,w\n")
+        with pytest.raises(ValueError, match=r"pg_class.csv:4: the row has 2 values"):
+            _catalog([str(path)])
+
+
+class TestCli:
+    """Tests for the ``sqlfluff-extended catalog`` command."""
+
+    def test_human(self):
+        """Test the human output and the exit code."""
+        result = CliRunner().invoke(
+            cli,
+            [
+                "catalog",
+                "--rules",
+                "CR01",
+                os.path.join(CATALOG_DIR, "pg_constraint.csv"),
+            ],
+        )
+        assert result.exit_code == 1
+        assert result.output.endswith(
+            "pg_constraint.csv:2: CR01 PRIMARY KEY constraint name 'person_pk' "
+            "should start with 'pk_'. [pg_constraint public.person.person_pk]\n"
+        )
+
+    def test_json(self):
+        """Test the JSON output."""
+        result = CliRunner().invoke(
+            cli, ["catalog", "--rules", "VW01", "--format", "json", CATALOG_JSON]
+        )
+        records = json.loads(result.output)
+        assert [v["object"] for v in records[0]["violations"]] == [
+            "public.person_details",
+            "public.stats_daily",
+        ]
+
+    def test_error(self, tmp_path):
+        """Test that invalid exports are reported without a traceback."""
+        path = tmp_path / "export.csv"
+        path.write_text("nspname\n")
+        result = CliRunner().invoke(cli, ["catalog", str(path)])
+        assert result.exit_code == 1
+        assert "cannot tell the catalog" in result.output
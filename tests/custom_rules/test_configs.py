@@ -0,0 +1,147 @@
+"""Tests for resolving configurations once per directory."""
+
+import pytest
+from click.testing import CliRunner
+from sqlfluff.core import FluffConfig, Linter
+
+from custom_rules.cli import cli
+from custom_rules.configs import ConfigResolver, config_fingerprint
+from custom_rules.prefilter import PrefilteredLinter
+from custom_rules.registry import rule_statistics
+from tests.custom_rules.test_fast import RULES
+
+SUBDIR_CONFIG = "[sqlfluff:rules:views.view_naming]\nexpected_prefix = {}\n"
+
+
+def _tree(tmp_path, prefix="vw_"):
+    """Write files in three directories, the last one configuring VW01."""
+    paths = []
+    for name in ("a", "b", "b/sub"):
+        directory = tmp_path / name
+        directory.mkdir()
+        for i in range(2):
+            path = directory / f"{i}.sql"
+            path.write_text(f"CREATE VIEW public.{prefix}{i} AS SELECT 1;\n")
+            paths.append(str(path))
+    (tmp_path / "b" / "sub" / ".sqlfluff").write_text(SUBDIR_CONFIG.format(prefix))
+    return paths
+
+
+def _config():
+    return FluffConfig(overrides={"dialect": "postgres", "rules": RULES})
+
+
+class TestConfigResolver:
+    """Tests for loading the configuration of each directory once."""
+
+    def test_per_directory(self, tmp_path):
+        """Test that the files of a directory share its configuration."""
+        paths = _tree(tmp_path)
+        resolver = ConfigResolver(_config())
+        configs = [resolver.directory_config(path) for path in paths]
+        assert configs[0] is configs[1]
+        assert configs[0] is not configs[2]
+        assert configs[4].get_section(["rules", "views.view_naming"]) == {
+            "expected_prefix": "vw_"
+        }
+        counts = resolver.statistics
+        assert (counts.directories, counts.configs) == (3, 2)
+        assert resolver.fingerprint(paths[5]) == config_fingerprint(
+            _config().make_child_from_path(paths[5])
+        )
+
+    def test_inline_directives(self, tmp_path):
+        """Test that the directives of a file do not leak into its directory."""
+        path = tmp_path / "a.sql"
+        path.write_text("-- sqlfluff:max_line_length:10\nSELECT 1;\n")
+        resolver = ConfigResolver(_config())
+        _, config, _ = Linter.load_raw_file_and_config(str(path), resolver)
+        assert config.get("max_line_length") == 10
+        assert resolver.directory_config(str(path)).get("max_line_length") == 80
+        assert resolver.statistics.files == 1
+
+    def test_same_results(self, tmp_path):
+        """Test that the files are linted as with a configuration per file."""
+        paths = _tree(tmp_path)
+        linter = PrefilteredLinter(config=_config())
+        expected = [
+            [
+                v.rule_code()
+                for v in linter.lint_rendered(
+                    linter.linter.render_file(path, linter.config)
+                )
+            ]
+            for path in paths
+        ]
+        assert [
+            [v.rule_code() for v in linter.lint_path(path)] for path in paths
+        ] == expected
+        assert linter.configs.statistics.files == len(paths)
+        assert linter.configs.statistics.directories == 3
+
+
+class TestRuleInstances:
+    """Tests for sharing the rules between the files of a configuration."""
+
+    def test_shared(self):
+        """Test that the same rule configuration yields the same rules."""
+        first = Linter(config=_config()).get_rulepack().rules
+        before = rule_statistics().configs
+        second = Linter(config=_config()).get_rulepack().rules
+        assert all(a is b for a, b in zip(first, second))
+        assert rule_statistics().configs == before
+
+    def test_distinct_options(self):
+        """Test that rules with other options are built separately."""
+        config = FluffConfig(
+            configs={"rules": {"views.view_naming": {"expected_prefix": "other_"}}},
+            overrides={"dialect": "postgres", "rules": "VW01"},
+        )
+        default = Linter(config=_config()).get_rulepack().rules[-1]
+        (other,) = Linter(config=config).get_rulepack().rules
+        assert other is not default
+        assert other.matcher != default.matcher
+
+    def test_sqlfluff_per_directory(self, tmp_path):
+        """Test that sqlfluff builds the rules once per distinct configuration."""
+        paths = _tree(tmp_path, prefix="cfg_test_")
+        instances, configs = rule_statistics().instances, rule_statistics().configs
+        result = Linter(config=_config()).lint_paths((str(tmp_path),))
+        violations = {
+            linted.path: [v.rule_code() for v in linted.get_violations()]
+            for linted_dir in result.paths
+            for linted in linted_dir.files
+        }
+        # The views only match the prefix configured for their directory.
+        assert [violations[path] for path in paths] == [["VW01"]] * 4 + [[]] * 2
+        # SQLFluff asks for the rules of every file, but at most the rules of
+        # the root and the VW01 rule of the subdirectory are new.
+        assert rule_statistics().instances - instances == 8 * len(paths)
+        assert rule_statistics().configs - configs <= 9
+
+
+def test_cli(tmp_path):
+    """Test that the lint command reports the distinct configurations."""
+    _tree(tmp_path)
+    args = ["lint", "--dialect", "postgres", "--rules", RULES, str(tmp_path)]
+    args += ["--statistics", "--cache-dir", str(tmp_path / "cache")]
+    result = CliRunner().invoke(cli, args)
+    assert "Configs: 2 distinct configurations in 3 directories, " in result.stderr
+    assert " distinct rule configurations." in result.stderr
+    assert result.exit_code == 1
+
+
+@pytest.mark.parametrize(
+    "mode", [[], ["--fast"], ["--stream"], ["--stream", "--fast"], ["--pg-dump"]]
+)
+def test_cached_per_directory(tmp_path, mode):
+    """Test that the same file is linted with the rules of each directory."""
+    paths = _tree(tmp_path)
+    args = ["lint", "--dialect", "postgres", "--rules", RULES, str(tmp_path)]
+    args += mode + ["--cache-dir", str(tmp_path / "cache")]
+    expected = CliRunner().invoke(cli, args + ["--no-cache"]).stdout
+    cold = CliRunner().invoke(cli, args).stdout
+    warm = CliRunner().invoke(cli, args).stdout
+    assert cold == warm == expected
+    # The views of b/sub have the prefix configured there.
+    assert [path for path in paths if path in expected] == paths[:4]
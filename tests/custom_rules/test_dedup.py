@@ -0,0 +1,150 @@
+"""Tests for reusing the violations of repeated statements."""
+
+import io
+
+import pytest
+from click.testing import CliRunner
+
+from custom_rules.cache import ResultCache
+from custom_rules.configs import config_fingerprint
+from custom_rules.cli import cli
+from custom_rules.dedup import StatementCache
+from custom_rules.statements import code_token_spans, normalized_statement
+from custom_rules.streaming import StreamingLinter
+from tests.custom_rules.corpus import make_corpus
+from tests.custom_rules.test_facts import _rules_config
+from tests.custom_rules.test_fast import RULES, SQL_FILES, _config, _key, _parsed
+
+STATEMENT = (
+    "CREATE TABLE public.t (id INT, CONSTRAINT pk PRIMARY KEY (id));\n"
+    "CREATE VIEW public.a AS SELECT id FROM public.t;\n"
+    "CREATE FUNCTION public.f(x INT) RETURNS INT\n"
+    "LANGUAGE sql AS $$ SELECT x $$;\n"
+)
+
+# The statements above, spaced and commented differently.
+REPEATED = (
+    "CREATE   TABLE public.t (\n    id INT,\n    CONSTRAINT pk PRIMARY KEY (id)\n);\n"
+    "/* again */ CREATE VIEW public.a\n  AS SELECT id -- the id\n  FROM public.t;\n"
+    "CREATE FUNCTION public.f(x INT)\tRETURNS INT LANGUAGE sql AS $$ SELECT x $$;\n"
+)
+
+
+def _statement_cache(cache=None):
+    return StatementCache(config_fingerprint(_config()), "stream", cache)
+
+
+def _stream(sql, statement_cache=None, **kwargs):
+    linter = StreamingLinter(
+        config=_config(), statement_cache=statement_cache, **kwargs
+    )
+    return sorted(_key(v) for v in linter.lint_stream(io.StringIO(sql)))
+
+
+class TestNormalizedStatement:
+    """Tests for the text repeated statements are recognized by."""
+
+    def test_whitespace_and_comments(self):
+        """Test that whitespace and comments between tokens are ignored."""
+        sql = "CREATE  VIEW a -- c\nAS /* d */ SELECT 1 ,2;"
+        assert normalized_statement(sql, code_token_spans(sql)) == (
+            "CREATE VIEW a AS SELECT 1,2;"
+        )
+
+    def test_quoted_text_is_kept(self):
+        """Test that quoted text and bodies are single tokens kept verbatim."""
+        sql = "SELECT 'a  b', \"c  d\", $$ x  y $$ FROM t;"
+        spans = code_token_spans(sql)
+        assert [sql[start:end] for start, end in spans][1:4] == [
+            "'a  b'",
+            ",",
+            '"c  d"',
+        ]
+        assert normalized_statement(sql, spans) == (
+            "SELECT 'a  b',\"c  d\",$$ x  y $$ FROM t;"
+        )
+
+
+class TestStatementCache:
+    """Repeated statements report what linting them again reports."""
+
+    @pytest.mark.parametrize("kwargs", [{}, {"fast": True}], ids=str)
+    def test_repeated_statements(self, kwargs):
+        """Test that reused violations are moved to the repeated statement."""
+        sql = (STATEMENT + REPEATED) * 3
+        _, parsed = _parsed(sql, _config())
+        statement_cache = _statement_cache()
+        assert _stream(sql, statement_cache, **kwargs) == parsed
+        assert len(parsed) == 24
+        assert statement_cache.statistics.statements == 18
+        assert statement_cache.statistics.hits == 15
+
+    @pytest.mark.parametrize("path", SQL_FILES)
+    def test_sql_files(self, path):
+        """Test parity on the SQL files of the test suite."""
+        with open(path, encoding="utf8") as f:
+            sql = f.read()
+        assert _stream(sql * 2, _statement_cache()) == _stream(sql * 2)
+
+    def test_corpus(self):
+        """Test parity on a generated corpus."""
+        sql = make_corpus(100, seed=7) * 2
+        statement_cache = _statement_cache()
+        assert _stream(sql, statement_cache, fast=True) == _stream(sql, fast=True)
+        assert statement_cache.statistics.hit_rate >= 0.5
+
+    def test_noqa(self):
+        """Test that statements with noqa comments are linted each time."""
+        sql = "CREATE VIEW public.a AS SELECT 1; -- noqa: VW01\n" * 2
+        sql += "CREATE VIEW public.a AS SELECT 1;\n"
+        statement_cache = _statement_cache()
+        assert _stream(sql, statement_cache) == _stream(sql)
+        assert statement_cache.statistics.hits == 0
+
+    def test_across_runs(self, tmp_path):
+        """Test that statements are reused from the result cache directory."""
+        cache = ResultCache(str(tmp_path))
+        expected = _stream(STATEMENT + REPEATED)
+        assert _stream(STATEMENT, _statement_cache(cache)) == [
+            v for v in expected if v[1] <= 4
+        ]
+        statement_cache = _statement_cache(ResultCache(str(tmp_path)))
+        assert _stream(REPEATED, statement_cache) == [
+            (code, line - 4, pos, desc)
+            for code, line, pos, desc in expected
+            if line > 4
+        ]
+        assert statement_cache.statistics.hits == 3
+
+    def test_layout_rules(self):
+        """Test that layout rules, which check whole files, do not run."""
+        config = _rules_config(RULES + ",LT01")
+        sql = "CREATE VIEW a AS SELECT 1;\nCREATE VIEW a AS SELECT  1;\n"
+        statement_cache = _statement_cache()
+        linter = StreamingLinter(config=config, statement_cache=statement_cache)
+        violations = linter.lint_stream(io.StringIO(sql))
+        assert [_key(v)[:3] for v in violations] == [("VW01", 1, 1), ("VW01", 2, 1)]
+        assert statement_cache.statistics.hits == 1
+
+    def test_max_entries(self):
+        """Test that the least recently used statements are forgotten."""
+        statement_cache = _statement_cache()
+        statement_cache.max_entries = 2
+        _stream(STATEMENT * 2, statement_cache)
+        assert statement_cache.statistics.hits == 0
+
+
+def test_cli_statistics(tmp_path):
+    """Test that the streaming mode reports the dedup hit rate."""
+    (tmp_path / "a.sql").write_text((STATEMENT + REPEATED) * 2)
+    args = ["lint", "--dialect", "postgres", "--rules", RULES, "--statistics"]
+    args += [str(tmp_path / "a.sql"), "--cache-dir", str(tmp_path / "cache")]
+    runner = CliRunner()
+    streamed = runner.invoke(cli, args + ["--stream"])
+    assert "Dedup: reused 9 of 12 statements (75%)." in streamed.stderr
+    assert streamed.stdout == runner.invoke(cli, args).stdout
+
+    stats = runner.invoke(
+        cli, ["cache", "stats", "--cache-dir", str(tmp_path / "cache")]
+    )
+    assert ", 3 statements, " in stats.stdout
@@ -0,0 +1,208 @@
+"""Tests for the cache of the facts the rules consume from parse trees."""
+
+import pytest
+import sqlfluff
+from click.testing import CliRunner
+from sqlfluff.core import FluffConfig, Linter
+
+from custom_rules.cache import ResultCache
+from custom_rules.cli import cli
+from custom_rules.facts import (
+    FactsLinter,
+    _Internals,
+    parse_fingerprint,
+    sqlfluff_supported,
+)
+from custom_rules.prefilter import PrefilteredLinter
+from tests.custom_rules.test_fast import RULES, SQL_FILES, _config
+
+SAMPLES = {
+    "noqa": (
+        "CREATE VIEW public.a AS SELECT 1; -- noqa: VW01\n"
+        "CREATE VIEW public.b AS SELECT 1; -- noqa VW01\n"
+        "-- noqa: disable=VW01\n"
+        "CREATE VIEW c AS SELECT 1;\n"
+        "-- noqa: enable=all\n"
+        "/* noqa: FN01 */ CREATE FUNCTION f(x INT) RETURNS INT AS $$ SELECT 1 $$ LANGUAGE sql;\n"
+    ),
+    "unparsable": (
+        "CREATE VIEW public.a AS SELEC 1 FROM;\n"
+        "CREATE TABLE t (id INT, CONSTRAINT x PRIMARY KEY (id));\n"
+    ),
+    "templated": (
+        "{% if true %}CREATE VIEW {{ 'a' }} AS SELECT 1;"
+        "{% else %}CREATE VIEW b AS SELECT 1;{% endif %}\n"
+        "{% for i in [1, 2] %}CREATE VIEW w{{ i }} AS SELECT 1;\n{% endfor %}"
+    ),
+    "templating_error": "CREATE VIEW {{ missing.attr }} AS SELECT 1;\n",
+}
+
+
+def _linter(tmp_path, config=None, **options):
+    cache = ResultCache(str(tmp_path / "cache"))
+    return FactsLinter(PrefilteredLinter(config=config or _config(), **options), cache)
+
+
+def _records(violations):
+    return [v.to_dict() for v in violations]
+
+
+def _rules_config(rules, dialect="postgres", **rules_configs):
+    """Return a configuration running the given rules."""
+    return FluffConfig(
+        configs={"core": {"large_file_skip_byte_limit": 0}, "rules": rules_configs},
+        overrides={"dialect": dialect, "rules": rules},
+    )
+
+
+class TestFactsLinter:
+    """Tests for linting files from the facts of their parse."""
+
+    @pytest.mark.parametrize("name", sorted(SAMPLES))
+    def test_parity(self, tmp_path, name):
+        """Test that cached facts report what the parsed mode reports."""
+        path = tmp_path / f"{name}.sql"
+        path.write_text(SAMPLES[name])
+        expected = _records(PrefilteredLinter(config=_config()).lint_path(str(path)))
+        assert _records(_linter(tmp_path).lint_path(str(path))) == expected
+        linter = _linter(tmp_path)
+        assert _records(linter.lint_path(str(path))) == expected
+        assert linter.statistics.hits == 1
+
+    @pytest.mark.parametrize("path", SQL_FILES)
+    def test_sql_files(self, tmp_path, path):
+        """Test the SQL files of the rule tests against a Linter."""
+        expected = _records(Linter(config=_config()).lint_path(path).get_violations())
+        _linter(tmp_path).lint_path(path)
+        assert _records(_linter(tmp_path).lint_path(path)) == expected
+
+    def test_rule_options(self, tmp_path, monkeypatch):
+        """Test that changed rule options relint the cached facts without parsing."""
+        path = tmp_path / "a.sql"
+        path.write_text(SAMPLES["noqa"])
+        _linter(tmp_path).lint_path(str(path))
+        # The same file, in a directory changing the options of VW01.
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / ".sqlfluff").write_text(
+            "[sqlfluff:rules:views.view_naming]\nexpected_prefix = c\n"
+        )
+        path = tmp_path / "sub" / "a.sql"
+        path.write_text(SAMPLES["noqa"])
+        config = _rules_config("VW01")
+        expected = _records(PrefilteredLinter(config=config).lint_path(str(path)))
+        monkeypatch.setattr(
+            Linter, "parse_rendered", lambda *args: pytest.fail("parsed")
+        )
+        linter = _linter(tmp_path, config)
+        assert _records(linter.lint_path(str(path))) == expected
+        assert [v["code"] for v in expected] == ["PRS", "VW01"]
+        assert "should start with 'c'" in expected[1]["description"]
+        assert linter.statistics.hits == 1
+
+    def test_skipped_file(self, tmp_path):
+        """Test that a file the prefilter skipped is parsed once a rule needs it."""
+        path = tmp_path / "a.sql"
+        path.write_text(SAMPLES["unparsable"])
+        linter = _linter(tmp_path, _rules_config("FN01"), skip_files=True)
+        assert linter.lint_path(str(path)) == []
+        linter = _linter(tmp_path)
+        expected = _records(PrefilteredLinter(config=_config()).lint_path(str(path)))
+        assert _records(linter.lint_path(str(path))) == expected
+        assert linter.statistics.misses == 1
+        assert _linter(tmp_path).lint_path(str(path))
+
+    def test_core_rules(self, tmp_path):
+        """Test that facts are not used when rules without a DDL model run."""
+        config = _rules_config(RULES + ",LT01")
+        path = tmp_path / "a.sql"
+        path.write_text(SAMPLES["noqa"])
+        linter = _linter(tmp_path, config)
+        assert not linter.enabled
+        linter.lint_path(str(path))
+        assert linter.cache.entries() == []
+
+    def test_unsupported_sqlfluff(self, tmp_path, monkeypatch):
+        """Test that facts are not used with an unchecked SQLFluff release."""
+        path = tmp_path / "a.sql"
+        path.write_text(SAMPLES["noqa"])
+        expected = _records(PrefilteredLinter(config=_config()).lint_path(str(path)))
+        monkeypatch.setattr(sqlfluff, "__version__", "5.0.0")
+        linter = _linter(tmp_path)
+        assert not linter.enabled
+        assert _records(linter.lint_path(str(path))) == expected
+        assert linter.cache.entries() == []
+
+    def test_fingerprint(self):
+        """Test that only the settings of the parse are part of the fingerprint."""
+        fingerprint = parse_fingerprint(_config())
+        assert parse_fingerprint(_rules_config("VW01")) == fingerprint
+        assert parse_fingerprint(_config(templater="raw")) != fingerprint
+        assert parse_fingerprint(_rules_config(RULES, "ansi")) != fingerprint
+
+
+class TestInternals:
+    """Tests for the SQLFluff internals the facts are linted with."""
+
+    @pytest.mark.parametrize(
+        "version, supported",
+        [
+            ("3.3.1", True),
+            ("3.4.0", True),
+            ("4.4.0", True),
+            ("3.2.6", False),
+            ("5.0.0", False),
+            ("unknown", False),
+        ],
+    )
+    def test_sqlfluff_supported(self, version, supported):
+        """Test the SQLFluff releases the facts can be linted with."""
+        assert sqlfluff_supported(version) is supported
+
+    def test_installed(self):
+        """Test that the installed SQLFluff release is supported."""
+        assert sqlfluff_supported()
+
+    def test_templated(self):
+        """Test that segments in templated areas are told apart."""
+        config = _config(templater="jinja")
+        tree = (
+            Linter(config=config)
+            .parse_string("CREATE VIEW {{ 'a' }} AS SELECT 1;\n")
+            .tree
+        )
+        view = next(tree.recursive_crawl("create_view_statement"))
+        (name,) = view.recursive_crawl("table_reference")
+        assert _Internals.templated(name)
+        assert not _Internals.templated(view.segments[0])
+
+    def test_violations(self):
+        """Test that the violations are deduplicated like those of a linted file."""
+        linter = Linter(config=_config())
+        linted = linter.lint_string(SAMPLES["noqa"])
+        violations = linted.get_violations()
+        assert _records(
+            _Internals.violations("a.sql", violations * 2, linted.ignore_mask)
+        ) == _records(violations)
+
+
+class TestCli:
+    """Tests for the parse cache of the lint command."""
+
+    def test_lint(self, tmp_path):
+        """Test that changing the rules reuses the cached parse."""
+        (tmp_path / "a.sql").write_text(SAMPLES["noqa"])
+        args = ["lint", "--dialect", "postgres", "--statistics", str(tmp_path)]
+        args += ["--cache-dir", str(tmp_path / "cache")]
+        runner = CliRunner()
+        first = runner.invoke(cli, args + ["--rules", "FN01,VW01"])
+        second = runner.invoke(cli, args + ["--rules", "VW01"])
+        assert "Parse cache: 0 hits, 1 misses." in first.stderr
+        assert "Parse cache: 1 hits, 0 misses." in second.stderr
+        assert "Cache: 0 hits, 1 misses" in second.stderr
+        uncached = runner.invoke(cli, args + ["--rules", "VW01", "--no-cache"])
+        assert second.stdout == uncached.stdout
+
+        stats = runner.invoke(
+            cli, ["cache", "stats", "--cache-dir", str(tmp_path / "cache")]
+        )
+        assert ": 2 results, 1 parsed files, " in stats.stdout
@@ -0,0 +1,185 @@
+"""Parity tests of the lexer-only fast mode against the parsed mode."""
+
+import glob
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from sqlfluff.core import Lexer, Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.cli import cli
+from custom_rules.fast import FastLinter
+from custom_rules.model import ObjectKind, get_ddl_model
+from custom_rules.token_model import build_token_model
+from tests.custom_rules.corpus import make_corpus
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+TESTS_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+SQL_FILES = sorted(glob.glob(os.path.join(TESTS_DIR, "test_*.sql")))
+
+
+def _config(**configs):
+    """Return a postgres configuration running the plugin rules only."""
+    return FluffConfig(
+        configs={"core": {"large_file_skip_byte_limit": 0, **configs}},
+        overrides={"dialect": "postgres", "rules": RULES},
+    )
+
+
+def _key(violation):
+    return (
+        violation.rule_code(),
+        violation.line_no,
+        violation.line_pos,
+        violation.desc(),
+    )
+
+
+def _parsed(sql, config):
+    """Lint with the parser, returning the parse tree and the plugin violations."""
+    linted = Linter(config=config).lint_string(sql)
+    return linted.tree, sorted(_key(v) for v in linted.get_violations())
+
+
+def _fast(sql, config, header_only=False):
+    linter = FastLinter(config=config, header_only=header_only)
+    return sorted(_key(v) for v in linter.lint_string(sql))
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    """A large generated corpus and its parsed mode results."""
+    sql = make_corpus(300, seed=7)
+    tree, violations = _parsed(sql, _config())
+    return sql, tree, violations
+
+
+class TestParity:
+    """The fast mode reports exactly what the parsed mode reports."""
+
+    @pytest.mark.parametrize(
+        "path", SQL_FILES, ids=[os.path.basename(p) for p in SQL_FILES]
+    )
+    def test_sql_files(self, path):
+        """Test parity on the SQL files of the test suite."""
+        with open(path, encoding="utf8") as f:
+            sql = f.read()
+        _, parsed = _parsed(sql, _config())
+        assert parsed
+        assert _fast(sql, _config()) == parsed
+        assert _fast(sql, _config(), header_only=True) == parsed
+
+    def test_corpus_parses(self, corpus):
+        """Test that the generated corpus is valid SQL for the parser."""
+        _, _, violations = corpus
+        assert not [v for v in violations if v[0] == "PRS"]
+        assert {v[0] for v in violations} >= set(RULES.split(",")) - {"CR05"}
+
+    def test_corpus(self, corpus):
+        """Test parity on the generated corpus."""
+        sql, _, parsed = corpus
+        assert _fast(sql, _config()) == parsed
+
+    def test_corpus_header_only(self, corpus):
+        """Test parity on the generated corpus with the bodies blanked out."""
+        sql, _, parsed = corpus
+        assert _fast(sql, _config(), header_only=True) == parsed
+
+    def test_corpus_model(self, corpus):
+        """Test that the token model holds the same objects as the parse model."""
+        sql, tree, _ = corpus
+        lexer = Lexer(config=_config())
+        tokens, _ = lexer.lex(sql)
+
+        def summary(model):
+            return sorted(
+                (
+                    kind.value,
+                    obj.name,
+                    obj.segment.pos_marker.working_line_no,
+                    obj.segment.pos_marker.working_line_pos,
+                )
+                for kind in ObjectKind
+                for obj in model.objects(kind)
+            )
+
+        assert summary(build_token_model(tokens)) == summary(get_ddl_model(tree))
+
+    def test_noqa(self):
+        """Test that inline and range noqa comments are honoured."""
+        sql = (
+            "CREATE VIEW public.a AS SELECT 1; -- noqa: VW01\n"
+            "CREATE VIEW public.b AS SELECT 1;\n"
+            "-- noqa: disable=FN01\n"
+            "CREATE FUNCTION public.f(p_a INT) RETURNS INT LANGUAGE sql AS 'SELECT 1';\n"
+            "-- noqa: enable=FN01\n"
+            "CREATE FUNCTION public.g(a INT) RETURNS INT LANGUAGE sql AS 'SELECT 1';\n"
+        )
+        _, parsed = _parsed(sql, _config())
+        assert [v[:2] for v in parsed] == [("FN01", 6), ("FN02", 6), ("VW01", 2)]
+        assert _fast(sql, _config()) == parsed
+        assert _fast(sql, _config(), header_only=True) == parsed
+
+    def test_disable_noqa(self):
+        """Test that noqa comments are ignored when disable_noqa is set."""
+        sql = "CREATE VIEW public.a AS SELECT 1; -- noqa\n"
+        config = _config(disable_noqa=True)
+        assert [v[0] for v in _fast(sql, config)] == ["VW01"]
+
+    def test_templated(self):
+        """Test that names are read from the rendered SQL."""
+        sql = "CREATE VIEW public.{{ name }} AS SELECT 1;\n"
+        config = _config(templater="jinja")
+        config.set_value(["templater", "jinja", "context", "name"], "stats")
+        fast = _fast(sql, config)
+        assert [v[0] for v in fast] == ["VW01"]
+        assert "'stats'" in fast[0][3]
+
+    def test_non_plugin_rules_ignored(self):
+        """Test that rules without a model evaluation are not run."""
+        linter = FastLinter(dialect="postgres", rules="VW01,LT01")
+        assert [rule.code for rule in linter.rules] == ["VW01"]
+
+
+class TestCli:
+    """Tests for the ``sqlfluff-extended lint`` command."""
+
+    def test_fast_matches_parsed(self):
+        """Test that both modes print the same violations."""
+        runner = CliRunner()
+        args = ["lint", "--dialect", "postgres", "--rules", RULES, *SQL_FILES]
+        parsed = runner.invoke(cli, args)
+        fast = runner.invoke(cli, args + ["--fast"])
+        assert parsed.exit_code == fast.exit_code == 1
+        assert fast.output == parsed.output
+        assert "VW01" in fast.output
+        header_only = runner.invoke(cli, args + ["--header-only"])
+        assert header_only.output == parsed.output
+
+    def test_json(self, tmp_path):
+        """Test the JSON output and the exit code of a clean file."""
+        path = tmp_path / "clean.sql"
+        path.write_text("CREATE VIEW public.v_ok AS SELECT 1;\n")
+        result = CliRunner().invoke(
+            cli,
+            ["lint", "--fast", "--dialect", "postgres", "--format", "json", str(path)],
+        )
+        assert result.exit_code == 0
+        assert json.loads(result.output) == [{"filepath": str(path), "violations": []}]
+
+    def test_sqlfluffignore(self, tmp_path, monkeypatch):
+        """Test that files are found like the parsed mode finds them."""
+        (tmp_path / "gen").mkdir()
+        (tmp_path / "gen" / "a.sql").write_text("CREATE VIEW public.a AS SELECT 1;\n")
+        (tmp_path / "b.sql").write_text("CREATE VIEW public.b AS SELECT 1;\n")
+        (tmp_path / ".sqlfluffignore").write_text("gen/\n")
+        monkeypatch.chdir(tmp_path)
+        runner = CliRunner()
+        args = ["lint", "--dialect", "postgres", "--rules", RULES, "."]
+        parsed = runner.invoke(cli, args + ["--no-cache"])
+        assert "b.sql" in parsed.output
+        assert "a.sql" not in parsed.output
+        for mode in ("--fast", "--header-only", "--stream"):
+            assert runner.invoke(cli, args + [mode]).output == parsed.output
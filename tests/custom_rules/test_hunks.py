@@ -0,0 +1,198 @@
+"""Tests for linting the statements touched by a change."""
+
+import shutil
+import subprocess
+
+import pytest
+from click.testing import CliRunner
+
+from custom_rules.cli import cli
+from custom_rules.hunks import HunkLinter, parse_diff
+from tests.custom_rules.corpus import make_corpus
+from tests.custom_rules.test_fast import RULES, SQL_FILES, _config, _key, _parsed
+
+SQL = (
+    "CREATE VIEW public.a AS SELECT 1;\n"
+    "\n"
+    "CREATE TABLE public.t (\n"
+    "    id INT,\n"
+    "    amount INT,\n"
+    "    CONSTRAINT t_pk PRIMARY KEY (id),\n"
+    "    CONSTRAINT amount_positive CHECK (amount > 0)\n"
+    ");\n"
+    "\n"
+    "CREATE VIEW public.b AS SELECT 1;\n"
+)
+
+
+def _hunks(sql, changes, **kwargs):
+    linter = HunkLinter(config=_config(), **kwargs)
+    violations = sorted(_key(v) for v in linter.lint_string(sql, changes))
+    return violations, linter.statistics
+
+
+class TestParseDiff:
+    """Tests for reading the changed lines of a diff."""
+
+    def test_hunks(self):
+        """Test added, changed and removed lines, and deleted files."""
+        diff = (
+            "diff --git a/db/schema.sql b/db/schema.sql\n"
+            "--- a/db/schema.sql\n"
+            "+++ b/db/schema.sql\n"
+            "@@ -3 +3,2 @@ CREATE TABLE\n"
+            "-a\n"
+            "+b\n"
+            "+c\n"
+            "@@ -20,2 +21,0 @@\n"
+            "-d\n"
+            "-e\n"
+            "@@ -30 +29 @@\n"
+            "diff --git a/old.sql b/old.sql\n"
+            "--- a/old.sql\n"
+            "+++ /dev/null\n"
+            "@@ -1,2 +0,0 @@\n"
+        )
+        assert parse_diff(diff) == {"db/schema.sql": [(3, 4), (21, 22), (29, 29)]}
+
+    def test_new_file(self):
+        """Test that every line of an added file is changed."""
+        diff = "--- /dev/null\n+++ b/new.sql\n@@ -0,0 +1,3 @@\n"
+        assert parse_diff(diff) == {"new.sql": [(1, 3)]}
+
+    def test_quoted_path(self):
+        """Test the paths git quotes."""
+        diff = '+++ "b/caf\\303\\251 \\"x\\".sql"\n@@ -1 +1 @@\n'
+        assert parse_diff(diff) == {'café "x".sql': [(1, 1)]}
+
+
+class TestHunkLinter:
+    """Tests for linting the changed statements of a file."""
+
+    def test_touched_statements(self):
+        """Test that only the statements overlapping the changes are linted."""
+        violations, statistics = _hunks(SQL, [(6, 7)])
+        assert [v[:3] for v in violations] == [("CR01", 6, 5), ("CR03", 7, 5)]
+        assert (statistics.statements, statistics.linted_statements) == (3, 1)
+
+    def test_changed_lines_only(self):
+        """Test that the violations of unchanged lines are not reported."""
+        violations, _ = _hunks(SQL, [(7, 7)])
+        assert [v[:3] for v in violations] == [("CR03", 7, 5)]
+
+    @pytest.mark.parametrize("kwargs", [{}, {"fast": True}], ids=str)
+    @pytest.mark.parametrize("path", SQL_FILES)
+    def test_whole_change(self, path, kwargs):
+        """Test that changing every line reports what a full lint reports."""
+        with open(path, encoding="utf8") as f:
+            sql = f.read()
+        _, parsed = _parsed(sql, _config())
+        violations, _ = _hunks(sql, [(1, sql.count("\n") + 1)], **kwargs)
+        assert violations == parsed
+
+    def test_corpus(self):
+        """Test that a small edit of a large file lints a few statements."""
+        sql = make_corpus(150, seed=5)
+        _, parsed = _parsed(sql, _config())
+        line = parsed[len(parsed) // 2][1]
+        violations, statistics = _hunks(sql, [(line, line)], fast=True)
+        assert violations == [v for v in parsed if v[1] == line]
+        assert statistics.linted_statements <= 2 < statistics.statements
+
+    def test_range_noqa_of_untouched_statements(self):
+        """Test that the disable directives of earlier statements still apply."""
+        sql = "-- noqa: disable=VW01\nSELECT 1;\n" + SQL
+        violations, _ = _hunks(sql, [(3, 12)])
+        assert [v[0] for v in violations] == ["CR01", "CR03"]
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "{% for i in [1, 2] %}CREATE VIEW public.a{{ i }} AS SELECT 1;\n"
+            "{% endfor %}\n",
+            "CREATE VIEW public.a AS SELECT 'x;\nCREATE VIEW public.b AS SELECT 1;\n",
+        ],
+        ids=["templated", "unterminated"],
+    )
+    def test_ambiguous_boundaries(self, sql):
+        """Test that files with uncertain statements are linted whole."""
+        violations, statistics = _hunks(sql, [(1, 1)])
+        _, parsed = _parsed(sql, _config())
+        assert violations == [v for v in parsed if v[1] == 1]
+        assert (statistics.whole_files, statistics.statements) == (1, 0)
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+class TestGit:
+    """Tests for reading the changes of a git working tree."""
+
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        def git(*args):
+            subprocess.run(
+                ["git", *args], cwd=tmp_path, check=True, capture_output=True
+            )
+
+        git("init", "-q")
+        git("config", "user.email", "test@example.com")
+        git("config", "user.name", "Test")
+        (tmp_path / "schema.sql").write_text(SQL)
+        (tmp_path / "other.sql").write_text(SQL)
+        git("add", ".")
+        git("commit", "-q", "-m", "Initial schema")
+        (tmp_path / "schema.sql").write_text(
+            SQL + "CREATE VIEW public.c AS SELECT 1;\n"
+        )
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def test_lint_paths(self, repo):
+        """Test that only the changed files and lines are linted."""
+        results = list(HunkLinter(config=_config()).lint_paths([str(repo)]))
+        assert [
+            (path, [_key(v)[:3] for v in violations]) for path, violations in results
+        ] == [(str(repo / "schema.sql"), [("VW01", 11, 1)])]
+
+    def test_cli(self, repo):
+        """Test the --changed option and its statistics."""
+        result = CliRunner().invoke(
+            cli,
+            [
+                "lint",
+                "--dialect",
+                "postgres",
+                "--rules",
+                RULES,
+                "--changed",
+                "--statistics",
+                ".",
+            ],
+        )
+        assert result.exit_code == 1
+        assert (
+            "schema.sql:11:1: VW01 View name 'c' should start with 'v_'."
+            in result.output
+        )
+        assert (
+            "Changes: linted 1 of 4 statements of 1 files, 0 files linted whole."
+            in result.output
+        )
+
+    def test_cli_default_rules(self, repo):
+        """Test that layout rules do not report the edges of the statements."""
+        result = CliRunner().invoke(
+            cli, ["lint", "--dialect", "postgres", "--changed", "."]
+        )
+        assert result.exit_code == 1
+        assert [line.split(": ")[1] for line in result.output.splitlines()] == [
+            "VW01 View name 'c' should start with 'v_'."
+        ]
+
+    def test_invalid_revision(self, repo):
+        """Test that git errors are reported without a traceback."""
+        result = CliRunner().invoke(
+            cli,
+            ["lint", "--dialect", "postgres", "--changed", "--diff-base", "nope", "."],
+        )
+        assert result.exit_code == 1
+        assert "git diff failed" in result.output
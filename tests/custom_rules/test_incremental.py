@@ -0,0 +1,130 @@
+"""Tests for linting documents again one changed statement at a time."""
+
+import random
+
+import pytest
+from sqlfluff.core import FluffConfig, Linter
+
+from custom_rules.incremental import IncrementalLinter
+from tests.custom_rules.corpus import make_corpus
+from tests.custom_rules.test_fast import SQL_FILES, _config, _key, _parsed
+
+SQL = (
+    "CREATE VIEW public.a AS SELECT 1;\n"
+    "\n"
+    "CREATE TABLE public.t (\n"
+    "    id INT,\n"
+    "    CONSTRAINT t_pk PRIMARY KEY (id)\n"
+    ");\n"
+    "SELECT 1; CREATE VIEW public.b AS SELECT 1;\n"
+)
+
+
+def _lint(linter, sql):
+    return sorted(_key(v) for v in linter.lint(sql))
+
+
+def _fresh(sql, **kwargs):
+    return _lint(IncrementalLinter(config=_config(), **kwargs), sql)
+
+
+class TestIncrementalLinter:
+    """The incremental linter reports what linting each version afresh does."""
+
+    @pytest.mark.parametrize("kwargs", [{}, {"fast": True}], ids=str)
+    @pytest.mark.parametrize("path", SQL_FILES)
+    def test_sql_files(self, path, kwargs):
+        """Test parity with a full lint on the SQL files of the test suite."""
+        with open(path, encoding="utf8") as f:
+            sql = f.read()
+        _, parsed = _parsed(sql, _config())
+        assert _fresh(sql, **kwargs) == parsed
+
+    def test_default_rules(self):
+        """Test parity with Linter.lint_string with the default rule selection."""
+        config = FluffConfig(overrides={"dialect": "postgres"})
+        expected = sorted(
+            _key(v) for v in Linter(config=config).lint_string(SQL).get_violations()
+        )
+        assert [v[0] for v in expected] == ["CR01", "VW01", "VW01"]
+        assert _lint(IncrementalLinter(config=config), SQL) == expected
+
+    def test_single_character_edit(self):
+        """Test that only the edited statement is linted again."""
+        linter = IncrementalLinter(config=_config())
+        _lint(linter, SQL)
+        edited = SQL.replace("t_pk", "tx_pk")
+        assert _lint(linter, edited) == _fresh(edited)
+        assert linter.statistics.linted_statements == 4 + 1
+        assert linter.statistics.scanned_statements == 5 + 1
+
+    def test_moved_statements(self):
+        """Test that statements moved by an edit keep their violations."""
+        linter = IncrementalLinter(config=_config())
+        _lint(linter, SQL)
+        edited = "-- Views\n\n" + SQL.replace("SELECT 1; CREATE", "SELECT 12;  CREATE")
+        violations = _lint(linter, edited)
+        assert violations == _fresh(edited)
+        assert [v[:3] for v in violations] == [
+            ("CR01", 7, 5),
+            ("VW01", 3, 1),
+            ("VW01", 9, 13),
+        ]
+        # The comment and the first SELECT are new, not the view after them.
+        assert linter.statistics.linted_statements == 4 + 2
+
+    def test_corpus(self):
+        """Test a series of edits of a generated file in the fast mode."""
+        sql = make_corpus(80, seed=7)
+        linter = IncrementalLinter(config=_config(), fast=True)
+        _lint(linter, sql)
+        for old, new in (("pk_", "pk"), ("CREATE", "\nCREATE"), ("\n\n", "\n")):
+            sql = sql.replace(old, new, 1)
+            assert _lint(linter, sql) == _fresh(sql, fast=True)
+        assert linter.statistics.linted_statements < 2 * linter.statistics.statements
+
+    def test_random_edits(self):
+        """Test edits opening and closing quotes, comments and statements."""
+        sql = make_corpus(20, seed=3)
+        linter = IncrementalLinter(config=_config(), fast=True)
+        rng = random.Random(0)
+        for _ in range(30):
+            pos = rng.randrange(len(sql) + 1)
+            if rng.random() < 0.3 and pos < len(sql):
+                sql = sql[:pos] + sql[pos + rng.randrange(1, 20) :]
+            else:
+                text = rng.choice([";", "'", "$$", "/*", "*/", "--", "\n", "x", "_pk"])
+                sql = sql[:pos] + text + sql[pos:]
+            assert _lint(linter, sql) == _fresh(sql, fast=True)
+        assert linter.statistics.scanned_statements < linter.statistics.statements
+
+    def test_range_noqa(self):
+        """Test that the directives of known statements still apply."""
+        sql = "-- noqa: disable=VW01\nSELECT 1;\n" + SQL
+        linter = IncrementalLinter(config=_config())
+        assert [v[0] for v in _lint(linter, sql)] == ["CR01"]
+        edited = sql.replace("t_pk", "pk_t")
+        assert _lint(linter, edited) == []
+        assert linter.statistics.linted_statements == 5 + 1
+
+    def test_only_current_statements_are_kept(self):
+        """Test that the results of replaced statements are dropped."""
+        linter = IncrementalLinter(config=_config())
+        for i in range(5):
+            linter.lint(SQL.replace("t_pk", f"t{i}_pk"))
+        assert len(linter._results) == 4
+
+    def test_tree_at(self):
+        """Test the parse tree of the statement at a line."""
+        linter = IncrementalLinter(config=_config())
+        linter.lint(SQL)
+        assert linter.tree_at(4).get_child("statement") is not None
+        assert "create_table_statement" in linter.tree_at(4).descendant_type_set
+        assert linter.tree_at(2) is None
+        assert linter.tree_at(100) is None
+
+    def test_fast_mode_keeps_no_trees(self):
+        """Test that the fast mode has no parse trees."""
+        linter = IncrementalLinter(config=_config(), fast=True)
+        linter.lint(SQL)
+        assert linter.tree_at(1) is None
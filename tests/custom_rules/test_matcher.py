@@ -0,0 +1,122 @@
+"""Tests for the compiled name matchers."""
+
+import pytest
+from sqlfluff.core import Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.matcher import compile_name_matcher, matcher_from_config
+
+
+class TestNameMatcher:
+    """Tests for checking names against a compiled configuration."""
+
+    def test_single_prefix(self):
+        """Test that a single prefix keeps the historical message."""
+        matcher = compile_name_matcher(("pk_",))
+        assert matcher.mismatch("pk_person") is None
+        assert matcher.mismatch("PK_Person") is None
+        assert matcher.mismatch("person_pk") == "should start with 'pk_'"
+
+    def test_several_prefixes(self):
+        """Test that any of several prefixes of different lengths is accepted."""
+        matcher = compile_name_matcher(("v_", "vw_", "view_"))
+        assert matcher.mismatch("v_users") is None
+        assert matcher.mismatch("vw_users") is None
+        assert matcher.mismatch("view_users") is None
+        assert (
+            matcher.mismatch("users") == "should start with one of 'v_', 'vw_', 'view_'"
+        )
+
+    def test_many_prefixes(self):
+        """Test matching against a large prefix list."""
+        prefixes = tuple(f"p{i}_" for i in range(500))
+        matcher = compile_name_matcher(prefixes)
+        assert matcher.mismatch("p499_name") is None
+        assert matcher.mismatch("p500_name") is not None
+
+    def test_schema_prefixes(self):
+        """Test that schema overrides replace the default prefixes."""
+        matcher = compile_name_matcher(
+            ("v_",), schema_prefixes=("audit:aud_", "Audit:audit_")
+        )
+        assert matcher.mismatch("v_users", "public") is None
+        assert matcher.mismatch("v_users", None) is None
+        assert matcher.mismatch("aud_users", "audit") is None
+        assert matcher.mismatch("audit_users", '"AUDIT"') is None
+        assert (
+            matcher.mismatch("v_users", "audit")
+            == "should start with one of 'aud_', 'audit_'"
+        )
+
+    def test_pattern_and_byte_limit(self):
+        """Test the snake case pattern and the identifier length limit."""
+        matcher = compile_name_matcher(
+            ("fun_",), name_pattern="[a-z][a-z0-9_]*", max_name_bytes=63
+        )
+        assert matcher.mismatch("fun_get_user") is None
+        assert (
+            matcher.mismatch("fun_getUser") == "should match pattern '[a-z][a-z0-9_]*'"
+        )
+        assert (
+            matcher.mismatch("fun_" + "x" * 60) == "should not be longer than 63 bytes"
+        )
+
+    def test_batch(self):
+        """Test that checking a batch matches checking each name."""
+        matcher = compile_name_matcher(
+            ("pk_", "pkey_"),
+            name_pattern=r"[a-z_0-9]+",
+            max_name_bytes=10,
+            schema_prefixes=("audit:a_",),
+        )
+        names = ["pk_a", "PK_B", "a_c", "x", "", "pk_very_long_name", "pk_İ", "p\nk_"]
+        schemas = [None, "audit", "public", '"Audit"']
+        for schema_list in ([schemas[i % 4] for i in range(len(names))], None):
+            expected = [
+                (i, matcher.mismatch(name, schema_list and schema_list[i]))
+                for i, name in enumerate(names)
+                if matcher.mismatch(name, schema_list and schema_list[i])
+            ]
+            assert matcher.mismatches(names, schema_list) == expected
+        assert matcher.mismatches([]) == []
+
+    def test_invalid_schema_prefix(self):
+        """Test that malformed schema overrides are rejected."""
+        with pytest.raises(ValueError):
+            compile_name_matcher(("v_",), schema_prefixes=("aud_",))
+
+    def test_compiled_once_per_config(self):
+        """Test that identical configurations share one compiled matcher."""
+        first = matcher_from_config({"expected_prefix": "v_, vw_"}, "v_")
+        second = matcher_from_config({"expected_prefix": "v_,vw_"}, "v_")
+        assert first is second
+        assert matcher_from_config({}, "v_") is matcher_from_config(
+            {"expected_prefix": "v_"}, "x_"
+        )
+
+
+def test_rule_configuration():
+    """Test the matcher options when read from a configuration file."""
+    config = FluffConfig.from_string("""
+[sqlfluff]
+dialect = postgres
+rules = VW01
+
+[sqlfluff:rules:views.view_naming]
+expected_prefix = v_, vw_
+schema_prefixes = audit:aud_
+name_pattern = [a-z][a-z0-9_]{0,62}
+""")
+    sql = """
+    CREATE VIEW public.vw_users AS SELECT 1;
+    CREATE VIEW public.users AS SELECT 1;
+    CREATE VIEW audit.aud_users AS SELECT 1;
+    CREATE VIEW audit.v_users AS SELECT 1;
+    CREATE VIEW public.v_Users AS SELECT 1;
+    """
+    result = Linter(config=config).lint_string(sql)
+    assert [(v.line_no, v.desc()) for v in result.violations] == [
+        (3, "View name 'users' should start with one of 'v_', 'vw_'."),
+        (5, "View name 'v_users' should start with 'aud_'."),
+        (6, "View name 'v_Users' should match pattern '[a-z][a-z0-9_]{0,62}'."),
+    ]
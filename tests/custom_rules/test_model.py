@@ -0,0 +1,82 @@
+"""Tests for the per-file DDL object model."""
+
+from sqlfluff.core import Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.model import ConstraintKind, get_ddl_model
+
+
+def _parse(sql):
+    """Parse a SQL string with the postgres dialect and return the tree."""
+    linter = Linter(config=FluffConfig(overrides={"dialect": "postgres"}))
+    return linter.parse_string(sql).tree
+
+
+class TestDdlModel:
+    """Tests for extracting DDL objects from a parse tree."""
+
+    def test_constraints(self):
+        """Test that named constraints get the expected kind, table and column."""
+        tree = _parse("""
+            CREATE TABLE public.orders (
+                order_id INT,
+                person_id INT,
+                amount INT CONSTRAINT default_amount DEFAULT 0,
+                CONSTRAINT orders_pk PRIMARY KEY (order_id),
+                CONSTRAINT orders_person_fk FOREIGN KEY (person_id) REFERENCES public.person(person_id),
+                CONSTRAINT amount_positive CHECK (amount > 0),
+                PRIMARY KEY (order_id)
+            );
+            alter table public.person add constraint person_email unique (email);
+            """)
+        model = get_ddl_model(tree)
+        assert [(c.name, c.kind, c.table, c.column) for c in model.constraints] == [
+            ("default_amount", ConstraintKind.DEFAULT, "public.orders", "amount"),
+            ("orders_pk", ConstraintKind.PRIMARY_KEY, "public.orders", None),
+            ("orders_person_fk", ConstraintKind.FOREIGN_KEY, "public.orders", None),
+            ("amount_positive", ConstraintKind.CHECK, "public.orders", None),
+            ("person_email", ConstraintKind.UNIQUE, "public.person", None),
+        ]
+        assert [c.is_table_constraint for c in model.constraints] == [
+            False,
+            True,
+            True,
+            True,
+            True,
+        ]
+        assert [(t.schema, t.name) for t in model.tables] == [("public", "orders")]
+
+    def test_functions(self):
+        """Test that functions are extracted with their parameters."""
+        tree = _parse("""
+            CREATE OR REPLACE FUNCTION public.get_user(user_id INT, OUT p_name TEXT)
+            RETURNS SETOF users LANGUAGE SQL AS $$ SELECT 1; $$;
+            CREATE FUNCTION get_all() RETURNS INT LANGUAGE SQL AS $$ SELECT 1; $$;
+            """)
+        functions = get_ddl_model(tree).functions
+        assert [(f.schema, f.name) for f in functions] == [
+            ("public", "get_user"),
+            (None, "get_all"),
+        ]
+        assert [p.name for p in functions[0].parameters] == ["user_id", "p_name"]
+        assert functions[1].parameters == ()
+
+    def test_views(self):
+        """Test that views and materialized views are extracted separately."""
+        tree = _parse("""
+            CREATE OR REPLACE VIEW public.user_details AS SELECT id FROM public.users;
+            CREATE MATERIALIZED VIEW v_user_stats AS SELECT count(*) FROM public.users;
+            """)
+        model = get_ddl_model(tree)
+        assert [(v.schema, v.name) for v in model.views] == [("public", "user_details")]
+        assert [(v.schema, v.name) for v in model.materialized_views] == [
+            (None, "v_user_stats")
+        ]
+
+    def test_model_is_shared_per_tree(self):
+        """Test that a tree is only walked once."""
+        sql = "ALTER TABLE public.person ADD CONSTRAINT uc_email UNIQUE (email);\n"
+        tree = _parse(sql)
+        assert get_ddl_model(tree) is get_ddl_model(tree)
+        other_tree = _parse(sql)
+        assert get_ddl_model(other_tree) is not get_ddl_model(tree)
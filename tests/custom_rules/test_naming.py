@@ -0,0 +1,84 @@
+"""Tests for the declarative naming rules."""
+
+import pytest
+from sqlfluff.core import Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.matcher import compile_name_matcher
+from custom_rules.model import ObjectKind, get_ddl_model
+from custom_rules.naming import NAMING_SPECS, SPECS_BY_KIND, naming_violations
+from custom_rules.registry import load_rule_class
+
+SQL = """
+CREATE TABLE public.orders (
+    order_id INT,
+    amount INT,
+    CONSTRAINT orders_pk PRIMARY KEY (order_id),
+    CONSTRAINT chk_amount CHECK (amount > 0)
+);
+CREATE VIEW public.v_orders AS SELECT * FROM public.orders;
+CREATE MATERIALIZED VIEW public.order_totals AS SELECT 1 AS total;
+"""
+
+
+def _model(sql):
+    """Parse a SQL string with the postgres dialect and return its model."""
+    linter = Linter(config=FluffConfig(overrides={"dialect": "postgres"}))
+    return get_ddl_model(linter.parse_string(sql).tree)
+
+
+class TestNamingSpecs:
+    """Tests for the naming spec table and its evaluation."""
+
+    def test_dispatch_groups_specs_by_kind(self):
+        """Test that every spec is dispatched on each of its object kinds."""
+        assert [spec.code for spec in SPECS_BY_KIND[ObjectKind.CONSTRAINT]] == [
+            "CR01",
+            "CR02",
+            "CR03",
+            "CR04",
+            "CR05",
+        ]
+        assert [s.code for s in SPECS_BY_KIND[ObjectKind.MATERIALIZED_VIEW]] == ["VW01"]
+        assert [s.code for s in SPECS_BY_KIND[ObjectKind.PARAMETER]] == ["FN02"]
+
+    @pytest.mark.parametrize("code", sorted(NAMING_SPECS))
+    def test_rule_classes_use_specs(self, code):
+        """Test that the rule classes are bound to the spec of their code."""
+        rule = load_rule_class(code)(code=code, description="")
+        assert rule.spec is NAMING_SPECS[code]
+        assert rule.matcher.prefixes_for() == (NAMING_SPECS[code].default_prefix,)
+
+    def test_naming_violations(self):
+        """Test that only objects of the spec kinds and predicate are reported."""
+        model = _model(SQL)
+        pk_violations = naming_violations(
+            model, NAMING_SPECS["CR01"], compile_name_matcher(("pk_",))
+        )
+        assert [(c.name, mismatch) for c, mismatch in pk_violations] == [
+            ("orders_pk", "should start with 'pk_'")
+        ]
+        assert (
+            naming_violations(
+                model, NAMING_SPECS["CR03"], compile_name_matcher(("chk_",))
+            )
+            == []
+        )
+        view_violations = naming_violations(
+            model, NAMING_SPECS["VW01"], compile_name_matcher(("v_",))
+        )
+        assert [v.name for v, _ in view_violations] == ["order_totals"]
+
+    def test_name_anchor(self):
+        """Test that CR05 reports the lowercased name, anchored to the name."""
+        model = _model(
+            "CREATE TABLE public.p (\n"
+            "    created_at TIMESTAMP CONSTRAINT Default_Created DEFAULT now()\n"
+            ");\n"
+        )
+        rule = load_rule_class("CR05")(code="CR05", description="")
+        [result] = rule.eval_model(model)
+        assert result.anchor.raw == "Default_Created"
+        assert result.description == (
+            "DEFAULT constraint name 'default_created' should start with 'df_'."
+        )
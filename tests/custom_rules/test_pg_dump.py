@@ -0,0 +1,172 @@
+"""Tests for the pg_dump input mode."""
+
+import mmap
+
+import pytest
+from click.testing import CliRunner
+
+from custom_rules import pg_dump
+from custom_rules.cli import cli
+from custom_rules.fast import FastLinter
+from custom_rules.pg_dump import DumpStatistics, iter_dump_statements
+from custom_rules.streaming import StreamingLinter
+from tests.custom_rules.test_fast import RULES, _config, _key
+
+DUMP = """--
+-- PostgreSQL database dump
+--
+
+SET standard_conforming_strings = on;
+
+CREATE TABLE public.person (
+    id integer NOT NULL,
+    name text
+);
+
+--
+-- Data for Name: person; Type: TABLE DATA; Schema: public; Owner: app
+--
+
+COPY public.person (id, name) FROM stdin;
+1\tCREATE VIEW bad AS SELECT 1;
+2\tit's; here \\\\. not the end
+3\tnaïve – ünïcode
+\\.
+
+
+INSERT INTO public.person VALUES (4, 'multi
+line; ''quoted'' value');
+INSERT INTO public.person VALUES (5, 'x'); CREATE VIEW public.stats AS SELECT 1;
+
+COPY public.person (id, name) FROM '/tmp/person.csv';
+
+ALTER TABLE ONLY public.person
+    ADD CONSTRAINT person_pkey PRIMARY KEY (id);
+
+CREATE FUNCTION public.get_person(id integer) RETURNS text
+    LANGUAGE sql
+    AS $$ SELECT name FROM public.person WHERE id = id; $$;
+"""
+
+
+def _without_copy_rows(sql):
+    """Blank out the COPY rows, keeping the lines, for the whole file linters."""
+    lines = sql.split("\n")
+    start = lines.index("COPY public.person (id, name) FROM stdin;")
+    end = lines.index("\\.")
+    return "\n".join(lines[:start] + [""] * (end - start + 1) + lines[end + 1 :])
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text(DUMP, encoding="utf8")
+    return str(path)
+
+
+class TestIterDumpStatements:
+    """Tests for reading the statements of a dump."""
+
+    def test_data_sections_are_skipped(self, dump_path):
+        """Test that COPY rows and INSERT statements are not yielded."""
+        statistics = DumpStatistics()
+        statements = list(iter_dump_statements(dump_path, statistics=statistics))
+        texts = " ".join(statement.text for statement in statements)
+        assert "INSERT" not in texts
+        assert "FROM stdin" not in texts
+        assert "CREATE VIEW bad" not in texts
+        assert "FROM '/tmp/person.csv'" in texts
+        assert statistics.copy_blocks == 1
+        assert statistics.insert_blocks == 1
+        assert statistics.statements == len(statements)
+
+    @pytest.mark.parametrize("chunk_size", [1, 16, 1 << 20])
+    def test_positions(self, dump_path, chunk_size):
+        """Test that statements keep their line and position in the file."""
+        statements = list(iter_dump_statements(dump_path, chunk_size=chunk_size))
+        lines = DUMP.split("\n")
+        for statement in statements:
+            line = lines[statement.line_no - 1]
+            first_line = statement.text.split("\n")[0]
+            assert line[statement.line_pos - 1 :].startswith(first_line)
+        view = next(s for s in statements if "public.stats" in s.text)
+        assert (view.line_no, view.line_pos) == (25, 44)
+
+    def test_long_copy_block(self, tmp_path, monkeypatch):
+        """Test the line count after a COPY block larger than the chunk size."""
+        # Release the pages read as often as possible.
+        monkeypatch.setattr(pg_dump, "_RELEASE_EVERY", mmap.PAGESIZE)
+        rows = "".join(f"{i}\tvalue; {i}\n" for i in range(50000))
+        path = tmp_path / "dump.sql"
+        path.write_text(
+            f"COPY t (a, b) FROM stdin;\n{rows}\\.\nCREATE VIEW v AS SELECT 1;\n"
+        )
+        statement, trailing_newline = iter_dump_statements(str(path), chunk_size=1000)
+        assert trailing_newline.text == "\n"
+        assert statement.text == "CREATE VIEW v AS SELECT 1;"
+        assert (statement.line_no, statement.line_pos) == (50003, 1)
+
+    @pytest.mark.parametrize(
+        "insert",
+        [
+            'INSERT INTO "o\'brien" VALUES (1);\n',
+            "INSERT INTO \"a;b\" VALUES ('x');\n",
+        ],
+    )
+    def test_quoted_identifiers(self, tmp_path, insert):
+        """Test that quotes in identifiers do not hide the following DDL."""
+        path = tmp_path / "dump.sql"
+        path.write_text(insert + "CREATE VIEW v AS SELECT 1;\n")
+        statements = [s.text for s in iter_dump_statements(str(path))]
+        assert "CREATE VIEW v AS SELECT 1;" in statements
+        assert not any("INSERT" in statement for statement in statements)
+
+    def test_unbalanced_insert(self, tmp_path):
+        """Test that an INSERT pg_dump would not write is linted, not skipped."""
+        path = tmp_path / "dump.sql"
+        path.write_text(
+            "INSERT INTO t VALUES ('unbalanced);\nCREATE VIEW v AS SELECT 1;\n"
+        )
+        statistics = DumpStatistics()
+        statements = list(iter_dump_statements(str(path), statistics=statistics))
+        assert statements[0].text.startswith("INSERT")
+        assert statistics.insert_blocks == 0
+        linter = StreamingLinter(config=_config(), pg_dump=True)
+        assert "LXR" in {v.rule_code() for v in linter.lint_path(str(path))}
+
+    def test_empty_file(self, tmp_path):
+        """Test that an empty dump has no statements."""
+        path = tmp_path / "empty.sql"
+        path.write_text("")
+        assert list(iter_dump_statements(str(path))) == []
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"fast": True}], ids=str)
+def test_violations_match_whole_file(dump_path, kwargs):
+    """Test that the violations are those of the file without its data."""
+    expected = sorted(
+        _key(v)
+        for v in FastLinter(config=_config()).lint_string(_without_copy_rows(DUMP))
+    )
+    assert [v[0] for v in expected] == ["CR01", "FN01", "FN02", "VW01"]
+    linter = StreamingLinter(config=_config(), pg_dump=True, **kwargs)
+    assert sorted(_key(v) for v in linter.lint_path(dump_path)) == expected
+
+
+def test_cli_pg_dump(dump_path):
+    """Test the ``--pg-dump`` option of the lint command."""
+    result = CliRunner().invoke(
+        cli, ["lint", "--pg-dump", "--dialect", "postgres", "--rules", RULES, dump_path]
+    )
+    assert result.exit_code == 1
+    assert f"{dump_path}:25:44: VW01" in result.output
+
+
+def test_cli_pg_dump_default_rules(dump_path):
+    """Test that layout rules do not report the edges of each statement."""
+    result = CliRunner().invoke(
+        cli, ["lint", "--pg-dump", "--no-cache", "--dialect", "postgres", dump_path]
+    )
+    assert result.exit_code == 1
+    codes = [line.split()[1] for line in result.output.splitlines()]
+    assert codes == ["VW01", "CR01", "FN01", "FN02"]
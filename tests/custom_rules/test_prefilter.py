@@ -0,0 +1,273 @@
+"""Tests for the trigger keyword prefilter."""
+
+import glob
+import os
+from io import StringIO
+
+import pytest
+from click.testing import CliRunner
+from sqlfluff.core import Linter
+from sqlfluff.core.config import FluffConfig
+
+from custom_rules.cli import cli
+from custom_rules.fast import FastLinter
+from custom_rules.prefilter import PrefilteredLinter, RulePrefilter
+from custom_rules.registry import GROUP_TRIGGERS, RULE_SPECS, trigger_group
+from custom_rules.streaming import StreamingLinter
+from tests.custom_rules.corpus import make_corpus
+
+RULES = "CR01,CR02,CR03,CR04,CR05,FN01,FN02,VW01"
+TESTS_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+SQL_FILES = sorted(glob.glob(os.path.join(TESTS_DIR, "test_*.sql")))
+
+DML = "INSERT INTO public.t VALUES (1);\nUPDATE public.t SET a = 2;\n"
+PK_CONFIG = "[sqlfluff:rules:constraints.pk_constraint_naming]\nexpected_prefix = xx_\n"
+PRIMARY_KEY = "CREATE TABLE public.t (a INT, CONSTRAINT pk_t PRIMARY KEY (a));\n"
+VIEWS_ONLY = (
+    "CREATE VIEW public.stats AS SELECT 1 AS a;\n"
+    "CREATE TABLE public.t (a INT PRIMARY KEY);\n"
+)
+
+
+def _config(rules=RULES, **configs):
+    return FluffConfig(
+        configs={"core": {"large_file_skip_byte_limit": 0, **configs}},
+        overrides={"dialect": "postgres", "rules": rules},
+    )
+
+
+def _key(violation):
+    return (
+        violation.rule_code(),
+        violation.line_no,
+        violation.line_pos,
+        violation.desc(),
+    )
+
+
+def _full(sql, config):
+    return sorted(
+        _key(v) for v in Linter(config=config).lint_string(sql).get_violations()
+    )
+
+
+def _prefiltered(sql, config):
+    linter = PrefilteredLinter(config=config)
+    return sorted(_key(v) for v in linter.lint_string(sql)), linter.prefilter
+
+
+def _samples():
+    samples = {}
+    for path in SQL_FILES:
+        with open(path, encoding="utf8") as f:
+            samples[os.path.basename(path)] = f.read()
+    samples["dml"] = DML
+    samples["views_only"] = VIEWS_ONLY
+    samples["lower_case"] = VIEWS_ONLY.lower()
+    samples["corpus"] = make_corpus(40, seed=3)
+    return samples
+
+
+SAMPLES = _samples()
+
+
+class TestRegistry:
+    """Tests for the trigger keywords declared by the rule groups."""
+
+    def test_every_rule_has_a_trigger_group(self):
+        """Test that every plugin rule belongs to a group with triggers."""
+        for spec in RULE_SPECS:
+            assert trigger_group(spec.code) in GROUP_TRIGGERS
+
+    def test_unknown_rule(self):
+        """Test that rules outside the plugin have no trigger group."""
+        assert trigger_group("LT01") is None
+
+
+class TestRulePrefilter:
+    """Tests for the selection of the rules to run."""
+
+    @pytest.fixture
+    def prefilter(self):
+        return RulePrefilter(
+            Linter(config=_config("VW01,FN01,LT01")).get_rulepack().rules
+        )
+
+    def test_select(self, prefilter):
+        """Test that only the groups whose keywords appear are selected."""
+        codes = [rule.code for rule in prefilter.select(["create view v as select 1"])]
+        assert codes == ["LT01", "VW01"]
+
+    def test_non_plugin_rules_always_run(self, prefilter):
+        """Test that rules without a trigger group are never skipped."""
+        assert [rule.code for rule in prefilter.select([DML])] == ["LT01"]
+
+    def test_variants(self, prefilter):
+        """Test that the keywords of any templated variant select a group."""
+        codes = [rule.code for rule in prefilter.select([DML, "CREATE FUNCTION"])]
+        assert codes == ["FN01", "LT01"]
+
+    def test_statistics(self):
+        """Test the counters of skipped files and rule runs."""
+        prefilter = RulePrefilter(Linter(config=_config()).get_rulepack().rules)
+        assert len(prefilter.select([DML])) == 0
+        assert len(prefilter.select([VIEWS_ONLY])) == 1
+        counts = prefilter.statistics
+        assert (counts.files, counts.skipped_files) == (2, 1)
+        assert (counts.rule_runs, counts.skipped_rule_runs) == (16, 15)
+
+
+class TestIdentity:
+    """The prefiltered linters report exactly what a full lint reports."""
+
+    @pytest.mark.parametrize("name", sorted(SAMPLES))
+    def test_parsed(self, name):
+        """Test the parsed mode on samples with and without trigger keywords."""
+        sql = SAMPLES[name]
+        violations, _ = _prefiltered(sql, _config())
+        assert violations == _full(sql, _config())
+
+    @pytest.mark.parametrize("name", sorted(SAMPLES))
+    def test_fast(self, name):
+        """Test the fast mode against the fast mode without the prefilter."""
+        sql = SAMPLES[name]
+        linters = [
+            FastLinter(config=_config(), prefilter=flag) for flag in (True, False)
+        ]
+        results = [
+            sorted(_key(v) for v in linter.lint_string(sql)) for linter in linters
+        ]
+        assert results[0] == results[1]
+
+    def test_core_rules(self):
+        """Test that core rules still run on files skipped by the plugin rules."""
+        config = _config(RULES + ",LT01")
+        violations, prefilter = _prefiltered("SELECT  1;\n", config)
+        assert violations == _full("SELECT  1;\n", config)
+        assert [v[0] for v in violations] == ["LT01"]
+        assert prefilter.statistics.skipped_files == 0
+
+    def test_skipped(self):
+        """Test that files without trigger keywords are skipped."""
+        violations, prefilter = _prefiltered(DML, _config())
+        assert violations == []
+        assert prefilter.statistics.skipped_files == 1
+
+    def test_errors_of_untriggered_files(self):
+        """Test that the files without any rule to run report their errors."""
+        sql = "SELECT 1 `;\n"
+        expected = _full(sql, _config())
+        assert [v[0] for v in expected] == ["LXR", "PRS"]
+        violations, prefilter = _prefiltered(sql, _config())
+        assert violations == expected
+        assert prefilter.statistics.skipped_files == 1
+        fast = FastLinter(config=_config())
+        assert [_key(v) for v in fast.lint_string(sql)] == expected[:1]
+
+    def test_skip_files(self):
+        """Test that skipping the files without any rule to run is opt-in."""
+        sql = "SELECT 1 `;\n"
+        linters = (
+            PrefilteredLinter(config=_config(), skip_files=True),
+            FastLinter(config=_config(), skip_files=True),
+        )
+        for linter in linters:
+            assert linter.lint_string(sql) == []
+
+    def test_templated(self):
+        """Test that the keywords are searched in the rendered SQL."""
+        sql = "CREATE {{ kind }} public.stats AS SELECT 1;\n"
+        # The view starts in the templated keyword, which is ignored by default.
+        config = _config(templater="jinja", ignore_templated_areas=False)
+        config.set_value(["templater", "jinja", "context", "kind"], "VIEW")
+        violations, prefilter = _prefiltered(sql, config)
+        assert [v[0] for v in violations] == ["VW01"]
+        assert violations == _full(sql, config)
+        assert prefilter.statistics.skipped_rule_runs == 7
+
+    def test_streaming(self):
+        """Test that statements are prefiltered one at a time."""
+        sql = DML + VIEWS_ONLY
+        linter = StreamingLinter(config=_config())
+        violations = sorted(_key(v) for v in linter.lint_stream(StringIO(sql)))
+        assert violations == _full(sql, _config())
+        counts = linter.prefilter.statistics
+        assert (counts.files, counts.skipped_files) == (4, 3)
+
+
+class TestConfigurations:
+    """The rules of each file are built from its own configuration."""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        """A file in a directory whose ``.sqlfluff`` changes the CR01 prefix."""
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / ".sqlfluff").write_text(PK_CONFIG)
+        path = tmp_path / "sub" / "a.sql"
+        path.write_text(PRIMARY_KEY)
+        return str(path)
+
+    def test_directory(self, path):
+        """Test the rule options of a directory in the parsed and fast modes."""
+        expected = sorted(
+            _key(v) for v in Linter(config=_config()).lint_path(path).get_violations()
+        )
+        assert [v[0] for v in expected] == ["CR01"]
+        for linter in (
+            PrefilteredLinter(config=_config()),
+            FastLinter(config=_config()),
+        ):
+            assert sorted(_key(v) for v in linter.lint_path(path)) == expected
+            assert linter.configs.statistics.rule_configs == 2
+        # The root configuration still applies to strings.
+        assert _prefiltered(PRIMARY_KEY, _config())[0] == []
+
+    def test_inline(self, tmp_path):
+        """Test the rule options of inline directives."""
+        path = tmp_path / "a.sql"
+        path.write_text(
+            "-- sqlfluff:rules:constraints.pk_constraint_naming:expected_prefix:xx_\n"
+            + PRIMARY_KEY
+        )
+        expected = sorted(
+            _key(v)
+            for v in Linter(config=_config()).lint_path(str(path)).get_violations()
+        )
+        assert [v[0] for v in expected] == ["CR01"]
+        for linter in (
+            PrefilteredLinter(config=_config()),
+            FastLinter(config=_config()),
+        ):
+            assert sorted(_key(v) for v in linter.lint_path(str(path))) == expected
+
+    def test_cli(self, path):
+        """Test that the lint command reports the violations of the directory."""
+        args = ["lint", "--dialect", "postgres", "--rules", RULES, "--no-cache", path]
+        for mode in ([], ["--fast"]):
+            result = CliRunner().invoke(cli, args + mode)
+            assert result.exit_code == 1
+            assert "CR01" in result.output
+
+
+class TestCli:
+    """Tests for the prefilter options of ``sqlfluff-extended lint``."""
+
+    def test_statistics(self, tmp_path):
+        """Test that the counters are printed and the output is unchanged."""
+        (tmp_path / "dml.sql").write_text(DML)
+        (tmp_path / "views.sql").write_text(VIEWS_ONLY)
+        args = ["lint", "--dialect", "postgres", "--rules", RULES, str(tmp_path)]
+        runner = CliRunner()
+        prefiltered = runner.invoke(cli, args + ["--statistics"])
+        full = runner.invoke(cli, args + ["--no-prefilter"])
+        assert prefiltered.exit_code == full.exit_code == 1
+        assert (
+            "Prefilter: skipped 15 of 16 rule runs, "
+            "1 of 2 files without any rule to run." in prefiltered.output
+        )
+        assert full.output in prefiltered.output
+        skipped = runner.invoke(cli, args + ["--statistics", "--skip-untriggered"])
+        assert "Prefilter: skipped 1 of 2 files and 15 of 16 rule runs." in (
+            skipped.output
+        )
+        assert full.output in skipped.output
@@ -0,0 +1,48 @@
+"""Tests for the lazy rule registry."""
+
+import subprocess
+import sys
+
+from custom_rules import get_rules
+from custom_rules.registry import RULE_SPECS, load_rule_class
+
+
+class TestRuleRegistry:
+    """Tests for the precomputed rule metadata and lazy loading."""
+
+    def test_specs_match_rule_classes(self):
+        """Test that the precomputed metadata matches the rule implementations."""
+        for spec in RULE_SPECS:
+            rule_class = load_rule_class(spec.code)
+            assert rule_class.code == spec.code
+            assert rule_class.name == spec.name
+            assert tuple(rule_class.groups) == spec.groups
+
+    def test_registered_metadata(self):
+        """Test that the registered classes expose the metadata from the table."""
+        rules = get_rules()
+        assert [r.code for r in rules] == [spec.code for spec in RULE_SPECS]
+        assert [r.description for r in rules] == [
+            spec.description for spec in RULE_SPECS
+        ]
+
+    def test_instantiation_returns_real_rule(self):
+        """Test that instantiating a registered class yields the real rule."""
+        lazy_class = next(r for r in get_rules() if r.code == "VW01")
+        rule = lazy_class(code="VW01", description="", expected_prefix="vw_")
+        assert isinstance(rule, load_rule_class("VW01"))
+        assert rule.expected_prefix == "vw_"
+
+    def test_get_rules_has_no_side_effects(self):
+        """Test that loading the plugin neither prints nor imports unselected rules."""
+        script = (
+            "import sys\n"
+            "from sqlfluff.core import FluffConfig, Linter\n"
+            "config = FluffConfig(overrides={'dialect': 'postgres', 'rules': 'CR01'})\n"
+            "Linter(config=config).lint_string('SELECT 1;\\n')\n"
+            "print(sorted(m for m in sys.modules if m.startswith('custom_rules.') and m[-4:-2] in {'CR', 'FN', 'VW'}))\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], check=True, capture_output=True, text=True
+        ).stdout
+        assert output.strip() == "['custom_rules.constraints.CR01']"
@@ -0,0 +1,222 @@
+"""Tests for sharing the result cache between machines."""
+
+import json
+import socket
+import threading
+import time
+import urllib.request
+
+import pytest
+from click.testing import CliRunner
+
+from custom_rules.cache import CachedLinter, ResultCache
+from custom_rules.cli import cli
+from custom_rules.remote import (
+    DirectoryBackend,
+    HttpBackend,
+    RemoteCache,
+    make_backend,
+    make_server,
+)
+from tests.custom_rules.test_cache import VIEWS, CountingLinter, _key
+from tests.custom_rules.test_fast import RULES, _config
+
+KEY = "0123456789abcdef0123456789abcdef01234567"
+
+RECORDS = [
+    {
+        "start_line_no": 1,
+        "start_line_pos": 1,
+        "code": "VW01",
+        "description": "View name 'a' should start with 'v_'.",
+        "name": "views.view_naming",
+        "warning": False,
+        "fixes": [],
+    }
+]
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a stand-in server, returning its URL."""
+    server = make_server(str(tmp_path / "server"), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _files(tmp_path, count):
+    directory = tmp_path / "sql"
+    directory.mkdir()
+    for i in range(count):
+        (directory / f"{i}.sql").write_text(VIEWS + f"SELECT {i};\n")
+    return str(directory)
+
+
+def _lint(linter, paths, cache_dir, remote=None):
+    cached = CachedLinter(linter, ResultCache(cache_dir), "fast", remote)
+    return [(path, [_key(v) for v in vs]) for path, vs in cached.lint_paths(paths)]
+
+
+class CountingBackend(DirectoryBackend):
+    """Counts the keys of each request."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.reads = []
+
+    def read_many(self, keys):
+        self.reads.append(len(keys))
+        return super().read_many(keys)
+
+
+class TestBackends:
+    """Tests for storing and reading back results."""
+
+    def test_directory(self, tmp_path):
+        """Test a round trip through a shared directory."""
+        backend = make_backend(f"file://{tmp_path}")
+        assert isinstance(backend, DirectoryBackend)
+        backend.write_many({KEY: RECORDS})
+        assert backend.read_many([KEY, "f" * 40]) == {KEY: RECORDS}
+
+    def test_http(self, server):
+        """Test a round trip through the stand-in server."""
+        backend = make_backend(server)
+        assert isinstance(backend, HttpBackend)
+        assert backend.read_many([KEY]) == {}
+        backend.write_many({KEY: RECORDS})
+        assert make_backend(server + "/").read_many([KEY, "f" * 40]) == {KEY: RECORDS}
+
+    @pytest.mark.parametrize(
+        "path, body",
+        [
+            ("/put", {"entries": {"../../escape": RECORDS}}),
+            ("/get", {"keys": "not a list"}),
+            ("/get", ["keys"]),
+            ("/other", {}),
+        ],
+    )
+    def test_bad_requests(self, server, tmp_path, path, body):
+        """Test that the server only stores keys and answers bad requests."""
+        request = urllib.request.Request(
+            server + path, data=json.dumps(body).encode(), method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        assert status in (204, 400, 404)
+        assert not (tmp_path / "escape").exists()
+        assert not (tmp_path / "escape.json").exists()
+
+
+class TestRemoteCache:
+    """Tests for looking files up in a remote cache."""
+
+    def test_shared_between_runners(self, tmp_path, server):
+        """Test that a runner with a cold cache reads the results of another."""
+        paths = [_files(tmp_path, 5)]
+        linter = CountingLinter(config=_config())
+        expected = _lint(linter, paths, str(tmp_path / "none"))
+        linted = linter.linted
+
+        remote = RemoteCache(make_backend(server))
+        assert _lint(linter, paths, str(tmp_path / "a"), remote) == expected
+        assert remote.statistics.writes == 5
+        remote = RemoteCache(make_backend(server))
+        assert _lint(linter, paths, str(tmp_path / "b"), remote) == expected
+        assert remote.statistics.hits == 5
+        assert linter.linted == 2 * linted
+        # The results read from the remote cache are cached locally.
+        assert len(ResultCache(str(tmp_path / "b")).entries()) == 5
+
+    def test_batches(self, tmp_path):
+        """Test that files are looked up in batches."""
+        paths = [_files(tmp_path, 10)]
+        backend = CountingBackend(str(tmp_path / "remote"))
+        remote = RemoteCache(backend, batch_size=4)
+        _lint(CountingLinter(config=_config()), paths, str(tmp_path / "a"), remote)
+        assert backend.reads == [4, 4, 2]
+        assert remote.statistics.requests == 6
+
+    def test_unreachable(self, tmp_path):
+        """Test that an unreachable backend is tried once, then left alone."""
+        paths = [_files(tmp_path, 10)]
+        linter = CountingLinter(config=_config())
+        expected = _lint(linter, paths, str(tmp_path / "none"))
+        remote = RemoteCache(
+            HttpBackend(f"http://127.0.0.1:{_free_port()}"), batch_size=2
+        )
+        assert _lint(linter, paths, str(tmp_path / "a"), remote) == expected
+        assert remote.statistics.errors == 1
+        assert remote.statistics.requests == 1
+        assert remote.error is not None
+
+    def test_slow(self, tmp_path):
+        """Test that a backend slower than the timeout is given up."""
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        # Accepts connections but never answers.
+        listener.listen()
+        port = listener.getsockname()[1]
+        paths = [_files(tmp_path, 4)]
+        remote = RemoteCache(HttpBackend(f"http://127.0.0.1:{port}", timeout=0.2))
+        start = time.perf_counter()
+        try:
+            result = _lint(
+                CountingLinter(config=_config()), paths, str(tmp_path / "a"), remote
+            )
+        finally:
+            listener.close()
+        assert len(result) == 4
+        assert time.perf_counter() - start < 5
+        assert remote.statistics.errors == 1
+
+    def test_invalid_entries(self, tmp_path):
+        """Test that entries which are not violation records are linted."""
+        paths = [_files(tmp_path, 3)]
+        linter = CountingLinter(config=_config())
+        expected = _lint(linter, paths, str(tmp_path / "none"))
+
+        class BadBackend:
+            def read_many(self, keys):
+                return {key: [{"code": "XX"}] for key in keys}
+
+            def write_many(self, entries):
+                raise RuntimeError("read only")
+
+        remote = RemoteCache(BadBackend())
+        assert _lint(linter, paths, str(tmp_path / "a"), remote) == expected
+        assert remote.statistics.misses == 3
+        assert remote.statistics.errors == 1
+
+
+def test_cli(tmp_path, server):
+    """Test that the lint command reads the results of another machine."""
+    paths = _files(tmp_path, 3)
+    args = ["lint", "--fast", "--dialect", "postgres", "--rules", RULES, paths]
+    args += ["--statistics", "--remote-cache", server]
+    runner = CliRunner()
+    first = runner.invoke(cli, args + ["--cache-dir", str(tmp_path / "a")])
+    second = runner.invoke(cli, args + ["--cache-dir", str(tmp_path / "b")])
+    assert "Remote cache: 0 hits, 3 misses, 3 written in 2 requests." in first.stderr
+    assert "Remote cache: 3 hits, 0 misses, 0 written in 1 requests." in second.stderr
+    assert first.stdout == second.stdout
+    assert second.exit_code == 1
+
+    unreachable = f"http://127.0.0.1:{_free_port()}"
+    args[-1] = unreachable
+    third = runner.invoke(cli, args + ["--cache-dir", str(tmp_path / "c")])
+    assert third.stdout == first.stdout
+    assert "Warning: the remote cache was not used after an error" in third.stderr
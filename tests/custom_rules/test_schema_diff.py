@@ -0,0 +1,195 @@
+"""Tests for linting the objects changed between two schema snapshots."""
+
+import json
+import os
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from custom_rules.cli import cli
+from custom_rules.fast import FastLinter
+from custom_rules.schema_diff import SchemaDiffLinter
+from tests.custom_rules.corpus import make_corpus
+from tests.custom_rules.test_catalog import CATALOG_DIR
+from tests.custom_rules.test_fast import RULES, _config, _key
+
+OLD_SQL = (
+    "CREATE TABLE public.person (\n"
+    "    id INT CONSTRAINT person_pk PRIMARY KEY\n"
+    ");\n"
+    "\n"
+    "CREATE VIEW public.stats AS SELECT 1 AS a;\n"
+    "\n"
+    "CREATE FUNCTION public.calc(x INT) RETURNS INT AS $$ SELECT x $$ "
+    "LANGUAGE sql;\n"
+)
+NEW_SQL = (
+    "CREATE TABLE public.person (\n"
+    "    id INT CONSTRAINT person_pk PRIMARY KEY,\n"
+    "    CONSTRAINT person_id_check CHECK (id > 0)\n"
+    ");\n"
+    "\n"
+    "CREATE VIEW public.stats AS SELECT 1 AS a;\n"
+    "\n"
+    "CREATE FUNCTION public.calc(x INT, y INT) RETURNS INT AS $$ SELECT x $$ "
+    "LANGUAGE sql;\n"
+    "CREATE MATERIALIZED VIEW public.daily AS SELECT 2 AS b;\n"
+)
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(name, sql):
+        path = tmp_path / name
+        path.write_text(sql)
+        return str(path)
+
+    return write
+
+
+def _diff(write, old_sql, new_sql, **kwargs):
+    linter = SchemaDiffLinter(config=_config(), **kwargs)
+    violations = linter.lint_sql(write("old.sql", old_sql), write("new.sql", new_sql))
+    return sorted(_key(v) for v in violations), linter.statistics
+
+
+class TestSqlDiff:
+    """Tests for diffing SQL dumps."""
+
+    def test_new_objects(self, write):
+        """Test that only the added objects are reported."""
+        violations, _ = _diff(write, OLD_SQL, NEW_SQL)
+        assert violations == [
+            (
+                "CR03",
+                3,
+                5,
+                "CHECK constraint name 'person_id_check' should start with 'chk_'.",
+            ),
+            ("FN02", 8, 36, "Function parameter 'y' should start with 'p_'."),
+            ("VW01", 9, 1, "View name 'daily' should start with 'v_'."),
+        ]
+
+    def test_renamed_objects(self, write):
+        """Test that renamed objects are reported, and not the unchanged ones."""
+        violations, _ = _diff(
+            write, OLD_SQL, OLD_SQL.replace("calc(x", "fun_calc(x_renamed")
+        )
+        assert [v[3] for v in violations] == [
+            "Function parameter 'x_renamed' should start with 'p_'."
+        ]
+
+    def test_unchanged(self, write):
+        """Test that identical dumps are not linted."""
+        violations, statistics = _diff(write, OLD_SQL, "\n" + OLD_SQL)
+        assert violations == []
+        assert (statistics.statements, statistics.changed_statements) == (3, 0)
+        assert statistics.old_objects == 0
+
+    def test_empty_old_snapshot(self, write):
+        """Test that against an empty dump every object is linted in place."""
+        sql = make_corpus(40, seed=5)
+        violations, statistics = _diff(write, "", sql, chunk_size=64)
+        expected = sorted(
+            _key(v) for v in FastLinter(config=_config()).lint_string(sql)
+        )
+        assert violations == expected
+        assert statistics.changed_statements == statistics.statements
+
+    def test_cost_scales_with_the_change(self, write):
+        """Test that only the changed statements of both dumps are lexed."""
+        sql = make_corpus(40, seed=5)
+        changed = sql + "CREATE VIEW public.added AS SELECT 1;\n"
+        violations, statistics = _diff(write, sql, changed)
+        assert [v[0] for v in violations] == ["VW01"]
+        assert statistics.changed_statements == 1
+        assert statistics.old_objects == 0
+
+    def test_exclude_reset(self, write, monkeypatch):
+        """Test that the old objects are no longer excluded after an error."""
+        linter = SchemaDiffLinter(config=_config())
+
+        def lint_string(*args, **kwargs):
+            assert linter.linter.exclude
+            raise RuntimeError("lint failed")
+
+        monkeypatch.setattr(linter.linter, "lint_string", lint_string)
+        with pytest.raises(RuntimeError):
+            linter.lint_sql(write("old.sql", OLD_SQL), write("new.sql", NEW_SQL))
+        assert linter.linter.exclude == frozenset()
+
+    def test_pg_dump(self, write):
+        """Test that the data sections of pg_dump output are skipped."""
+        data = "COPY public.person (id) FROM stdin;\n1\n\\.\n\n"
+        violations, statistics = _diff(
+            write, OLD_SQL + data, NEW_SQL + data.replace("1", "2"), pg_dump=True
+        )
+        assert len(violations) == 3
+        assert statistics.statements == 4
+
+
+class TestCatalogDiff:
+    """Tests for diffing catalog exports."""
+
+    @pytest.fixture
+    def exports(self, tmp_path):
+        old = tmp_path / "old"
+        new = tmp_path / "new"
+        shutil.copytree(CATALOG_DIR, old)
+        shutil.copytree(CATALOG_DIR, new)
+        with open(new / "pg_constraint.csv", "a") as f:
+            f.write("public,orders,orders_amount_check,c\n")
+        with open(new / "pg_class.csv", "a") as f:
+            f.write("public,daily,v\n")
+        content = (new / "pg_class.csv").read_text()
+        (new / "pg_class.csv").write_text(content.replace("stats_daily", "v_daily"))
+        return str(old), str(new)
+
+    def test_new_and_renamed_objects(self, exports):
+        """Test that the objects missing from the old exports are checked."""
+        old, new = exports
+        linter = SchemaDiffLinter(config=_config())
+        violations = [v for _, vs in linter.lint_catalogs([old], [new]) for v in vs]
+        assert [(v.code, v.object) for v in violations] == [
+            ("VW01", "public.daily"),
+            ("CR03", "public.orders.orders_amount_check"),
+        ]
+
+    def test_unchanged(self):
+        """Test that identical exports report nothing."""
+        linter = SchemaDiffLinter(config=_config())
+        results = list(linter.lint_catalogs([CATALOG_DIR], [CATALOG_DIR]))
+        assert results and all(not violations for _, violations in results)
+
+
+class TestCli:
+    """Tests for the ``sqlfluff-extended diff`` command."""
+
+    def test_sql(self, write):
+        """Test the human output, the statistics and the exit code."""
+        old, new = write("old.sql", OLD_SQL), write("new.sql", NEW_SQL)
+        result = CliRunner().invoke(
+            cli,
+            ["diff", "--dialect", "postgres", "--rules", RULES, "--statistics"]
+            + [old, new],
+        )
+        assert result.exit_code == 1
+        assert f"{new}:9:1: VW01 View name 'daily' should start with 'v_'." in (
+            result.output
+        )
+        assert "Diff: 3 of 4 statements changed, 3 old objects compared." in (
+            result.output
+        )
+
+    def test_catalog_json(self, tmp_path):
+        """Test the JSON output of a catalog diff."""
+        new = tmp_path / "pg_class.csv"
+        new.write_text("nspname,relname,relkind\npublic,report,v\n")
+        result = CliRunner().invoke(
+            cli,
+            ["diff", "--rules", "VW01", "--format", "json"]
+            + [os.path.join(CATALOG_DIR, "pg_class.csv"), str(new)],
+        )
+        records = json.loads(result.output)
+        assert [v["object"] for v in records[0]["violations"]] == ["public.report"]
@@ -0,0 +1,113 @@
+"""Tests for the statement scanner and the header-only body masking."""
+
+import pytest
+
+from custom_rules.statements import (
+    body_start,
+    find_statement_end,
+    iter_statement_spans,
+    mask_bodies,
+)
+
+
+def _statements(sql):
+    return [sql[start:end].strip() for start, end in iter_statement_spans(sql)]
+
+
+class TestStatementSpans:
+    """Tests for the statement boundaries."""
+
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "SELECT 'a;b', 'it''s;'",
+            "SELECT E'it\\'s;'",
+            'SELECT 1 AS "a;b"',
+            "SELECT $$ ; $$, $tag$ $$ ; $tag$",
+            "SELECT 1 /* ; /* nested ; */ ; */",
+            "SELECT 1 -- ;\n",
+            "CREATE FUNCTION f() RETURNS INT LANGUAGE sql\n"
+            "BEGIN ATOMIC\n  SELECT 1;\n  SELECT CASE WHEN TRUE THEN 1 END;\nEND;",
+        ],
+    )
+    def test_semicolons_inside_are_skipped(self, statement):
+        """Test that semicolons in strings, comments and bodies are skipped."""
+        first = statement.rstrip(";") + ";"
+        assert _statements(first + "\nSELECT 2;") == [first.strip(), "SELECT 2;"]
+
+    def test_spans_cover_the_text(self):
+        """Test that the spans are contiguous and end with the text."""
+        sql = "SELECT 1;\n-- c\nSELECT 2;\nSELECT 3"
+        spans = list(iter_statement_spans(sql))
+        assert spans[0].start == 0
+        assert all(a.end == b.start for a, b in zip(spans, spans[1:]))
+        assert spans[-1].end == len(sql)
+        assert _statements(sql) == ["SELECT 1;", "-- c\nSELECT 2;", "SELECT 3"]
+
+    def test_unterminated(self):
+        """Test the end of an unterminated statement."""
+        assert find_statement_end("SELECT 'a;") == 10
+        assert find_statement_end("SELECT 'a;", final=False) is None
+        assert find_statement_end("SELECT 1", final=False) is None
+        assert find_statement_end("SELECT 1; SELECT 2", 0, final=False) == 9
+
+    def test_identifiers_with_dollars(self):
+        """Test that dollars inside identifiers do not open a dollar quote."""
+        assert _statements("SELECT a$b$c; SELECT 2;") == ["SELECT a$b$c;", "SELECT 2;"]
+
+
+class TestMaskBodies:
+    """Tests for the header-only masking."""
+
+    @pytest.mark.parametrize(
+        "sql,header",
+        [
+            (
+                "CREATE VIEW v (a) WITH (x = 1) AS SELECT 1 AS a;",
+                "CREATE VIEW v (a) WITH (x = 1) AS",
+            ),
+            (
+                "CREATE OR REPLACE MATERIALIZED VIEW public.v AS SELECT 1;",
+                "CREATE OR REPLACE MATERIALIZED VIEW public.v AS",
+            ),
+            (
+                "CREATE FUNCTION f(p_a INT DEFAULT (1)) RETURNS INT AS $$ x $$;",
+                "CREATE FUNCTION f(p_a INT DEFAULT (1))",
+            ),
+            (
+                "CREATE PROCEDURE p(a INT) LANGUAGE sql AS 'x';",
+                "CREATE PROCEDURE p(a INT)",
+            ),
+        ],
+    )
+    def test_bodies_are_blanked(self, sql, header):
+        """Test that only the header and the terminator are left."""
+        masked = mask_bodies(sql)
+        assert len(masked) == len(sql)
+        assert masked.startswith(header)
+        assert masked[len(header) :].strip() == ";"
+        assert body_start(sql, next(iter_statement_spans(sql))) == len(header)
+
+    def test_other_statements_are_kept(self):
+        """Test that tables, alters and DML are not changed."""
+        sql = (
+            "CREATE TABLE t (a INT CONSTRAINT pk_t PRIMARY KEY);\n"
+            "ALTER TABLE t ADD CONSTRAINT uc_t UNIQUE (a);\n"
+            "SELECT 1 AS view;\n"
+        )
+        assert mask_bodies(sql) == sql
+
+    def test_lines_and_comments_are_kept(self):
+        """Test that line breaks and comments inside bodies are kept."""
+        sql = (
+            "CREATE VIEW v AS\nSELECT '--', 1 -- noqa: VW01\n"
+            "/* block */ FROM t;\nCREATE VIEW w AS SELECT 2;"
+        )
+        masked = mask_bodies(sql)
+        assert len(masked) == len(sql)
+        assert [line.strip() for line in masked.splitlines()] == [
+            "CREATE VIEW v AS",
+            "-- noqa: VW01",
+            "/* block */" + " " * len(" FROM t") + ";",
+            "CREATE VIEW w AS" + " " * len(" SELECT 2") + ";",
+        ]
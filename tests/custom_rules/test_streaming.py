@@ -0,0 +1,109 @@
+"""Tests for the statement by statement streaming mode."""
+
+import io
+
+import pytest
+from click.testing import CliRunner
+
+from custom_rules.cli import cli
+from custom_rules.statements import iter_statement_spans
+from custom_rules.streaming import Statement, StreamingLinter, iter_statements
+from tests.custom_rules.corpus import make_corpus
+from tests.custom_rules.test_fast import RULES, SQL_FILES, _config, _key, _parsed
+
+
+def _stream(sql, chunk_size=64, **kwargs):
+    linter = StreamingLinter(config=_config(), chunk_size=chunk_size, **kwargs)
+    return sorted(_key(v) for v in linter.lint_stream(io.StringIO(sql)))
+
+
+class TestIterStatements:
+    """Tests for splitting a stream into statements."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+    def test_chunks_do_not_change_the_split(self, chunk_size):
+        """Test that statements split across chunks are read whole."""
+        sql = make_corpus(60, seed=3)
+        statements = list(iter_statements(io.StringIO(sql), chunk_size))
+        assert [s.text for s in statements] == [
+            sql[start:end] for start, end in iter_statement_spans(sql)
+        ]
+
+    def test_positions(self):
+        """Test the line and position each statement starts at."""
+        sql = "SELECT 1; SELECT 2;\n\nSELECT $$;\n$$;"
+        assert list(iter_statements(io.StringIO(sql), chunk_size=4)) == [
+            Statement("SELECT 1;", 1, 1),
+            Statement(" SELECT 2;", 1, 10),
+            Statement("\n\nSELECT $$;\n$$;", 1, 20),
+        ]
+
+    def test_empty(self):
+        """Test that an empty stream has no statements."""
+        assert list(iter_statements(io.StringIO(""))) == []
+
+
+class TestStreamingLinter:
+    """The streaming mode reports what the whole file mode reports."""
+
+    @pytest.mark.parametrize(
+        "kwargs", [{}, {"fast": True}, {"header_only": True}], ids=str
+    )
+    @pytest.mark.parametrize("path", SQL_FILES)
+    def test_sql_files(self, path, kwargs):
+        """Test parity on the SQL files of the test suite."""
+        with open(path, encoding="utf8") as f:
+            sql = f.read()
+        _, parsed = _parsed(sql, _config())
+        assert _stream(sql, **kwargs) == parsed
+
+    def test_corpus(self):
+        """Test parity on a generated corpus, statement by statement."""
+        sql = make_corpus(150, seed=5)
+        _, parsed = _parsed(sql, _config())
+        assert _stream(sql, fast=True) == parsed
+
+    def test_range_noqa_spans_statements(self):
+        """Test that disable and enable directives apply to later statements."""
+        sql = (
+            "-- noqa: disable=VW01\n"
+            "CREATE VIEW public.a AS SELECT 1;\n"
+            "CREATE VIEW public.b AS SELECT 1;\n"
+            "-- noqa: enable=VW01\n"
+            "CREATE VIEW public.c AS SELECT 1; CREATE VIEW public.d AS SELECT 1;\n"
+        )
+        _, parsed = _parsed(sql, _config())
+        assert [v[:3] for v in parsed] == [("VW01", 5, 1), ("VW01", 5, 35)]
+        assert _stream(sql) == parsed
+        assert _stream(sql, fast=True) == parsed
+
+    def test_violations_are_detached(self):
+        """Test that violations do not keep the statement segments alive."""
+        linter = StreamingLinter(config=_config())
+        sql = "SELECT 1;\nCREATE VIEW public.a AS SELECT 1;\n"
+        (violation,) = linter.lint_stream(io.StringIO(sql))
+        assert violation.segment is None
+        assert violation.to_dict()["start_line_no"] == 2
+
+
+def test_cli_stream():
+    """Test that the streaming mode prints the same violations."""
+    runner = CliRunner()
+    args = ["lint", "--dialect", "postgres", "--rules", RULES, *SQL_FILES]
+    expected = runner.invoke(cli, args).output
+    for flags in (["--stream"], ["--stream", "--fast"], ["--stream", "--header-only"]):
+        result = runner.invoke(cli, args + flags)
+        assert result.exit_code == 1
+        assert result.output == expected
+
+
+def test_cli_stream_default_rules():
+    """Test that layout rules do not report the edges of each statement."""
+    runner = CliRunner()
+    args = ["lint", "--no-cache", *SQL_FILES]
+    expected = runner.invoke(cli, args).output
+    assert expected
+    for flags in (["--stream"], ["--stream", "--fast"]):
+        result = runner.invoke(cli, args + flags)
+        assert result.exit_code == 1
+        assert result.output == expected
@@ -0,0 +1,228 @@
+"""Tests for watching files and linting them again as they change."""
+
+import os
+import sys
+
+import pytest
+
+from custom_rules.fast import FastLinter
+from custom_rules.watch import (
+    InotifyWatcher,
+    LatencyStatistics,
+    PollingWatcher,
+    WatchSession,
+    make_watcher,
+)
+from tests.custom_rules.test_configs import SUBDIR_CONFIG
+from tests.custom_rules.test_fast import _config
+
+VIEWS = "CREATE VIEW public.a AS SELECT 1;\nCREATE VIEW public.v_b AS SELECT 1;\n"
+
+
+class FakeWatcher:
+    """Returns prepared changes, then no change."""
+
+    def __init__(self, *changes):
+        self.changes = list(changes)
+        self.closed = False
+
+    def wait(self, timeout):
+        return self.changes.pop(0) if self.changes else set()
+
+    def close(self):
+        self.closed = True
+
+
+def _touch(path, text, mtime_offset=0):
+    path.write_text(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+
+@pytest.fixture
+def migrations(tmp_path):
+    (tmp_path / "one.sql").write_text(VIEWS)
+    (tmp_path / "two.sql").write_text("SELECT 1;\n")
+    (tmp_path / "notes.txt").write_text("CREATE VIEW x AS SELECT 1;\n")
+    return tmp_path
+
+
+def _session(migrations, watcher=None):
+    lines = []
+    session = WatchSession(
+        FastLinter(config=_config()),
+        [str(migrations)],
+        watcher or FakeWatcher(),
+        echo=lines.append,
+        debounce=0,
+    )
+    return session, lines
+
+
+class TestWatchSession:
+    """Tests for linting the changed files and printing the differences."""
+
+    def test_start(self, migrations):
+        """Test that every file is linted first."""
+        session, lines = _session(migrations)
+        assert session.start() == 1
+        assert lines == [
+            f"{migrations / 'one.sql'}:1:1: VW01 View name 'a' should start with 'v_'.",
+            "Watching 2 files, 1 violations.",
+        ]
+
+    def test_deltas(self, migrations):
+        """Test that only the new and fixed violations are printed."""
+        session, lines = _session(migrations)
+        session.start()
+        lines.clear()
+        one, two = migrations / "one.sql", migrations / "two.sql"
+        # Moving a violation to another line does not print it again.
+        one.write_text("\n\n" + VIEWS)
+        two.write_text("CREATE VIEW public.c AS SELECT 1;\n")
+        assert session.update([str(one), str(two), str(migrations / "notes.txt")])
+        assert lines[:-1] == [
+            f"+ {two}:1:1: VW01 View name 'c' should start with 'v_'.",
+        ]
+        assert lines[-1].startswith("Linted 2 changed files in ")
+        assert session.results[str(one)] == (
+            (3, 1, "VW01", "View name 'a' should start with 'v_'."),
+        )
+        assert session.latency.count == 2
+
+        lines.clear()
+        one.write_text("CREATE VIEW public.v_a AS SELECT 1;\n")
+        os.remove(two)
+        session.update([str(one), str(two)])
+        assert lines[:-1] == [
+            f"- {one}:3:1: VW01 View name 'a' should start with 'v_'.",
+            f"- {two}:1:1: VW01 View name 'c' should start with 'v_'.",
+        ]
+        assert str(two) not in session.results
+
+    def test_rescan(self, migrations):
+        """Test that lost events check every file, without measuring latency."""
+        session, lines = _session(migrations)
+        session.start()
+        (migrations / "three.sql").write_text("CREATE VIEW public.d AS SELECT 1;\n")
+        assert len(session.update(None)) == 3
+        assert session.latency.count == 0
+        assert any("View name 'd'" in line for line in lines)
+
+    def test_sqlfluffignore(self, migrations, monkeypatch):
+        """Test that ignored files are neither linted nor linted again."""
+        (migrations / "gen").mkdir()
+        (migrations / "gen" / "a.sql").write_text(VIEWS)
+        (migrations / ".sqlfluffignore").write_text("gen/\n")
+        monkeypatch.chdir(migrations)
+        session, lines = _session(migrations)
+        session.start()
+        assert lines[-1] == "Watching 2 files, 1 violations."
+        ignored = migrations / "gen" / "b.sql"
+        ignored.write_text(VIEWS)
+        assert session.update([str(ignored)]) == []
+        assert session.update([str(ignored)]) == []
+        assert session.update(None) == sorted(session.results)
+
+    def test_config_change(self, migrations, monkeypatch):
+        """Test that changed configuration and ignore files are loaded again."""
+        (migrations / "sub").mkdir()
+        view = migrations / "sub" / "v.sql"
+        view.write_text("CREATE VIEW public.vw_a AS SELECT 1;\n")
+        monkeypatch.chdir(migrations)
+        session, lines = _session(migrations)
+        session.start()
+        finding = f"{view}:1:1: VW01 View name 'vw_a' should start with 'v_'."
+        assert finding in lines
+        lines.clear()
+
+        config = migrations / "sub" / ".sqlfluff"
+        config.write_text(SUBDIR_CONFIG.format("vw_"))
+        assert session.update([str(config)]) == sorted(session.results)
+        assert lines[:-1] == ["- " + finding]
+        lines.clear()
+        config.write_text(SUBDIR_CONFIG.format("v_"))
+        session.update([str(config)])
+        assert lines[:-1] == ["+ " + finding]
+        lines.clear()
+
+        ignore = migrations / ".sqlfluffignore"
+        ignore.write_text("sub/\n")
+        session.update([str(ignore)])
+        assert lines[:-1] == ["- " + finding]
+        assert str(view) not in session.results
+
+    def test_debounce(self, migrations):
+        """Test that a burst of changes is linted at once."""
+        watcher = FakeWatcher({"a.sql"}, {"b.sql"}, {"a.sql"}, set(), {"c.sql"})
+        session, _ = _session(migrations, watcher)
+        assert session.wait() == {"a.sql", "b.sql"}
+        assert session.wait() == {"c.sql"}
+
+    def test_debounce_lost_events(self, migrations):
+        """Test that lost events in a burst check every file."""
+        session, _ = _session(migrations, FakeWatcher({"a.sql"}, None, {"b.sql"}))
+        assert session.wait() is None
+
+    def test_run(self, migrations):
+        """Test that the watcher is closed when the session ends."""
+        watcher = FakeWatcher({str(migrations / "one.sql")})
+        session, lines = _session(migrations, watcher)
+        session.run(bursts=1)
+        assert watcher.closed
+        assert lines[-1].startswith("Linted 1 changed files")
+
+
+class TestLatencyStatistics:
+    """Tests for the latency summary."""
+
+    def test_window(self):
+        """Test that only the recent latencies are kept."""
+        latency = LatencyStatistics(window=3)
+        for seconds in (9.0, 1.0, 2.0, 3.0):
+            latency.add(seconds)
+        assert latency.count == 4
+        assert latency.percentile(0.5) == 2.0
+        assert latency.percentile(0.95) == 3.0
+
+
+class TestWatchers:
+    """Tests for the sources of changes."""
+
+    def test_polling(self, migrations):
+        """Test that modified, created and deleted files are found."""
+        watcher = PollingWatcher([str(migrations)], _config(), interval=0.01)
+        assert watcher.wait(0) == set()
+        _touch(migrations / "one.sql", VIEWS, mtime_offset=10**9)
+        (migrations / "new.sql").write_text("SELECT 1;\n")
+        os.remove(migrations / "two.sql")
+        assert watcher.wait(1) == {
+            str(migrations / name) for name in ("one.sql", "new.sql", "two.sql")
+        }
+        (migrations / ".sqlfluffignore").write_text("new.sql\n")
+        assert watcher.wait(1) == {
+            str(migrations / name) for name in (".sqlfluffignore", "new.sql")
+        }
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_inotify(self, migrations):
+        """Test that saved files and new directories are reported."""
+        watcher = make_watcher([str(migrations)], _config())
+        assert isinstance(watcher, InotifyWatcher)
+        try:
+            assert watcher.wait(0) == set()
+            (migrations / "one.sql").write_text(VIEWS)
+            assert watcher.wait(1) == {str(migrations / "one.sql")}
+            os.mkdir(migrations / "sub")
+            assert watcher.wait(1) is None
+            (migrations / "sub" / "x.sql").write_text(VIEWS)
+            assert watcher.wait(1) == {str(migrations / "sub" / "x.sql")}
+            (migrations / "sub" / ".sqlfluff").write_text("")
+            assert watcher.wait(1) == {str(migrations / "sub" / ".sqlfluff")}
+        finally:
+            watcher.close()
+
+    def test_poll_option(self, migrations):
+        """Test that polling can be forced."""
+        watcher = make_watcher([str(migrations)], _config(), poll=True)
+        assert isinstance(watcher, PollingWatcher)